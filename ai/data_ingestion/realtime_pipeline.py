@@ -6,24 +6,28 @@
 import asyncio
 import json
 import logging
+import threading
 import time
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
-from typing import AsyncGenerator, Dict, List, Optional
+from typing import AsyncGenerator, Callable, Dict, List, Optional, Sequence, Tuple
 
 import apache_beam as beam
 import fastavro
 import numpy as np
 import pandas as pd
 import prometheus_client
-import psycopg2
 import pydantic
 import redis
 from apache_beam.options.pipeline_options import PipelineOptions
 from kafka import KafkaConsumer, KafkaProducer
 from kafka.errors import KafkaError
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from pydantic import BaseModel, Field
 
+from shared.feature_store.store import PatientFeatureStore
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,6 +47,37 @@
     "hms_data_quality_score", "Data quality score (0-100)", ["data_type"]
 )
 
+STAGE_RECORDS = prometheus_client.Counter(
+    "hms_ingestion_stage_records_total",
+    "Records processed by each ingestion stage",
+    ["stage"],
+)
+
+STAGE_QUEUE_DEPTH = prometheus_client.Gauge(
+    "hms_ingestion_stage_queue_depth",
+    "Records waiting in front of each ingestion stage",
+    ["stage"],
+)
+
+STAGE_BATCH_SIZE = prometheus_client.Histogram(
+    "hms_ingestion_stage_batch_size",
+    "Micro-batch size per ingestion stage",
+    ["stage"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+
+STAGE_BATCH_LATENCY = prometheus_client.Histogram(
+    "hms_ingestion_stage_batch_seconds",
+    "Time spent on one micro-batch per ingestion stage",
+    ["stage"],
+)
+
+KAFKA_SEND_ERRORS = prometheus_client.Counter(
+    "hms_ingestion_kafka_send_errors_total",
+    "Asynchronous Kafka delivery failures",
+    ["topic"],
+)
+
 
 # Data models for validation
 class VitalSigns(BaseModel):
@@ -78,30 +113,122 @@ class PatientEvent(BaseModel):
     source_system: str
 
 
+PATIENT_CONTEXT_FIELDS = ("age", "gender", "admission_status", "ward", "attending_physician")
+
+# Records flow through these stages in order, connected by bounded queues.
+PIPELINE_STAGES = ("validate", "enrich", "persist", "publish")
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_BATCH_WAIT_MS = 5
+TIMELINE_LENGTH = 1000
+LATEST_DATA_TTL_SECONDS = 3600
+_END_OF_STREAM = object()
+
+
+def _json_serializer(value) -> bytes:
+    return json.dumps(value, default=str).encode("utf-8")
+
+
+class _LocalSendFuture:
+    """Already-completed stand-in for kafka-python's FutureRecordMetadata"""
+
+    def __init__(self, metadata: Dict):
+        self.metadata = metadata
+
+    def add_callback(self, f: Callable, *args, **kwargs):
+        f(*args, self.metadata, **kwargs)
+        return self
+
+    def add_errback(self, f: Callable, *args, **kwargs):
+        return self
+
+    def get(self, timeout: Optional[float] = None) -> Dict:
+        return self.metadata
+
+
+class LocalProducer:
+    """
+    In-process stand-in for KafkaProducer for offline benchmarks
+
+    Values are serialised exactly as the real producer would, then counted
+    per topic; only the most recent messages are kept.
+    """
+
+    def __init__(
+        self, value_serializer: Callable = _json_serializer, keep_last: int = 1000
+    ):
+        self.value_serializer = value_serializer
+        self.sent: Dict[str, int] = defaultdict(int)
+        self.bytes_sent = 0
+        self.messages = deque(maxlen=keep_last)
+
+    def send(self, topic: str, value=None, key: Optional[bytes] = None):
+        payload = self.value_serializer(value)
+        offset = self.sent[topic]
+        self.sent[topic] += 1
+        self.bytes_sent += len(payload)
+        self.messages.append((topic, key, payload))
+        return _LocalSendFuture({"topic": topic, "offset": offset})
+
+    def flush(self, timeout: Optional[float] = None):
+        pass
+
+    def close(self, timeout: Optional[float] = None):
+        pass
+
+
 class RealtimeDataIngestor:
     """
     Real-time data ingestion pipeline for healthcare data
     """
 
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, producer=None):
         self.config = config
         self.kafka_bootstrap_servers = config["kafka"]["bootstrap_servers"]
         self.redis_host = config["redis"]["host"]
         self.redis_port = config["redis"]["port"]
-        self.db_config = config["database"]
+        self.db_config = config.get("database")
 
         # Initialize connections
         self.redis_client = redis.Redis(
             host=self.redis_host, port=self.redis_port, decode_responses=True
         )
 
-        # Kafka setup
-        self.kafka_producer = KafkaProducer(
+        # Patient feature store (online Redis tier + offline Parquet tier)
+        feature_store_config = config.get("feature_store", {})
+        self.feature_store = PatientFeatureStore(
+            self.redis_client,
+            offline_path=feature_store_config.get("offline_path", "feature_store"),
+            offline_flush_rows=feature_store_config.get("offline_flush_rows", 1000),
+        )
+
+        # Pooled connections for feature store misses, opened on the first miss
+        # and never when running offline without database config
+        self._db_pool = None
+        self._db_pool_lock = threading.Lock()
+
+        # Kafka setup; sends are batched by the client (linger/batch size)
+        # and only flushed when a stream finishes. Pass a LocalProducer to
+        # run without a broker.
+        kafka_config = config["kafka"]
+        self.kafka_producer = producer or KafkaProducer(
             bootstrap_servers=self.kafka_bootstrap_servers,
-            value_serializer=lambda v: json.dumps(v, default=str).encode("utf-8"),
+            value_serializer=_json_serializer,
             acks="all",
             retries=3,
+            linger_ms=kafka_config.get("linger_ms", 20),
+            batch_size=kafka_config.get("batch_size", 64 * 1024),
+            compression_type=kafka_config.get("compression_type"),
+        )
+
+        # Staged pipeline sizing
+        ingestion_config = config.get("ingestion", {})
+        self.queue_size = ingestion_config.get("queue_size", DEFAULT_QUEUE_SIZE)
+        self.batch_size = ingestion_config.get("batch_size", DEFAULT_BATCH_SIZE)
+        self.batch_wait = (
+            ingestion_config.get("batch_wait_ms", DEFAULT_BATCH_WAIT_MS) / 1000
         )
+        self.stage_stats: Dict[str, Dict] = {}
 
         # Data quality rules
         self.quality_rules = {
@@ -118,60 +245,178 @@ def initialize_metrics(self):
         prometheus_client.start_http_server(8000)
         logger.info("Prometheus metrics server started on port 8000")
 
-    async def ingest_patient_data(self, data_stream: AsyncGenerator[Dict, None]):
+    async def ingest_patient_data(
+        self, data_stream: AsyncGenerator[Dict, None]
+    ) -> Dict[str, Dict]:
         """
         Main ingestion pipeline for patient data
 
+        Records flow through validate -> enrich -> persist -> publish stages
+        joined by bounded queues, so a slow stage holds back the stream
+        instead of buffering without limit. Each stage takes whatever is
+        queued (up to batch_size, waiting at most batch_wait for more) and
+        handles it as one micro-batch.
+
         Args:
             data_stream: Async generator of patient data
-        """
-        async for data in data_stream:
-            start_time = time.time()
 
+        Returns:
+            Records, batches and busy seconds per stage
+        """
+        handlers = {
+            "validate": self.validate_batch,
+            "enrich": self.enrich_batch,
+            "persist": self.persist_batch,
+            "publish": self.publish_batch,
+        }
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in PIPELINE_STAGES]
+        self.stage_stats = {
+            stage: {"records": 0, "batches": 0, "busy_seconds": 0.0}
+            for stage in PIPELINE_STAGES
+        }
+        workers = [
+            asyncio.create_task(
+                self._run_stage(
+                    stage,
+                    handlers[stage],
+                    queues[index],
+                    queues[index + 1] if index + 1 < len(queues) else None,
+                )
+            )
+            for index, stage in enumerate(PIPELINE_STAGES)
+        ]
+        try:
+            async for data in data_stream:
+                await queues[0].put({"raw": data, "start_time": time.time()})
+            await queues[0].put(_END_OF_STREAM)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        await asyncio.to_thread(self.kafka_producer.flush)
+        return self.stage_stats
+
+    async def _run_stage(
+        self,
+        stage: str,
+        handler: Callable,
+        inbound: asyncio.Queue,
+        outbound: Optional[asyncio.Queue],
+    ):
+        """Feed micro-batches from ``inbound`` through ``handler``"""
+        stats = self.stage_stats[stage]
+        finished = False
+        while not finished:
+            batch, finished = await self._next_batch(inbound)
+            STAGE_QUEUE_DEPTH.labels(stage=stage).set(inbound.qsize())
+            if not batch:
+                continue
+            started = time.time()
             try:
-                # Validate and preprocess data
-                validated_data = await self.validate_and_preprocess(data)
-
-                # Check data quality
+                results = await handler(batch)
+            except Exception as e:
+                logger.error(f"Error in {stage} stage: {e}")
+                for item in batch:
+                    await self.handle_ingestion_error(item["raw"], e)
+                results = []
+            elapsed = time.time() - started
+            STAGE_RECORDS.labels(stage=stage).inc(len(batch))
+            STAGE_BATCH_SIZE.labels(stage=stage).observe(len(batch))
+            STAGE_BATCH_LATENCY.labels(stage=stage).observe(elapsed)
+            stats["records"] += len(batch)
+            stats["batches"] += 1
+            stats["busy_seconds"] += elapsed
+            if outbound is not None:
+                for item in results:
+                    await outbound.put(item)
+        if outbound is not None:
+            await outbound.put(_END_OF_STREAM)
+
+    async def _next_batch(self, queue: asyncio.Queue) -> Tuple[List[Dict], bool]:
+        """Wait for one record, then collect more until full or batch_wait passes"""
+        item = await queue.get()
+        if item is _END_OF_STREAM:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is _END_OF_STREAM:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def validate_batch(self, batch: List[Dict]) -> List[Dict]:
+        """Validate, preprocess and quality-check a micro-batch"""
+        accepted = []
+        for item in batch:
+            try:
+                validated_data = await self.validate_and_preprocess(item["raw"])
                 quality_score = self.assess_data_quality(validated_data)
-                DATA_QUALITY_SCORE.labels(data_type=validated_data["type"]).set(
-                    quality_score
-                )
-
-                if quality_score < 70:
-                    logger.warning(
-                        f"Low data quality score: {quality_score} for {validated_data['type']}"
-                    )
-                    # Send to data quality issue queue
-                    await self.send_to_quality_issue_queue(validated_data)
-
-                # Enrich data
-                enriched_data = await self.enrich_data(validated_data)
-
-                # Store in real-time cache (Redis)
-                await self.store_in_cache(enriched_data)
-
-                # Send to Kafka for downstream processing
-                await self.send_to_kafka(enriched_data)
-
-                # Update metrics
-                INGESTED_RECORDS.labels(
-                    data_type=enriched_data["type"],
-                    source=enriched_data.get("source", "unknown"),
-                ).inc()
+            except Exception as e:
+                logger.error(f"Error ingesting data: {e}")
+                # Send to error queue for retry
+                await self.handle_ingestion_error(item["raw"], e)
+                continue
 
-                PROCESSING_LATENCY.labels(data_type=enriched_data["type"]).observe(
-                    time.time() - start_time
+            DATA_QUALITY_SCORE.labels(data_type=validated_data["type"]).set(
+                quality_score
+            )
+            if quality_score < 70:
+                logger.warning(
+                    f"Low data quality score: {quality_score} for {validated_data['type']}"
                 )
+                # Send to data quality issue queue
+                await self.send_to_quality_issue_queue(validated_data)
+
+            item["data"] = validated_data
+            accepted.append(item)
+        return accepted
+
+    async def enrich_batch(self, batch: List[Dict]) -> List[Dict]:
+        """Enrich a micro-batch with one context and risk-score lookup"""
+        patient_ids = list(dict.fromkeys(item["data"]["patient_id"] for item in batch))
+        contexts, risk_scores = await asyncio.to_thread(
+            self._lookup_enrichment, patient_ids
+        )
+        for item in batch:
+            patient_id = item["data"]["patient_id"]
+            item["data"] = self._enrich(
+                item["data"], contexts.get(patient_id, {}), risk_scores.get(patient_id)
+            )
+        return batch
 
-                logger.info(
-                    f"Successfully ingested {enriched_data['type']} data for patient {enriched_data['patient_id']}"
-                )
+    async def persist_batch(self, batch: List[Dict]) -> List[Dict]:
+        """Write a micro-batch to the feature store and Redis cache"""
+        await asyncio.to_thread(self._persist, [item["data"] for item in batch])
+        return batch
 
-            except Exception as e:
-                logger.error(f"Error ingesting data: {e}")
-                # Send to error queue for retry
-                await self.handle_ingestion_error(data, e)
+    async def publish_batch(self, batch: List[Dict]) -> List[Dict]:
+        """Hand a micro-batch to the Kafka producer and record metrics"""
+        await asyncio.to_thread(
+            lambda: [self._produce(item["data"]) for item in batch]
+        )
+        finished = time.time()
+        for item in batch:
+            enriched_data = item["data"]
+            INGESTED_RECORDS.labels(
+                data_type=enriched_data["type"],
+                source=enriched_data.get("source", "unknown"),
+            ).inc()
+            PROCESSING_LATENCY.labels(data_type=enriched_data["type"]).observe(
+                finished - item["start_time"]
+            )
+        logger.debug(f"Ingested {len(batch)} records")
+        return batch
 
     async def validate_and_preprocess(self, raw_data: Dict) -> Dict:
         """
@@ -343,12 +588,19 @@ async def enrich_data(self, data: Dict) -> Dict:
         Returns:
             Enriched data
         """
-        patient_id = data["patient_id"]
-
-        # Get patient context from cache or database
-        patient_context = await self.get_patient_context(patient_id)
+        return (await self.enrich_batch([{"data": data}]))[0]["data"]
+
+    def _lookup_enrichment(
+        self, patient_ids: Sequence[str]
+    ) -> Tuple[Dict[str, Dict], Dict[str, Optional[Dict]]]:
+        return (
+            self.get_patient_contexts(patient_ids),
+            self.get_risk_scores(patient_ids),
+        )
 
-        # Add enrichment
+    def _enrich(
+        self, data: Dict, patient_context: Dict, risk_scores: Optional[Dict]
+    ) -> Dict:
         enriched_data = data.copy()
         enriched_data["enrichment"] = {
             "patient_age": patient_context.get("age"),
@@ -360,95 +612,151 @@ async def enrich_data(self, data: Dict) -> Dict:
         }
 
         # Add risk scores if available
-        risk_scores = await self.get_patient_risk_scores(patient_id)
         if risk_scores:
             enriched_data["risk_scores"] = risk_scores
 
         return enriched_data
 
     async def get_patient_context(self, patient_id: str) -> Dict:
-        """Get patient context from cache or database"""
-        # Try Redis first
-        cache_key = f"patient_context:{patient_id}"
-        cached_data = self.redis_client.get(cache_key)
+        """Get patient context from the feature store, falling back to the database"""
+        return (await asyncio.to_thread(self.get_patient_contexts, [patient_id]))[
+            patient_id
+        ]
 
-        if cached_data:
-            return json.loads(cached_data)
+    def _get_db_pool(self) -> ThreadedConnectionPool:
+        with self._db_pool_lock:
+            if self._db_pool is None:
+                self._db_pool = ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=self.config.get("database_pool_size", 5),
+                    **self.db_config,
+                )
+            return self._db_pool
+
+    def get_patient_contexts(self, patient_ids: Sequence[str]) -> Dict[str, Dict]:
+        """Contexts for many patients: one feature store read, one query for misses"""
+        contexts = self.feature_store.get_online_features(
+            patient_ids, features=PATIENT_CONTEXT_FIELDS
+        )
+        missing = [patient_id for patient_id in patient_ids if not contexts[patient_id]]
+        if not missing or not self.db_config:
+            return contexts
 
-        # Fetch from database if not in cache
+        # Fetch from database on feature store misses and materialise them
+        conn = None
         try:
-            conn = psycopg2.connect(**self.db_config)
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-            query = """
-                SELECT age, gender, admission_status, ward, attending_physician
-                FROM patients
-                WHERE patient_id = %s
-            """
-            cursor.execute(query, (patient_id,))
-            result = cursor.fetchone()
-
-            if result:
-                # Cache for 5 minutes
-                self.redis_client.setex(
-                    cache_key, 300, json.dumps(dict(result), default=str)
+            db_pool = self._get_db_pool()
+            conn = db_pool.getconn()
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(
+                    """
+                    SELECT patient_id, age, gender, admission_status, ward,
+                           attending_physician
+                    FROM patients
+                    WHERE patient_id = ANY(%s)
+                    """,
+                    (missing,),
                 )
-                return dict(result)
+                rows = cursor.fetchall()
+
+            fetched = {}
+            for row in rows:
+                row = dict(row)
+                fetched[str(row.pop("patient_id"))] = row
+            if fetched:
+                self.feature_store.put_online_many("patient_profile", fetched)
+                contexts.update(fetched)
 
         except Exception as e:
             logger.error(f"Error fetching patient context: {e}")
+        finally:
+            if conn is not None:
+                db_pool.putconn(conn)
 
-        return {}
+        return contexts
 
     async def get_patient_risk_scores(self, patient_id: str) -> Optional[Dict]:
         """Get current risk scores for patient"""
-        cache_key = f"risk_scores:{patient_id}"
-        cached_scores = self.redis_client.get(cache_key)
-
-        if cached_scores:
-            return json.loads(cached_scores)
+        return (await asyncio.to_thread(self.get_risk_scores, [patient_id]))[
+            patient_id
+        ]
 
-        return None
+    def get_risk_scores(self, patient_ids: Sequence[str]) -> Dict[str, Optional[Dict]]:
+        """Current risk scores for many patients with one MGET"""
+        cached = self.redis_client.mget(
+            [f"risk_scores:{patient_id}" for patient_id in patient_ids]
+        )
+        return {
+            patient_id: json.loads(scores) if scores else None
+            for patient_id, scores in zip(patient_ids, cached)
+        }
 
     async def store_in_cache(self, data: Dict):
         """Store data in Redis cache"""
+        pipeline = self.redis_client.pipeline(transaction=False)
+        self._queue_cache_writes(pipeline, data)
+        await asyncio.to_thread(pipeline.execute)
+
+    def _persist(self, records: List[Dict]):
+        # Materialise features for online lookup and offline training
+        self.feature_store.ingest_many(records)
+
+        # Timeline and latest-value writes for the whole batch in one round trip
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for data in records:
+            self._queue_cache_writes(pipeline, data)
+        pipeline.execute()
+
+    def _queue_cache_writes(self, pipeline, data: Dict):
         patient_id = data["patient_id"]
         data_type = data["type"]
+        timestamp = data["timestamp"]
 
         # Store in patient timeline
         timeline_key = f"patient_timeline:{patient_id}"
         timeline_entry = {
             "type": data_type,
-            "timestamp": data["timestamp"].isoformat(),
+            "timestamp": (
+                timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp
+            ),
             "data": data["data"],
         }
 
         # Add to sorted set with timestamp as score
-        self.redis_client.zadd(
-            timeline_key, {json.dumps(timeline_entry): datetime.utcnow().timestamp()}
+        pipeline.zadd(
+            timeline_key,
+            {json.dumps(timeline_entry, default=str): datetime.utcnow().timestamp()},
         )
 
-        # Keep only last 1000 entries
-        self.redis_client.zremrangebyrank(timeline_key, 0, -1001)
+        # Keep only the most recent entries
+        pipeline.zremrangebyrank(timeline_key, 0, -(TIMELINE_LENGTH + 1))
 
         # Store latest data by type
         latest_key = f"latest_{data_type}:{patient_id}"
-        self.redis_client.setex(
-            latest_key, 3600, json.dumps(data, default=str)  # 1 hour TTL
+        pipeline.setex(
+            latest_key, LATEST_DATA_TTL_SECONDS, json.dumps(data, default=str)
         )
 
     async def send_to_kafka(self, data: Dict):
         """Send data to Kafka topic"""
+        self._produce(data)
+
+    def _produce(self, data: Dict):
+        """Queue a record on the producer; delivery failures are counted, not raised"""
         topic = f"hms_{data['type']}"
 
         try:
-            self.kafka_producer.send(
+            future = self.kafka_producer.send(
                 topic, value=data, key=data["patient_id"].encode("utf-8")
             )
-            self.kafka_producer.flush()
         except KafkaError as e:
             logger.error(f"Error sending to Kafka: {e}")
             raise
+        future.add_errback(self._on_send_error, topic)
+
+    def _on_send_error(self, topic: str, error: Exception):
+        KAFKA_SEND_ERRORS.labels(topic=topic).inc()
+        logger.error(f"Error delivering to Kafka topic {topic}: {error}")
 
     async def send_to_quality_issue_queue(self, data: Dict):
         """Send low-quality data to quality issue queue"""
@@ -3,12 +3,18 @@
 Implements advanced NLP capabilities for extracting insights from clinical documentation
 """
 
+import argparse
+import asyncio
+import hashlib
 import json
 import logging
 import re
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Union
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import nltk
 import numpy as np
@@ -25,6 +31,13 @@
 from pydantic import BaseModel
 from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
 
+try:
+    import ahocorasick
+
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -52,6 +65,246 @@
     "hms_nlp_processing_latency_seconds", "NLP processing latency", ["note_type"]
 )
 
+NLP_RESULT_CACHE = prometheus_client.Counter(
+    "hms_nlp_result_cache_total", "Extraction result cache lookups", ["result"]
+)
+
+# Bump when extraction output changes so cached results are not reused.
+EXTRACTOR_VERSION = "2"
+DEFAULT_RESULT_CACHE_SIZE = 10000
+DEFAULT_PIPE_BATCH_SIZE = 64
+DEFAULT_SENTIMENT_BATCH_SIZE = 16
+DEFAULT_BACKFILL_CHUNK_SIZE = 2000
+SENTIMENT_CHUNK_SIZE = 512
+
+# Only entities are read from spaCy docs; sentences and tokens come from NLTK.
+UNUSED_SPACY_COMPONENTS = (
+    "tagger",
+    "parser",
+    "morphologizer",
+    "attribute_ruler",
+    "lemmatizer",
+    "senter",
+    "textcat",
+)
+
+# Extractor patterns, compiled once
+MEDICAL_PATTERNS = {
+    "dosage": re.compile(
+        r"(\d+(?:\.\d+)?)\s*(mg|g|mcg|ml|units?|tabs?|caps?)\s*(?:q(\d+)h|(?:once|twice|three times)\s*daily|daily|bid|tid|qid)?"
+    ),
+    "vital_signs": re.compile(
+        r"(BP|HR|RR|Temp|O2Sat|SpO2):\s*(\d+(?:\.\d+)?(?:/\d+(?:\.\d+)?)?)"
+    ),
+    "lab_value": re.compile(r"(\w+)\s*[:=]\s*(\d+(?:\.\d+)?)\s*([a-zA-Z/]+)"),
+    "date": re.compile(r"(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}-\d{2}-\d{2})"),
+    "allergy": re.compile(r"(?:allergy|allergic to)\s*:\s*([^,.;]+)", re.IGNORECASE),
+    "family_history": re.compile(
+        r"(mother|father|sister|brother|maternal|paternal)\s*(?:with|history of|hx)\s*([^,.;]+)",
+        re.IGNORECASE,
+    ),
+}
+
+MEDICATION_PATTERNS = (
+    re.compile(
+        r"(\w+)\s+(\d+(?:\.\d+)?)\s*(mg|g|mcg)\s*(?:q(\d+)h|daily|bid|tid|qid)?",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"(\w+)\s+(\d+)\s*(tabs?|caps?)\s*(?:q(\d+)h|daily|bid|tid|qid)?", re.IGNORECASE
+    ),
+)
+
+CONDITION_PATTERNS = (
+    (re.compile(r"(?:history of|hx)\s+(?:\w+\s+)*(\w+)", re.IGNORECASE), "resolved"),
+    (re.compile(r"(\w+)\s+(?:improved|resolved)", re.IGNORECASE), "resolved"),
+    (re.compile(r"(?:active|current)\s+(\w+)", re.IGNORECASE), "active"),
+    (re.compile(r"(\w+)\s+(?:worsening|severe|acute)", re.IGNORECASE), "active"),
+)
+
+PROCEDURE_KEYWORDS = (
+    "surgery",
+    "operation",
+    "procedure",
+    "biopsy",
+    "endoscopy",
+    "colonoscopy",
+    "catheterization",
+    "intubation",
+    "ventilation",
+)
+
+SECTION_PATTERNS = tuple(
+    (re.compile(pattern, re.IGNORECASE | re.DOTALL), name)
+    for pattern, name in (
+        (
+            r"subjective[:\-]?\s*(.*?)(?=objective[:\-]|assessment[:\-]|plan[:\-]|$)",
+            "subjective",
+        ),
+        (
+            r"objective[:\-]?\s*(.*?)(?=subjective[:\-]|assessment[:\-]|plan[:\-]|$)",
+            "objective",
+        ),
+        (
+            r"assessment[:\-]?\s*(.*?)(?=subjective[:\-]|objective[:\-]|plan[:\-]|$)",
+            "assessment",
+        ),
+        (
+            r"plan[:\-]?\s*(.*?)(?=subjective[:\-]|objective[:\-]|assessment[:\-]|$)",
+            "plan",
+        ),
+    )
+)
+
+PRIMARY_DIAGNOSIS_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"primary diagnosis:\s*([^,.;]+)",
+        r"chief complaint:\s*([^,.;]+)",
+        r"admitting diagnosis:\s*([^,.;]+)",
+    )
+)
+
+PLAN_ITEM_PATTERN = re.compile(r"(?:\d+\.|[-*•])\s*([^\n]+)")
+PLAN_ACTION_PATTERN = re.compile(
+    r"(will|plan to|recommend|suggest|order)\s+([^\.;]+)", re.IGNORECASE
+)
+NUMERIC_VALUE_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+SMOKING_PATTERNS = tuple(
+    (re.compile(pattern, re.IGNORECASE), status)
+    for pattern, status in (
+        (r"never smoked?", "never"),
+        (r"former smoker|quit smoking|ex-smoker", "former"),
+        (r"current smoker|smokes? \d+ packs?/day", "current"),
+        (r"pack(?: |-)years?\s*:\s*(\d+)", "pack_years"),
+    )
+)
+
+ALCOHOL_PATTERNS = tuple(
+    (re.compile(pattern, re.IGNORECASE), use)
+    for pattern, use in (
+        (r"no alcohol|doesn\'t drink|non-drinker", "none"),
+        (r"social drinker|occasional alcohol", "social"),
+        (r"\d+ drinks?/day|alcohol abuse|alcoholism", "heavy"),
+    )
+)
+
+NO_SUBSTANCE_USE_PATTERN = re.compile(
+    r"no illicit drugs|no substance use", re.IGNORECASE
+)
+SUBSTANCE_USE_PATTERN = re.compile(
+    r"heroin|cocaine|marijuana|methamphetamine", re.IGNORECASE
+)
+OCCUPATION_PATTERN = re.compile(r"occupation[:\-]?\s*([^\.;]+)", re.IGNORECASE)
+LIVING_SITUATION_PATTERN = re.compile(
+    r"(?:lives? with|living situation)[:\-]?\s*([^\.;]+)", re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=65536)
+def count_syllables(word: str) -> int:
+    """Count syllables in a word (simplified); memoised across notes"""
+    word = word.lower()
+    if word.endswith("e"):
+        word = word[:-1]
+    vowels = "aeiouy"
+    count = 0
+    prev_char_was_vowel = False
+    for char in word:
+        if char in vowels and not prev_char_was_vowel:
+            count += 1
+            prev_char_was_vowel = True
+        else:
+            prev_char_was_vowel = False
+    return max(1, count)
+
+
+def _is_word_char(text: str, index: int) -> bool:
+    return 0 <= index < len(text) and (text[index].isalnum() or text[index] == "_")
+
+
+class TermMatcher:
+    """
+    Finds dictionary terms in text in a single pass
+
+    Uses an Aho-Corasick automaton when pyahocorasick is installed and one
+    compiled alternation otherwise. Matching is case-insensitive and can be
+    limited to whole words.
+    """
+
+    def __init__(self, terms: Dict[str, Any], whole_words: bool = True):
+        self.terms = {term.lower(): value for term, value in terms.items()}
+        self.whole_words = whole_words
+        self._automaton = None
+        self._pattern = None
+        if not self.terms:
+            return
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for term in self.terms:
+                self._automaton.add_word(term, term)
+            self._automaton.make_automaton()
+        else:
+            alternation = "|".join(
+                re.escape(term) for term in sorted(self.terms, key=len, reverse=True)
+            )
+            if whole_words:
+                alternation = rf"(?<!\w)(?:{alternation})(?!\w)"
+            self._pattern = re.compile(alternation)
+
+    def find(self, text: str) -> List[Tuple[int, str, Any]]:
+        """(start, term, value) for each match, ordered by position"""
+        lowered = text.lower()
+        if self._automaton is not None:
+            matches = []
+            for end, term in self._automaton.iter(lowered):
+                start = end - len(term) + 1
+                if self.whole_words and (
+                    _is_word_char(lowered, start - 1) or _is_word_char(lowered, end + 1)
+                ):
+                    continue
+                matches.append((start, term, self.terms[term]))
+            return sorted(matches, key=lambda match: match[0])
+        if self._pattern is not None:
+            return [
+                (match.start(), match.group(0), self.terms[match.group(0)])
+                for match in self._pattern.finditer(lowered)
+            ]
+        return []
+
+
+class ExtractionCache:
+    """Bounded LRU of note extractions keyed by a hash of the note content"""
+
+    def __init__(self, max_entries: int = DEFAULT_RESULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(content: str) -> str:
+        digest = hashlib.sha256(content.encode("utf-8"))
+        digest.update(EXTRACTOR_VERSION.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            extraction = self._entries.get(key)
+            if extraction is not None:
+                self._entries.move_to_end(key)
+            return extraction
+
+    def put(self, key: str, extraction: Dict):
+        with self._lock:
+            self._entries[key] = extraction
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 
 # Pydantic models
 class ClinicalNote(BaseModel):
@@ -114,7 +367,7 @@ class ClinicalNLPProcessor:
     Advanced clinical NLP processor for medical notes
     """
 
-    def __init__(self):
+    def __init__(self, result_cache_size: int = DEFAULT_RESULT_CACHE_SIZE):
         # Load spaCy medical model
         try:
             self.nlp = spacy.load("en_core_medical_lg")
@@ -123,6 +376,13 @@ def __init__(self):
             self.nlp = spacy.load("en_core_web_lg")
             self.add_medical_patterns()
 
+        # Only entities are read from spaCy docs; skip the other components
+        self.nlp.select_pipes(
+            disable=[
+                name for name in UNUSED_SPACY_COMPONENTS if name in self.nlp.pipe_names
+            ]
+        )
+
         # Load BioClinicalBERT for clinical text classification
         self.tokenizer = AutoTokenizer.from_pretrained(
             "emilyalsentzer/Bio_ClinicalBERT"
@@ -147,6 +407,24 @@ def __init__(self):
         self.medications_db = self._load_medications_database()
         self.conditions_db = self._load_conditions_database()
 
+        # Dictionary lookups compiled into single-pass matchers
+        medication_terms = {
+            details["generic_name"]: details for details in self.medications_db.values()
+        }
+        medication_terms.update(self.medications_db)
+        self.medication_matcher = TermMatcher(medication_terms)
+        condition_terms = {
+            details["full_name"]: details for details in self.conditions_db.values()
+        }
+        condition_terms.update(self.conditions_db)
+        self.condition_matcher = TermMatcher(condition_terms)
+        self.procedure_matcher = TermMatcher(
+            {keyword: keyword for keyword in PROCEDURE_KEYWORDS}, whole_words=False
+        )
+
+        # Extractions keyed by note content hash
+        self.result_cache = ExtractionCache(result_cache_size)
+
     def add_medical_patterns(self):
         """Add medical entity patterns to spaCy pipeline"""
         patterns = [
@@ -183,15 +461,8 @@ def _create_condition_extractor(self):
         return pipeline("ner", model="samrawal/bert-base-uncased-clinical-ner")
 
     def _load_medical_patterns(self):
-        """Load medical regex patterns"""
-        return {
-            "dosage": r"(\d+(?:\.\d+)?)\s*(mg|g|mcg|ml|units?|tabs?|caps?)\s*(?:q(\d+)h|(?:once|twice|three times)\s*daily|daily|bid|tid|qid)?",
-            "vital_signs": r"(BP|HR|RR|Temp|O2Sat|SpO2):\s*(\d+(?:\.\d+)?(?:/\d+(?:\.\d+)?)?)",
-            "lab_value": r"(\w+)\s*[:=]\s*(\d+(?:\.\d+)?)\s*([a-zA-Z/]+)",
-            "date": r"(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}-\d{2}-\d{2})",
-            "allergy": r"(?:allergy|allergic to)\s*:\s*([^,.;]+)",
-            "family_history": r"(?:mother|father|sister|brother|maternal|paternal)\s*(?:with|history of|hx)\s*([^,.;]+)",
-        }
+        """Load medical regex patterns (precompiled)"""
+        return dict(MEDICAL_PATTERNS)
 
     def _load_medications_database(self):
         """Load medications database for normalization"""
@@ -230,64 +501,117 @@ def process_clinical_note(self, note: ClinicalNote) -> NLPExtractionResult:
         Returns:
             Structured extraction result
         """
-        start_time = time.time()
+        return self.process_clinical_notes([note])[0]
+
+    def process_clinical_notes(
+        self,
+        notes: List[ClinicalNote],
+        n_process: int = 1,
+        batch_size: int = DEFAULT_PIPE_BATCH_SIZE,
+    ) -> List[NLPExtractionResult]:
+        """
+        Process a batch of clinical notes
 
-        # Process with spaCy
-        doc = self.nlp(note.content)
-
-        # Extract entities
-        entities = self._extract_entities(doc)
-
-        # Extract specific clinical concepts
-        medications = self._extract_medications(note.content)
-        conditions = self._extract_conditions(note.content)
-        procedures = self._extract_procedures(note.content)
-        lab_values = self._extract_lab_values(note.content)
-        vital_signs = self._extract_vital_signs(note.content)
-        allergies = self._extract_allergies(note.content)
-
-        # Extract narrative sections
-        social_history = self._extract_social_history(note.content)
-        family_history = self._extract_family_history(note.content)
-        assessment = self._extract_assessment(note.content)
-        plan = self._extract_plan(note.content)
-
-        # Analyze sentiment
-        sentiment = self._analyze_sentiment(note.content)
-
-        # Calculate readability score
-        readability_score = self._calculate_readability(note.content)
-
-        # Quality metrics
-        quality_metrics = self._assess_note_quality(note.content)
-
-        # Update metrics
-        NLP_PROCESSED_NOTES.labels(
-            note_type=note.note_type, extraction_type="full"
-        ).inc()
-        NLP_PROCESSING_LATENCY.labels(note_type=note.note_type).observe(
-            time.time() - start_time
-        )
+        Notes whose content has been seen before are answered from the result
+        cache; the rest go through ``nlp.pipe`` together (optionally across
+        ``n_process`` processes) and share batched sentiment inference.
 
-        return NLPExtractionResult(
-            note_id=note.note_id,
-            patient_id=note.patient_id,
-            processing_timestamp=datetime.utcnow().isoformat(),
-            entities=entities,
-            medications=medications,
-            conditions=conditions,
-            procedures=procedures,
-            lab_values=lab_values,
-            vital_signs=vital_signs,
-            allergies=allergies,
-            social_history=social_history,
-            family_history=family_history,
-            assessment=assessment,
-            plan=plan,
-            sentiment=sentiment,
-            readability_score=readability_score,
-            quality_metrics=quality_metrics,
-        )
+        Args:
+            notes: Clinical note objects
+            n_process: spaCy worker processes
+            batch_size: Notes per spaCy batch
+
+        Returns:
+            Structured extraction results in the order of ``notes``
+        """
+        start_time = time.time()
+        keys = [ExtractionCache.key(note.content) for note in notes]
+        extractions: Dict[str, Dict] = {}
+        pending: Dict[str, str] = {}
+        for key, note in zip(keys, notes):
+            if key in extractions or key in pending:
+                continue
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                extractions[key] = cached
+            else:
+                pending[key] = note.content
+        NLP_RESULT_CACHE.labels(result="hit").inc(len(notes) - len(pending))
+        NLP_RESULT_CACHE.labels(result="miss").inc(len(pending))
+
+        if pending:
+            texts = list(pending.values())
+            docs = self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+            sentiments = self._analyze_sentiments(texts)
+            for key, text, doc, sentiment in zip(pending, texts, docs, sentiments):
+                extraction = self._extract(text, doc, sentiment)
+                self.result_cache.put(key, extraction)
+                extractions[key] = extraction
+
+        # Update metrics (latency is the batch time spread over its notes)
+        latency = (time.time() - start_time) / max(len(notes), 1)
+        results = []
+        for key, note in zip(keys, notes):
+            NLP_PROCESSED_NOTES.labels(
+                note_type=note.note_type, extraction_type="full"
+            ).inc()
+            NLP_PROCESSING_LATENCY.labels(note_type=note.note_type).observe(latency)
+            results.append(
+                NLPExtractionResult(
+                    note_id=note.note_id,
+                    patient_id=note.patient_id,
+                    processing_timestamp=datetime.utcnow().isoformat(),
+                    **extractions[key],
+                )
+            )
+        return results
+
+    def iter_process_notes(
+        self,
+        notes: Iterable[ClinicalNote],
+        chunk_size: int = DEFAULT_BACKFILL_CHUNK_SIZE,
+        n_process: int = 1,
+        batch_size: int = DEFAULT_PIPE_BATCH_SIZE,
+    ) -> Iterator[NLPExtractionResult]:
+        """Stream results for a large note backlog, one chunk in memory at a time"""
+        chunk: List[ClinicalNote] = []
+        for note in notes:
+            chunk.append(note)
+            if len(chunk) >= chunk_size:
+                yield from self.process_clinical_notes(chunk, n_process, batch_size)
+                chunk = []
+        if chunk:
+            yield from self.process_clinical_notes(chunk, n_process, batch_size)
+
+    def _extract(self, text: str, doc, sentiment: Dict) -> Dict:
+        """Content-derived part of an extraction result for one note"""
+        # Tokenise and split once; several extractors share these
+        sentences = sent_tokenize(text)
+        sentence_words = [word_tokenize(sentence) for sentence in sentences]
+        sections = self._split_into_sections(text)
+
+        return {
+            "entities": self._extract_entities(doc),
+            # Extract specific clinical concepts
+            "medications": self._extract_medications(text),
+            "conditions": self._extract_conditions(text),
+            "procedures": self._extract_procedures(text, sentences),
+            "lab_values": self._extract_lab_values(text),
+            "vital_signs": self._extract_vital_signs(text),
+            "allergies": self._extract_allergies(text),
+            # Extract narrative sections
+            "social_history": self._extract_social_history(text),
+            "family_history": self._extract_family_history(text),
+            "assessment": self._extract_assessment(text, sections),
+            "plan": self._extract_plan(text, sections),
+            "sentiment": sentiment,
+            "readability_score": self._calculate_readability(
+                text, sentences, sentence_words
+            ),
+            "quality_metrics": self._assess_note_quality(
+                text, sections, sentences, sentence_words
+            ),
+        }
 
     def _extract_entities(self, doc) -> List[ExtractedEntity]:
         """Extract named entities from document"""
@@ -318,15 +642,15 @@ def _normalize_entity(self, text: str, entity_type: str) -> Optional[str]:
 
         if entity_type == "MEDICATION":
             # Check medications database
-            for med, details in self.medications_db.items():
-                if med in text or details["generic_name"] in text:
-                    return details["generic_name"]
+            matches = self.medication_matcher.find(text)
+            if matches:
+                return matches[0][2]["generic_name"]
 
         elif entity_type == "CONDITION":
             # Check conditions database
-            for cond, details in self.conditions_db.items():
-                if cond in text or details["full_name"] in text:
-                    return details["full_name"]
+            matches = self.condition_matcher.find(text)
+            if matches:
+                return matches[0][2]["full_name"]
 
         return text
 
@@ -335,14 +659,8 @@ def _extract_medications(self, text: str) -> List[MedicationEntity]:
         medications = []
 
         # Use regex patterns for basic extraction
-        med_patterns = [
-            r"(\w+)\s+(\d+(?:\.\d+)?)\s*(mg|g|mcg)\s*(?:q(\d+)h|daily|bid|tid|qid)?",
-            r"(\w+)\s+(\d+)\s*(tabs?|caps?)\s*(?:q(\d+)h|daily|bid|tid|qid)?",
-        ]
-
-        for pattern in med_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for pattern in MEDICATION_PATTERNS:
+            for match in pattern.finditer(text):
                 med = MedicationEntity(
                     name=match.group(1),
                     dosage=f"{match.group(2)} {match.group(3)}",
@@ -357,20 +675,9 @@ def _extract_conditions(self, text: str) -> List[ConditionEntity]:
         """Extract medical conditions"""
         conditions = []
 
-        # Use spaCy and additional patterns
-        doc = self.nlp(text)
-
         # Look for condition patterns
-        condition_patterns = [
-            (r"(?:history of|hx)\s+(?:\w+\s+)*(\w+)", "resolved"),
-            (r"(\w+)\s+(?:improved|resolved)", "resolved"),
-            (r"(?:active|current)\s+(\w+)", "active"),
-            (r"(\w+)\s+(?:worsening|severe|acute)", "active"),
-        ]
-
-        for pattern, status in condition_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for pattern, status in CONDITION_PATTERNS:
+            for match in pattern.finditer(text):
                 condition = ConditionEntity(
                     condition=match.group(1),
                     status=status,
@@ -380,27 +687,19 @@ def _extract_conditions(self, text: str) -> List[ConditionEntity]:
 
         return conditions
 
-    def _extract_procedures(self, text: str) -> List[Dict]:
+    def _extract_procedures(
+        self, text: str, sentences: Optional[List[str]] = None
+    ) -> List[Dict]:
         """Extract medical procedures"""
         procedures = []
 
-        # Common procedure keywords
-        procedure_keywords = [
-            "surgery",
-            "operation",
-            "procedure",
-            "biopsy",
-            "endoscopy",
-            "colonoscopy",
-            "catheterization",
-            "intubation",
-            "ventilation",
-        ]
-
-        sentences = sent_tokenize(text)
+        if sentences is None:
+            sentences = sent_tokenize(text)
         for sentence in sentences:
-            for keyword in procedure_keywords:
-                if keyword in sentence.lower():
+            # One entry per procedure keyword found in the sentence
+            found = {term for _, term, _ in self.procedure_matcher.find(sentence)}
+            for keyword in PROCEDURE_KEYWORDS:
+                if keyword in found:
                     procedures.append(
                         {
                             "procedure": sentence.strip(),
@@ -416,7 +715,7 @@ def _extract_lab_values(self, text: str) -> List[Dict]:
         lab_values = []
 
         # Use medical patterns
-        matches = re.finditer(self.medical_patterns["lab_value"], text)
+        matches = self.medical_patterns["lab_value"].finditer(text)
         for match in matches:
             lab_values.append(
                 {
@@ -433,7 +732,7 @@ def _extract_vital_signs(self, text: str) -> List[Dict]:
         """Extract vital signs"""
         vital_signs = []
 
-        matches = re.finditer(self.medical_patterns["vital_signs"], text)
+        matches = self.medical_patterns["vital_signs"].finditer(text)
         for match in matches:
             vital_type = match.group(1)
             value = match.group(2)
@@ -464,7 +763,7 @@ def _extract_allergies(self, text: str) -> List[Dict]:
         """Extract patient allergies"""
         allergies = []
 
-        matches = re.finditer(self.medical_patterns["allergy"], text, re.IGNORECASE)
+        matches = self.medical_patterns["allergy"].finditer(text)
         for match in matches:
             allergies.append(
                 {
@@ -493,9 +792,7 @@ def _extract_family_history(self, text: str) -> List[Dict]:
         """Extract family medical history"""
         family_history = []
 
-        matches = re.finditer(
-            self.medical_patterns["family_history"], text, re.IGNORECASE
-        )
+        matches = self.medical_patterns["family_history"].finditer(text)
         for match in matches:
             family_history.append(
                 {
@@ -507,7 +804,9 @@ def _extract_family_history(self, text: str) -> List[Dict]:
 
         return family_history
 
-    def _extract_assessment(self, text: str) -> Dict:
+    def _extract_assessment(
+        self, text: str, sections: Optional[Dict[str, str]] = None
+    ) -> Dict:
         """Extract assessment section"""
         assessment = {
             "primary_diagnosis": [],
@@ -517,90 +816,115 @@ def _extract_assessment(self, text: str) -> Dict:
         }
 
         # Look for assessment section headers
-        sections = self._split_into_sections(text)
+        if sections is None:
+            sections = self._split_into_sections(text)
         if "assessment" in sections:
             assessment_text = sections["assessment"]
             assessment["summary"] = assessment_text
 
             # Extract diagnoses
-            primary_patterns = [
-                r"primary diagnosis:\s*([^,.;]+)",
-                r"chief complaint:\s*([^,.;]+)",
-                r"admitting diagnosis:\s*([^,.;]+)",
-            ]
-
-            for pattern in primary_patterns:
-                matches = re.finditer(pattern, assessment_text, re.IGNORECASE)
-                for match in matches:
+            for pattern in PRIMARY_DIAGNOSIS_PATTERNS:
+                for match in pattern.finditer(assessment_text):
                     assessment["primary_diagnosis"].append(match.group(1).strip())
 
         return assessment
 
-    def _extract_plan(self, text: str) -> List[str]:
+    def _extract_plan(
+        self, text: str, sections: Optional[Dict[str, str]] = None
+    ) -> List[str]:
         """Extract treatment plan"""
         plan_items = []
 
-        sections = self._split_into_sections(text)
+        if sections is None:
+            sections = self._split_into_sections(text)
         if "plan" in sections:
             plan_text = sections["plan"]
 
             # Extract numbered or bulleted items
-            items = re.findall(r"(?:\d+\.|[-*•])\s*([^\n]+)", plan_text)
+            items = PLAN_ITEM_PATTERN.findall(plan_text)
             plan_items.extend([item.strip() for item in items])
 
             # Extract action items
-            actions = re.findall(
-                r"(will|plan to|recommend|suggest|order)\s+([^\.;]+)",
-                plan_text,
-                re.IGNORECASE,
-            )
+            actions = PLAN_ACTION_PATTERN.findall(plan_text)
             plan_items.extend([f"{action[0]} {action[1]}" for action in actions])
 
         return plan_items
 
     def _analyze_sentiment(self, text: str) -> Dict:
         """Analyze sentiment of clinical note"""
+        return self._analyze_sentiments([text])[0]
+
+    def _analyze_sentiments(self, texts: List[str]) -> List[Dict]:
+        """Sentiment for many notes with their chunks batched through the model"""
         # Process in chunks due to model limitations
-        chunk_size = 512
-        chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
-
-        sentiments = []
-        for chunk in chunks:
-            if chunk.strip():
-                result = self.sentiment_analyzer(chunk)[0]
-                sentiments.append(result)
-
-        # Aggregate sentiments
-        if sentiments:
-            avg_score = np.mean(
-                [
-                    s["score"] if s["label"] == "POSITIVE" else -s["score"]
-                    for s in sentiments
-                ]
-            )
-            overall_sentiment = (
-                "positive"
-                if avg_score > 0.1
-                else "negative" if avg_score < -0.1 else "neutral"
+        note_chunks = [
+            [
+                chunk
+                for chunk in (
+                    text[i : i + SENTIMENT_CHUNK_SIZE]
+                    for i in range(0, len(text), SENTIMENT_CHUNK_SIZE)
+                )
+                if chunk.strip()
+            ]
+            for text in texts
+        ]
+        flat_chunks = [chunk for chunks in note_chunks for chunk in chunks]
+        flat_results = (
+            self.sentiment_analyzer(
+                flat_chunks, batch_size=DEFAULT_SENTIMENT_BATCH_SIZE
             )
-        else:
-            avg_score = 0
-            overall_sentiment = "neutral"
+            if flat_chunks
+            else []
+        )
 
-        return {
-            "overall": overall_sentiment,
-            "score": float(avg_score),
-            "chunks": sentiments,
-        }
+        results = []
+        offset = 0
+        for chunks in note_chunks:
+            sentiments = flat_results[offset : offset + len(chunks)]
+            offset += len(chunks)
+
+            # Aggregate sentiments
+            if sentiments:
+                avg_score = np.mean(
+                    [
+                        s["score"] if s["label"] == "POSITIVE" else -s["score"]
+                        for s in sentiments
+                    ]
+                )
+                overall_sentiment = (
+                    "positive"
+                    if avg_score > 0.1
+                    else "negative" if avg_score < -0.1 else "neutral"
+                )
+            else:
+                avg_score = 0
+                overall_sentiment = "neutral"
 
-    def _calculate_readability(self, text: str) -> float:
+            results.append(
+                {
+                    "overall": overall_sentiment,
+                    "score": float(avg_score),
+                    "chunks": sentiments,
+                }
+            )
+        return results
+
+    def _calculate_readability(
+        self,
+        text: str,
+        sentences: Optional[List[str]] = None,
+        sentence_words: Optional[List[List[str]]] = None,
+    ) -> float:
         """Calculate Flesch Reading Ease score"""
-        sentences = sent_tokenize(text)
-        words = word_tokenize(text)
+        if sentences is None:
+            sentences = sent_tokenize(text)
+        if sentence_words is None:
+            sentence_words = [word_tokenize(sentence) for sentence in sentences]
+        words = [word for sentence in sentence_words for word in sentence]
 
         avg_sentence_length = len(words) / len(sentences) if sentences else 0
         avg_syllables_per_word = (
-            np.mean([self._count_syllables(word) for word in words]) if words else 0
+            np.mean([count_syllables(word) for word in words]) if words else 0
         )
 
         # Flesch Reading Ease formula
@@ -611,21 +935,15 @@ def _calculate_readability(self, text: str) -> float:
 
     def _count_syllables(self, word: str) -> int:
         """Count syllables in a word (simplified)"""
-        word = word.lower()
-        if word.endswith("e"):
-            word = word[:-1]
-        vowels = "aeiouy"
-        count = 0
-        prev_char_was_vowel = False
-        for char in word:
-            if char in vowels and not prev_char_was_vowel:
-                count += 1
-                prev_char_was_vowel = True
-            else:
-                prev_char_was_vowel = False
-        return max(1, count)
-
-    def _assess_note_quality(self, text: str) -> Dict:
+        return count_syllables(word)
+
+    def _assess_note_quality(
+        self,
+        text: str,
+        sections: Optional[Dict[str, str]] = None,
+        sentences: Optional[List[str]] = None,
+        sentence_words: Optional[List[List[str]]] = None,
+    ) -> Dict:
         """Assess quality of clinical note"""
         quality_metrics = {
             "completeness": 0,
@@ -636,7 +954,8 @@ def _assess_note_quality(self, text: str) -> Dict:
         }
 
         # Check for required sections
-        sections = self._split_into_sections(text)
+        if sections is None:
+            sections = self._split_into_sections(text)
         required_sections = ["subjective", "objective", "assessment", "plan"]
         quality_metrics["structure"] = (
             len([s for s in required_sections if s in sections])
@@ -653,14 +972,17 @@ def _assess_note_quality(self, text: str) -> Dict:
             quality_metrics["completeness"] = 90
 
         # Check clarity (based on sentence length)
-        sentences = sent_tokenize(text)
+        if sentences is None:
+            sentences = sent_tokenize(text)
+        if sentence_words is None:
+            sentence_words = [word_tokenize(sentence) for sentence in sentences]
         avg_sentence_length = (
-            np.mean([len(word_tokenize(s)) for s in sentences]) if sentences else 0
+            np.mean([len(words) for words in sentence_words]) if sentences else 0
         )
         quality_metrics["clarity"] = 100 - min(50, abs(avg_sentence_length - 15) * 2)
 
         # Check specificity (look for specific values)
-        specific_values = len(re.findall(r"\d+(?:\.\d+)?", text))
+        specific_values = len(NUMERIC_VALUE_PATTERN.findall(text))
         quality_metrics["specificity"] = min(100, specific_values * 2)
 
         return quality_metrics
@@ -668,27 +990,8 @@ def _assess_note_quality(self, text: str) -> Dict:
     def _split_into_sections(self, text: str) -> Dict[str, str]:
         """Split clinical note into sections"""
         sections = {}
-        section_patterns = [
-            (
-                r"subjective[:\-]?\s*(.*?)(?=objective[:\-]|assessment[:\-]|plan[:\-]|$)",
-                "subjective",
-            ),
-            (
-                r"objective[:\-]?\s*(.*?)(?=subjective[:\-]|assessment[:\-]|plan[:\-]|$)",
-                "objective",
-            ),
-            (
-                r"assessment[:\-]?\s*(.*?)(?=subjective[:\-]|objective[:\-]|plan[:\-]|$)",
-                "assessment",
-            ),
-            (
-                r"plan[:\-]?\s*(.*?)(?=subjective[:\-]|objective[:\-]|assessment[:\-]|$)",
-                "plan",
-            ),
-        ]
-
-        for pattern, section_name in section_patterns:
-            matches = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+        for pattern, section_name in SECTION_PATTERNS:
+            matches = pattern.search(text)
             if matches:
                 sections[section_name] = matches.group(1).strip()
 
@@ -740,15 +1043,8 @@ def _infer_body_system(self, condition: str) -> str:
 
     def _extract_smoking_status(self, text: str) -> str:
         """Extract smoking status"""
-        smoking_patterns = [
-            (r"never smoked?", "never"),
-            (r"former smoker|quit smoking|ex-smoker", "former"),
-            (r"current smoker|smokes? \d+ packs?/day", "current"),
-            (r"pack(?: |-)years?\s*:\s*(\d+)", "pack_years"),
-        ]
-
-        for pattern, status in smoking_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern, status in SMOKING_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return (
                     status if status != "pack_years" else f"{match.group(1)} pack-years"
@@ -757,42 +1053,32 @@ def _extract_smoking_status(self, text: str) -> str:
 
     def _extract_alcohol_use(self, text: str) -> str:
         """Extract alcohol use"""
-        patterns = [
-            (r"no alcohol|doesn\'t drink|non-drinker", "none"),
-            (r"social drinker|occasional alcohol", "social"),
-            (r"\d+ drinks?/day|alcohol abuse|alcoholism", "heavy"),
-        ]
-
-        for pattern, use in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+        for pattern, use in ALCOHOL_PATTERNS:
+            if pattern.search(text):
                 return use
         return "unknown"
 
     def _extract_substance_use(self, text: str) -> str:
         """Extract substance use"""
-        if re.search(r"no illicit drugs|no substance use", text, re.IGNORECASE):
+        if NO_SUBSTANCE_USE_PATTERN.search(text):
             return "none"
-        elif re.search(
-            r"heroin|cocaine|marijuana|methamphetamine", text, re.IGNORECASE
-        ):
+        elif SUBSTANCE_USE_PATTERN.search(text):
             return "positive"
         return "unknown"
 
     def _extract_occupation(self, text: str) -> str:
         """Extract occupation"""
-        match = re.search(r"occupation[:\-]?\s*([^\.;]+)", text, re.IGNORECASE)
+        match = OCCUPATION_PATTERN.search(text)
         return match.group(1).strip() if match else "unknown"
 
     def _extract_living_situation(self, text: str) -> str:
         """Extract living situation"""
-        match = re.search(
-            r"(?:lives? with|living situation)[:\-]?\s*([^\.;]+)", text, re.IGNORECASE
-        )
+        match = LIVING_SITUATION_PATTERN.search(text)
         return match.group(1).strip() if match else "unknown"
 
     def _extract_date(self, text: str) -> Optional[str]:
         """Extract date from text"""
-        match = re.search(self.medical_patterns["date"], text)
+        match = self.medical_patterns["date"].search(text)
         return match.group(1) if match else None
 
 
@@ -813,6 +1099,16 @@ async def process_note(note: ClinicalNote):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/process/notes", response_model=List[NLPExtractionResult])
+async def process_notes(notes: List[ClinicalNote]):
+    """Process a batch of clinical notes in one pipeline pass"""
+    try:
+        return await asyncio.to_thread(processor.process_clinical_notes, notes)
+    except Exception as e:
+        logger.error(f"Error processing notes: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -825,8 +1121,42 @@ async def get_metrics():
     return prometheus_client.generate_latest()
 
 
+def run_backfill(
+    input_path: str, output_path: str, n_process: int, chunk_size: int
+) -> int:
+    """Process a JSONL file of notes into a JSONL file of extraction results"""
+
+    def read_notes():
+        with open(input_path) as f:
+            for line in f:
+                if line.strip():
+                    yield ClinicalNote(**json.loads(line))
+
+    count = 0
+    with open(output_path, "w") as out:
+        for result in processor.iter_process_notes(
+            read_notes(), chunk_size=chunk_size, n_process=n_process
+        ):
+            out.write(result.json() + "\n")
+            count += 1
+            if count % chunk_size == 0:
+                logger.info(f"Backfill processed {count} notes")
+    logger.info(f"Backfill complete: {count} notes written to {output_path}")
+    return count
+
+
 # Example usage
 if __name__ == "__main__":
-    import uvicorn
-
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    parser = argparse.ArgumentParser(description="HMS Clinical NLP Service")
+    parser.add_argument("--backfill", help="JSONL file of notes to process offline")
+    parser.add_argument("--output", default="nlp_results.jsonl")
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_BACKFILL_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.backfill:
+        run_backfill(args.backfill, args.output, args.n_process, args.chunk_size)
+    else:
+        import uvicorn
+
+        uvicorn.run(app, host="0.0.0.0", port=8002)
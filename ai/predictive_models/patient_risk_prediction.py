@@ -21,13 +21,32 @@
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Feature store names (FeatureEngineeringPipeline vocabulary) mapped onto the
+# keys prepare_features reads.
+STORE_VITAL_FIELDS = {
+    "heart_rate": "heart_rate",
+    "systolic_bp": "blood_pressure_systolic",
+    "diastolic_bp": "blood_pressure_diastolic",
+    "oxygen_saturation": "oxygen_saturation",
+    "temperature": "temperature",
+    "respiratory_rate": "respiratory_rate",
+}
+STORE_LAB_FIELDS = {
+    "glucose": "glucose",
+    "creatinine": "creatinine",
+    "sodium": "sodium",
+    "potassium": "potassium",
+    "hemoglobin": "hemoglobin",
+    "white_blood_cell": "white_blood_cell_count",
+}
+
 
 class PatientRiskPredictor:
     """
     Advanced patient risk prediction system with multiple models
     """
 
-    def __init__(self, experiment_name="hms-patient-risk-prediction"):
+    def __init__(self, experiment_name="hms-patient-risk-prediction", feature_store=None):
         self.models = {
             "readmission": RandomForestClassifier(n_estimators=200, random_state=42),
             "sepsis": GradientBoostingClassifier(n_estimators=100, random_state=42),
@@ -40,6 +59,7 @@ def __init__(self, experiment_name="hms-patient-risk-prediction"):
         self.scalers = {}
         self.feature_encoders = {}
         self.experiment_name = experiment_name
+        self.feature_store = feature_store
         self.setup_mlflow()
 
     def setup_mlflow(self):
@@ -51,6 +71,54 @@ def setup_mlflow(self):
         except Exception as e:
             logger.warning(f"MLflow initialization failed: {e}")
 
+    def attach_store_features(self, patient_data_list: List[Dict]) -> List[Dict]:
+        """
+        Fill vitals, labs and demographics from the online feature store
+
+        Values supplied by the caller take precedence over stored ones. All
+        patients are looked up in a single round trip.
+        """
+        if self.feature_store is None:
+            return patient_data_list
+
+        patient_ids = [
+            str(p["patient_id"]) for p in patient_data_list if p.get("patient_id")
+        ]
+        if not patient_ids:
+            return patient_data_list
+
+        online = self.feature_store.get_online_features(patient_ids)
+        merged = []
+        for patient_data in patient_data_list:
+            features = online.get(str(patient_data.get("patient_id")), {})
+            if not features:
+                merged.append(patient_data)
+                continue
+            patient_data = dict(patient_data)
+            vitals = {
+                target: features[source]
+                for source, target in STORE_VITAL_FIELDS.items()
+                if source in features
+            }
+            labs = {
+                target: features[source]
+                for source, target in STORE_LAB_FIELDS.items()
+                if source in features
+            }
+            patient_data["vital_signs"] = {
+                **vitals,
+                **patient_data.get("vital_signs", {}),
+            }
+            patient_data["lab_results"] = {
+                **labs,
+                **patient_data.get("lab_results", {}),
+            }
+            for key in ("age", "gender"):
+                if key in features:
+                    patient_data.setdefault(key, features[key])
+            merged.append(patient_data)
+        return merged
+
     def prepare_features(self, patient_data: Dict) -> np.ndarray:
         """
         Prepare features for prediction models
@@ -219,6 +287,10 @@ def predict_risk(self, patient_data: Dict, risk_type: str = "readmission") -> Di
         if risk_type not in self.models:
             raise ValueError(f"Unknown risk type: {risk_type}")
 
+        patient_data = self.attach_store_features([patient_data])[0]
+        return self._predict_attached(patient_data, risk_type)
+
+    def _predict_attached(self, patient_data: Dict, risk_type: str) -> Dict:
         # Prepare features
         features = self.prepare_features(patient_data)
 
@@ -343,10 +415,13 @@ def batch_predict(
         Returns:
             List of prediction results
         """
+        if risk_type not in self.models:
+            raise ValueError(f"Unknown risk type: {risk_type}")
+
         results = []
 
-        for patient_data in patient_data_list:
-            result = self.predict_risk(patient_data, risk_type)
+        for patient_data in self.attach_store_features(patient_data_list):
+            result = self._predict_attached(patient_data, risk_type)
             results.append(result)
 
         return results
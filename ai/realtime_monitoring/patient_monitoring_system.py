@@ -9,6 +9,7 @@
 import logging
 import smtplib
 import time
+import uuid
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from email.mime.text import MIMEText
@@ -17,12 +18,14 @@
 import numpy as np
 import pandas as pd
 import prometheus_client
-import redis
+import redis.asyncio as aioredis
 import websockets
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from jinja2 import Template
 from pydantic import BaseModel, Field
 
+from shared.realtime.fanout import DEFAULT_QUEUE_SIZE, FanoutHub, SubscriptionFilter
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -59,9 +62,12 @@ class VitalSigns(BaseModel):
     consciousness_level: Optional[str] = (
         None  # 'alert', 'voice', 'pain', 'unresponsive'
     )
+    supplemental_oxygen: Optional[bool] = None  # NEWS2 "air or oxygen"
 
 
 class PatientAlert(BaseModel):
+    # Alerts raised in one evaluation tick share a timestamp, so each gets an id
+    alert_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     patient_id: str
     alert_type: str
     severity: str  # 'low', 'medium', 'high', 'critical'
@@ -83,41 +89,337 @@ class MonitoringConfig(BaseModel):
     monitoring_intervals: Dict[str, int]  # seconds
     escalation_contacts: List[Dict]
     custom_rules: Optional[List[Dict]] = None
+    ward: Optional[str] = None
+
+
+VITAL_PARAMS = (
+    "heart_rate",
+    "blood_pressure_systolic",
+    "blood_pressure_diastolic",
+    "oxygen_saturation",
+    "temperature",
+    "respiratory_rate",
+)
+# Columns of the per-ward reading matrices: the vitals, then consciousness as
+# an AVPU code and supplemental oxygen as 0/1. Missing values are NaN.
+READING_COLUMNS = VITAL_PARAMS + ("consciousness_level", "supplemental_oxygen")
+COLUMN_INDEX = {name: index for index, name in enumerate(READING_COLUMNS)}
+CONSCIOUSNESS_CODES = {"alert": 0, "voice": 1, "pain": 2, "unresponsive": 3}
+CONSCIOUSNESS_LEVELS = {code: level for level, code in CONSCIOUSNESS_CODES.items()}
+TREND_PARAMS = (
+    "heart_rate",
+    "blood_pressure_systolic",
+    "oxygen_saturation",
+    "temperature",
+    "respiratory_rate",
+)
+TREND_COLUMNS = np.array([COLUMN_INDEX[param] for param in TREND_PARAMS])
+HISTORY_DEPTH = 100
+TREND_DEPTH = 50
+TREND_WINDOW = 5
+ALERT_HISTORY_LIMIT = 100
+DEFAULT_WARD = "unassigned"
+RULE_OPERATORS = {"gt": 0, "lt": 1, "eq": 2}
+
+
+def reading_row(vital_signs: VitalSigns) -> np.ndarray:
+    row = np.full(len(READING_COLUMNS), np.nan)
+    for index, param in enumerate(VITAL_PARAMS):
+        value = getattr(vital_signs, param)
+        if value is not None:
+            row[index] = value
+    if vital_signs.consciousness_level:
+        code = CONSCIOUSNESS_CODES.get(vital_signs.consciousness_level.lower())
+        if code is not None:
+            row[COLUMN_INDEX["consciousness_level"]] = code
+    if vital_signs.supplemental_oxygen is not None:
+        oxygen = float(vital_signs.supplemental_oxygen)
+        row[COLUMN_INDEX["supplemental_oxygen"]] = oxygen
+    return row
+
+
+def mews_scores(readings: np.ndarray) -> np.ndarray:
+    """Vectorised Modified Early Warning Score over rows of ``readings``.
+
+    Bands match the scalar MEWS table documented on
+    ``calculate_ews_score``; missing values score 0.
+    """
+    hr = readings[:, COLUMN_INDEX["heart_rate"]]
+    sbp = readings[:, COLUMN_INDEX["blood_pressure_systolic"]]
+    rr = readings[:, COLUMN_INDEX["respiratory_rate"]]
+    temp = readings[:, COLUMN_INDEX["temperature"]]
+    avpu = readings[:, COLUMN_INDEX["consciousness_level"]]
+    score = np.select(
+        [
+            hr < 40,
+            (hr >= 40) & (hr <= 50),
+            (hr >= 101) & (hr <= 110),
+            (hr >= 111) & (hr <= 130),
+            hr > 130,
+        ],
+        [3, 1, 1, 2, 3],
+        0,
+    )
+    score = score + np.select(
+        [sbp < 70, (sbp >= 70) & (sbp <= 80), (sbp >= 81) & (sbp <= 100), sbp > 200],
+        [3, 2, 1, 2],
+        0,
+    )
+    score = score + np.select(
+        [rr < 9, (rr >= 15) & (rr <= 20), (rr >= 21) & (rr <= 29), rr > 30],
+        [3, 1, 2, 3],
+        0,
+    )
+    score = score + np.select([temp < 35, temp > 38.5], [2, 2], 0)
+    score = score + np.nan_to_num(avpu, nan=0.0)
+    return score.astype(float)
+
+
+def news2_scores(readings: np.ndarray) -> np.ndarray:
+    """Vectorised NEWS2 (SpO2 scale 1); missing values score 0."""
+    hr = readings[:, COLUMN_INDEX["heart_rate"]]
+    sbp = readings[:, COLUMN_INDEX["blood_pressure_systolic"]]
+    rr = readings[:, COLUMN_INDEX["respiratory_rate"]]
+    spo2 = readings[:, COLUMN_INDEX["oxygen_saturation"]]
+    temp = readings[:, COLUMN_INDEX["temperature"]]
+    avpu = readings[:, COLUMN_INDEX["consciousness_level"]]
+    oxygen = readings[:, COLUMN_INDEX["supplemental_oxygen"]]
+    score = np.select(
+        [rr <= 8, rr <= 11, rr <= 20, rr <= 24, rr > 24], [3, 1, 0, 2, 3], 0
+    )
+    score = score + np.select([spo2 <= 91, spo2 <= 93, spo2 <= 95], [3, 2, 1], 0)
+    score = score + np.where(oxygen == 1, 2, 0)
+    score = score + np.select(
+        [sbp <= 90, sbp <= 100, sbp <= 110, sbp <= 219, sbp > 219], [3, 2, 1, 0, 3], 0
+    )
+    score = score + np.select(
+        [hr <= 40, hr <= 50, hr <= 90, hr <= 110, hr <= 130, hr > 130],
+        [3, 1, 0, 1, 2, 3],
+        0,
+    )
+    score = score + np.where(avpu >= 1, 3, 0)
+    score = score + np.select(
+        [temp <= 35, temp <= 36, temp <= 38, temp <= 39, temp > 39], [3, 1, 0, 1, 2], 0
+    )
+    return score.astype(float)
+
+
+def trend_slopes(
+    trend: np.ndarray, cursor: np.ndarray, count: np.ndarray, window: int = TREND_WINDOW
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Least-squares slope over each series' last ``window`` values.
+
+    ``trend`` is ``(patients, params, depth)`` with per-series write
+    ``cursor``; returns ``(slopes, valid)`` shaped ``(patients, params)``.
+    """
+    depth = trend.shape[-1]
+    offsets = np.arange(window) - window
+    indices = (cursor[..., None] + offsets) % depth
+    values = np.take_along_axis(trend, indices, axis=-1)
+    x = np.arange(window) - (window - 1) / 2
+    slopes = values @ x / np.sum(x**2)
+    return slopes, count >= window
+
+
+class WardVitalsStore:
+    """Columnar vitals state for one ward.
+
+    Every monitored patient owns a row (slot) in fixed-depth NumPy ring
+    buffers, so ingesting a reading is a few array writes and scoring,
+    thresholds, trends and rules run as whole-ward array operations per
+    tick instead of per reading.
+    """
+
+    def __init__(self, ward: str, initial_capacity: int = 64):
+        self.ward = ward
+        self.slots: Dict[str, int] = {}
+        self.patient_ids: List[Optional[str]] = []
+        self.free_slots: List[int] = []
+        self.capacity = 0
+        self.rules: List[Tuple[int, Dict]] = []
+        self._compiled_rules = None
+        self._resize(initial_capacity)
+        self.free_slots = list(range(initial_capacity - 1, -1, -1))
+
+    def _resize(self, capacity: int):
+        columns = len(READING_COLUMNS)
+        trends = len(TREND_PARAMS)
+        vitals = len(VITAL_PARAMS)
+        specs = {
+            "latest": ((columns,), np.nan, float),
+            "history": ((HISTORY_DEPTH, columns), np.nan, np.float32),
+            "history_ts": ((HISTORY_DEPTH,), np.nan, float),
+            "history_cursor": ((), 0, np.int64),
+            "history_count": ((), 0, np.int64),
+            "trend": ((trends, TREND_DEPTH), np.nan, float),
+            "trend_cursor": ((trends,), 0, np.int64),
+            "trend_count": ((trends,), 0, np.int64),
+            "threshold_min": ((vitals,), np.nan, float),
+            "threshold_max": ((vitals,), np.nan, float),
+            "vitals_interval": ((), 300.0, float),
+            "last_update": ((), np.nan, float),
+            "ews": ((), 0.0, float),
+            "news2": ((), 0.0, float),
+            "dirty": ((), False, bool),
+            "active": ((), False, bool),
+        }
+        for name, (shape, fill, dtype) in specs.items():
+            array = np.full((capacity,) + shape, fill, dtype=dtype)
+            if self.capacity:
+                array[: self.capacity] = getattr(self, name)
+            setattr(self, name, array)
+        self.patient_ids.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+    def add(self, config: "MonitoringConfig", default_thresholds: Dict) -> int:
+        slot = self.slots.get(config.patient_id)
+        if slot is None:
+            if not self.free_slots:
+                self.free_slots = list(
+                    range(self.capacity * 2 - 1, self.capacity - 1, -1)
+                )
+                self._resize(self.capacity * 2)
+            slot = self.free_slots.pop()
+            self.slots[config.patient_id] = slot
+            self.patient_ids[slot] = config.patient_id
+        self._reset(slot)
+        thresholds = config.alert_thresholds or default_thresholds
+        for param, limits in thresholds.items():
+            if param not in VITAL_PARAMS:
+                logger.warning(f"Ignoring threshold for unknown parameter {param}")
+                continue
+            index = VITAL_PARAMS.index(param)
+            self.threshold_min[slot, index] = limits["min"]
+            self.threshold_max[slot, index] = limits["max"]
+        self.vitals_interval[slot] = config.monitoring_intervals.get(
+            "vital_signs", 300
+        )
+        self.last_update[slot] = time.time()
+        self.active[slot] = True
+        self.rules = [(s, rule) for s, rule in self.rules if s != slot]
+        self.rules.extend((slot, rule) for rule in config.custom_rules or [])
+        self._compiled_rules = None
+        return slot
+
+    def remove(self, patient_id: str):
+        slot = self.slots.pop(patient_id, None)
+        if slot is None:
+            return
+        self._reset(slot)
+        self.patient_ids[slot] = None
+        self.free_slots.append(slot)
+        self.rules = [(s, rule) for s, rule in self.rules if s != slot]
+        self._compiled_rules = None
+
+    def _reset(self, slot: int):
+        for name in ("latest", "history", "history_ts", "trend"):
+            getattr(self, name)[slot] = np.nan
+        for name in ("threshold_min", "threshold_max", "last_update"):
+            getattr(self, name)[slot] = np.nan
+        for name in ("history_cursor", "history_count", "trend_cursor", "trend_count"):
+            getattr(self, name)[slot] = 0
+        self.ews[slot] = self.news2[slot] = 0.0
+        self.dirty[slot] = self.active[slot] = False
+
+    def record(self, slot: int, row: np.ndarray, timestamp: float):
+        self.latest[slot] = row
+        cursor = self.history_cursor[slot]
+        self.history[slot, cursor] = row
+        self.history_ts[slot, cursor] = timestamp
+        self.history_cursor[slot] = (cursor + 1) % HISTORY_DEPTH
+        self.history_count[slot] = min(self.history_count[slot] + 1, HISTORY_DEPTH)
+        for index, value in enumerate(row[TREND_COLUMNS]):
+            if not np.isnan(value):
+                cursor = self.trend_cursor[slot, index]
+                self.trend[slot, index, cursor] = value
+                self.trend_cursor[slot, index] = (cursor + 1) % TREND_DEPTH
+                self.trend_count[slot, index] += 1
+        self.last_update[slot] = time.time()
+        self.dirty[slot] = True
+
+    def compiled_rules(self) -> Optional[Dict[str, np.ndarray]]:
+        """Flatten custom rules into condition arrays for vectorised checks."""
+        if self._compiled_rules is None and self.rules:
+            cond_rule, cond_column, cond_op, cond_value = [], [], [], []
+            for rule_index, (_, rule) in enumerate(self.rules):
+                for condition in rule.get("conditions", []):
+                    column = COLUMN_INDEX.get(condition["parameter"], -1)
+                    value = condition["value"]
+                    if condition["parameter"] == "consciousness_level":
+                        value = CONSCIOUSNESS_CODES.get(str(value).lower(), np.nan)
+                    try:
+                        value = float(value)
+                    except (TypeError, ValueError):
+                        value = np.nan
+                    cond_rule.append(rule_index)
+                    cond_column.append(column)
+                    cond_op.append(RULE_OPERATORS.get(condition["operator"], -1))
+                    cond_value.append(value)
+            self._compiled_rules = {
+                "rule_slot": np.array([slot for slot, _ in self.rules], dtype=np.int64),
+                "cond_rule": np.array(cond_rule, dtype=np.int64),
+                "cond_column": np.array(cond_column, dtype=np.int64),
+                "cond_op": np.array(cond_op, dtype=np.int64),
+                "cond_value": np.array(cond_value, dtype=float),
+            }
+        return self._compiled_rules
+
+    def reading(self, slot: int) -> Optional[Dict]:
+        """Most recent reading for ``slot`` as a VitalSigns-shaped dict."""
+        if not self.history_count[slot]:
+            return None
+        cursor = (self.history_cursor[slot] - 1) % HISTORY_DEPTH
+        row = self.latest[slot]
+        reading = {
+            "timestamp": datetime.fromtimestamp(
+                self.history_ts[slot, cursor]
+            ).isoformat(),
+        }
+        for param in VITAL_PARAMS:
+            value = row[COLUMN_INDEX[param]]
+            reading[param] = None if np.isnan(value) else float(value)
+        avpu = row[COLUMN_INDEX["consciousness_level"]]
+        reading["consciousness_level"] = (
+            None if np.isnan(avpu) else CONSCIOUSNESS_LEVELS[int(avpu)]
+        )
+        oxygen = row[COLUMN_INDEX["supplemental_oxygen"]]
+        reading["supplemental_oxygen"] = None if np.isnan(oxygen) else bool(oxygen)
+        return reading
+
+    def trend_tail(
+        self, slot: int, length: int = TREND_WINDOW
+    ) -> Dict[str, List[float]]:
+        tail = {}
+        for index, param in enumerate(TREND_PARAMS):
+            count = min(self.trend_count[slot, index], length)
+            cursor = self.trend_cursor[slot, index]
+            positions = (cursor - count + np.arange(count)) % TREND_DEPTH
+            tail[param] = self.trend[slot, index, positions].tolist()
+        return tail
 
 
 @dataclass
 class PatientMonitoringState:
-    """State tracking for a monitored patient"""
+    """Per-patient metadata; readings and scores live in the ward store."""
 
     patient_id: str
-    vital_signs_history: List[VitalSigns]
-    current_ews_score: float
+    ward: str
+    slot: int
+    store: WardVitalsStore
     alert_history: List[PatientAlert]
-    last_update: datetime
     monitoring_config: MonitoringConfig
-    trend_data: Dict[str, List[float]]  # For trend analysis
 
+    @property
+    def current_ews_score(self) -> float:
+        return float(self.store.ews[self.slot])
 
-class ConnectionManager:
-    """Manages WebSocket connections for real-time alerts"""
+    @property
+    def current_news2_score(self) -> float:
+        return float(self.store.news2[self.slot])
 
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                # Connection might be closed
-                pass
+    @property
+    def last_update(self) -> datetime:
+        return datetime.utcfromtimestamp(self.store.last_update[self.slot])
 
 
 class RealtimePatientMonitoringSystem:
@@ -132,16 +434,23 @@ def __init__(self, config: Dict):
         self.db_config = config["database"]
         self.email_config = config.get("email", {})
 
-        # Initialize Redis
-        self.redis_client = redis.Redis(
+        # Initialize Redis (asyncio client; writes go through pipelines)
+        self.redis_client = aioredis.Redis(
             host=self.redis_host, port=self.redis_port, decode_responses=True
         )
 
-        # Initialize connection manager
-        self.connection_manager = ConnectionManager()
+        # WebSocket fan-out by patient, ward and event type; other monitoring
+        # processes are reached through Redis pub/sub
+        self.fanout = FanoutHub(
+            redis_client=self.redis_client,
+            channel=config.get("fanout_channel", "hms:monitoring:fanout"),
+            max_queue=config.get("websocket_queue_size", DEFAULT_QUEUE_SIZE),
+        )
 
-        # Patient monitoring states
+        # Patient metadata; readings and scores live in per-ward stores
         self.monitored_patients: Dict[str, PatientMonitoringState] = {}
+        self.wards: Dict[str, WardVitalsStore] = {}
+        self.tick_interval = config.get("tick_interval_seconds", 1.0)
 
         # Alert severity colors
         self.severity_colors = {
@@ -160,37 +469,38 @@ def __init__(self, config: Dict):
             "temperature": {"min": 36.1, "max": 37.2},
             "respiratory_rate": {"min": 12, "max": 20},
         }
-
-        # Initialize monitoring
-        self.start_background_tasks()
+        self._background_tasks: List[asyncio.Task] = []
 
     def start_background_tasks(self):
-        """Start background monitoring tasks"""
-        asyncio.create_task(self.monitor_patients())
-        asyncio.create_task(self.check_system_health())
-        asyncio.create_task(self.cleanup_old_data())
+        """Start background monitoring tasks (needs a running event loop)"""
+        self.fanout.start()
+        self._background_tasks = [
+            asyncio.create_task(self.run_ticks()),
+            asyncio.create_task(self.monitor_patients()),
+            asyncio.create_task(self.check_system_health()),
+        ]
 
     async def add_patient_to_monitoring(self, config: MonitoringConfig):
         """Add patient to monitoring system"""
         patient_id = config.patient_id
+        ward = config.ward or DEFAULT_WARD
+
+        previous = self.monitored_patients.get(patient_id)
+        if previous is not None and previous.ward != ward:
+            previous.store.remove(patient_id)
+        store = self.wards.get(ward)
+        if store is None:
+            store = self.wards[ward] = WardVitalsStore(ward)
+        slot = store.add(config, self.default_thresholds)
 
-        # Initialize monitoring state
         monitoring_state = PatientMonitoringState(
             patient_id=patient_id,
-            vital_signs_history=[],
-            current_ews_score=0,
+            ward=ward,
+            slot=slot,
+            store=store,
             alert_history=[],
-            last_update=datetime.utcnow(),
             monitoring_config=config,
-            trend_data={
-                "heart_rate": [],
-                "blood_pressure_systolic": [],
-                "oxygen_saturation": [],
-                "temperature": [],
-                "respiratory_rate": [],
-            },
         )
-
         self.monitored_patients[patient_id] = monitoring_state
 
         # Store in Redis
@@ -199,75 +509,17 @@ async def add_patient_to_monitoring(self, config: MonitoringConfig):
         # Update metrics
         PATIENTS_MONITORED.set(len(self.monitored_patients))
 
-        logger.info(f"Added patient {patient_id} to monitoring")
+        logger.info(f"Added patient {patient_id} to monitoring on ward {ward}")
 
     async def update_vital_signs(self, patient_id: str, vital_signs: VitalSigns):
-        """Update patient vital signs and trigger analysis"""
-        start_time = time.time()
-
-        if patient_id not in self.monitored_patients:
+        """Record a reading; scoring and alerting happen on the next tick"""
+        state = self.monitored_patients.get(patient_id)
+        if state is None:
             logger.warning(f"Patient {patient_id} not in monitoring system")
             return
-
-        # Get monitoring state
-        state = self.monitored_patients[patient_id]
-
-        # Add to history
-        state.vital_signs_history.append(vital_signs)
-
-        # Keep only last 100 readings
-        if len(state.vital_signs_history) > 100:
-            state.vital_signs_history = state.vital_signs_history[-100:]
-
-        # Update trend data
-        self.update_trend_data(state, vital_signs)
-
-        # Calculate Early Warning Score
-        ews_score = self.calculate_ews_score(vital_signs)
-        state.current_ews_score = ews_score
-
-        # Update Prometheus metrics
-        EARLY_WARNING_SCORES.labels(patient_id=patient_id, score_type="ews").set(
-            ews_score
+        state.store.record(
+            state.slot, reading_row(vital_signs), vital_signs.timestamp.timestamp()
         )
-        MONITORING_LATENCY.observe(time.time() - start_time)
-
-        # Check for alerts
-        alerts = await self.check_for_alerts(state, vital_signs, ews_score)
-
-        # Store updated state
-        await self.store_monitoring_state(patient_id, state)
-
-        # Broadcast updates if there are alerts
-        if alerts:
-            for alert in alerts:
-                await self.handle_alert(alert)
-
-        # Broadcast vital signs update
-        update_message = {
-            "type": "vital_signs_update",
-            "patient_id": patient_id,
-            "vital_signs": vital_signs.dict(),
-            "ews_score": ews_score,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
-        await self.connection_manager.broadcast(json.dumps(update_message))
-
-    def update_trend_data(self, state: PatientMonitoringState, vital_signs: VitalSigns):
-        """Update trend data for analysis"""
-        for param in [
-            "heart_rate",
-            "blood_pressure_systolic",
-            "oxygen_saturation",
-            "temperature",
-            "respiratory_rate",
-        ]:
-            value = getattr(vital_signs, param)
-            if value is not None:
-                state.trend_data[param].append(value)
-                # Keep only last 50 values for trend analysis
-                if len(state.trend_data[param]) > 50:
-                    state.trend_data[param] = state.trend_data[param][-50:]
 
     def calculate_ews_score(self, vital_signs: VitalSigns) -> float:
         """
@@ -280,137 +532,219 @@ def calculate_ews_score(self, vital_signs: VitalSigns) -> float:
         - Temperature: <35 (2), 35-38.4 (0), >38.5 (2)
         - Consciousness: Alert (0), Voice (1), Pain (2), Unresponsive (3)
         """
-        score = 0
-
-        # Heart Rate
-        hr = vital_signs.heart_rate
-        if hr is not None:
-            if hr < 40:
-                score += 3
-            elif 40 <= hr <= 50:
-                score += 1
-            elif 51 <= hr <= 100:
-                score += 0
-            elif 101 <= hr <= 110:
-                score += 1
-            elif 111 <= hr <= 130:
-                score += 2
-            elif hr > 130:
-                score += 3
-
-        # Systolic Blood Pressure
-        sbp = vital_signs.blood_pressure_systolic
-        if sbp is not None:
-            if sbp < 70:
-                score += 3
-            elif 70 <= sbp <= 80:
-                score += 2
-            elif 81 <= sbp <= 100:
-                score += 1
-            elif 101 <= sbp <= 199:
-                score += 0
-            elif sbp > 200:
-                score += 2
-
-        # Respiratory Rate
-        rr = vital_signs.respiratory_rate
-        if rr is not None:
-            if rr < 9:
-                score += 3
-            elif 9 <= rr <= 14:
-                score += 0
-            elif 15 <= rr <= 20:
-                score += 1
-            elif 21 <= rr <= 29:
-                score += 2
-            elif rr > 30:
-                score += 3
-
-        # Temperature
-        temp = vital_signs.temperature
-        if temp is not None:
-            if temp < 35:
-                score += 2
-            elif 35 <= temp <= 38.4:
-                score += 0
-            elif temp > 38.5:
-                score += 2
-
-        # Consciousness Level
-        if vital_signs.consciousness_level:
-            level = vital_signs.consciousness_level.lower()
-            if level == "alert":
-                score += 0
-            elif level == "voice":
-                score += 1
-            elif level == "pain":
-                score += 2
-            elif level == "unresponsive":
-                score += 3
-
-        return score
-
-    async def check_for_alerts(
-        self, state: PatientMonitoringState, vital_signs: VitalSigns, ews_score: float
-    ) -> List[PatientAlert]:
-        """Check for alert conditions"""
-        alerts = []
+        return float(mews_scores(reading_row(vital_signs)[None, :])[0])
 
-        # Check EWS score thresholds
-        if ews_score >= 5:
-            severity = (
-                "critical" if ews_score >= 7 else "high" if ews_score >= 6 else "medium"
-            )
-            alert = PatientAlert(
-                patient_id=state.patient_id,
-                alert_type="high_ews_score",
-                severity=severity,
-                score=ews_score,
-                triggered_by=["ews_score"],
-                timestamp=datetime.utcnow(),
-                message=f"Early Warning Score elevated: {ews_score}",
-                recommendations=self.get_ews_recommendations(ews_score),
-            )
-            alerts.append(alert)
+    async def run_ticks(self):
+        """Evaluate every ward once per tick"""
+        while True:
+            started = time.time()
+            try:
+                await self.evaluate_tick()
+            except Exception as e:
+                logger.error(f"Error in monitoring tick: {e}")
+            MONITORING_LATENCY.observe(time.time() - started)
+            await asyncio.sleep(max(0.0, self.tick_interval - (time.time() - started)))
+
+    async def evaluate_tick(self) -> List[PatientAlert]:
+        """Score and check every patient with a new reading since the last tick"""
+        alerts: List[PatientAlert] = []
+        updates = []
+        evaluated = []
+        pipe = self.redis_client.pipeline(transaction=False)
+        for store in self.wards.values():
+            slots = np.flatnonzero(store.dirty & store.active)
+            if not slots.size:
+                continue
+            store.dirty[slots] = False
+            evaluated.append((store, slots))
+            alerts.extend(self.evaluate_ward(store, slots))
+            for slot in slots:
+                patient_id = store.patient_ids[slot]
+                EARLY_WARNING_SCORES.labels(
+                    patient_id=patient_id, score_type="ews"
+                ).set(store.ews[slot])
+                EARLY_WARNING_SCORES.labels(
+                    patient_id=patient_id, score_type="news2"
+                ).set(store.news2[slot])
+                self._queue_state(pipe, patient_id, store, slot)
+                updates.append(
+                    self.fanout.envelope(
+                        {
+                            "type": "vital_signs_update",
+                            "patient_id": patient_id,
+                            "ward": store.ward,
+                            "vital_signs": store.reading(slot),
+                            "ews_score": float(store.ews[slot]),
+                            "news2_score": float(store.news2[slot]),
+                            "timestamp": datetime.utcnow().isoformat(),
+                        },
+                        "vital_signs_update",
+                        patient_id=patient_id,
+                        ward=store.ward,
+                        coalesce_key=f"vitals:{patient_id}",
+                    )
+                )
+        for alert in alerts:
+            self._queue_alert(pipe, alert)
+        try:
+            if updates or alerts:
+                await pipe.execute()
+        except Exception:
+            # Persist again on the next tick; the alerts still go out below
+            for store, slots in evaluated:
+                store.dirty[slots] = True
+            raise
+        finally:
+            for alert in alerts:
+                await self.notify_alert(alert)
+        await self.fanout.publish_many(updates)
+        return alerts
 
-        # Check individual vital signs
-        thresholds = state.monitoring_config.alert_thresholds or self.default_thresholds
+    def evaluate_ward(
+        self, store: WardVitalsStore, slots: np.ndarray
+    ) -> List[PatientAlert]:
+        """Vectorised EWS, threshold, trend and custom-rule checks for ``slots``"""
+        now = datetime.utcnow()
+        readings = store.latest[slots]
+        ews = mews_scores(readings)
+        store.ews[slots] = ews
+        store.news2[slots] = news2_scores(readings)
+        alerts: List[PatientAlert] = []
+
+        # EWS score thresholds
+        for row in np.flatnonzero(ews >= 5):
+            score = float(ews[row])
+            severity = "critical" if score >= 7 else "high" if score >= 6 else "medium"
+            alerts.append(
+                PatientAlert(
+                    patient_id=store.patient_ids[slots[row]],
+                    alert_type="high_ews_score",
+                    severity=severity,
+                    score=score,
+                    triggered_by=["ews_score"],
+                    timestamp=now,
+                    message=f"Early Warning Score elevated: {score}",
+                    recommendations=self.get_ews_recommendations(score),
+                )
+            )
 
-        for param, limits in thresholds.items():
-            value = getattr(vital_signs, param)
-            if value is not None:
-                if value < limits["min"] or value > limits["max"]:
-                    severity = self.calculate_vital_sign_severity(param, value, limits)
-                    alert = PatientAlert(
-                        patient_id=state.patient_id,
-                        alert_type=f"{param}_abnormal",
-                        severity=severity,
-                        score=self.calculate_vital_sign_score(param, value, limits),
-                        triggered_by=[param],
-                        timestamp=datetime.utcnow(),
-                        message=f"{param.replace('_', ' ').title()} abnormal: {value}",
-                        recommendations=self.get_vital_sign_recommendations(
-                            param, value, severity
-                        ),
-                    )
-                    alerts.append(alert)
+        # Individual vital signs against per-patient limits
+        vitals = readings[:, : len(VITAL_PARAMS)]
+        low = store.threshold_min[slots]
+        high = store.threshold_max[slots]
+        for row, index in np.argwhere((vitals < low) | (vitals > high)):
+            param = VITAL_PARAMS[index]
+            value = float(vitals[row, index])
+            limits = {"min": float(low[row, index]), "max": float(high[row, index])}
+            severity = self.calculate_vital_sign_severity(param, value, limits)
+            alerts.append(
+                PatientAlert(
+                    patient_id=store.patient_ids[slots[row]],
+                    alert_type=f"{param}_abnormal",
+                    severity=severity,
+                    score=self.calculate_vital_sign_score(param, value, limits),
+                    triggered_by=[param],
+                    timestamp=now,
+                    message=f"{param.replace('_', ' ').title()} abnormal: {value}",
+                    recommendations=self.get_vital_sign_recommendations(
+                        param, value, severity
+                    ),
+                )
+            )
 
-        # Check trends
-        trend_alerts = self.check_trends(state)
-        alerts.extend(trend_alerts)
+        # Trends over each series' last TREND_WINDOW values
+        slopes, valid = trend_slopes(
+            store.trend[slots], store.trend_cursor[slots], store.trend_count[slots]
+        )
+        heart_rate = TREND_PARAMS.index("heart_rate")
+        oxygen = TREND_PARAMS.index("oxygen_saturation")
+        for row in np.flatnonzero(valid[:, heart_rate] & (slopes[:, heart_rate] > 5)):
+            trend = float(slopes[row, heart_rate])
+            alerts.append(
+                PatientAlert(
+                    patient_id=store.patient_ids[slots[row]],
+                    alert_type="heart_rate_trend_up",
+                    severity="high",
+                    score=abs(trend),
+                    triggered_by=["heart_rate_trend"],
+                    timestamp=now,
+                    message=f"Heart rate trending upward: {trend:.1f} beats/min increase",
+                    recommendations=[
+                        "Check for pain, anxiety, or clinical deterioration"
+                    ],
+                )
+            )
+        for row in np.flatnonzero(valid[:, oxygen] & (slopes[:, oxygen] < -2)):
+            trend = float(slopes[row, oxygen])
+            alerts.append(
+                PatientAlert(
+                    patient_id=store.patient_ids[slots[row]],
+                    alert_type="oxygen_saturation_trend_down",
+                    severity="high",
+                    score=abs(trend),
+                    triggered_by=["oxygen_saturation_trend"],
+                    timestamp=now,
+                    message=f"Oxygen saturation trending downward: {trend:.1f}% decrease",
+                    recommendations=[
+                        "Check respiratory status, consider oxygen therapy"
+                    ],
+                )
+            )
 
-        # Check custom rules
-        if state.monitoring_config.custom_rules:
-            custom_alerts = await self.check_custom_rules(state, vital_signs)
-            alerts.extend(custom_alerts)
+        alerts.extend(self.evaluate_custom_rules(store, slots, now))
 
-        # Add alerts to history
         for alert in alerts:
+            state = self.monitored_patients[alert.patient_id]
             state.alert_history.append(alert)
+            if len(state.alert_history) > ALERT_HISTORY_LIMIT:
+                del state.alert_history[: -ALERT_HISTORY_LIMIT]
             ALERTS_GENERATED.labels(
                 alert_type=alert.alert_type, severity=alert.severity
             ).inc()
+        return alerts
 
+    def evaluate_custom_rules(
+        self, store: WardVitalsStore, slots: np.ndarray, now: datetime
+    ) -> List[PatientAlert]:
+        """Evaluate every rule of the updated patients in one pass.
+
+        A rule fires when none of its conditions fails; a condition on a
+        missing value or unknown parameter fails, an unknown operator passes.
+        """
+        compiled = store.compiled_rules()
+        if compiled is None:
+            return []
+        updated = np.zeros(store.capacity, dtype=bool)
+        updated[slots] = True
+        rule_slot = compiled["rule_slot"]
+        cond_rule = compiled["cond_rule"]
+        column = compiled["cond_column"]
+        op = compiled["cond_op"]
+        target = compiled["cond_value"]
+        values = store.latest[rule_slot[cond_rule], np.maximum(column, 0)]
+        with np.errstate(invalid="ignore"):
+            passed = np.select(
+                [op == 0, op == 1, op == 2],
+                [values > target, values < target, values == target],
+                True,
+            )
+        passed &= (column >= 0) & ~np.isnan(values)
+        failures = np.bincount(cond_rule[~passed], minlength=len(rule_slot))
+        alerts = []
+        for rule_index in np.flatnonzero((failures == 0) & updated[rule_slot]):
+            slot, rule = store.rules[rule_index]
+            alerts.append(
+                PatientAlert(
+                    patient_id=store.patient_ids[slot],
+                    alert_type=rule["name"],
+                    severity=rule["severity"],
+                    score=rule.get("score", 5),
+                    triggered_by=rule.get("triggered_by", ["custom_rule"]),
+                    timestamp=now,
+                    message=rule["message"],
+                    recommendations=rule.get("recommendations", []),
+                )
+            )
         return alerts
 
     def calculate_vital_sign_severity(
@@ -464,98 +798,6 @@ def calculate_vital_sign_score(
             return (value - max_val) / max_val * 10
         return 0
 
-    def check_trends(self, state: PatientMonitoringState) -> List[PatientAlert]:
-        """Check for concerning trends in vital signs"""
-        alerts = []
-
-        for param, values in state.trend_data.items():
-            if len(values) >= 5:
-                # Simple trend detection
-                recent_values = values[-5:]
-                trend = np.polyfit(range(len(recent_values)), recent_values, 1)[0]
-
-                # Check for concerning trends
-                if param == "heart_rate" and trend > 5:
-                    alert = PatientAlert(
-                        patient_id=state.patient_id,
-                        alert_type=f"{param}_trend_up",
-                        severity="high",
-                        score=abs(trend),
-                        triggered_by=[f"{param}_trend"],
-                        timestamp=datetime.utcnow(),
-                        message=f"Heart rate trending upward: {trend:.1f} beats/min increase",
-                        recommendations=[
-                            "Check for pain, anxiety, or clinical deterioration"
-                        ],
-                    )
-                    alerts.append(alert)
-
-                elif param == "oxygen_saturation" and trend < -2:
-                    alert = PatientAlert(
-                        patient_id=state.patient_id,
-                        alert_type=f"{param}_trend_down",
-                        severity="high",
-                        score=abs(trend),
-                        triggered_by=[f"{param}_trend"],
-                        timestamp=datetime.utcnow(),
-                        message=f"Oxygen saturation trending downward: {trend:.1f}% decrease",
-                        recommendations=[
-                            "Check respiratory status, consider oxygen therapy"
-                        ],
-                    )
-                    alerts.append(alert)
-
-        return alerts
-
-    async def check_custom_rules(
-        self, state: PatientMonitoringState, vital_signs: VitalSigns
-    ) -> List[PatientAlert]:
-        """Check custom alert rules"""
-        alerts = []
-
-        for rule in state.monitoring_config.custom_rules or []:
-            # This is a simplified rule engine
-            # In production, you'd use a more sophisticated rule engine
-            if self.evaluate_rule(rule, vital_signs, state):
-                alert = PatientAlert(
-                    patient_id=state.patient_id,
-                    alert_type=rule["name"],
-                    severity=rule["severity"],
-                    score=rule.get("score", 5),
-                    triggered_by=rule.get("triggered_by", ["custom_rule"]),
-                    timestamp=datetime.utcnow(),
-                    message=rule["message"],
-                    recommendations=rule.get("recommendations", []),
-                )
-                alerts.append(alert)
-
-        return alerts
-
-    def evaluate_rule(
-        self, rule: Dict, vital_signs: VitalSigns, state: PatientMonitoringState
-    ) -> bool:
-        """Evaluate a custom rule"""
-        # Simplified rule evaluation
-        conditions = rule.get("conditions", [])
-
-        for condition in conditions:
-            param = condition["parameter"]
-            operator = condition["operator"]
-            value = condition["value"]
-
-            current_value = getattr(vital_signs, param, None)
-            if current_value is None:
-                return False
-
-            if operator == "gt" and current_value <= value:
-                return False
-            elif operator == "lt" and current_value >= value:
-                return False
-            elif operator == "eq" and current_value != value:
-                return False
-
-        return True
-
     def get_ews_recommendations(self, score: float) -> List[str]:
         """Get recommendations based on EWS score"""
         if score >= 7:
@@ -651,14 +893,26 @@ def get_vital_sign_recommendations(
 
         return recommendations
 
+    async def publish_update(self, message: Dict, patient_id: str):
+        """Fan a message out to the patient's, ward's and event type's subscribers"""
+        state = self.monitored_patients.get(patient_id)
+        await self.fanout.publish(
+            message,
+            message["type"],
+            patient_id=patient_id,
+            ward=state.ward if state else None,
+        )
+
     async def handle_alert(self, alert: PatientAlert):
         """Handle alert notification and escalation"""
-        # Store alert in Redis
         await self.store_alert(alert)
+        await self.notify_alert(alert)
 
+    async def notify_alert(self, alert: PatientAlert):
+        """Broadcast an already-stored alert and escalate critical ones"""
         # Send WebSocket notification
-        alert_message = {"type": "alert", "alert": alert.dict()}
-        await self.connection_manager.broadcast(json.dumps(alert_message))
+        alert_message = {"type": "alert", "alert": json.loads(alert.json())}
+        await self.publish_update(alert_message, alert.patient_id)
 
         # Send email notification for critical alerts
         if alert.severity == "critical":
@@ -671,14 +925,19 @@ async def handle_alert(self, alert: PatientAlert):
 
     async def store_alert(self, alert: PatientAlert):
         """Store alert in Redis"""
-        alert_key = f"alert:{alert.patient_id}:{alert.timestamp.isoformat()}"
+        pipe = self.redis_client.pipeline(transaction=False)
+        self._queue_alert(pipe, alert)
+        await pipe.execute()
+
+    def _queue_alert(self, pipe, alert: PatientAlert):
+        alert_key = f"alert:{alert.patient_id}:{alert.alert_id}"
         alert_data = alert.json()
-        self.redis_client.setex(alert_key, 86400 * 7, alert_data)  # Store for 7 days
+        pipe.setex(alert_key, 86400 * 7, alert_data)  # Store for 7 days
 
         # Add to patient alert list
         patient_alerts_key = f"patient_alerts:{alert.patient_id}"
-        self.redis_client.lpush(patient_alerts_key, alert_data)
-        self.redis_client.ltrim(patient_alerts_key, 0, 99)  # Keep last 100 alerts
+        pipe.lpush(patient_alerts_key, alert_data)
+        pipe.ltrim(patient_alerts_key, 0, 99)  # Keep last 100 alerts
 
     async def send_email_alert(self, alert: PatientAlert):
         """Send email alert for critical alerts"""
@@ -725,49 +984,55 @@ async def send_email_alert(self, alert: PatientAlert):
             msg["From"] = self.email_config["from_email"]
             msg["To"] = ", ".join(self.email_config["to_emails"])
 
-            with smtplib.SMTP(
-                self.email_config["smtp_server"], self.email_config["smtp_port"]
-            ) as server:
-                server.starttls()
-                server.login(
-                    self.email_config["username"], self.email_config["password"]
-                )
-                server.send_message(msg)
+            # smtplib blocks; keep it off the event loop driving the ticks
+            await asyncio.to_thread(self._send_email, msg)
 
             logger.info(f"Email alert sent for patient {alert.patient_id}")
         except Exception as e:
             logger.error(f"Failed to send email alert: {e}")
 
+    def _send_email(self, msg: MIMEText):
+        with smtplib.SMTP(
+            self.email_config["smtp_server"], self.email_config["smtp_port"]
+        ) as server:
+            server.starttls()
+            server.login(self.email_config["username"], self.email_config["password"])
+            server.send_message(msg)
+
     async def store_monitoring_state(
         self, patient_id: str, state: PatientMonitoringState
     ):
         """Store monitoring state in Redis"""
-        # Convert to serializable format
+        pipe = self.redis_client.pipeline(transaction=False)
+        self._queue_state(pipe, patient_id, state.store, state.slot)
+        await pipe.execute()
+
+    def _queue_state(self, pipe, patient_id: str, store: WardVitalsStore, slot: int):
         state_data = {
-            "vital_signs_history": [vs.dict() for vs in state.vital_signs_history],
-            "current_ews_score": state.current_ews_score,
-            "last_update": state.last_update.isoformat(),
-            "trend_data": state.trend_data,
+            "ward": store.ward,
+            "vital_signs": store.reading(slot),
+            "current_ews_score": float(store.ews[slot]),
+            "current_news2_score": float(store.news2[slot]),
+            "last_update": datetime.utcfromtimestamp(
+                store.last_update[slot]
+            ).isoformat(),
+            "trend_data": store.trend_tail(slot),
         }
-
-        self.redis_client.setex(
+        pipe.setex(
             f"monitoring_state:{patient_id}", 3600, json.dumps(state_data)  # 1 hour TTL
         )
 
     async def monitor_patients(self):
-        """Background task to monitor all patients"""
+        """Background task to request readings from overdue patients"""
         while True:
             try:
-                for patient_id, state in self.monitored_patients.items():
-                    # Check if patient needs update based on monitoring interval
-                    interval = state.monitoring_config.monitoring_intervals.get(
-                        "vital_signs", 300
+                now = time.time()
+                for store in self.wards.values():
+                    overdue = store.active & (
+                        now - store.last_update > store.vitals_interval
                     )
-                    if (
-                        datetime.utcnow() - state.last_update
-                    ).total_seconds() > interval:
-                        # Request vital signs update
-                        await self.request_vital_signs_update(patient_id)
+                    for slot in np.flatnonzero(overdue):
+                        await self.request_vital_signs_update(store.patient_ids[slot])
 
                 await asyncio.sleep(60)  # Check every minute
             except Exception as e:
@@ -785,11 +1050,12 @@ async def check_system_health(self):
         while True:
             try:
                 # Check Redis connection
-                self.redis_client.ping()
+                await self.redis_client.ping()
 
                 # Check number of monitored patients
                 logger.info(
-                    f"Currently monitoring {len(self.monitored_patients)} patients"
+                    f"Currently monitoring {len(self.monitored_patients)} patients "
+                    f"across {len(self.wards)} wards"
                 )
 
                 await asyncio.sleep(300)  # Check every 5 minutes
@@ -797,32 +1063,15 @@ async def check_system_health(self):
                 logger.error(f"System health check failed: {e}")
                 await asyncio.sleep(60)
 
-    async def cleanup_old_data(self):
-        """Clean up old monitoring data"""
-        while True:
-            try:
-                # Clean up old vital signs history
-                for patient_id, state in self.monitored_patients.items():
-                    if len(state.vital_signs_history) > 1000:
-                        state.vital_signs_history = state.vital_signs_history[-1000:]
-
-                await asyncio.sleep(3600)  # Clean up every hour
-            except Exception as e:
-                logger.error(f"Data cleanup failed: {e}")
-                await asyncio.sleep(3600)
-
     async def acknowledge_alert(
-        self, patient_id: str, alert_timestamp: str, acknowledged_by: str
+        self, patient_id: str, alert_id: str, acknowledged_by: str
     ):
         """Acknowledge an alert"""
         # Find and update alert
         state = self.monitored_patients.get(patient_id)
         if state:
             for alert in state.alert_history:
-                if (
-                    alert.timestamp.isoformat() == alert_timestamp
-                    and not alert.acknowledged
-                ):
+                if alert.alert_id == alert_id and not alert.acknowledged:
                     alert.acknowledged = True
                     alert.acknowledged_by = acknowledged_by
                     alert.acknowledged_time = datetime.utcnow()
@@ -834,19 +1083,19 @@ async def acknowledge_alert(
                     update = {
                         "type": "alert_acknowledged",
                         "patient_id": patient_id,
-                        "alert_timestamp": alert_timestamp,
+                        "alert_id": alert_id,
                         "acknowledged_by": acknowledged_by,
                     }
-                    await self.connection_manager.broadcast(json.dumps(update))
+                    await self.publish_update(update, patient_id)
 
                     break
 
-    async def resolve_alert(self, patient_id: str, alert_timestamp: str):
+    async def resolve_alert(self, patient_id: str, alert_id: str):
         """Mark an alert as resolved"""
         state = self.monitored_patients.get(patient_id)
         if state:
             for alert in state.alert_history:
-                if alert.timestamp.isoformat() == alert_timestamp:
+                if alert.alert_id == alert_id:
                     alert.resolved_time = datetime.utcnow()
 
                     # Update in Redis
@@ -856,9 +1105,9 @@ async def resolve_alert(self, patient_id: str, alert_timestamp: str):
                     update = {
                         "type": "alert_resolved",
                         "patient_id": patient_id,
-                        "alert_timestamp": alert_timestamp,
+                        "alert_id": alert_id,
                     }
-                    await self.connection_manager.broadcast(json.dumps(update))
+                    await self.publish_update(update, patient_id)
 
                     break
 
@@ -870,17 +1119,15 @@ def get_patient_status(self, patient_id: str) -> Optional[Dict]:
 
         return {
             "patient_id": patient_id,
+            "ward": state.ward,
             "monitoring_level": state.monitoring_config.monitoring_level,
             "current_ews_score": state.current_ews_score,
+            "current_news2_score": state.current_news2_score,
             "last_update": state.last_update.isoformat(),
             "active_alerts": len(
                 [a for a in state.alert_history if not a.resolved_time]
             ),
-            "vital_signs": (
-                state.vital_signs_history[-1].dict()
-                if state.vital_signs_history
-                else None
-            ),
+            "vital_signs": state.store.reading(state.slot),
         }
 
 
@@ -904,27 +1151,54 @@ def get_patient_status(self, patient_id: str) -> Optional[Dict]:
 monitoring_system = RealtimePatientMonitoringSystem(monitoring_config)
 
 
+@app.on_event("startup")
+async def start_monitoring():
+    monitoring_system.start_background_tasks()
+
+
+@app.on_event("shutdown")
+async def stop_monitoring():
+    await monitoring_system.fanout.stop()
+
+
 @app.websocket("/ws/monitoring")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time monitoring updates"""
-    await monitoring_system.connection_manager.connect(websocket)
+    """WebSocket endpoint for real-time monitoring updates
+
+    Clients receive everything unless they narrow it with ``patient``, ``ward``
+    and ``event`` query parameters or a ``subscribe`` message carrying
+    ``patients``, ``wards`` and ``event_types`` lists.
+    """
+    query = websocket.query_params
+    subscription_filter = SubscriptionFilter.from_message(
+        {
+            "patients": query.getlist("patient"),
+            "wards": query.getlist("ward"),
+            "event_types": query.getlist("event"),
+        }
+    )
+    await monitoring_system.fanout.connect(websocket, subscription_filter)
     try:
         while True:
             data = await websocket.receive_text()
             # Handle incoming WebSocket messages
             message = json.loads(data)
-            if message["type"] == "acknowledge_alert":
+            if message["type"] == "subscribe":
+                monitoring_system.fanout.update_filter(
+                    websocket, SubscriptionFilter.from_message(message)
+                )
+            elif message["type"] == "acknowledge_alert":
                 await monitoring_system.acknowledge_alert(
                     message["patient_id"],
-                    message["alert_timestamp"],
+                    message["alert_id"],
                     message["acknowledged_by"],
                 )
             elif message["type"] == "resolve_alert":
                 await monitoring_system.resolve_alert(
-                    message["patient_id"], message["alert_timestamp"]
+                    message["patient_id"], message["alert_id"]
                 )
     except WebSocketDisconnect:
-        monitoring_system.connection_manager.disconnect(websocket)
+        monitoring_system.fanout.disconnect(websocket)
 
 
 @app.post("/monitoring/add")
@@ -959,7 +1233,9 @@ async def get_patient_status(patient_id: str):
 async def get_patient_alerts(patient_id: str, limit: int = 10):
     """Get patient alert history"""
     alerts_key = f"patient_alerts:{patient_id}"
-    alerts_data = monitoring_system.redis_client.lrange(alerts_key, 0, limit - 1)
+    alerts_data = await monitoring_system.redis_client.lrange(
+        alerts_key, 0, limit - 1
+    )
     alerts = [json.loads(data) for data in alerts_data]
     return {"alerts": alerts}
 
@@ -970,6 +1246,12 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
 
+@app.get("/monitoring/fanout")
+async def get_fanout_stats():
+    """WebSocket fan-out connection, queue and drop counters"""
+    return monitoring_system.fanout.get_stats()
+
+
 @app.get("/metrics")
 async def get_metrics():
     """Get Prometheus metrics"""
@@ -4,6 +4,7 @@
 
 from datetime import datetime
 
+from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
@@ -26,12 +27,27 @@ def add_arguments(self, parser):
             type=str,
             help="Processing date in YYYY-MM-DD format (optional - defaults to current date)",
         )
+        parser.add_argument(
+            "--user",
+            type=str,
+            help="Username recorded on the depreciation journal entries "
+            "(optional - defaults to the first active superuser)",
+        )
         parser.add_argument(
             "--dry-run",
             action="store_true",
             help="Show what would be processed without making changes",
         )
 
+    @staticmethod
+    def get_processing_user(username=None):
+        User = get_user_model()
+        if username:
+            return User.objects.filter(username=username, is_active=True).first()
+        return (
+            User.objects.filter(is_superuser=True, is_active=True).order_by("id").first()
+        )
+
     def handle(self, *args, **options):
         hospital_id = options.get("hospital_id")
         processing_date_str = options.get("date")
@@ -48,6 +64,18 @@ def handle(self, *args, **options):
                 return
         else:
             processing_date = timezone.now().date()
+        username = options.get("user")
+        processed_by = self.get_processing_user(username)
+        if processed_by is None and not dry_run:
+            if username:
+                message = f"User {username} not found or inactive."
+            else:
+                message = (
+                    "No user to record on journal entries. Pass --user or create "
+                    "an active superuser."
+                )
+            self.stdout.write(self.style.ERROR(message))
+            return
         if hospital_id:
             hospitals = Hospital.objects.filter(id=hospital_id)
         else:
@@ -82,7 +110,7 @@ def handle(self, *args, **options):
                 continue
             if not dry_run:
                 processed_assets = DepreciationCalculator.process_monthly_depreciation(
-                    hospital, processing_date
+                    hospital, processing_date, created_by=processed_by
                 )
             else:
                 from accounting.models import DepreciationSchedule, FixedAsset
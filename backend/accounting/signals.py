@@ -14,7 +14,7 @@
     Expense,
     PayrollEntry,
 )
-from .utils import DoubleEntryBookkeeping
+from .utils import DoubleEntryBookkeeping, audit_log_entry
 
 
 @receiver(post_save, sender=AccountingInvoice)
@@ -89,21 +89,7 @@ def log_model_changes(sender, instance, created, **kwargs):
     if sender == AccountingAuditLog:
         return
     try:
-        user = getattr(instance, "created_by", None) or getattr(
-            instance, "updated_by", None
-        )
-        action_type = "CREATE" if created else "UPDATE"
-        AccountingAuditLog.objects.create(
-            hospital=getattr(instance, "hospital", None),
-            user=user,
-            action_type=action_type,
-            table_name=sender._meta.db_table,
-            record_id=str(instance.pk),
-            new_values={
-                "model": sender.__name__,
-                "timestamp": timezone.now().isoformat(),
-            },
-        )
+        audit_log_entry(instance, "CREATE" if created else "UPDATE").save()
     except Exception as e:
         print(f"Error logging audit trail: {e}")
 
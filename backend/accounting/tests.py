@@ -2,9 +2,13 @@
 tests module
 """
 
+from datetime import date, timedelta
 from decimal import Decimal
 
+from rest_framework.test import APIRequestFactory, force_authenticate
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 from django.utils import timezone
 
@@ -12,21 +16,32 @@
 from users.models import UserRole
 
 from .models import (
+    AccountingAuditLog,
     AccountingInvoice,
     AccountingPayment,
     AccountType,
+    BookLock,
     ChartOfAccounts,
     CostCenter,
     Currency,
     Customer,
+    DepreciationSchedule,
     Expense,
+    FinancialYear,
     FixedAsset,
     InvoiceLineItem,
     LedgerEntry,
     PayrollEntry,
     Vendor,
 )
-from .utils import DepreciationCalculator, DoubleEntryBookkeeping, ReportGenerator
+from .utils import (
+    AgeingEngine,
+    AgeingReportGenerator,
+    DepreciationCalculator,
+    DoubleEntryBookkeeping,
+    ReportGenerator,
+)
+from .views import AccountingInvoiceViewSet, PayrollEntryViewSet
 
 User = get_user_model()
 
@@ -241,6 +256,50 @@ def test_straight_line_depreciation(self):
         expected_monthly = expected_annual // 12
         self.assertEqual(monthly_depreciation, expected_monthly)
 
+    def test_monthly_command_posts_depreciation_as_user(self):
+        for code, name, account_type in [
+            ("6900", "Depreciation", AccountType.EXPENSES),
+            ("1500", "Accumulated Depreciation", AccountType.ASSETS),
+        ]:
+            ChartOfAccounts.objects.create(
+                hospital=self.hospital,
+                account_code=code,
+                account_name=name,
+                account_type=account_type,
+                account_subtype="FIXED_ASSETS",
+            )
+        FinancialYear.objects.create(
+            hospital=self.hospital,
+            name="2024-25",
+            start_date=date(2024, 4, 1),
+            end_date=date(2025, 3, 31),
+        )
+        asset = FixedAsset.objects.create(
+            hospital=self.hospital,
+            asset_code="MED002",
+            name="CT Scanner",
+            category="MEDICAL_EQUIPMENT",
+            cost_center=self.cost_center,
+            purchase_date=date(2024, 4, 1),
+            purchase_cost_cents=120000000,
+            vendor=self.vendor,
+            depreciation_method="STRAIGHT_LINE",
+            useful_life_years=10,
+            salvage_value_cents=0,
+            current_book_value_cents=120000000,
+        )
+        call_command(
+            "monthly_accounting_tasks",
+            hospital_id=self.hospital.id,
+            date="2024-05-31",
+            user=self.user.username,
+        )
+        schedule = DepreciationSchedule.objects.get(asset=asset)
+        self.assertEqual(schedule.depreciation_amount_cents, 1000000)
+        self.assertEqual(schedule.processed_by, self.user)
+        entry = LedgerEntry.objects.get(reference_number="DEP-MED002-202405")
+        self.assertEqual(entry.created_by, self.user)
+
 
 class DoubleEntryBookkeepingTest(AccountingModuleTestCase):
     def test_journal_entry_creation(self):
@@ -351,3 +410,192 @@ def test_payroll_calculations(self):
         self.assertEqual(payroll.total_deductions_cents, expected_deductions)
         self.assertEqual(payroll.net_salary_cents, expected_net)
         self.assertEqual(payroll.employer_cost_cents, expected_employer_cost)
+
+
+class AgeingReportTest(AccountingModuleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer = Customer.objects.create(
+            hospital=self.hospital,
+            customer_code="CUST001",
+            name="Test Customer",
+        )
+        self.as_of_date = date(2024, 6, 30)
+        for days_overdue, balance in [(10, 1000), (45, 2000), (75, 3000), (120, 4000)]:
+            due_date = self.as_of_date - timedelta(days=days_overdue)
+            AccountingInvoice.objects.create(
+                hospital=self.hospital,
+                invoice_type="CORPORATE",
+                invoice_date=due_date - timedelta(days=30),
+                due_date=due_date,
+                customer=self.customer,
+                cost_center=self.cost_center,
+                currency=self.currency,
+                total_cents=balance,
+                balance_cents=balance,
+                status="SENT",
+                created_by=self.user,
+            )
+
+    def test_buckets_from_boundaries(self):
+        self.assertEqual(
+            AgeingEngine.buckets_from_boundaries([60, 30]),
+            (("0-30", None, 30), ("31-60", 31, 60), ("60+", 61, None)),
+        )
+        with self.assertRaises(ValueError):
+            AgeingEngine.buckets_from_boundaries([0, 30])
+
+    def test_receivables_ageing_totals(self):
+        report = AgeingReportGenerator.generate_receivables_ageing(
+            self.hospital, self.as_of_date
+        )
+        self.assertEqual(
+            report["bucket_totals"],
+            {"0-30": 1000, "31-60": 2000, "61-90": 3000, "90+": 4000},
+        )
+        self.assertEqual(report["grand_total"], 10000)
+        self.assertEqual(len(report["ageing_buckets"]["90+"]), 1)
+        self.assertEqual(report["ageing_buckets"]["90+"][0]["days_outstanding"], 120)
+
+    def test_grouped_and_paged_ageing(self):
+        report = AgeingReportGenerator.generate_receivables_ageing(
+            self.hospital,
+            self.as_of_date,
+            buckets=AgeingEngine.buckets_from_boundaries([60]),
+            group_by="cost_center",
+            page=1,
+            page_size=2,
+        )
+        self.assertEqual(len(report["groups"]), 1)
+        self.assertEqual(
+            report["groups"][0]["bucket_totals"], {"0-60": 3000, "60+": 7000}
+        )
+        self.assertEqual(report["ageing_buckets"]["60+"][0]["balance_cents"], 4000)
+        self.assertEqual(sum(len(v) for v in report["ageing_buckets"].values()), 2)
+
+    def test_unpaged_report_returns_every_row(self):
+        engine = AgeingReportGenerator.invoice_ageing_engine(
+            self.hospital, self.as_of_date
+        )
+        self.assertEqual(len(engine.report()["rows"]), 4)
+        self.assertEqual(len(engine.report(page=1, page_size=3)["rows"]), 3)
+
+    def test_overdue_endpoint_keeps_list_shape(self):
+        AccountingInvoice.objects.filter(hospital=self.hospital).update(
+            status="OVERDUE"
+        )
+        view = AccountingInvoiceViewSet.as_view({"get": "overdue"})
+        request = APIRequestFactory().get(
+            "/invoices/overdue/", {"as_of_date": self.as_of_date.isoformat()}
+        )
+        force_authenticate(request, user=self.user)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 4)
+
+    def test_ageing_filtered_to_one_bucket(self):
+        report = AgeingReportGenerator.generate_receivables_ageing(
+            self.hospital, self.as_of_date, bucket="61-90"
+        )
+        self.assertEqual(
+            {label: len(rows) for label, rows in report["ageing_buckets"].items()},
+            {"0-30": 0, "31-60": 0, "61-90": 1, "90+": 0},
+        )
+        with self.assertRaises(ValueError):
+            AgeingReportGenerator.generate_receivables_ageing(
+                self.hospital, self.as_of_date, bucket="120+"
+            )
+
+
+class BatchJournalPostingTest(AccountingModuleTestCase):
+    def setUp(self):
+        super().setUp()
+        for code, name, account_type in [
+            ("6300", "Salaries", AccountType.EXPENSES),
+            ("2400", "Salaries Payable", AccountType.LIABILITIES),
+        ]:
+            ChartOfAccounts.objects.create(
+                hospital=self.hospital,
+                account_code=code,
+                account_name=name,
+                account_type=account_type,
+                account_subtype="CURRENT_LIABILITIES",
+            )
+        self.payrolls = []
+        for index, pay_date in enumerate([date(2024, 1, 31), date(2024, 3, 31)]):
+            employee = User.objects.create_user(
+                username=f"employee{index}",
+                email=f"employee{index}@test.com",
+                password="secure_test_password",
+                role=UserRole.REGISTERED_NURSE,
+                hospital=self.hospital,
+            )
+            self.payrolls.append(
+                PayrollEntry.objects.create(
+                    hospital=self.hospital,
+                    employee=employee,
+                    pay_period_start=pay_date.replace(day=1),
+                    pay_period_end=pay_date,
+                    pay_date=pay_date,
+                    basic_salary_cents=3000000,
+                    status="DRAFT",
+                    cost_center=self.cost_center,
+                    created_by=self.user,
+                )
+            )
+        BookLock.objects.create(
+            hospital=self.hospital,
+            lock_date=date(2024, 2, 29),
+            lock_type="MONTHLY",
+            locked_by=self.user,
+            reason="January closed",
+        )
+
+    def test_locked_documents_fail_without_aborting_batch(self):
+        result = DoubleEntryBookkeeping.post_payroll_entries_batch(
+            self.hospital,
+            PayrollEntry.objects.filter(id__in=[p.id for p in self.payrolls]),
+        )
+        self.assertEqual(result["posted"], [self.payrolls[1].id])
+        self.assertEqual(len(result["failed"]), 1)
+        self.assertEqual(result["failed"][0]["document_id"], self.payrolls[0].id)
+        self.assertEqual(result["entries_created"], 1)
+        entry = LedgerEntry.objects.get(payroll=self.payrolls[1])
+        self.assertEqual(entry.amount_cents, 3000000)
+        self.assertFalse(LedgerEntry.objects.filter(payroll=self.payrolls[0]).exists())
+
+    def test_batch_posted_entries_are_audited(self):
+        DoubleEntryBookkeeping.post_payroll_entries_batch(
+            self.hospital,
+            PayrollEntry.objects.filter(id=self.payrolls[1].id),
+            created_by=self.user,
+        )
+        entry = LedgerEntry.objects.get(payroll=self.payrolls[1])
+        audit = AccountingAuditLog.objects.get(
+            table_name=LedgerEntry._meta.db_table, record_id=str(entry.pk)
+        )
+        self.assertEqual(audit.action_type, "CREATE")
+        self.assertEqual(audit.user, self.user)
+
+    def test_bulk_approve_leaves_unposted_payrolls_in_draft(self):
+        view = PayrollEntryViewSet.as_view({"post": "bulk_approve"})
+        request = APIRequestFactory().post(
+            "/payroll/bulk_approve/",
+            {"payroll_ids": [p.id for p in self.payrolls]},
+            format="json",
+        )
+        force_authenticate(request, user=self.user)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["approved"], 1)
+        self.assertEqual(response.data["posted"], 1)
+        self.assertEqual(
+            response.data["failed"][0]["document_id"], self.payrolls[0].id
+        )
+        for payroll in self.payrolls:
+            payroll.refresh_from_db()
+        self.assertEqual(self.payrolls[0].status, "DRAFT")
+        self.assertIsNone(self.payrolls[0].approved_by)
+        self.assertEqual(self.payrolls[1].status, "APPROVED")
+        self.assertEqual(self.payrolls[1].approved_by, self.user)
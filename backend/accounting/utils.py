@@ -9,18 +9,22 @@
 from defusedxml import ElementTree as ET
 from openpyxl.styles import Border, Font, PatternFill, Side
 
-from django.db import models, transaction
+from django.db import DatabaseError, models, transaction
 from django.utils import timezone
 
 from .models import (
+    AccountingAuditLog,
     AccountingInvoice,
     AccountingPayment,
+    AccountingPeriod,
     BankTransaction,
+    BookLock,
     ChartOfAccounts,
     Currency,
     DepreciationSchedule,
     Expense,
     FixedAsset,
+    InvoiceLineItem,
     LedgerEntry,
 )
 
@@ -80,64 +84,121 @@ def create_journal_entry(
         return ledger_entry
 
     @staticmethod
-    def post_invoice_entries(invoice):
-        entries = []
-        entries.append(
-            DoubleEntryBookkeeping.create_journal_entry(
-                hospital=invoice.hospital,
-                debit_account_code="1200",
-                credit_account_code="4000",
-                amount_cents=invoice.total_cents,
-                description=f"Sales invoice {invoice.invoice_number}",
-                reference_number=invoice.invoice_number,
-                transaction_date=invoice.invoice_date,
-                created_by=invoice.created_by,
-                source_invoice=invoice,
-            )
-        )
-        for item in invoice.items.filter(cost_price_cents__gt=0):
-            entries.append(
-                DoubleEntryBookkeeping.create_journal_entry(
-                    hospital=invoice.hospital,
-                    debit_account_code="5000",
-                    credit_account_code="1300",
-                    amount_cents=item.cost_price_cents * int(item.quantity),
-                    description=f"Cost of sales for {item.description}",
-                    reference_number=invoice.invoice_number,
-                    transaction_date=invoice.invoice_date,
-                    created_by=invoice.created_by,
-                    source_invoice=invoice,
-                )
+    def invoice_entry_specs(invoice):
+        common = {
+            "reference_number": invoice.invoice_number,
+            "transaction_date": invoice.invoice_date,
+            "created_by": invoice.created_by,
+            "source_invoice": invoice,
+        }
+        specs = [
+            {
+                "debit_account_code": "1200",
+                "credit_account_code": "4000",
+                "amount_cents": invoice.total_cents,
+                "description": f"Sales invoice {invoice.invoice_number}",
+                **common,
+            }
+        ]
+        costed_items = getattr(invoice, "costed_items", None)
+        if costed_items is None:
+            costed_items = invoice.items.filter(cost_price_cents__gt=0)
+        for item in costed_items:
+            specs.append(
+                {
+                    "debit_account_code": "5000",
+                    "credit_account_code": "1300",
+                    "amount_cents": item.cost_price_cents * int(item.quantity),
+                    "description": f"Cost of sales for {item.description}",
+                    **common,
+                }
             )
-        return entries
+        return specs
 
     @staticmethod
-    def post_payment_entries(payment):
+    def payment_entry_specs(payment):
         bank_account_code = "1100" if payment.payment_method == "CASH" else "1150"
-        entry = DoubleEntryBookkeeping.create_journal_entry(
-            hospital=payment.hospital,
-            debit_account_code=bank_account_code,
-            credit_account_code="1200",
-            amount_cents=payment.amount_cents,
-            description=f"Payment received - {payment.payment_number}",
-            reference_number=payment.payment_number,
-            transaction_date=payment.payment_date,
-            created_by=payment.received_by,
-            source_payment=payment,
-        )
+        common = {
+            "reference_number": payment.payment_number,
+            "transaction_date": payment.payment_date,
+            "created_by": payment.received_by,
+            "source_payment": payment,
+        }
+        specs = [
+            {
+                "debit_account_code": bank_account_code,
+                "credit_account_code": "1200",
+                "amount_cents": payment.amount_cents,
+                "description": f"Payment received - {payment.payment_number}",
+                **common,
+            }
+        ]
         if payment.tds_cents > 0:
-            DoubleEntryBookkeeping.create_journal_entry(
-                hospital=payment.hospital,
-                debit_account_code="1400",
-                credit_account_code="2300",
-                amount_cents=payment.tds_cents,
-                description=f"TDS on payment {payment.payment_number}",
-                reference_number=payment.payment_number,
-                transaction_date=payment.payment_date,
-                created_by=payment.received_by,
-                source_payment=payment,
+            specs.append(
+                {
+                    "debit_account_code": "1400",
+                    "credit_account_code": "2300",
+                    "amount_cents": payment.tds_cents,
+                    "description": f"TDS on payment {payment.payment_number}",
+                    **common,
+                }
             )
-        return entry
+        return specs
+
+    @staticmethod
+    def payroll_entry_specs(payroll):
+        employee_name = payroll.employee.get_full_name()
+        common = {
+            "reference_number": f"PAY-{payroll.id}",
+            "transaction_date": payroll.pay_date,
+            "created_by": payroll.created_by,
+            "source_payroll": payroll,
+        }
+        specs = [
+            {
+                "debit_account_code": "6300",
+                "credit_account_code": "2400",
+                "amount_cents": payroll.net_salary_cents,
+                "description": f"Salary for {employee_name}",
+                **common,
+            }
+        ]
+        if payroll.pf_employer_cents > 0:
+            specs.append(
+                {
+                    "debit_account_code": "6310",
+                    "credit_account_code": "2410",
+                    "amount_cents": payroll.pf_employer_cents,
+                    "description": f"Employer PF contribution for {employee_name}",
+                    **common,
+                }
+            )
+        if payroll.esi_employer_cents > 0:
+            specs.append(
+                {
+                    "debit_account_code": "6320",
+                    "credit_account_code": "2420",
+                    "amount_cents": payroll.esi_employer_cents,
+                    "description": f"Employer ESI contribution for {employee_name}",
+                    **common,
+                }
+            )
+        return specs
+
+    @staticmethod
+    def post_invoice_entries(invoice):
+        return [
+            DoubleEntryBookkeeping.create_journal_entry(hospital=invoice.hospital, **spec)
+            for spec in DoubleEntryBookkeeping.invoice_entry_specs(invoice)
+        ]
+
+    @staticmethod
+    def post_payment_entries(payment):
+        entries = [
+            DoubleEntryBookkeeping.create_journal_entry(hospital=payment.hospital, **spec)
+            for spec in DoubleEntryBookkeeping.payment_entry_specs(payment)
+        ]
+        return entries[0]
 
     @staticmethod
     def post_expense_entries(expense):
@@ -170,50 +231,177 @@ def post_expense_entries(expense):
 
     @staticmethod
     def post_payroll_entries(payroll):
-        entries = []
-        entries.append(
-            DoubleEntryBookkeeping.create_journal_entry(
-                hospital=payroll.hospital,
-                debit_account_code="6300",
-                credit_account_code="2400",
-                amount_cents=payroll.net_salary_cents,
-                description=f"Salary for {payroll.employee.get_full_name()}",
-                reference_number=f"PAY-{payroll.id}",
-                transaction_date=payroll.pay_date,
-                created_by=payroll.created_by,
-                source_payroll=payroll,
+        return [
+            DoubleEntryBookkeeping.create_journal_entry(hospital=payroll.hospital, **spec)
+            for spec in DoubleEntryBookkeeping.payroll_entry_specs(payroll)
+        ]
+
+    @staticmethod
+    def post_invoice_entries_batch(hospital, invoices, created_by=None):
+        invoices = invoices.select_related("created_by").prefetch_related(
+            models.Prefetch(
+                "items",
+                queryset=InvoiceLineItem.objects.filter(cost_price_cents__gt=0),
+                to_attr="costed_items",
             )
         )
-        if payroll.pf_employer_cents > 0:
-            entries.append(
-                DoubleEntryBookkeeping.create_journal_entry(
-                    hospital=payroll.hospital,
-                    debit_account_code="6310",
-                    credit_account_code="2410",
-                    amount_cents=payroll.pf_employer_cents,
-                    description=f"Employer PF contribution for {payroll.employee.get_full_name()}",
-                    reference_number=f"PAY-{payroll.id}",
-                    transaction_date=payroll.pay_date,
-                    created_by=payroll.created_by,
-                    source_payroll=payroll,
-                )
+        return JournalBatchPoster(hospital, created_by=created_by).post(
+            invoices, DoubleEntryBookkeeping.invoice_entry_specs
+        )
+
+    @staticmethod
+    def post_payment_entries_batch(hospital, payments, created_by=None):
+        payments = payments.select_related("received_by")
+        return JournalBatchPoster(hospital, created_by=created_by).post(
+            payments, DoubleEntryBookkeeping.payment_entry_specs
+        )
+
+    @staticmethod
+    def post_payroll_entries_batch(hospital, payrolls, created_by=None):
+        payrolls = payrolls.select_related("employee", "created_by")
+        return JournalBatchPoster(hospital, created_by=created_by).post(
+            payrolls, DoubleEntryBookkeeping.payroll_entry_specs
+        )
+
+
+def audit_log_entry(instance, action_type, user=None):
+    """Audit row for one accounting record, as the post_save handler writes it"""
+    user_id = user.pk if user else None
+    return AccountingAuditLog(
+        hospital_id=getattr(instance, "hospital_id", None),
+        user_id=user_id
+        or getattr(instance, "created_by_id", None)
+        or getattr(instance, "updated_by_id", None),
+        action_type=action_type,
+        table_name=instance._meta.db_table,
+        record_id=str(instance.pk),
+        new_values={
+            "model": type(instance).__name__,
+            "timestamp": timezone.now().isoformat(),
+        },
+    )
+
+
+def log_bulk_changes(instances, action_type, user=None, batch_size=500):
+    """Audit records written by bulk_create, bulk_update or update(), which
+    bypass the post_save audit handler"""
+    AccountingAuditLog.objects.bulk_create(
+        [audit_log_entry(instance, action_type, user) for instance in instances],
+        batch_size=batch_size,
+    )
+
+
+class JournalBatchPoster:
+    """Post journal entries for many source documents in one transaction.
+
+    Accounts, the base currency and period locks are loaded once per batch.
+    Each document's entries are built and validated in memory; a document
+    that fails validation is reported in ``failed`` and the rest of the
+    batch is still inserted with ``bulk_create``.
+    """
+
+    def __init__(self, hospital, created_by=None, batch_size=500):
+        self.hospital = hospital
+        self.created_by = created_by
+        self.batch_size = batch_size
+        self.accounts = {
+            account.account_code: account
+            for account in ChartOfAccounts.objects.filter(
+                hospital=hospital, is_active=True
             )
-        if payroll.esi_employer_cents > 0:
+        }
+        self.currency = Currency.objects.filter(
+            hospital=hospital, is_base_currency=True
+        ).first()
+        self.locked_through = BookLock.objects.filter(hospital=hospital).aggregate(
+            lock_date=models.Max("lock_date")
+        )["lock_date"]
+        self.closed_periods = list(
+            AccountingPeriod.objects.filter(hospital=hospital, is_closed=True).values_list(
+                "start_date", "end_date"
+            )
+        )
+
+    def is_locked(self, transaction_date):
+        if self.locked_through and transaction_date <= self.locked_through:
+            return True
+        return any(
+            start <= transaction_date <= end for start, end in self.closed_periods
+        )
+
+    def build_entries(self, specs):
+        if not self.currency:
+            raise ValueError("No base currency configured")
+        entries = []
+        for spec in specs:
+            transaction_date = spec.get("transaction_date") or timezone.now().date()
+            if self.is_locked(transaction_date):
+                raise ValueError(f"Books are locked for {transaction_date}")
+            if spec["amount_cents"] <= 0:
+                raise ValueError(
+                    f"Entry amount must be positive: {spec['description']}"
+                )
+            created_by = spec.get("created_by") or self.created_by
+            if created_by is None:
+                raise ValueError("No user recorded for journal entry")
+            try:
+                debit_account = self.accounts[spec["debit_account_code"]]
+                credit_account = self.accounts[spec["credit_account_code"]]
+            except KeyError as e:
+                raise ValueError(f"Account not found: {e}")
             entries.append(
-                DoubleEntryBookkeeping.create_journal_entry(
-                    hospital=payroll.hospital,
-                    debit_account_code="6320",
-                    credit_account_code="2420",
-                    amount_cents=payroll.esi_employer_cents,
-                    description=f"Employer ESI contribution for {payroll.employee.get_full_name()}",
-                    reference_number=f"PAY-{payroll.id}",
-                    transaction_date=payroll.pay_date,
-                    created_by=payroll.created_by,
-                    source_payroll=payroll,
+                LedgerEntry(
+                    hospital=self.hospital,
+                    transaction_date=transaction_date,
+                    reference_number=spec["reference_number"],
+                    description=spec["description"][:255],
+                    debit_account=debit_account,
+                    credit_account=credit_account,
+                    amount_cents=spec["amount_cents"],
+                    currency=self.currency,
+                    created_by=created_by,
+                    invoice=spec.get("source_invoice"),
+                    payment=spec.get("source_payment"),
+                    expense=spec.get("source_expense"),
+                    payroll=spec.get("source_payroll"),
                 )
             )
         return entries
 
+    def post(self, documents, spec_builder):
+        prepared = []
+        failed = []
+        for document in documents:
+            try:
+                prepared.append((document, self.build_entries(spec_builder(document))))
+            except (ValueError, AttributeError, TypeError) as e:
+                failed.append({"document_id": document.pk, "error": str(e)})
+        posted = []
+        entries = [entry for _, document_entries in prepared for entry in document_entries]
+        try:
+            with transaction.atomic():
+                LedgerEntry.objects.bulk_create(entries, batch_size=self.batch_size)
+                log_bulk_changes(entries, "CREATE", batch_size=self.batch_size)
+            posted = [document.pk for document, _ in prepared]
+        except DatabaseError:
+            entries = []
+            with transaction.atomic():
+                for document, document_entries in prepared:
+                    try:
+                        with transaction.atomic():
+                            LedgerEntry.objects.bulk_create(document_entries)
+                            log_bulk_changes(document_entries, "CREATE")
+                    except DatabaseError as e:
+                        failed.append({"document_id": document.pk, "error": str(e)})
+                        continue
+                    posted.append(document.pk)
+                    entries.extend(document_entries)
+        return {
+            "posted": posted,
+            "failed": failed,
+            "entries_created": len(entries),
+        }
+
 
 class DepreciationCalculator:
     @staticmethod
@@ -268,60 +456,81 @@ def generate_depreciation_schedule(asset):
 
     @staticmethod
     @transaction.atomic
-    def process_monthly_depreciation(hospital, processing_date=None):
+    def process_monthly_depreciation(hospital, processing_date=None, created_by=None):
+        if created_by is None:
+            raise ValueError("created_by is required to post depreciation entries")
         if not processing_date:
             processing_date = timezone.now().date()
+        if isinstance(processing_date, str):
+            processing_date = date.fromisoformat(processing_date)
+        already_processed = DepreciationSchedule.objects.filter(
+            hospital=hospital,
+            depreciation_date__year=processing_date.year,
+            depreciation_date__month=processing_date.month,
+        ).values_list("asset_id", flat=True)
         active_assets = FixedAsset.objects.filter(
             hospital=hospital,
             is_active=True,
             purchase_date__lt=processing_date,
-        )
-        processed_count = 0
+        ).exclude(id__in=already_processed)
+        monthly_amounts = {}
         for asset in active_assets:
-            existing_entry = DepreciationSchedule.objects.filter(
-                asset=asset,
-                depreciation_date__year=processing_date.year,
-                depreciation_date__month=processing_date.month,
-            ).first()
-            if existing_entry:
-                continue
             monthly_depreciation = (
                 DepreciationCalculator.calculate_monthly_depreciation(asset)
             )
-            if monthly_depreciation <= 0:
+            if monthly_depreciation > 0:
+                monthly_amounts[asset] = monthly_depreciation
+
+        def depreciation_specs(asset):
+            return [
+                {
+                    "debit_account_code": "6900",
+                    "credit_account_code": "1500",
+                    "amount_cents": monthly_amounts[asset],
+                    "description": f"Monthly depreciation for {asset.name}",
+                    "reference_number": f"DEP-{asset.asset_code}-{processing_date.strftime('%Y%m')}",
+                    "transaction_date": processing_date,
+                }
+            ]
+
+        result = JournalBatchPoster(hospital, created_by=created_by).post(
+            list(monthly_amounts), depreciation_specs
+        )
+        posted = set(result["posted"])
+        schedules = []
+        assets = []
+        for asset, monthly_depreciation in monthly_amounts.items():
+            if asset.pk not in posted:
                 continue
             new_accumulated = (
                 asset.accumulated_depreciation_cents + monthly_depreciation
             )
             new_book_value = asset.purchase_cost_cents - new_accumulated
-            DepreciationSchedule.objects.create(
-                hospital=hospital,
-                asset=asset,
-                depreciation_date=processing_date,
-                depreciation_amount_cents=monthly_depreciation,
-                accumulated_depreciation_cents=new_accumulated,
-                book_value_cents=new_book_value,
-                is_processed=True,
+            schedules.append(
+                DepreciationSchedule(
+                    hospital=hospital,
+                    asset=asset,
+                    depreciation_date=processing_date,
+                    depreciation_amount_cents=monthly_depreciation,
+                    accumulated_depreciation_cents=new_accumulated,
+                    book_value_cents=new_book_value,
+                    is_processed=True,
+                    processed_by=created_by,
+                    processed_at=timezone.now(),
+                )
             )
             asset.accumulated_depreciation_cents = new_accumulated
             asset.current_book_value_cents = new_book_value
-            asset.save(
-                update_fields=[
-                    "accumulated_depreciation_cents",
-                    "current_book_value_cents",
-                ]
-            )
-            DoubleEntryBookkeeping.create_journal_entry(
-                hospital=hospital,
-                debit_account_code="6900",
-                credit_account_code="1500",
-                amount_cents=monthly_depreciation,
-                description=f"Monthly depreciation for {asset.name}",
-                reference_number=f"DEP-{asset.asset_code}-{processing_date.strftime('%Y%m')}",
-                transaction_date=processing_date,
-            )
-            processed_count += 1
-        return processed_count
+            assets.append(asset)
+        DepreciationSchedule.objects.bulk_create(schedules, batch_size=500)
+        FixedAsset.objects.bulk_update(
+            assets,
+            ["accumulated_depreciation_cents", "current_book_value_cents"],
+            batch_size=500,
+        )
+        log_bulk_changes(schedules, "CREATE", user=created_by)
+        log_bulk_changes(assets, "UPDATE", user=created_by)
+        return len(assets)
 
 
 class TaxCalculator:
@@ -666,43 +875,247 @@ def export_gst_returns(hospital, start_date, end_date, return_type="GSTR1"):
         return {}
 
 
+DEFAULT_AGEING_BOUNDARIES = (30, 60, 90)
+
+
+class AgeingEngine:
+    """Bucket and total outstanding balances in the database.
+
+    Buckets are ``(label, min_days, max_days)`` tuples where either bound may
+    be ``None``. Day bounds are translated into date bounds on ``date_field``
+    so every bucket becomes a plain indexed range filter and the totals for
+    all buckets come back from a single conditional-aggregation query.
+    """
+
+    INVOICE_GROUPINGS = {
+        "customer": ("customer_id", "customer__customer_code", "customer__name"),
+        "payer": ("invoice_type", "customer_id", "customer__name"),
+        "cost_center": ("cost_center_id", "cost_center__code", "cost_center__name"),
+    }
+    CLAIM_GROUPINGS = {
+        "customer": ("invoice__customer_id", "invoice__customer__name"),
+        "payer": ("insurance_company_id", "insurance_company__name"),
+        "cost_center": (
+            "invoice__cost_center_id",
+            "invoice__cost_center__code",
+            "invoice__cost_center__name",
+        ),
+    }
+
+    def __init__(
+        self,
+        queryset,
+        as_of_date,
+        date_field="due_date",
+        amount_field="balance_cents",
+        buckets=None,
+        groupings=None,
+        select_related=(),
+    ):
+        if isinstance(as_of_date, str):
+            as_of_date = date.fromisoformat(as_of_date)
+        self.queryset = queryset
+        self.as_of_date = as_of_date
+        self.date_field = date_field
+        self.amount_field = amount_field
+        self.buckets = self.validate_buckets(
+            buckets or self.buckets_from_boundaries(DEFAULT_AGEING_BOUNDARIES)
+        )
+        self.groupings = groupings or {}
+        self.select_related = tuple(select_related)
+
+    @staticmethod
+    def buckets_from_boundaries(boundaries):
+        boundaries = sorted({int(b) for b in boundaries})
+        if not boundaries or boundaries[0] <= 0:
+            raise ValueError("Ageing boundaries must be positive day counts")
+        buckets = []
+        lower = 0
+        for upper in boundaries:
+            buckets.append(
+                (f"{lower}-{upper}", None if lower == 0 else lower, upper)
+            )
+            lower = upper + 1
+        buckets.append((f"{boundaries[-1]}+", lower, None))
+        return tuple(buckets)
+
+    @staticmethod
+    def validate_buckets(buckets):
+        labels = set()
+        for label, min_days, max_days in buckets:
+            if label in labels:
+                raise ValueError(f"Duplicate ageing bucket: {label}")
+            if min_days is not None and max_days is not None and min_days > max_days:
+                raise ValueError(f"Invalid ageing bucket range: {label}")
+            labels.add(label)
+        return tuple(buckets)
+
+    def bucket_q(self, min_days, max_days):
+        condition = models.Q()
+        if min_days is not None:
+            condition &= models.Q(
+                **{
+                    f"{self.date_field}__lte": self.as_of_date
+                    - timedelta(days=min_days)
+                }
+            )
+        if max_days is not None:
+            condition &= models.Q(
+                **{
+                    f"{self.date_field}__gte": self.as_of_date
+                    - timedelta(days=max_days)
+                }
+            )
+        return condition
+
+    def _bucket_aggregates(self):
+        aggregates = {}
+        for index, (_, min_days, max_days) in enumerate(self.buckets):
+            condition = self.bucket_q(min_days, max_days)
+            aggregates[f"bucket_{index}_cents"] = models.Sum(
+                self.amount_field, filter=condition, default=0
+            )
+            aggregates[f"bucket_{index}_count"] = models.Count(
+                "pk", filter=condition
+            )
+        aggregates["grand_total"] = models.Sum(self.amount_field, default=0)
+        aggregates["document_count"] = models.Count("pk")
+        return aggregates
+
+    def _unpack(self, row):
+        bucket_totals = {}
+        bucket_counts = {}
+        for index, (label, _, _) in enumerate(self.buckets):
+            bucket_totals[label] = row.pop(f"bucket_{index}_cents") or 0
+            bucket_counts[label] = row.pop(f"bucket_{index}_count") or 0
+        row["bucket_totals"] = bucket_totals
+        row["bucket_counts"] = bucket_counts
+        row["grand_total"] = row.get("grand_total") or 0
+        return row
+
+    def summary(self):
+        return self._unpack(self.queryset.aggregate(**self._bucket_aggregates()))
+
+    def grouped(self, group_by):
+        try:
+            fields = self.groupings[group_by]
+        except KeyError:
+            raise ValueError(f"Unsupported ageing grouping: {group_by}")
+        rows = (
+            self.queryset.order_by()
+            .values(*fields)
+            .annotate(**self._bucket_aggregates())
+            .order_by("-grand_total")
+        )
+        return [self._unpack(dict(row)) for row in rows]
+
+    def bucket_case(self):
+        return models.Case(
+            *[
+                models.When(self.bucket_q(min_days, max_days), then=models.Value(label))
+                for label, min_days, max_days in self.buckets
+            ],
+            default=models.Value(""),
+            output_field=models.CharField(),
+        )
+
+    def detail_queryset(self, bucket=None):
+        queryset = self.queryset.annotate(ageing_bucket=self.bucket_case())
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if bucket is not None:
+            for label, min_days, max_days in self.buckets:
+                if label == bucket:
+                    queryset = queryset.filter(self.bucket_q(min_days, max_days))
+                    break
+            else:
+                raise ValueError(f"Unknown ageing bucket: {bucket}")
+        return queryset.order_by(self.date_field, "pk")
+
+    def days_outstanding(self, obj):
+        reference = getattr(obj, self.date_field)
+        if reference is None:
+            return None
+        return (self.as_of_date - reference).days
+
+    def report(self, group_by=None, page=None, page_size=100, bucket=None):
+        report = {"as_of_date": self.as_of_date, **self.summary()}
+        report["buckets"] = [
+            {"label": label, "min_days": min_days, "max_days": max_days}
+            for label, min_days, max_days in self.buckets
+        ]
+        if group_by:
+            report["group_by"] = group_by
+            report["groups"] = self.grouped(group_by)
+        report["rows"] = self.rows(page, page_size, bucket)
+        if page is not None:
+            report["page"] = max(int(page), 1)
+            report["page_size"] = max(int(page_size), 1)
+        return report
+
+    def rows(self, page=None, page_size=100, bucket=None):
+        """Detail rows; every matching row unless the caller asks for a page."""
+        queryset = self.detail_queryset(bucket)
+        if page is None:
+            return queryset
+        page = max(int(page), 1)
+        page_size = max(int(page_size), 1)
+        offset = (page - 1) * page_size
+        return queryset[offset : offset + page_size]
+
+
 class AgeingReportGenerator:
     @staticmethod
-    def generate_receivables_ageing(hospital, as_of_date):
+    def invoice_ageing_engine(hospital, as_of_date, buckets=None):
         unpaid_invoices = AccountingInvoice.objects.filter(
             hospital=hospital,
             status__in=["SENT", "OVERDUE", "PARTIAL"],
             balance_cents__gt=0,
         )
-        ageing_buckets = {"0-30": [], "31-60": [], "61-90": [], "90+": []}
-        for invoice in unpaid_invoices:
-            days_outstanding = (as_of_date - invoice.due_date).days
-            ageing_data = {
-                "invoice_number": invoice.invoice_number,
-                "customer": str(invoice.customer or invoice.patient),
-                "invoice_date": invoice.invoice_date,
-                "due_date": invoice.due_date,
-                "total_cents": invoice.total_cents,
-                "balance_cents": invoice.balance_cents,
-                "days_outstanding": days_outstanding,
-            }
-            if days_outstanding <= 30:
-                ageing_buckets["0-30"].append(ageing_data)
-            elif days_outstanding <= 60:
-                ageing_buckets["31-60"].append(ageing_data)
-            elif days_outstanding <= 90:
-                ageing_buckets["61-90"].append(ageing_data)
-            else:
-                ageing_buckets["90+"].append(ageing_data)
-        bucket_totals = {}
-        for bucket, invoices in ageing_buckets.items():
-            bucket_totals[bucket] = sum(inv["balance_cents"] for inv in invoices)
-        return {
-            "as_of_date": as_of_date,
-            "ageing_buckets": ageing_buckets,
-            "bucket_totals": bucket_totals,
-            "grand_total": sum(bucket_totals.values()),
-        }
+        return AgeingEngine(
+            unpaid_invoices,
+            as_of_date,
+            date_field="due_date",
+            amount_field="balance_cents",
+            buckets=buckets,
+            groupings=AgeingEngine.INVOICE_GROUPINGS,
+            select_related=("customer", "patient"),
+        )
+
+    @staticmethod
+    def generate_receivables_ageing(
+        hospital,
+        as_of_date,
+        buckets=None,
+        group_by=None,
+        page=None,
+        page_size=100,
+        bucket=None,
+    ):
+        engine = AgeingReportGenerator.invoice_ageing_engine(
+            hospital, as_of_date, buckets
+        )
+        report = engine.report(
+            group_by=group_by, page=page, page_size=page_size, bucket=bucket
+        )
+        invoices = report.pop("rows")
+        ageing_buckets = {label: [] for label, _, _ in engine.buckets}
+        for invoice in invoices:
+            if invoice.ageing_bucket not in ageing_buckets:
+                continue
+            ageing_buckets[invoice.ageing_bucket].append(
+                {
+                    "invoice_number": invoice.invoice_number,
+                    "customer": str(invoice.customer or invoice.patient),
+                    "invoice_date": invoice.invoice_date,
+                    "due_date": invoice.due_date,
+                    "total_cents": invoice.total_cents,
+                    "balance_cents": invoice.balance_cents,
+                    "days_outstanding": engine.days_outstanding(invoice),
+                }
+            )
+        report["ageing_buckets"] = ageing_buckets
+        return report
 
 
 class BankReconciliationHelper:
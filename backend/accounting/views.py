@@ -10,6 +10,7 @@
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from django.db import transaction
 from django.db.models import Q, Sum
 from django.http import HttpResponse
 from django.utils import timezone
@@ -74,6 +75,7 @@
     VendorSerializer,
 )
 from .utils import (
+    AgeingEngine,
     AgeingReportGenerator,
     BankReconciliationHelper,
     DepreciationCalculator,
@@ -81,9 +83,25 @@
     ExportEngine,
     ReportGenerator,
     TaxCalculator,
+    log_bulk_changes,
 )
 
 
+def ageing_params(params):
+    boundaries = params.get("boundaries")
+    if isinstance(boundaries, str):
+        boundaries = [b for b in boundaries.split(",") if b.strip()]
+    return {
+        "buckets": (
+            AgeingEngine.buckets_from_boundaries(boundaries) if boundaries else None
+        ),
+        "group_by": params.get("group_by") or None,
+        "page": params.get("page") or None,
+        "page_size": min(int(params.get("page_size") or 100), 1000),
+        "bucket": params.get("bucket") or None,
+    }
+
+
 class HospitalFilterMixin:
     def get_queryset(self):
         return super().get_queryset().filter(hospital=self.request.user.hospital)
@@ -297,7 +315,22 @@ def overdue(self, request):
         overdue_invoices = self.get_queryset().filter(
             status="OVERDUE", balance_cents__gt=0
         )
-        serializer = self.get_serializer(overdue_invoices, many=True)
+        try:
+            params = ageing_params(request.query_params)
+            engine = AgeingEngine(
+                overdue_invoices,
+                request.query_params.get("as_of_date") or timezone.now().date(),
+                buckets=params["buckets"],
+                select_related=("customer", "patient", "currency", "cost_center"),
+            )
+            # Still a plain list of invoices; bucket totals live in the
+            # aging_report endpoint
+            invoices = engine.rows(
+                params["page"], params["page_size"], params["bucket"]
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(invoices, many=True)
         return Response(serializer.data)
 
 
@@ -371,6 +404,35 @@ def approve(self, request, pk=None):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    @action(detail=False, methods=["post"])
+    def bulk_approve(self, request):
+        payrolls = self.get_queryset().filter(status="DRAFT")
+        payroll_ids = request.data.get("payroll_ids")
+        if payroll_ids:
+            payrolls = payrolls.filter(id__in=payroll_ids)
+        with transaction.atomic():
+            drafts = list(payrolls.select_for_update().only("id", "hospital_id"))
+            result = DoubleEntryBookkeeping.post_payroll_entries_batch(
+                request.user.hospital,
+                PayrollEntry.objects.filter(id__in=[payroll.id for payroll in drafts]),
+                created_by=request.user,
+            )
+            # Payrolls that failed to post stay DRAFT so they can be retried
+            posted = set(result["posted"])
+            approved = [payroll for payroll in drafts if payroll.id in posted]
+            PayrollEntry.objects.filter(id__in=posted).update(
+                status="APPROVED", approved_by=request.user
+            )
+            log_bulk_changes(approved, "APPROVE", user=request.user)
+        return Response(
+            {
+                "approved": len(approved),
+                "posted": len(result["posted"]),
+                "entries_created": result["entries_created"],
+                "failed": result["failed"],
+            }
+        )
+
     @action(detail=True, methods=["get"])
     def salary_slip(self, request, pk=None):
         payroll = self.get_object()
@@ -512,17 +574,24 @@ def pending_claims(self, request):
         pending_claims = self.get_queryset().filter(
             status__in=["SUBMITTED", "UNDER_REVIEW"]
         )
-        serializer = self.get_serializer(pending_claims, many=True)
-        total_pending = (
-            pending_claims.aggregate(total=Sum("claim_amount_cents"))["total"] or 0
-        )
-        return Response(
-            {
-                "claims": serializer.data,
-                "total_pending_cents": total_pending,
-                "count": pending_claims.count(),
-            }
-        )
+        try:
+            params = ageing_params(request.query_params)
+            engine = AgeingEngine(
+                pending_claims,
+                request.query_params.get("as_of_date") or timezone.now().date(),
+                date_field="submission_date",
+                amount_field="claim_amount_cents",
+                buckets=params.pop("buckets"),
+                groupings=AgeingEngine.CLAIM_GROUPINGS,
+                select_related=("invoice", "insurance_company"),
+            )
+            report = engine.report(**params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        report["claims"] = self.get_serializer(report.pop("rows"), many=True).data
+        report["total_pending_cents"] = report["grand_total"]
+        report["count"] = report["document_count"]
+        return Response(report)
 
 
 class TDSEntryViewSet(HospitalFilterMixin, viewsets.ModelViewSet):
@@ -594,9 +663,21 @@ def post(self, request):
             return Response(report_data)
         elif report_type == "aging_report":
             as_of_date = request.data.get("as_of_date", timezone.now().date())
-            report_data = AgeingReportGenerator.generate_receivables_ageing(
-                hospital, as_of_date
-            )
+            try:
+                params = ageing_params(request.data)
+                report_data = AgeingReportGenerator.generate_receivables_ageing(
+                    hospital,
+                    as_of_date,
+                    buckets=params["buckets"],
+                    group_by=params["group_by"],
+                    page=params["page"],
+                    page_size=params["page_size"],
+                    bucket=params["bucket"],
+                )
+            except ValueError as e:
+                return Response(
+                    {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+                )
             return Response(report_data)
         else:
             return Response(
@@ -783,6 +864,7 @@ def post(self, request):
             processed_count = DepreciationCalculator.process_monthly_depreciation(
                 hospital,
                 processing_date,
+                created_by=request.user,
             )
             return Response(
                 {
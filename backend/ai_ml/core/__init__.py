@@ -1,11 +1,16 @@
-from .feature_engineering import FeatureEngineeringPipeline
+from .feature_engineering import FeatureEngineeringPipeline, TransformPlan
 from .inference_engine import InferenceEngine
+from .model_cache import ModelArtifactCache
 from .model_monitoring import ModelMonitoring
 from .model_registry import ModelRegistry
+from .process_pool import ProcessInferencePool
 
 __all__ = [
     "ModelRegistry",
+    "ModelArtifactCache",
     "FeatureEngineeringPipeline",
+    "TransformPlan",
     "InferenceEngine",
+    "ProcessInferencePool",
     "ModelMonitoring",
 ]
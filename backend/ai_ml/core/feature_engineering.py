@@ -2,12 +2,15 @@
 feature_engineering module
 """
 
+import hashlib
+import json
 import logging
 import re
 import secrets
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -29,6 +32,125 @@ class FeatureType(Enum):
     UTILIZATION = "utilization"
 
 
+TRANSFORM_PLAN_VERSION = 1
+
+INTERACTION_FEATURES = (
+    ("age_comorbidity_interaction", "age_normalized", "comorbidity_count"),
+    ("severity_medication_interaction", "charlson_index", "medication_count"),
+    ("bp_hr_interaction", "bp_normalized", "hr_normalized"),
+)
+
+
+@dataclass
+class TransformPlan:
+    """Fitted, serialisable state needed to turn engineered features into a
+    model matrix: column order, category codes, imputation values, scaler
+    parameters, selected columns and interaction terms."""
+
+    feature_types: List[str]
+    input_columns: List[str]
+    category_maps: Dict[str, Dict[str, int]]
+    fill_values: List[float]
+    means: List[float]
+    scales: List[float]
+    selected_columns: List[str]
+    interactions: List[Tuple[str, str, str]]
+    version: int = TRANSFORM_PLAN_VERSION
+    fitted_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    _arrays: Optional[Dict] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def output_columns(self) -> List[str]:
+        return list(self.selected_columns) + [name for name, _, _ in self.interactions]
+
+    @property
+    def fingerprint(self) -> str:
+        payload = self.to_dict()
+        payload.pop("fitted_at")
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data.pop("_arrays")
+        data["interactions"] = [list(term) for term in self.interactions]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TransformPlan":
+        data = dict(data)
+        version = data.get("version")
+        if version != TRANSFORM_PLAN_VERSION:
+            raise ValueError(f"Unsupported transform plan version: {version}")
+        data["interactions"] = [tuple(term) for term in data["interactions"]]
+        return cls(**data)
+
+    def _compiled(self) -> Dict:
+        if self._arrays is None:
+            index = {name: i for i, name in enumerate(self.input_columns)}
+            selected = np.array(
+                [index[name] for name in self.selected_columns], dtype=np.intp
+            )
+            selected_index = {name: i for i, name in enumerate(self.selected_columns)}
+            self._arrays = {
+                "index": index,
+                "fill": np.asarray(self.fill_values, dtype=float),
+                "means": np.asarray(self.means, dtype=float),
+                "scales": np.asarray(self.scales, dtype=float),
+                "selected": selected,
+                "left": np.array(
+                    [selected_index[left] for _, left, _ in self.interactions],
+                    dtype=np.intp,
+                ),
+                "right": np.array(
+                    [selected_index[right] for _, _, right in self.interactions],
+                    dtype=np.intp,
+                ),
+            }
+        return self._arrays
+
+    def is_engineered(self, record: Mapping) -> bool:
+        """Whether ``record`` already holds every engineered input column."""
+        return all(column in record for column in self.input_columns)
+
+    def encode(self, records: Sequence[Mapping]) -> np.ndarray:
+        """Lay engineered feature records out as a float matrix in plan order.
+
+        Unknown columns are ignored; missing or unseen values become NaN and
+        are imputed by ``apply``.
+        """
+        index = self._compiled()["index"]
+        matrix = np.full((len(records), len(self.input_columns)), np.nan)
+        for row, record in enumerate(records):
+            for name, value in record.items():
+                column = index.get(name)
+                if column is None or value is None:
+                    continue
+                categories = self.category_maps.get(name)
+                if categories is not None:
+                    value = categories.get(str(value))
+                    if value is None:
+                        continue
+                try:
+                    matrix[row, column] = float(value)
+                except (TypeError, ValueError):
+                    continue
+        return matrix
+
+    def apply(self, matrix: np.ndarray) -> np.ndarray:
+        arrays = self._compiled()
+        matrix = np.asarray(matrix, dtype=float)
+        matrix = np.where(np.isnan(matrix), arrays["fill"], matrix)
+        matrix = (matrix - arrays["means"]) / arrays["scales"]
+        matrix = matrix[:, arrays["selected"]]
+        if self.interactions:
+            products = matrix[:, arrays["left"]] * matrix[:, arrays["right"]]
+            matrix = np.hstack([matrix, products])
+        return matrix
+
+
 class FeatureEngineeringPipeline:
     def __init__(self):
         self.scalers = {}
@@ -36,6 +158,7 @@ def __init__(self):
         self.feature_metadata = {}
         self.feature_importance = {}
         self.feature_engineering_rules = self._load_feature_rules()
+        self.plan = None
 
     def _load_feature_rules(self) -> Dict:
         return {
@@ -82,48 +205,8 @@ def engineer_features(
         target_variable: Optional[str] = None,
     ) -> Dict:
         try:
-            if feature_types is None:
-                feature_types = list(FeatureType)
-            if isinstance(raw_data, dict):
-                data = pd.DataFrame([raw_data])
-            else:
-                data = raw_data.copy()
-            engineered_features = {}
-            feature_metadata = {}
-            for feature_type in feature_types:
-                if feature_type == FeatureType.DEMOGRAPHIC:
-                    demo_features = self._engineer_demographic_features(data)
-                    engineered_features.update(demo_features)
-                    feature_metadata["demographic"] = list(demo_features.keys())
-                elif feature_type == FeatureType.CLINICAL:
-                    clinical_features = self._engineer_clinical_features(data)
-                    engineered_features.update(clinical_features)
-                    feature_metadata["clinical"] = list(clinical_features.keys())
-                elif feature_type == FeatureType.TEMPORAL:
-                    temporal_features = self._engineer_temporal_features(data)
-                    engineered_features.update(temporal_features)
-                    feature_metadata["temporal"] = list(temporal_features.keys())
-                elif feature_type == FeatureType.LABORATORY:
-                    lab_features = self._engineer_laboratory_features(data)
-                    engineered_features.update(lab_features)
-                    feature_metadata["laboratory"] = list(lab_features.keys())
-                elif feature_type == FeatureType.MEDICATION:
-                    med_features = self._engineer_medication_features(data)
-                    engineered_features.update(med_features)
-                    feature_metadata["medication"] = list(med_features.keys())
-                elif feature_type == FeatureType.VITAL_SIGNS:
-                    vital_features = self._engineer_vital_signs_features(data)
-                    engineered_features.update(vital_features)
-                    feature_metadata["vital_signs"] = list(vital_features.keys())
-                elif feature_type == FeatureType.SOCIAL:
-                    social_features = self._engineer_social_features(data)
-                    engineered_features.update(social_features)
-                    feature_metadata["social"] = list(social_features.keys())
-                elif feature_type == FeatureType.UTILIZATION:
-                    util_features = self._engineer_utilization_features(data)
-                    engineered_features.update(util_features)
-                    feature_metadata["utilization"] = list(util_features.keys())
-            features_df = pd.DataFrame(engineered_features)
+            data = self._as_frame(raw_data)
+            features_df, feature_metadata = self._derive_features(data, feature_types)
             features_df = self._handle_missing_values(features_df)
             features_df, scaling_info = self._scale_features(features_df)
             if target_variable and target_variable in data.columns:
@@ -146,6 +229,135 @@ def engineer_features(
             logger.error(f"Feature engineering failed: {e}")
             return {"error": str(e)}
 
+    def fit(
+        self,
+        raw_data: Union[pd.DataFrame, Dict, List[Dict]],
+        feature_types: Optional[List[FeatureType]] = None,
+        target_variable: Optional[str] = None,
+    ) -> TransformPlan:
+        """Fit a reusable transform plan on training data and keep it on
+        ``self.plan``."""
+        data = self._as_frame(raw_data)
+        features_df, _ = self._derive_features(data, feature_types)
+        input_columns = list(features_df.columns)
+        category_maps = {}
+        for column in input_columns:
+            if not pd.api.types.is_numeric_dtype(features_df[column]):
+                categories = sorted(
+                    {str(value) for value in features_df[column].dropna().unique()}
+                )
+                category_maps[column] = {
+                    category: code for code, category in enumerate(categories)
+                }
+        plan = TransformPlan(
+            feature_types=[
+                feature_type.value
+                for feature_type in (feature_types or list(FeatureType))
+            ],
+            input_columns=input_columns,
+            category_maps=category_maps,
+            fill_values=[],
+            means=[],
+            scales=[],
+            selected_columns=input_columns,
+            interactions=[],
+        )
+        matrix = plan.encode(features_df.to_dict("records"))
+        fill_values = []
+        for column in range(matrix.shape[1]):
+            observed = matrix[:, column][~np.isnan(matrix[:, column])]
+            if observed.size == 0 or np.isin(observed, (0.0, 1.0)).all():
+                fill_values.append(0.0)
+            else:
+                fill_values.append(float(np.median(observed)))
+        matrix = np.where(np.isnan(matrix), np.asarray(fill_values), matrix)
+        means = matrix.mean(axis=0) if len(matrix) else np.zeros(len(input_columns))
+        scales = matrix.std(axis=0) if len(matrix) else np.ones(len(input_columns))
+        scales[scales == 0] = 1.0
+        for column, name in enumerate(input_columns):
+            if name in category_maps:
+                means[column] = 0.0
+                scales[column] = 1.0
+        selected_columns = input_columns
+        if target_variable and target_variable in data.columns:
+            scaled = pd.DataFrame((matrix - means) / scales, columns=input_columns)
+            _, selected_columns = self._select_features(scaled, data[target_variable])
+        plan.fill_values = fill_values
+        plan.means = means.tolist()
+        plan.scales = scales.tolist()
+        plan.selected_columns = list(selected_columns)
+        plan.interactions = [
+            (name, left, right)
+            for name, left, right in INTERACTION_FEATURES
+            if left in selected_columns and right in selected_columns
+        ]
+        plan._arrays = None
+        self.plan = plan
+        return plan
+
+    def transform(
+        self,
+        raw_data: Union[pd.DataFrame, Dict, List[Dict]],
+        plan: Optional[TransformPlan] = None,
+    ) -> np.ndarray:
+        """Turn raw patient records into a model matrix using a fitted plan.
+
+        Records that already carry the engineered features (for example from
+        the online feature store) skip pandas and go through
+        ``transform_records``.
+        """
+        plan = plan or self.plan
+        if plan is None:
+            raise ValueError("Transform plan has not been fitted")
+        records = [raw_data] if isinstance(raw_data, Mapping) else raw_data
+        if isinstance(records, list) and all(
+            isinstance(record, Mapping) and plan.is_engineered(record)
+            for record in records
+        ):
+            return self.transform_records(records, plan)
+        feature_types = [FeatureType(value) for value in plan.feature_types]
+        features_df, _ = self._derive_features(self._as_frame(raw_data), feature_types)
+        return self.transform_records(features_df.to_dict("records"), plan)
+
+    def transform_records(
+        self, records: Sequence[Mapping], plan: Optional[TransformPlan] = None
+    ) -> np.ndarray:
+        """NumPy-only path for records that already hold engineered features."""
+        plan = plan or self.plan
+        if plan is None:
+            raise ValueError("Transform plan has not been fitted")
+        return plan.apply(plan.encode(records))
+
+    def _as_frame(self, raw_data: Union[pd.DataFrame, Dict, List[Dict]]) -> pd.DataFrame:
+        if isinstance(raw_data, dict):
+            return pd.DataFrame([raw_data])
+        if isinstance(raw_data, pd.DataFrame):
+            return raw_data.copy()
+        return pd.DataFrame(list(raw_data))
+
+    def _derive_features(
+        self, data: pd.DataFrame, feature_types: Optional[List[FeatureType]] = None
+    ) -> Tuple[pd.DataFrame, Dict]:
+        if feature_types is None:
+            feature_types = list(FeatureType)
+        engineers = {
+            FeatureType.DEMOGRAPHIC: self._engineer_demographic_features,
+            FeatureType.CLINICAL: self._engineer_clinical_features,
+            FeatureType.TEMPORAL: self._engineer_temporal_features,
+            FeatureType.LABORATORY: self._engineer_laboratory_features,
+            FeatureType.MEDICATION: self._engineer_medication_features,
+            FeatureType.VITAL_SIGNS: self._engineer_vital_signs_features,
+            FeatureType.SOCIAL: self._engineer_social_features,
+            FeatureType.UTILIZATION: self._engineer_utilization_features,
+        }
+        engineered_features = {}
+        feature_metadata = {}
+        for feature_type in feature_types:
+            features = engineers[feature_type](data)
+            engineered_features.update(features)
+            feature_metadata[feature_type.value] = list(features.keys())
+        return pd.DataFrame(engineered_features), feature_metadata
+
     def _engineer_demographic_features(self, data: pd.DataFrame) -> Dict:
         features = {}
         try:
@@ -614,18 +826,9 @@ def _scale_features(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
 
     def _create_interaction_features(self, df: pd.DataFrame) -> pd.DataFrame:
         interaction_features = pd.DataFrame(index=df.index)
-        if "age_normalized" in df.columns and "comorbidity_count" in df.columns:
-            interaction_features["age_comorbidity_interaction"] = (
-                df["age_normalized"] * df["comorbidity_count"]
-            )
-        if "charlson_index" in df.columns and "medication_count" in df.columns:
-            interaction_features["severity_medication_interaction"] = (
-                df["charlson_index"] * df["medication_count"]
-            )
-        if "bp_normalized" in df.columns and "hr_normalized" in df.columns:
-            interaction_features["bp_hr_interaction"] = (
-                df["bp_normalized"] * df["hr_normalized"]
-            )
+        for name, left, right in INTERACTION_FEATURES:
+            if left in df.columns and right in df.columns:
+                interaction_features[name] = df[left] * df[right]
         return interaction_features
 
     def _select_features(
@@ -9,8 +9,10 @@
 import threading
 import time
 import weakref
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Union
@@ -25,6 +27,7 @@
 
 from .feature_engineering import FeatureEngineeringPipeline
 from .model_registry import ModelRegistry
+from .process_pool import ProcessInferencePool
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +47,19 @@ class InferenceMode(Enum):
     ASYNC = "async"
 
 
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(InferencePriority)}
+
+# Longest a request of each priority may sit in a micro-batch waiting for
+# company before the batch is flushed (capped by the engine's max wait).
+MICRO_BATCH_WAIT_MS = {
+    InferencePriority.CRITICAL: 0,
+    InferencePriority.HIGH: 2,
+    InferencePriority.NORMAL: 10,
+    InferencePriority.LOW: 25,
+    InferencePriority.BACKGROUND: 50,
+}
+
+
 @dataclass
 class InferenceRequest:
     request_id: str
@@ -72,6 +88,231 @@ class InferenceResponse:
     error: Optional[str] = None
 
 
+@dataclass
+class _PendingPrediction:
+    request: InferenceRequest
+    flush_at: float
+    expires_at: float
+    future: Future = field(default_factory=Future)
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row requests for the same model.
+
+    Requests are grouped per ``model_id`` and flushed as one batch when
+    ``max_batch_size`` is reached or when the most urgent request's wait
+    budget (see ``MICRO_BATCH_WAIT_MS``) runs out. Batches are handed to
+    ``process_batch`` on ``executor`` and results are scattered back to each
+    caller's future.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[str, List[InferenceRequest]], List],
+        executor: ThreadPoolExecutor,
+        max_batch_size: int = 64,
+        max_wait_ms: int = 10,
+    ):
+        self.process_batch = process_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending = defaultdict(list)
+        self._condition = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, request: InferenceRequest) -> Future:
+        now = time.monotonic()
+        wait_ms = min(MICRO_BATCH_WAIT_MS[request.priority], self.max_wait_ms)
+        pending = _PendingPrediction(
+            request=request,
+            flush_at=now + wait_ms / 1000.0,
+            expires_at=now + request.timeout_ms / 1000.0,
+        )
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("Micro-batcher is shut down")
+            self._pending[request.model_id].append(pending)
+            self._condition.notify()
+        return pending.future
+
+    def _take_ready(self, now: float, flush_all: bool = False):
+        ready = []
+        next_flush = None
+        for model_id in list(self._pending):
+            pending = self._pending[model_id]
+            while pending and (
+                flush_all
+                or len(pending) >= self.max_batch_size
+                or min(item.flush_at for item in pending) <= now
+            ):
+                pending.sort(
+                    key=lambda item: (
+                        PRIORITY_RANK[item.request.priority],
+                        item.flush_at,
+                    )
+                )
+                ready.append((model_id, pending[: self.max_batch_size]))
+                del pending[: self.max_batch_size]
+            if pending:
+                flush_at = min(item.flush_at for item in pending)
+                next_flush = (
+                    flush_at if next_flush is None else min(next_flush, flush_at)
+                )
+            else:
+                del self._pending[model_id]
+        return ready, next_flush
+
+    def _dispatch_loop(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    ready, next_flush = self._take_ready(now, not self._running)
+                    if ready or not self._running:
+                        break
+                    self._condition.wait(
+                        None if next_flush is None else max(next_flush - now, 0)
+                    )
+                running = self._running
+            for model_id, batch in ready:
+                try:
+                    self.executor.submit(self._run_batch, model_id, batch)
+                except RuntimeError:
+                    self._run_batch(model_id, batch)
+            if not running:
+                return
+
+    def _run_batch(self, model_id: str, batch: List[_PendingPrediction]):
+        now = time.monotonic()
+        live = []
+        for item in batch:
+            if item.expires_at <= now:
+                item.future.set_result(
+                    InferenceResponse(
+                        request_id=item.request.request_id,
+                        model_id=model_id,
+                        predictions=None,
+                        confidence=0.0,
+                        processing_time_ms=item.request.timeout_ms,
+                        error="Timeout reached",
+                    )
+                )
+            else:
+                live.append(item)
+        if not live:
+            return
+        try:
+            responses = self.process_batch(model_id, [item.request for item in live])
+        except Exception as e:
+            logger.error(f"Micro-batch for {model_id} failed: {e}")
+            for item in live:
+                item.future.set_exception(e)
+            return
+        for item, response in zip(live, responses):
+            item.future.set_result(response)
+            if item.request.callback:
+                try:
+                    item.request.callback(response)
+                except Exception as e:
+                    logger.error(
+                        f"Callback failed for request {item.request.request_id}: {e}"
+                    )
+
+    def queue_depths(self) -> Dict[str, int]:
+        with self._condition:
+            return {model_id: len(items) for model_id, items in self._pending.items()}
+
+    def shutdown(self, timeout: float = 5.0):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join(timeout=timeout)
+
+
+def build_feature_matrix(
+    feature_pipeline, inputs: List[Any], transform_plan=None
+) -> tuple:
+    """Build one feature matrix for ``inputs`` and each input's row span.
+
+    Raw dict records go through the model's fitted transform plan together in
+    one call. Without a plan each record is engineered on its own, since
+    ``engineer_features`` fits scaling and imputation to whatever it is given
+    and a score must not depend on the other requests in the batch.
+    DataFrame/array inputs are taken as ready-made feature rows.
+    """
+    blocks = [None] * len(inputs)
+    records = [
+        (index, data) for index, data in enumerate(inputs) if isinstance(data, dict)
+    ]
+    if records and transform_plan is not None:
+        values = feature_pipeline.transform(
+            [record for _, record in records], transform_plan
+        )
+        for row, (index, _) in enumerate(records):
+            blocks[index] = values[row : row + 1]
+    else:
+        for index, record in records:
+            features_result = feature_pipeline.engineer_features(record)
+            if "error" in features_result:
+                raise ValueError(features_result["error"])
+            blocks[index] = features_result["features"].values
+    for index, data in enumerate(inputs):
+        if blocks[index] is None:
+            if isinstance(data, pd.DataFrame):
+                blocks[index] = data.values
+            else:
+                blocks[index] = np.atleast_2d(np.asarray(data))
+    spans = []
+    offset = 0
+    for block in blocks:
+        spans.append((offset, offset + len(block)))
+        offset += len(block)
+    return np.vstack(blocks), spans
+
+
+def predict_rows(model: Any, features: np.ndarray) -> tuple:
+    """Return per-row predictions and confidences from one model call."""
+    if hasattr(model, "predict_proba"):
+        probabilities = np.asarray(model.predict_proba(features))
+        indices = probabilities.argmax(axis=1)
+        classes = getattr(model, "classes_", None)
+        predictions = np.asarray(classes)[indices] if classes is not None else indices
+        return predictions, probabilities.max(axis=1)
+    predictions, confidence = predict_single(model, features)
+    predictions = np.asarray(predictions)
+    confidences = np.broadcast_to(
+        np.asarray(confidence, dtype=float), (len(features),)
+    )
+    return predictions, confidences
+
+
+def predict_single(model: Any, features: np.ndarray) -> tuple:
+    try:
+        if hasattr(model, "predict_proba"):
+            probabilities = model.predict_proba(features)
+            predictions = model.predict(features)
+            confidence = float(np.max(probabilities))
+        elif hasattr(model, "predict"):
+            predictions = model.predict(features)
+            confidence = 1.0
+        elif hasattr(model, "__call__"):
+            result = model(features)
+            if isinstance(result, tuple):
+                predictions, confidence = result
+            else:
+                predictions = result
+                confidence = 1.0
+        else:
+            raise ValueError("Model does not have prediction method")
+        return predictions, confidence
+    except Exception as e:
+        logger.error(f"Prediction failed: {e}")
+        raise
+
+
 class InferenceEngine:
     _instances = weakref.WeakSet()
 
@@ -84,12 +325,21 @@ def __new__(cls, *args, **kwargs):
     def __init__(
         self,
         max_workers: int = 10,
-        cache_size: int = 10000,
         enable_gpu: bool = True,
         redis_host: str = None,
+        micro_batching: bool = False,
+        max_batch_size: int = 64,
+        max_batch_wait_ms: int = 10,
+        feature_store=None,
+        warm_start: bool = False,
+        process_workers: int = 0,
+        registry_path: Optional[str] = None,
     ):
-        self.model_registry = ModelRegistry()
+        self.model_registry = ModelRegistry(registry_path)
         self.feature_pipeline = FeatureEngineeringPipeline()
+        # Optional online feature store (shared.feature_store.PatientFeatureStore)
+        # used to fill in features for requests that reference a patient_id.
+        self.feature_store = feature_store
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.queues = {
             InferencePriority.CRITICAL: queue.PriorityQueue(maxsize=100),
@@ -98,8 +348,9 @@ def __init__(
             InferencePriority.LOW: queue.PriorityQueue(maxsize=2000),
             InferencePriority.BACKGROUND: queue.PriorityQueue(maxsize=5000),
         }
-        self.model_cache = {}
-        self.cache_size = cache_size
+        # Loaded models live in the registry's process-wide artifact cache,
+        # shared by every engine in this process and bounded by size.
+        self.model_cache = self.model_registry.artifact_cache
         self.performance_metrics = {
             "total_requests": 0,
             "successful_requests": 0,
@@ -124,12 +375,47 @@ def __init__(
         self.workers = []
         self._shutdown_event = threading.Event()
         self._cache_lock = threading.RLock()
+        self._metrics_lock = threading.Lock()
+        self.max_batch_size = max_batch_size
+        self.batcher = (
+            MicroBatcher(
+                self._process_batch,
+                self.executor,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_batch_wait_ms,
+            )
+            if micro_batching
+            else None
+        )
+        # With process_workers > 0, feature engineering and model calls run
+        # in spawned worker processes and models are loaded there, not here.
+        self.process_pool = (
+            ProcessInferencePool(
+                num_workers=process_workers,
+                registry_path=self.model_registry.registry_path,
+            )
+            if process_workers
+            else None
+        )
+        if warm_start:
+            self.warm_up()
         self._start_workers()
         self.monitor_thread = threading.Thread(
             target=self._monitor_performance, daemon=True
         )
         self.monitor_thread.start()
 
+    def warm_up(self, environment: str = "production"):
+        """Load the serving models for ``environment`` ahead of traffic"""
+        if self.process_pool is not None:
+            return self.process_pool.warm(
+                [
+                    model_info["model_id"]
+                    for model_info in self.model_registry.serving_models(environment)
+                ]
+            )
+        return self.model_registry.warm_models(environment)
+
     def _check_gpu_availability(self) -> bool:
         try:
             import torch
@@ -213,6 +499,27 @@ def predict(
                         return cached_response
                 else:
                     self.performance_metrics["cache_misses"] += 1
+            if self.batcher is not None and mode in (
+                InferenceMode.REAL_TIME,
+                InferenceMode.BATCH,
+            ):
+                future = self.batcher.submit(request)
+                if async_callback:
+                    return request_id
+                try:
+                    response = future.result(timeout=timeout_ms / 1000.0)
+                except FutureTimeoutError:
+                    return InferenceResponse(
+                        request_id=request_id,
+                        model_id=model_id,
+                        predictions=None,
+                        confidence=0.0,
+                        processing_time_ms=timeout_ms,
+                        error="Timeout reached",
+                    )
+                if mode == InferenceMode.REAL_TIME and not response.error:
+                    self._cache_prediction(cache_key, response)
+                return response
             if not async_callback and mode == InferenceMode.REAL_TIME:
                 response = self._process_request(request)
                 self._update_metrics(response)
@@ -254,49 +561,44 @@ def predict_batch(
         priority: InferencePriority = InferencePriority.NORMAL,
         timeout_ms: int = 5000,
     ) -> List[InferenceResponse]:
-        try:
-            if not input_data_list:
-                return []
-            responses = []
-            futures = []
-            for i, input_data in enumerate(input_data_list):
-                future = self.executor.submit(
-                    self.predict,
-                    model_id=model_id,
-                    input_data=input_data,
-                    priority=priority,
-                    mode=InferenceMode.BATCH,
-                    timeout_ms=timeout_ms,
-                )
-                futures.append(future)
-            for future in as_completed(futures, timeout=timeout_ms / 1000):
-                try:
-                    response = future.result()
-                    responses.append(response)
-                except Exception as e:
-                    responses.append(
-                        InferenceResponse(
-                            request_id="batch_error",
-                            model_id=model_id,
-                            predictions=None,
-                            confidence=0.0,
-                            processing_time_ms=0,
-                            error=str(e),
-                        )
+        """Score many rows with one feature transform and model call per chunk.
+
+        Responses are returned in input order.
+        """
+        if not input_data_list:
+            return []
+        batch_id = f"batch_{int(time.time() * 1000000)}"
+        requests = [
+            InferenceRequest(
+                request_id=f"{batch_id}_{index}",
+                model_id=model_id,
+                input_data=input_data,
+                priority=priority,
+                mode=InferenceMode.BATCH,
+                timeout_ms=timeout_ms,
+                metadata={},
+            )
+            for index, input_data in enumerate(input_data_list)
+        ]
+        deadline = time.time() + timeout_ms / 1000.0
+        responses = []
+        for start in range(0, len(requests), self.max_batch_size):
+            chunk = requests[start : start + self.max_batch_size]
+            if time.time() >= deadline:
+                responses.extend(
+                    InferenceResponse(
+                        request_id=request.request_id,
+                        model_id=model_id,
+                        predictions=None,
+                        confidence=0.0,
+                        processing_time_ms=timeout_ms,
+                        error="Timeout reached",
                     )
-            return responses
-        except Exception as e:
-            logger.error(f"Batch prediction failed: {e}")
-            return [
-                InferenceResponse(
-                    request_id="batch_error",
-                    model_id=model_id,
-                    predictions=None,
-                    confidence=0.0,
-                    processing_time_ms=0,
-                    error=str(e),
+                    for request in chunk
                 )
-            ]
+                continue
+            responses.extend(self._process_batch(model_id, chunk))
+        return responses
 
     def predict_stream(
         self,
@@ -326,16 +628,24 @@ def stream_processor():
         return stream_id
 
     def _process_request(self, request: InferenceRequest) -> InferenceResponse:
+        if self.process_pool is not None:
+            return self._process_remote(request.model_id, [request])[0]
         start_time = time.time()
         try:
             model_info = self._get_cached_model(request.model_id)
             if not model_info:
                 raise ValueError(f"Model not found: {request.model_id}")
             model = model_info["model_object"]
-            if isinstance(request.input_data, dict):
-                features_result = self.feature_pipeline.engineer_features(
-                    request.input_data
+            transform_plan = model_info.get("transform_plan")
+            input_data = request.input_data
+            if isinstance(input_data, dict):
+                input_data = self._with_store_features([(0, input_data)])[0][1]
+            if transform_plan is not None and isinstance(input_data, dict):
+                features_df = self.feature_pipeline.transform(
+                    input_data, transform_plan
                 )
+            elif isinstance(input_data, dict):
+                features_result = self.feature_pipeline.engineer_features(input_data)
                 if "error" in features_result:
                     raise ValueError(features_result["error"])
                 features_df = features_result["features"]
@@ -367,40 +677,148 @@ def _process_request(self, request: InferenceRequest) -> InferenceResponse:
                 error=str(e),
             )
 
-    def _make_prediction(self, model: Any, features: np.ndarray) -> tuple:
+    def _process_batch(
+        self, model_id: str, requests: List[InferenceRequest]
+    ) -> List[InferenceResponse]:
+        if self.process_pool is not None:
+            responses = self._process_remote(model_id, requests)
+            for response in responses:
+                self._update_metrics(response)
+            return responses
+        start_time = time.time()
         try:
-            if hasattr(model, "predict_proba"):
-                probabilities = model.predict_proba(features)
-                predictions = model.predict(features)
-                confidence = float(np.max(probabilities))
-            elif hasattr(model, "predict"):
-                predictions = model.predict(features)
-                confidence = 1.0
-            elif hasattr(model, "__call__"):
-                result = model(features)
-                if isinstance(result, tuple):
-                    predictions, confidence = result
-                else:
-                    predictions = result
-                    confidence = 1.0
-            else:
-                raise ValueError("Model does not have prediction method")
-            return predictions, confidence
+            model_info = self._get_cached_model(model_id)
+            if not model_info:
+                raise ValueError(f"Model not found: {model_id}")
+            features, spans = self._batch_features(
+                requests, model_info.get("transform_plan")
+            )
+            predictions, confidences = self._make_batch_prediction(
+                model_info["model_object"], features
+            )
         except Exception as e:
-            logger.error(f"Prediction failed: {e}")
-            raise
+            logger.warning(
+                f"Batched inference failed for {model_id}, "
+                f"falling back to per-request processing: {e}"
+            )
+            responses = [self._process_request(request) for request in requests]
+            for response in responses:
+                self._update_metrics(response)
+            return responses
+        processing_time = (time.time() - start_time) * 1000
+        responses = self._batch_responses(
+            model_id, requests, predictions, confidences, spans, processing_time
+        )
+        for response in responses:
+            self._update_metrics(response)
+        return responses
+
+    def _process_remote(
+        self, model_id: str, requests: List[InferenceRequest]
+    ) -> List[InferenceResponse]:
+        """Score ``requests`` in the process pool, at the most urgent priority."""
+        start_time = time.time()
+        try:
+            future = self.process_pool.submit(
+                model_id,
+                self._request_inputs(requests),
+                priority_rank=min(
+                    PRIORITY_RANK[request.priority] for request in requests
+                ),
+            )
+            timeout_s = max(request.timeout_ms for request in requests) / 1000.0
+            try:
+                predictions, confidences, spans = future.result(timeout=timeout_s)
+            except FutureTimeoutError:
+                future.cancel()
+                raise TimeoutError("Timeout reached")
+        except Exception as e:
+            processing_time = (time.time() - start_time) * 1000
+            logger.error(f"Remote inference failed for {model_id}: {e}")
+            return [
+                InferenceResponse(
+                    request_id=request.request_id,
+                    model_id=model_id,
+                    predictions=None,
+                    confidence=0.0,
+                    processing_time_ms=processing_time,
+                    error=str(e),
+                )
+                for request in requests
+            ]
+        processing_time = (time.time() - start_time) * 1000
+        return self._batch_responses(
+            model_id, requests, predictions, confidences, spans, processing_time
+        )
+
+    def _batch_responses(
+        self,
+        model_id: str,
+        requests: List[InferenceRequest],
+        predictions: np.ndarray,
+        confidences: np.ndarray,
+        spans: List[tuple],
+        processing_time: float,
+    ) -> List[InferenceResponse]:
+        return [
+            InferenceResponse(
+                request_id=request.request_id,
+                model_id=model_id,
+                predictions=predictions[lo:hi],
+                confidence=float(np.max(confidences[lo:hi])) if hi > lo else 0.0,
+                processing_time_ms=processing_time,
+                metadata=request.metadata,
+            )
+            for request, (lo, hi) in zip(requests, spans)
+        ]
+
+    def _batch_features(
+        self, requests: List[InferenceRequest], transform_plan=None
+    ) -> tuple:
+        return build_feature_matrix(
+            self.feature_pipeline, self._request_inputs(requests), transform_plan
+        )
+
+    def _request_inputs(self, requests: List[InferenceRequest]) -> List[Any]:
+        """Request inputs with online feature-store values merged into dicts."""
+        records = dict(
+            self._with_store_features(
+                [
+                    (index, request.input_data)
+                    for index, request in enumerate(requests)
+                    if isinstance(request.input_data, dict)
+                ]
+            )
+        )
+        return [
+            records.get(index, request.input_data)
+            for index, request in enumerate(requests)
+        ]
+
+    def _with_store_features(self, records: List[tuple]) -> List[tuple]:
+        """Merge online feature-store values under each record's own fields."""
+        patient_ids = [
+            str(record["patient_id"]) for _, record in records if "patient_id" in record
+        ]
+        if self.feature_store is None or not patient_ids:
+            return records
+        online = self.feature_store.get_online_features(patient_ids)
+        return [
+            (index, {**online.get(str(record.get("patient_id")), {}), **record})
+            for index, record in records
+        ]
+
+    def _make_batch_prediction(self, model: Any, features: np.ndarray) -> tuple:
+        return predict_rows(model, features)
+
+    def _make_prediction(self, model: Any, features: np.ndarray) -> tuple:
+        return predict_single(model, features)
 
     def _get_cached_model(self, model_id: str) -> Optional[Dict]:
         try:
-            if model_id in self.model_cache:
-                return self.model_cache[model_id]
             model_result = self.model_registry.get_model(model_id, load_model=True)
             if "error" in model_result:
                 return None
-            if len(self.model_cache) >= self.cache_size:
-                oldest_key = next(iter(self.model_cache))
-                del self.model_cache[oldest_key]
-            self.model_cache[model_id] = model_result
             return model_result
         except Exception as e:
             logger.error(f"Model loading failed: {e}")
@@ -415,10 +833,14 @@ def _generate_cache_key(
             data_str = json.dumps(input_data, sort_keys=True)
         elif isinstance(input_data, pd.DataFrame):
             data_str = input_data.to_json()
+        elif isinstance(input_data, np.ndarray):
+            # str() elides large arrays with "...", which would collide.
+            digest = hashlib.sha256(np.ascontiguousarray(input_data).tobytes())
+            data_str = f"{input_data.shape}:{input_data.dtype.str}:{digest.hexdigest()}"
         else:
             data_str = str(input_data)
         hash_input = f"{model_id}:{data_str}"
-        return hashlib.hashlib.sha256(hash_input.encode()).hexdigest()
+        return hashlib.sha256(hash_input.encode()).hexdigest()
 
     def _get_cached_prediction(self, cache_key: str) -> Optional[InferenceResponse]:
         try:
@@ -473,17 +895,18 @@ def _wait_for_completion(
         )
 
     def _update_metrics(self, response: InferenceResponse):
-        self.performance_metrics["total_requests"] += 1
-        if response.error:
-            self.performance_metrics["failed_requests"] += 1
-        else:
-            self.performance_metrics["successful_requests"] += 1
-        total_requests = self.performance_metrics["total_requests"]
-        current_avg = self.performance_metrics["average_response_time"]
-        new_time = response.processing_time_ms
-        self.performance_metrics["average_response_time"] = (
-            current_avg * (total_requests - 1) + new_time
-        ) / total_requests
+        with self._metrics_lock:
+            self.performance_metrics["total_requests"] += 1
+            if response.error:
+                self.performance_metrics["failed_requests"] += 1
+            else:
+                self.performance_metrics["successful_requests"] += 1
+            total_requests = self.performance_metrics["total_requests"]
+            current_avg = self.performance_metrics["average_response_time"]
+            new_time = response.processing_time_ms
+            self.performance_metrics["average_response_time"] = (
+                current_avg * (total_requests - 1) + new_time
+            ) / total_requests
 
     def _monitor_performance(self):
         while self.running:
@@ -511,7 +934,7 @@ def _monitor_performance(self):
     def _handle_performance_degradation(self):
         logger.info("Handling performance degradation")
         if psutil.virtual_memory().percent > 90:
-            self.model_cache.clear()
+            self.model_cache.clear(include_pinned=False)
             cache.clear()
             if self.redis_client:
                 self.redis_client.flushdb()
@@ -534,6 +957,13 @@ def get_performance_metrics(self) -> Dict:
                     for priority, queue in self.queues.items()
                 },
                 "model_cache_size": len(self.model_cache),
+                "model_cache": self.model_cache.get_stats(),
+                "micro_batch_queue_depths": (
+                    self.batcher.queue_depths() if self.batcher else {}
+                ),
+                "process_pool": (
+                    self.process_pool.get_stats() if self.process_pool else {}
+                ),
                 "gpu_available": self.enable_gpu,
             },
             "timestamp": datetime.now().isoformat(),
@@ -567,6 +997,10 @@ def shutdown(self):
             except queue.Empty:
                 pass
 
+        # Flush pending micro-batches while the executor is still up
+        if self.batcher is not None:
+            self.batcher.shutdown()
+
         # Send shutdown signals to workers
         for priority in InferencePriority:
             try:
@@ -585,6 +1019,10 @@ def shutdown(self):
             except Exception as e:
                 logger.error(f"Error joining worker thread: {e}")
 
+        # Stop worker processes once no thread can submit to them
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+
         # Shutdown executor
         try:
             self.executor.shutdown(wait=True, cancel_futures=True)
@@ -633,3 +1071,8 @@ def initialize_inference_engine(**kwargs):
     global inference_engine
     inference_engine = InferenceEngine(**kwargs)
     return inference_engine
+
+
+def warm_up_inference_engine(environment: str = "production"):
+    """Warm the shared engine; called once from the server entrypoints."""
+    return get_inference_engine().warm_up(environment)
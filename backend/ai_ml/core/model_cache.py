@@ -0,0 +1,197 @@
+"""
+model_cache module
+
+Process-wide cache of loaded model artifacts bounded by a memory budget.
+
+Eviction is GreedyDual-Size: every entry carries a priority of
+``clock + weight / size`` and the lowest priority is evicted first, with the
+clock advanced to the evicted priority so that entries which are not used
+age out. With ``policy="lru"`` the weight is 1 and is refreshed on each hit
+(size-aware LRU); with ``policy="lfu"`` it is the hit count (GDSF,
+size-aware LFU). Pinned entries, such as warmed production models, are only
+evicted when nothing else is left.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_CACHE_BYTES = 2 * 1024**3
+MEGABYTE = 1024**2
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    size_bytes: int
+    hits: int = 1
+    priority: float = 0.0
+    pinned: bool = False
+
+
+class ModelArtifactCache:
+    def __init__(
+        self, max_bytes: int = DEFAULT_MODEL_CACHE_BYTES, policy: str = "lfu"
+    ):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._clock = 0.0
+        self.current_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "loads": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _priority(self, entry: _CacheEntry) -> float:
+        weight = entry.hits if self.policy == "lfu" else 1
+        return self._clock + weight / max(entry.size_bytes / MEGABYTE, 1e-3)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            entry.hits += 1
+            entry.priority = self._priority(entry)
+            self.stats["hits"] += 1
+            return entry.value
+
+    def put(self, key: str, value: Any, size_bytes: int, pinned: bool = False):
+        with self._lock:
+            self._discard(key)
+            if size_bytes > self.max_bytes:
+                logger.warning(
+                    f"Model artifact {key} ({size_bytes} bytes) exceeds the cache "
+                    f"budget of {self.max_bytes} bytes and will not be cached"
+                )
+                return
+            entry = _CacheEntry(value=value, size_bytes=size_bytes, pinned=pinned)
+            entry.priority = self._priority(entry)
+            self._entries[key] = entry
+            self.current_bytes += size_bytes
+            self._evict()
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        size_bytes: int,
+        pinned: bool = False,
+    ) -> Any:
+        """Return the cached value, loading it at most once across threads."""
+        value = self.get(key)
+        if value is not None:
+            if pinned:
+                self.pin(key)
+            return value
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        try:
+            with load_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        entry.pinned = entry.pinned or pinned
+                        return entry.value
+                value = loader()
+                self.stats["loads"] += 1
+                self.put(key, value, size_bytes, pinned=pinned)
+                return value
+        finally:
+            with self._lock:
+                self._load_locks.pop(key, None)
+
+    def pin(self, key: str, pinned: bool = True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.pinned = pinned
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._discard(key)
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                self._discard(key)
+            return len(keys)
+
+    def clear(self, include_pinned: bool = True):
+        with self._lock:
+            for key in list(self._entries):
+                if include_pinned or not self._entries[key].pinned:
+                    self._discard(key)
+
+    def _discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size_bytes
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            candidates = [
+                (entry.priority, key)
+                for key, entry in self._entries.items()
+                if not entry.pinned
+            ]
+            if not candidates:
+                candidates = [
+                    (entry.priority, key) for key, entry in self._entries.items()
+                ]
+                logger.warning("Pinned model artifacts exceed the cache budget")
+            priority, key = min(candidates)
+            self._clock = max(self._clock, priority)
+            self._discard(key)
+            self.stats["evictions"] += 1
+            logger.info(f"Evicted model artifact {key} from cache")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "pinned": sum(1 for entry in self._entries.values() if entry.pinned),
+                "current_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "policy": self.policy,
+            }
+
+
+model_artifact_cache = None
+_model_artifact_cache_lock = threading.Lock()
+
+
+def get_model_artifact_cache() -> ModelArtifactCache:
+    global model_artifact_cache
+    if model_artifact_cache is None:
+        with _model_artifact_cache_lock:
+            if model_artifact_cache is None:
+                model_artifact_cache = ModelArtifactCache(
+                    max_bytes=getattr(
+                        settings, "ML_MODEL_CACHE_BYTES", DEFAULT_MODEL_CACHE_BYTES
+                    ),
+                    policy=getattr(settings, "ML_MODEL_CACHE_POLICY", "lfu"),
+                )
+    return model_artifact_cache
+
+
+def initialize_model_artifact_cache(**kwargs):
+    global model_artifact_cache
+    model_artifact_cache = ModelArtifactCache(**kwargs)
+    return model_artifact_cache
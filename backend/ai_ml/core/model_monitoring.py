@@ -4,7 +4,10 @@
 
 import json
 import logging
+import threading
+import time
 import warnings
+from collections import Counter
 from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
 from enum import Enum
@@ -14,8 +17,6 @@
 import numpy as np
 import pandas as pd
 import seaborn as sns
-from scipy import stats
-from scipy.spatial.distance import jensenshannon
 from sklearn.metrics import (
     accuracy_score,
     f1_score,
@@ -31,6 +32,17 @@
 from django.db import models
 from django.utils import timezone
 
+from .streaming_stats import (
+    DEFAULT_SKETCH_BINS,
+    DISTRIBUTION_EPSILON,
+    HistogramSketch,
+    RingBuffer,
+    js_distance,
+    js_divergence,
+    ks_approximation,
+    population_stability_index,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -75,16 +87,227 @@ class DriftAlert:
     metadata: Optional[Dict] = None
 
 
+def _is_numeric(value: Any) -> bool:
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(
+        value, bool
+    )
+
+
+def _category(value: Any) -> Any:
+    """Hashable key for a categorical prediction (arrays become tuples)."""
+    if isinstance(value, np.ndarray):
+        return tuple(value.tolist())
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def _iter_features(input_data: Any):
+    """Yield ``(feature_name, value)`` pairs for dict or array-like inputs."""
+    if isinstance(input_data, dict):
+        return iter(input_data.items())
+    if isinstance(input_data, pd.Series):
+        return ((str(key), value) for key, value in input_data.items())
+    values = np.asarray(input_data, dtype=object).ravel()
+    return ((str(index), value) for index, value in enumerate(values))
+
+
+def _as_float(value: Any) -> Tuple[float, bool]:
+    """Coerce to float; the flag is False for values that are not numeric."""
+    if value is None:
+        return np.nan, True
+    try:
+        return float(value), True
+    except (TypeError, ValueError):
+        return np.nan, False
+
+
+class _ModelWindow:
+    """Sliding window of recent predictions held in fixed-size ring buffers.
+
+    Per-feature histogram sketches of the window are kept in step with the
+    buffers (the evicted value is subtracted, the new one added), so drift
+    against a baseline never needs a pass over the raw window.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.predictions = RingBuffer(capacity, dtype=object, fill=None)
+        self.ground_truths = RingBuffer(capacity, dtype=object, fill=None)
+        self.timestamps = RingBuffer(capacity)
+        self.latencies = RingBuffer(capacity)
+        self.input_rejects = RingBuffer(capacity, dtype=np.int32, fill=0)
+        self.features = {}
+        self.feature_sketches = {}
+        self.prediction_sketch = None
+        self.prediction_counts = Counter()
+        self.total_logged = 0
+
+    def attach_baseline(self, baseline: "_Baseline"):
+        with self.lock:
+            self.feature_sketches = {}
+            for name, sketch in baseline.feature_sketches.items():
+                current = sketch.empty_like()
+                if name in self.features:
+                    current.add_many(self.features[name].values())
+                self.feature_sketches[name] = current
+            self.prediction_sketch = None
+            self.prediction_counts = Counter()
+            predictions = [p for p in self.predictions.values() if p is not None]
+            if baseline.prediction_sketch is not None:
+                self.prediction_sketch = baseline.prediction_sketch.empty_like()
+                self.prediction_sketch.add_many(
+                    [p for p in predictions if _is_numeric(p)]
+                )
+            else:
+                self.prediction_counts.update(_category(p) for p in predictions)
+
+    def append(self, input_data, prediction, ground_truth, timestamp, latency):
+        with self.lock:
+            slot = self.predictions.head
+            evicted_prediction = self.predictions.append(prediction)
+            self.ground_truths.append(ground_truth)
+            self.timestamps.append(timestamp)
+            self.latencies.append(latency)
+            rejects = 0
+            seen = set()
+            for name, raw in _iter_features(input_data):
+                value, numeric = _as_float(raw)
+                rejects += not numeric
+                self._append_feature(str(name), value, slot)
+                seen.add(str(name))
+            for name in self.features.keys() - seen:
+                self._append_feature(name, np.nan, slot)
+            self.input_rejects.append(rejects)
+            if self.prediction_sketch is not None:
+                if evicted_prediction is not None and _is_numeric(evicted_prediction):
+                    self.prediction_sketch.remove(float(evicted_prediction))
+                if _is_numeric(prediction):
+                    self.prediction_sketch.add(float(prediction))
+            else:
+                if evicted_prediction is not None:
+                    key = _category(evicted_prediction)
+                    self.prediction_counts[key] -= 1
+                    if self.prediction_counts[key] <= 0:
+                        del self.prediction_counts[key]
+                if prediction is not None:
+                    self.prediction_counts[_category(prediction)] += 1
+            self.total_logged += 1
+            return self.total_logged
+
+    def _append_feature(self, name: str, value: float, slot: int):
+        buffer = self.features.get(name)
+        if buffer is None:
+            # A feature first seen mid-window is NaN for the earlier rows.
+            buffer = RingBuffer(self.capacity)
+            buffer.count = len(self.predictions) - 1
+            buffer.head = slot
+            self.features[name] = buffer
+        evicted = buffer.append(value)
+        sketch = self.feature_sketches.get(name)
+        if sketch is not None:
+            if evicted is not None:
+                sketch.remove(evicted)
+            sketch.add(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "predictions": list(self.predictions.values()),
+                "ground_truths": list(self.ground_truths.values()),
+                "timestamps": self.timestamps.values(),
+                "latencies": self.latencies.values(),
+                "input_rejects": self.input_rejects.values(),
+                "features": {
+                    name: buffer.values() for name, buffer in self.features.items()
+                },
+                "feature_sketches": {
+                    name: (sketch.counts.copy(), sketch.missing)
+                    for name, sketch in self.feature_sketches.items()
+                },
+                "prediction_sketch": (
+                    self.prediction_sketch.counts.copy()
+                    if self.prediction_sketch is not None
+                    else None
+                ),
+                "prediction_counts": dict(self.prediction_counts),
+            }
+
+
+@dataclass
+class _Baseline:
+    feature_sketches: Dict[str, HistogramSketch]
+    prediction_sketch: Optional[HistogramSketch]
+    prediction_counts: Dict[Any, int]
+    prediction_mean: float
+    prediction_std: float
+    sample_count: int
+
+    @classmethod
+    def from_data(cls, baseline_data: Dict, bins: int) -> "_Baseline":
+        inputs = baseline_data.get("inputs", [])
+        if isinstance(inputs, pd.DataFrame):
+            columns = {
+                str(name): pd.to_numeric(inputs[name], errors="coerce").to_numpy(
+                    dtype=float
+                )
+                for name in inputs.columns
+            }
+        else:
+            collected = {}
+            for row_index, row in enumerate(inputs):
+                for name, raw in _iter_features(row):
+                    collected.setdefault(str(name), {})[row_index] = _as_float(raw)[0]
+            columns = {
+                name: np.array(
+                    [values.get(i, np.nan) for i in range(len(inputs))], dtype=float
+                )
+                for name, values in collected.items()
+            }
+        feature_sketches = {
+            name: HistogramSketch.from_values(values, bins)
+            for name, values in columns.items()
+            if not np.isnan(values).all()
+        }
+        predictions = list(baseline_data.get("predictions", []))
+        numeric = bool(predictions) and all(_is_numeric(p) for p in predictions)
+        values = np.asarray(predictions, dtype=float) if numeric else np.array([])
+        return cls(
+            feature_sketches=feature_sketches,
+            prediction_sketch=(
+                HistogramSketch.from_values(values, bins) if numeric else None
+            ),
+            prediction_counts=(
+                {}
+                if numeric
+                else dict(
+                    Counter(_category(p) for p in predictions if p is not None)
+                )
+            ),
+            prediction_mean=float(values.mean()) if values.size else float("nan"),
+            prediction_std=float(values.std()) if values.size else float("nan"),
+            sample_count=len(predictions),
+        )
+
+
 class ModelMonitoring:
     def __init__(
         self,
         alert_thresholds: Optional[Dict] = None,
         monitoring_window: int = 1000,
         baseline_window: int = 5000,
+        sketch_bins: int = DEFAULT_SKETCH_BINS,
+        analysis_every: int = 100,
+        analysis_interval_seconds: float = 5.0,
+        background_analysis: bool = True,
     ):
         self.alert_thresholds = alert_thresholds or self._default_thresholds()
         self.monitoring_window = monitoring_window
         self.baseline_window = baseline_window
+        self.sketch_bins = sketch_bins
+        self.analysis_every = analysis_every
+        self.analysis_interval_seconds = analysis_interval_seconds
         self.baseline_data = {}
         self.monitoring_data = {}
         self.performance_history = {}
@@ -104,6 +327,14 @@ def __init__(
             "latency": [],
             "throughput": [],
         }
+        self._windows_lock = threading.Lock()
+        self._pending_analysis = set()
+        self._analysis_wakeup = threading.Event()
+        self._analysis_stop = threading.Event()
+        # Started by the first scheduled analysis, so constructing a monitor
+        # (e.g. at import) does not spawn a thread
+        self.background_analysis = background_analysis
+        self._analysis_thread = None
 
     def _default_thresholds(self) -> Dict:
         return {
@@ -116,6 +347,19 @@ def _default_thresholds(self) -> Dict:
             "data_quality_threshold": 0.1,
         }
 
+    def _window(self, model_id: str) -> _ModelWindow:
+        window = self.monitoring_data.get(model_id)
+        if window is None:
+            with self._windows_lock:
+                window = self.monitoring_data.get(model_id)
+                if window is None:
+                    window = _ModelWindow(self.monitoring_window)
+                    baseline = self.baseline_data.get(model_id)
+                    if baseline is not None:
+                        window.attach_baseline(baseline)
+                    self.monitoring_data[model_id] = window
+        return window
+
     def log_prediction(
         self,
         model_id: str,
@@ -126,45 +370,59 @@ def log_prediction(
         metadata: Optional[Dict] = None,
     ):
         try:
-            timestamp = timezone.now()
-            if model_id not in self.monitoring_data:
-                self.monitoring_data[model_id] = {
-                    "predictions": [],
-                    "inputs": [],
-                    "ground_truths": [],
-                    "timestamps": [],
-                    "latencies": [],
-                    "metadata": [],
-                }
-            self.monitoring_data[model_id]["predictions"].append(prediction)
-            self.monitoring_data[model_id]["inputs"].append(input_data)
-            self.monitoring_data[model_id]["ground_truths"].append(ground_truth)
-            self.monitoring_data[model_id]["timestamps"].append(timestamp)
-            self.monitoring_data[model_id]["latencies"].append(prediction_time or 0)
-            self.monitoring_data[model_id]["metadata"].append(metadata or {})
-            if (
-                len(self.monitoring_data[model_id]["predictions"])
-                > self.monitoring_window
-            ):
-                for key in self.monitoring_data[model_id]:
-                    self.monitoring_data[model_id][key] = self.monitoring_data[
-                        model_id
-                    ][key][-self.monitoring_window :]
-            if len(self.monitoring_data[model_id]["predictions"]) % 100 == 0:
-                self.analyze_model_health(model_id)
+            logged = self._window(model_id).append(
+                input_data,
+                prediction,
+                ground_truth,
+                time.time(),
+                prediction_time or 0,
+            )
+            if logged % self.analysis_every == 0:
+                self._schedule_analysis(model_id)
         except Exception as e:
             logger.error(f"Failed to log prediction for model {model_id}: {e}")
 
+    def _schedule_analysis(self, model_id: str):
+        if not self.background_analysis:
+            self.analyze_model_health(model_id)
+            return
+        with self._windows_lock:
+            self._pending_analysis.add(model_id)
+            if self._analysis_thread is None and not self._analysis_stop.is_set():
+                self._analysis_thread = threading.Thread(
+                    target=self._analysis_loop, daemon=True
+                )
+                self._analysis_thread.start()
+        self._analysis_wakeup.set()
+
+    def _analysis_loop(self):
+        while not self._analysis_stop.is_set():
+            self._analysis_wakeup.wait(timeout=self.analysis_interval_seconds)
+            self._analysis_wakeup.clear()
+            with self._windows_lock:
+                pending, self._pending_analysis = self._pending_analysis, set()
+            for model_id in pending:
+                self.analyze_model_health(model_id)
+            # Coalesce bursts of triggers into at most one pass per interval.
+            self._analysis_stop.wait(timeout=self.analysis_interval_seconds)
+
+    def stop(self):
+        self._analysis_stop.set()
+        self._analysis_wakeup.set()
+        if self._analysis_thread is not None:
+            self._analysis_thread.join(timeout=5.0)
+
     def analyze_model_health(self, model_id: str) -> MonitoringMetrics:
         try:
-            model_data = self.monitoring_data.get(model_id, {})
-            if not model_data or len(model_data["predictions"]) < 10:
+            window = self.monitoring_data.get(model_id)
+            if window is None or len(window.predictions) < 10:
                 return self._create_empty_metrics(model_id)
-            performance_metrics = self._calculate_performance_metrics(model_id)
-            data_quality_metrics = self._calculate_data_quality_metrics(model_id)
-            drift_metrics = self._detect_all_drift(model_id)
-            system_metrics = self._calculate_system_metrics(model_id)
-            prediction_metrics = self._calculate_prediction_metrics(model_id)
+            snapshot = window.snapshot()
+            performance_metrics = self._calculate_performance_metrics(snapshot)
+            data_quality_metrics = self._calculate_data_quality_metrics(snapshot)
+            drift_metrics = self._detect_all_drift(model_id, snapshot)
+            system_metrics = self._calculate_system_metrics(snapshot)
+            prediction_metrics = self._calculate_prediction_metrics(snapshot)
             monitoring_metrics = MonitoringMetrics(
                 model_id=model_id,
                 timestamp=timezone.now(),
@@ -173,8 +431,8 @@ def analyze_model_health(self, model_id: str) -> MonitoringMetrics:
                 drift_metrics=drift_metrics,
                 system_metrics=system_metrics,
                 prediction_metrics=prediction_metrics,
-                sample_count=len(model_data["predictions"]),
-                latency_ms=np.mean(model_data["latencies"]),
+                sample_count=len(snapshot["predictions"]),
+                latency_ms=float(np.mean(snapshot["latencies"])),
             )
             self._check_for_alerts(monitoring_metrics)
             if model_id not in self.performance_history:
@@ -187,15 +445,20 @@ def analyze_model_health(self, model_id: str) -> MonitoringMetrics:
             logger.error(f"Model health analysis failed for {model_id}: {e}")
             return self._create_empty_metrics(model_id)
 
-    def _calculate_performance_metrics(self, model_id: str) -> Dict[str, float]:
-        model_data = self.monitoring_data.get(model_id, {})
-        predictions = model_data.get("predictions", [])
-        ground_truths = model_data.get("ground_truths", [])
-        valid_indices = [i for i, gt in enumerate(ground_truths) if gt is not None]
-        if len(valid_indices) < 5:
+    def _labelled(self, snapshot: Dict) -> Tuple[List, List]:
+        pairs = [
+            (prediction, truth)
+            for prediction, truth in zip(
+                snapshot["predictions"], snapshot["ground_truths"]
+            )
+            if truth is not None
+        ]
+        return [p for p, _ in pairs], [t for _, t in pairs]
+
+    def _calculate_performance_metrics(self, snapshot: Dict) -> Dict[str, float]:
+        valid_predictions, valid_ground_truths = self._labelled(snapshot)
+        if len(valid_ground_truths) < 5:
             return {}
-        valid_predictions = [predictions[i] for i in valid_indices]
-        valid_ground_truths = [ground_truths[i] for i in valid_indices]
         metrics = {}
         try:
             if len(set(valid_ground_truths)) <= 10:
@@ -236,110 +499,92 @@ def _calculate_performance_metrics(self, model_id: str) -> Dict[str, float]:
             logger.error(f"Performance metric calculation failed: {e}")
         return metrics
 
-    def _calculate_data_quality_metrics(self, model_id: str) -> Dict[str, float]:
-        model_data = self.monitoring_data.get(model_id, {})
-        inputs = model_data.get("inputs", [])
-        if not inputs:
+    def _calculate_data_quality_metrics(self, snapshot: Dict) -> Dict[str, float]:
+        features = snapshot["features"]
+        if not features:
             return {}
         metrics = {}
         try:
-            if isinstance(inputs[0], dict):
-                df = pd.DataFrame(inputs)
-            elif isinstance(inputs[0], (list, np.ndarray)):
-                df = pd.DataFrame(inputs)
-            else:
-                return {}
-            missing_rate = df.isnull().sum().sum() / (df.shape[0] * df.shape[1])
-            metrics["missing_value_rate"] = missing_rate
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
+            matrix = np.column_stack(list(features.values()))
+            metrics["missing_value_rate"] = float(np.isnan(matrix).mean())
             outlier_count = 0
             total_count = 0
-            for col in numeric_cols:
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                outliers = df[(df[col] < Q1 - 1.5 * IQR) | (df[col] > Q3 + 1.5 * IQR)]
-                outlier_count += len(outliers)
-                total_count += len(df[col])
+            for column in matrix.T:
+                observed = column[~np.isnan(column)]
+                if observed.size == 0:
+                    continue
+                q1, q3 = np.percentile(observed, [25, 75])
+                iqr = q3 - q1
+                outlier_count += int(
+                    ((observed < q1 - 1.5 * iqr) | (observed > q3 + 1.5 * iqr)).sum()
+                )
+                total_count += len(column)
             metrics["outlier_rate"] = (
                 outlier_count / total_count if total_count > 0 else 0
             )
-            type_consistency = 1.0
-            for col in df.columns:
-                unique_types = df[col].apply(type).nunique()
-                if unique_types > 1:
-                    type_consistency *= (unique_types - 1) / unique_types
-            metrics["type_consistency"] = type_consistency
+            metrics["type_consistency"] = 1.0 - float(
+                snapshot["input_rejects"].sum() / matrix.size
+            )
         except Exception as e:
             logger.error(f"Data quality calculation failed: {e}")
         return metrics
 
-    def _detect_all_drift(self, model_id: str) -> Dict[str, Dict[str, float]]:
+    def _detect_all_drift(
+        self, model_id: str, snapshot: Dict
+    ) -> Dict[str, Dict[str, float]]:
         drift_metrics = {}
         for drift_type, detector in self.drift_detectors.items():
             try:
-                drift_result = detector(model_id)
+                drift_result = detector(model_id, snapshot)
                 if drift_result:
                     drift_metrics[drift_type.value] = drift_result
             except Exception as e:
                 logger.error(f"Drift detection failed for {drift_type}: {e}")
         return drift_metrics
 
-    def _detect_data_drift(self, model_id: str) -> Dict[str, float]:
-        model_data = self.monitoring_data.get(model_id, {})
-        inputs = model_data.get("inputs", [])
-        if len(inputs) < 100 or model_id not in self.baseline_data:
+    def _detect_data_drift(self, model_id: str, snapshot: Dict) -> Dict[str, float]:
+        baseline = self.baseline_data.get(model_id)
+        if len(snapshot["predictions"]) < 100 or baseline is None:
             return {}
         try:
-            if isinstance(inputs[0], dict):
-                current_df = pd.DataFrame(inputs)
-                baseline_df = pd.DataFrame(self.baseline_data[model_id]["inputs"])
-            else:
-                current_df = pd.DataFrame(inputs)
-                baseline_df = pd.DataFrame(self.baseline_data[model_id]["inputs"])
             drift_scores = {}
-            numeric_cols = current_df.select_dtypes(include=[np.number]).columns
-            for col in numeric_cols:
-                if col in baseline_df.columns:
-                    ks_stat, ks_pvalue = stats.ks_2samp(
-                        baseline_df[col].dropna(), current_df[col].dropna()
-                    )
-                    drift_scores[f"{col}_ks_stat"] = ks_stat
-                    drift_scores[f"{col}_ks_pvalue"] = ks_pvalue
-                    try:
-                        js_divergence = self._calculate_js_divergence(
-                            baseline_df[col].dropna(), current_df[col].dropna()
-                        )
-                        drift_scores[f"{col}_js_divergence"] = js_divergence
-                    except:
-                        drift_scores[f"{col}_js_divergence"] = 0.0
-            overall_drift = np.mean(
-                [score for key, score in drift_scores.items() if "js_divergence" in key]
-            )
-            drift_scores["overall_data_drift"] = overall_drift
+            js_scores = []
+            for name, (counts, _) in snapshot["feature_sketches"].items():
+                reference = baseline.feature_sketches[name]
+                current = reference.empty_like()
+                current.counts = counts
+                if current.total == 0:
+                    continue
+                expected = reference.distribution()
+                actual = current.distribution()
+                ks_stat, ks_pvalue = ks_approximation(reference, current)
+                js = js_divergence(expected, actual)
+                drift_scores[f"{name}_ks_stat"] = ks_stat
+                drift_scores[f"{name}_ks_pvalue"] = ks_pvalue
+                drift_scores[f"{name}_js_divergence"] = js
+                drift_scores[f"{name}_psi"] = population_stability_index(
+                    expected, actual
+                )
+                js_scores.append(js)
+            if not js_scores:
+                return {}
+            drift_scores["overall_data_drift"] = float(np.mean(js_scores))
             return drift_scores
         except Exception as e:
             logger.error(f"Data drift detection failed: {e}")
             return {}
 
-    def _detect_concept_drift(self, model_id: str) -> Dict[str, float]:
-        model_data = self.monitoring_data.get(model_id, {})
-        predictions = model_data.get("predictions", [])
-        ground_truths = model_data.get("ground_truths", [])
-        valid_indices = [i for i, gt in enumerate(ground_truths) if gt is not None]
-        if len(valid_indices) < 50:
+    def _detect_concept_drift(self, model_id: str, snapshot: Dict) -> Dict[str, float]:
+        valid_predictions, valid_ground_truths = self._labelled(snapshot)
+        if len(valid_ground_truths) < 50:
             return {}
         try:
-            recent_predictions = [predictions[i] for i in valid_indices[-100:]]
-            recent_ground_truths = [ground_truths[i] for i in valid_indices[-100:]]
-            recent_accuracy = accuracy_score(recent_ground_truths, recent_predictions)
-            if len(valid_indices) > 200:
-                baseline_predictions = [predictions[i] for i in valid_indices[:-100]]
-                baseline_ground_truths = [
-                    ground_truths[i] for i in valid_indices[:-100]
-                ]
+            recent_accuracy = accuracy_score(
+                valid_ground_truths[-100:], valid_predictions[-100:]
+            )
+            if len(valid_ground_truths) > 200:
                 baseline_accuracy = accuracy_score(
-                    baseline_ground_truths, baseline_predictions
+                    valid_ground_truths[:-100], valid_predictions[:-100]
                 )
                 performance_drop = baseline_accuracy - recent_accuracy
                 concept_drift_score = max(0, performance_drop)
@@ -353,56 +598,62 @@ def _detect_concept_drift(self, model_id: str) -> Dict[str, float]:
             logger.error(f"Concept drift detection failed: {e}")
         return {}
 
-    def _detect_prediction_drift(self, model_id: str) -> Dict[str, float]:
-        model_data = self.monitoring_data.get(model_id, {})
-        predictions = model_data.get("predictions", [])
-        if len(predictions) < 100 or model_id not in self.baseline_data:
+    def _detect_prediction_drift(
+        self, model_id: str, snapshot: Dict
+    ) -> Dict[str, float]:
+        baseline = self.baseline_data.get(model_id)
+        predictions = snapshot["predictions"]
+        if len(predictions) < 100 or baseline is None:
             return {}
         try:
-            baseline_predictions = self.baseline_data[model_id]["predictions"]
-            if isinstance(predictions[0], (int, float, np.integer, np.floating)):
-                baseline_dist = np.histogram(baseline_predictions, bins=20)[0]
-                current_dist = np.histogram(predictions, bins=20)[0]
-                baseline_dist = baseline_dist / baseline_dist.sum()
-                current_dist = current_dist / current_dist.sum()
-                js_divergence = jensenshannon(baseline_dist, current_dist)
-                return {
-                    "prediction_drift_js": js_divergence,
-                    "baseline_mean": np.mean(baseline_predictions),
-                    "current_mean": np.mean(predictions),
-                    "baseline_std": np.std(baseline_predictions),
-                    "current_std": np.std(predictions),
-                }
-            else:
-                baseline_unique, baseline_counts = np.unique(
-                    baseline_predictions, return_counts=True
+            if baseline.prediction_sketch is not None:
+                if snapshot["prediction_sketch"] is None:
+                    return {}
+                current = baseline.prediction_sketch.empty_like()
+                current.counts = snapshot["prediction_sketch"]
+                numeric = np.asarray(
+                    [p for p in predictions if _is_numeric(p)], dtype=float
                 )
-                current_unique, current_counts = np.unique(
-                    predictions, return_counts=True
-                )
-                all_categories = np.union1d(baseline_unique, current_unique)
-                baseline_probs = np.zeros(len(all_categories))
-                current_probs = np.zeros(len(all_categories))
-                for i, cat in enumerate(all_categories):
-                    if cat in baseline_unique:
-                        baseline_probs[i] = baseline_counts[
-                            np.where(baseline_unique == cat)[0][0]
-                        ] / len(baseline_predictions)
-                    if cat in current_unique:
-                        current_probs[i] = current_counts[
-                            np.where(current_unique == cat)[0][0]
-                        ] / len(predictions)
-                js_divergence = jensenshannon(baseline_probs, current_probs)
                 return {
-                    "prediction_drift_js": js_divergence,
-                    "prediction_distribution_shift": js_divergence
-                    > self.alert_thresholds["prediction_drift"],
+                    "prediction_drift_js": js_distance(
+                        baseline.prediction_sketch.distribution(),
+                        current.distribution(),
+                    ),
+                    "baseline_mean": baseline.prediction_mean,
+                    "current_mean": float(np.mean(numeric)) if numeric.size else 0.0,
+                    "baseline_std": baseline.prediction_std,
+                    "current_std": float(np.std(numeric)) if numeric.size else 0.0,
                 }
+            current_counts = snapshot["prediction_counts"]
+            categories = sorted(
+                set(baseline.prediction_counts) | set(current_counts), key=str
+            )
+            baseline_probs = np.array(
+                [baseline.prediction_counts.get(c, 0) for c in categories], dtype=float
+            )
+            current_probs = np.array(
+                [current_counts.get(c, 0) for c in categories], dtype=float
+            )
+            baseline_probs = (baseline_probs + DISTRIBUTION_EPSILON) / (
+                baseline_probs + DISTRIBUTION_EPSILON
+            ).sum()
+            current_probs = (current_probs + DISTRIBUTION_EPSILON) / (
+                current_probs + DISTRIBUTION_EPSILON
+            ).sum()
+            # Distance, not divergence, as the prediction_drift threshold assumes
+            js = js_distance(baseline_probs, current_probs)
+            return {
+                "prediction_drift_js": js,
+                "prediction_distribution_shift": js
+                > self.alert_thresholds["prediction_drift"],
+            }
         except Exception as e:
             logger.error(f"Prediction drift detection failed: {e}")
         return {}
 
-    def _detect_performance_drift(self, model_id: str) -> Dict[str, float]:
+    def _detect_performance_drift(
+        self, model_id: str, snapshot: Optional[Dict] = None
+    ) -> Dict[str, float]:
         if (
             model_id not in self.performance_history
             or len(self.performance_history[model_id]) < 10
@@ -446,82 +697,72 @@ def _detect_performance_drift(self, model_id: str) -> Dict[str, float]:
             logger.error(f"Performance drift detection failed: {e}")
         return {}
 
-    def _calculate_system_metrics(self, model_id: str) -> Dict[str, float]:
-        model_data = self.monitoring_data.get(model_id, {})
-        latencies = model_data.get("latencies", [])
-        timestamps = model_data.get("timestamps", [])
-        if not latencies:
+    def _calculate_system_metrics(self, snapshot: Dict) -> Dict[str, float]:
+        latencies = snapshot["latencies"]
+        if not latencies.size:
             return {}
         try:
+            p95, p99 = np.percentile(latencies, [95, 99])
             metrics = {
-                "avg_latency_ms": np.mean(latencies),
-                "p95_latency_ms": np.percentile(latencies, 95),
-                "p99_latency_ms": np.percentile(latencies, 99),
-                "throughput_per_second": self._calculate_throughput(timestamps),
-                "error_rate": self._calculate_error_rate(model_id),
+                "avg_latency_ms": float(np.mean(latencies)),
+                "p95_latency_ms": float(p95),
+                "p99_latency_ms": float(p99),
+                "throughput_per_second": self._calculate_throughput(
+                    snapshot["timestamps"]
+                ),
+                "error_rate": self._calculate_error_rate(snapshot),
             }
             return metrics
         except Exception as e:
             logger.error(f"System metrics calculation failed: {e}")
         return {}
 
-    def _calculate_prediction_metrics(self, model_id: str) -> Dict[str, Any]:
-        model_data = self.monitoring_data.get(model_id, {})
-        predictions = model_data.get("predictions", [])
+    def _calculate_prediction_metrics(self, snapshot: Dict) -> Dict[str, Any]:
+        predictions = snapshot["predictions"]
         if not predictions:
             return {}
         try:
-            if isinstance(predictions[0], (int, float, np.integer, np.floating)):
+            if _is_numeric(predictions[0]):
+                values = np.asarray(predictions, dtype=float)
                 return {
-                    "prediction_mean": np.mean(predictions),
-                    "prediction_std": np.std(predictions),
-                    "prediction_min": np.min(predictions),
-                    "prediction_max": np.max(predictions),
-                    "prediction_median": np.median(predictions),
+                    "prediction_mean": float(np.mean(values)),
+                    "prediction_std": float(np.std(values)),
+                    "prediction_min": float(np.min(values)),
+                    "prediction_max": float(np.max(values)),
+                    "prediction_median": float(np.median(values)),
                 }
             else:
-                unique, counts = np.unique(predictions, return_counts=True)
+                distribution = Counter(
+                    _category(p) for p in predictions if p is not None
+                )
+                counts = np.array(list(distribution.values()), dtype=float)
                 return {
-                    "prediction_distribution": dict(zip(unique, counts)),
-                    "most_common_prediction": unique[np.argmax(counts)],
+                    "prediction_distribution": dict(distribution),
+                    "most_common_prediction": distribution.most_common(1)[0][0],
                     "prediction_entropy": self._calculate_entropy(
-                        counts / len(predictions)
+                        counts / counts.sum()
                     ),
                 }
         except Exception as e:
             logger.error(f"Prediction metrics calculation failed: {e}")
         return {}
 
-    def _calculate_js_divergence(self, p: np.ndarray, q: np.ndarray) -> float:
-        p_hist, _ = np.histogram(p, bins=20, density=True)
-        q_hist, _ = np.histogram(q, bins=20, density=True)
-        p_hist = p_hist / p_hist.sum()
-        q_hist = q_hist / q_hist.sum()
-        m = 0.5 * (p_hist + q_hist)
-        js_divergence = 0.5 * (stats.entropy(p_hist, m) + stats.entropy(q_hist, m))
-        return js_divergence
-
     def _calculate_entropy(self, probabilities: np.ndarray) -> float:
         probabilities = probabilities[probabilities > 0]
         return -np.sum(probabilities * np.log2(probabilities))
 
-    def _calculate_throughput(self, timestamps: List[datetime]) -> float:
+    def _calculate_throughput(self, timestamps: np.ndarray) -> float:
         if len(timestamps) < 2:
             return 0.0
-        time_span = (timestamps[-1] - timestamps[0]).total_seconds()
+        time_span = float(timestamps[-1] - timestamps[0])
         if time_span > 0:
             return len(timestamps) / time_span
         return 0.0
 
-    def _calculate_error_rate(self, model_id: str) -> float:
-        model_data = self.monitoring_data.get(model_id, {})
-        ground_truths = model_data.get("ground_truths", [])
-        predictions = model_data.get("predictions", [])
-        valid_indices = [i for i, gt in enumerate(ground_truths) if gt is not None]
-        if not valid_indices:
+    def _calculate_error_rate(self, snapshot: Dict) -> float:
+        valid_predictions, valid_ground_truths = self._labelled(snapshot)
+        if not valid_ground_truths:
             return 0.0
-        valid_predictions = [predictions[i] for i in valid_indices]
-        valid_ground_truths = [ground_truths[i] for i in valid_indices]
         errors = sum(
             1
             for pred, true_val in zip(valid_predictions, valid_ground_truths)
@@ -651,7 +892,16 @@ def _create_empty_metrics(self, model_id: str) -> MonitoringMetrics:
         )
 
     def set_baseline(self, model_id: str, baseline_data: Dict):
-        self.baseline_data[model_id] = baseline_data
+        """Summarise ``baseline_data`` ("inputs", "predictions") into sketches.
+
+        Only the sketches are retained; later windows are compared against
+        their bin edges without touching the raw baseline again.
+        """
+        baseline = _Baseline.from_data(baseline_data, self.sketch_bins)
+        self.baseline_data[model_id] = baseline
+        window = self.monitoring_data.get(model_id)
+        if window is not None:
+            window.attach_baseline(baseline)
         logger.info(f"Baseline set for model {model_id}")
 
     def get_model_health_dashboard(self, model_id: str) -> Dict:
@@ -927,5 +1177,7 @@ def get_model_monitor() -> ModelMonitoring:
 
 def initialize_model_monitor(**kwargs):
     global model_monitor
+    if model_monitor is not None:
+        model_monitor.stop()
     model_monitor = ModelMonitoring(**kwargs)
     return model_monitor
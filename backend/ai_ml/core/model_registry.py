@@ -7,11 +7,15 @@
 import logging
 import os
 import pickle
+import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import boto3
+import joblib
 import mlflow
 import mlflow.pyfunc
 import mlflow.sklearn
@@ -20,16 +24,51 @@
 from django.conf import settings
 from django.core.cache import cache
 
+from .feature_engineering import TransformPlan
+from .model_cache import ModelArtifactCache, get_model_artifact_cache
+
 logger = logging.getLogger(__name__)
 
+# Artifacts at least this large are opened with joblib memory mapping so the
+# NumPy buffers are shared through the page cache by every worker process.
+MMAP_MIN_BYTES = 16 * 1024**2
+REGISTRY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    model_id TEXT PRIMARY KEY,
+    model_name TEXT NOT NULL,
+    model_type TEXT NOT NULL,
+    environment TEXT NOT NULL,
+    status TEXT NOT NULL,
+    deployed_to TEXT,
+    registered_at TEXT NOT NULL,
+    info TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS models_type_idx ON models (model_type, registered_at);
+CREATE INDEX IF NOT EXISTS models_env_status_idx ON models (environment, status);
+CREATE INDEX IF NOT EXISTS models_deployed_idx ON models (deployed_to, status);
+CREATE INDEX IF NOT EXISTS models_status_idx ON models (status, registered_at);
+CREATE TABLE IF NOT EXISTS deployments (
+    model_id TEXT PRIMARY KEY,
+    info TEXT NOT NULL
+);
+"""
+
 
 class ModelRegistry:
-    def __init__(self, registry_path: Optional[str] = None):
+    def __init__(
+        self,
+        registry_path: Optional[str] = None,
+        artifact_cache: Optional[ModelArtifactCache] = None,
+    ):
         self.registry_path = registry_path or os.path.join(
             settings.BASE_DIR, "ml_models"
         )
         self.models_db_path = os.path.join(self.registry_path, "models_registry.json")
-        self.registry_cache = {}
+        self.metadata_db_path = os.path.join(
+            self.registry_path, "models_registry.sqlite3"
+        )
+        self.artifact_cache = artifact_cache or get_model_artifact_cache()
+        self._db_lock = threading.Lock()
         self._initialize_registry()
         self._setup_mlflow()
 
@@ -38,29 +77,98 @@ def _initialize_registry(self):
         os.makedirs(os.path.join(self.registry_path, "production"), exist_ok=True)
         os.makedirs(os.path.join(self.registry_path, "staging"), exist_ok=True)
         os.makedirs(os.path.join(self.registry_path, "development"), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(REGISTRY_SCHEMA)
+        self._import_legacy_database()
+
+    @contextmanager
+    def _connect(self):
+        with self._db_lock:
+            conn = sqlite3.connect(self.metadata_db_path, timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+    def _import_legacy_database(self):
+        """One-time import of models_registry.json into the indexed store."""
         if not os.path.exists(self.models_db_path):
-            self._create_models_database()
-
-    def _create_models_database(self):
-        initial_db = {
-            "models": {},
-            "deployments": {},
-            "last_updated": datetime.now().isoformat(),
-            "version": "1.0",
-        }
-        self._save_models_database(initial_db)
-
-    def _load_models_database(self) -> Dict:
+            return
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM models LIMIT 1").fetchone():
+                return
         try:
             with open(self.models_db_path, "r") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self._create_models_database()
-            return self._load_models_database()
+                legacy_db = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Skipping unreadable legacy model registry: {e}")
+            return
+        for model_info in legacy_db.get("models", {}).values():
+            self._save_model_info(model_info)
+        for model_id, deployment_info in legacy_db.get("deployments", {}).items():
+            self._save_deployment(model_id, deployment_info)
+        logger.info(
+            f"Imported {len(legacy_db.get('models', {}))} models from "
+            f"{self.models_db_path}"
+        )
+
+    def _get_model_info(self, model_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT info FROM models WHERE model_id = ?", (model_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
 
-    def _save_models_database(self, db_data: Dict):
-        with open(self.models_db_path, "w") as f:
-            json.dump(db_data, f, indent=2)
+    def _save_model_info(self, model_info: Dict):
+        deployed_to = (model_info.get("deployment_info") or {}).get("deployed_to")
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO models (model_id, model_name, model_type, "
+                "environment, status, deployed_to, registered_at, info) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    model_info["model_id"],
+                    model_info["model_name"],
+                    model_info["model_type"],
+                    model_info["environment"],
+                    model_info["status"],
+                    deployed_to,
+                    model_info["registered_at"],
+                    json.dumps(model_info),
+                ),
+            )
+
+    def _delete_model_info(self, model_ids: Iterable[str]):
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM models WHERE model_id = ?",
+                [(model_id,) for model_id in model_ids],
+            )
+
+    def _query_models(self, where: str = "", params: Tuple = ()) -> List[Dict]:
+        query = "SELECT info FROM models"
+        if where:
+            query += f" WHERE {where}"
+        query += " ORDER BY registered_at DESC"
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _save_deployment(self, model_id: str, deployment_info: Dict):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO deployments (model_id, info) VALUES (?, ?)",
+                (model_id, json.dumps(deployment_info)),
+            )
+
+    def _get_deployment(self, model_id: str) -> Dict:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT info FROM deployments WHERE model_id = ?", (model_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else {}
 
     def _setup_mlflow(self):
         try:
@@ -77,6 +185,7 @@ def register_model(
         environment: str = "development",
         metadata: Optional[Dict] = None,
         model_file: Optional[str] = None,
+        transform_plan: Optional[TransformPlan] = None,
     ) -> Dict:
         try:
             if environment not in ["development", "staging", "production"]:
@@ -85,6 +194,16 @@ def register_model(
             if model_file is None:
                 model_file = self._save_model_file(model, model_name, model_version)
             model_hash = self._calculate_model_hash(model_file)
+            plan_info = {}
+            if transform_plan is not None:
+                self._check_plan_matches_model(transform_plan, model)
+                plan_info = {
+                    "transform_plan_file": self._save_transform_plan(
+                        transform_plan, model_file
+                    ),
+                    "transform_plan_version": transform_plan.version,
+                    "transform_plan_fingerprint": transform_plan.fingerprint,
+                }
             model_metadata = {
                 "model_id": model_id,
                 "model_name": model_name,
@@ -99,10 +218,9 @@ def register_model(
                 "metadata": metadata or {},
                 "performance_metrics": {},
                 "deployment_info": {},
+                **plan_info,
             }
-            registry_db = self._load_models_database()
-            registry_db["models"][model_id] = model_metadata
-            self._save_models_database(registry_db)
+            self._save_model_info(model_metadata)
             self._log_to_mlflow(model_name, model_metadata)
             logger.info(f"Model registered successfully: {model_id}")
             return {
@@ -114,26 +232,76 @@ def register_model(
             logger.error(f"Model registration failed: {e}")
             return {"status": "error", "message": str(e)}
 
-    def get_model(self, model_id: str, load_model: bool = True) -> Dict:
+    def get_model(
+        self, model_id: str, load_model: bool = True, pinned: bool = False
+    ) -> Dict:
         try:
             cache_key = f"model_{model_id}"
-            cached_result = cache.get(cache_key)
-            if cached_result and not load_model:
-                return cached_result
-            registry_db = self._load_models_database()
-            model_info = registry_db["models"].get(model_id)
-            if not model_info:
-                raise ValueError(f"Model not found: {model_id}")
-            result = {"model_info": model_info, "model_object": None}
-            if load_model:
-                model_object = self._load_model_file(model_info["model_file"])
-                result["model_object"] = model_object
-            cache.set(cache_key, result, timeout=3600)
-            return result
+            model_info = cache.get(cache_key)
+            if model_info is None:
+                model_info = self._get_model_info(model_id)
+                if not model_info:
+                    raise ValueError(f"Model not found: {model_id}")
+                cache.set(cache_key, model_info, timeout=3600)
+            if not load_model:
+                return {"model_info": model_info, "model_object": None}
+            # The loaded artifact lives in the process-wide cache; only the
+            # metadata goes to the shared Django cache.
+            return self.artifact_cache.get_or_load(
+                self._artifact_key(model_info),
+                lambda: self._load_artifact(model_info),
+                self._artifact_size(model_info),
+                pinned=pinned,
+            )
         except Exception as e:
             logger.error(f"Model retrieval failed: {e}")
             return {"error": str(e)}
 
+    def _artifact_key(self, model_info: Dict) -> str:
+        return f"{model_info['model_id']}:{model_info['model_hash']}"
+
+    def _artifact_size(self, model_info: Dict) -> int:
+        size = os.path.getsize(model_info["model_file"])
+        plan_file = model_info.get("transform_plan_file")
+        if plan_file and os.path.exists(plan_file):
+            size += os.path.getsize(plan_file)
+        return size
+
+    def _load_artifact(self, model_info: Dict) -> Dict:
+        model_object = self._load_model_file(model_info["model_file"])
+        result = {"model_info": model_info, "model_object": model_object}
+        if model_info.get("transform_plan_file"):
+            transform_plan = self._load_transform_plan(model_info)
+            self._check_plan_matches_model(transform_plan, model_object)
+            result["transform_plan"] = transform_plan
+        return result
+
+    def serving_models(self, environment: str = "production") -> List[Dict]:
+        """Active models registered in or deployed to ``environment``."""
+        return self._query_models(
+            "status = 'active' AND (environment = ? OR deployed_to = ?)",
+            (environment, environment),
+        )
+
+    def warm_models(self, environment: str = "production") -> Dict:
+        """Load and pin every active model serving ``environment``.
+
+        Called at startup so the first request after a deploy does not pay
+        for unpickling.
+        """
+        warmed = []
+        failed = []
+        for model_info in self.serving_models(environment):
+            result = self.get_model(model_info["model_id"], pinned=True)
+            if "error" in result:
+                failed.append(model_info["model_id"])
+            else:
+                warmed.append(model_info["model_id"])
+        logger.info(
+            f"Warmed {len(warmed)} {environment} models ({len(failed)} failed)"
+        )
+        return {"warmed": warmed, "failed": failed}
+
     def list_models(
         self,
         model_type: Optional[str] = None,
@@ -141,16 +309,17 @@ def list_models(
         status: Optional[str] = None,
     ) -> List[Dict]:
         try:
-            registry_db = self._load_models_database()
-            models = list(registry_db["models"].values())
-            if model_type:
-                models = [m for m in models if m["model_type"] == model_type]
-            if environment:
-                models = [m for m in models if m["environment"] == environment]
-            if status:
-                models = [m for m in models if m["status"] == status]
-            models.sort(key=lambda x: x["registered_at"], reverse=True)
-            return models
+            clauses = []
+            params = []
+            for column, value in (
+                ("model_type", model_type),
+                ("environment", environment),
+                ("status", status),
+            ):
+                if value:
+                    clauses.append(f"{column} = ?")
+                    params.append(value)
+            return self._query_models(" AND ".join(clauses), tuple(params))
         except Exception as e:
             logger.error(f"Model listing failed: {e}")
             return []
@@ -159,17 +328,17 @@ def update_model_status(
         self, model_id: str, status: str, deployment_info: Optional[Dict] = None
     ) -> Dict:
         try:
-            registry_db = self._load_models_database()
-            model_info = registry_db["models"].get(model_id)
+            model_info = self._get_model_info(model_id)
             if not model_info:
                 raise ValueError(f"Model not found: {model_id}")
             model_info["status"] = status
             model_info["updated_at"] = datetime.now().isoformat()
             if deployment_info:
                 model_info["deployment_info"].update(deployment_info)
-            self._save_models_database(registry_db)
+            self._save_model_info(model_info)
             cache_key = f"model_{model_id}"
             cache.delete(cache_key)
+            self.artifact_cache.invalidate_prefix(f"{model_id}:")
             logger.info(f"Model status updated: {model_id} -> {status}")
             return {
                 "model_id": model_id,
@@ -184,7 +353,7 @@ def deploy_model(self, model_id: str, target_environment: str) -> Dict:
         try:
             if target_environment not in ["staging", "production"]:
                 raise ValueError(f"Invalid target environment: {target_environment}")
-            model_result = self.get_model(model_id)
+            model_result = self.get_model(model_id, load_model=False)
             if "error" in model_result:
                 raise ValueError(model_result["error"])
             model_info = model_result["model_info"]
@@ -205,9 +374,9 @@ def deploy_model(self, model_id: str, target_environment: str) -> Dict:
             update_result = self.update_model_status(
                 model_id, "active", deployment_info
             )
-            registry_db = self._load_models_database()
-            registry_db["deployments"][model_id] = deployment_info
-            self._save_models_database(registry_db)
+            self._save_deployment(model_id, deployment_info)
+            if target_environment == "production":
+                self.get_model(model_id, pinned=True)
             logger.info(
                 f"Model deployed successfully: {model_id} -> {target_environment}"
             )
@@ -226,16 +395,44 @@ def _generate_model_id(self, model_name: str, model_version: str) -> str:
         return f"{model_name}_{model_version}_{timestamp}"
 
     def _save_model_file(self, model: Any, model_name: str, model_version: str) -> str:
-        filename = f"{model_name}_{model_version}.pkl"
+        # Uncompressed joblib keeps NumPy buffers page-aligned for mmap loading.
+        filename = f"{model_name}_{model_version}.joblib"
         filepath = os.path.join(self.registry_path, filename)
-        with open(filepath, "wb") as f:
-            pickle.dump(model, f)
+        joblib.dump(model, filepath)
         return filepath
 
     def _load_model_file(self, filepath: str) -> Any:
+        if filepath.endswith(".joblib"):
+            mmap_mode = "r" if os.path.getsize(filepath) >= MMAP_MIN_BYTES else None
+            return joblib.load(filepath, mmap_mode=mmap_mode)
         with open(filepath, "rb") as f:
             return pickle.load(f)
 
+    def _save_transform_plan(self, transform_plan: TransformPlan, model_file: str) -> str:
+        filepath = f"{os.path.splitext(model_file)[0]}.plan.json"
+        with open(filepath, "w") as f:
+            json.dump(transform_plan.to_dict(), f, indent=2)
+        return filepath
+
+    def _load_transform_plan(self, model_info: Dict) -> TransformPlan:
+        with open(model_info["transform_plan_file"], "r") as f:
+            transform_plan = TransformPlan.from_dict(json.load(f))
+        if transform_plan.fingerprint != model_info.get("transform_plan_fingerprint"):
+            raise ValueError(
+                f"Transform plan for {model_info['model_id']} does not match the "
+                "fingerprint recorded at registration"
+            )
+        return transform_plan
+
+    def _check_plan_matches_model(self, transform_plan: TransformPlan, model: Any):
+        expected = getattr(model, "n_features_in_", None)
+        produced = len(transform_plan.output_columns)
+        if expected is not None and expected != produced:
+            raise ValueError(
+                f"Transform plan produces {produced} features but the model "
+                f"expects {expected}"
+            )
+
     def _calculate_model_hash(self, filepath: str) -> str:
         sha256_hash = hashlib.sha256()
         with open(filepath, "rb") as f:
@@ -287,12 +484,11 @@ def validate_model_integrity(self, model_id: str) -> Dict:
 
     def get_deployment_history(self, model_id: str) -> List[Dict]:
         try:
-            registry_db = self._load_models_database()
             deployments = []
-            model_info = registry_db["models"].get(model_id, {})
+            model_info = self._get_model_info(model_id) or {}
             if model_info and "deployment_info" in model_info:
                 deployments.append(model_info["deployment_info"])
-            deployment_registry = registry_db["deployments"].get(model_id, {})
+            deployment_registry = self._get_deployment(model_id)
             if deployment_registry:
                 deployments.append(deployment_registry)
             return deployments
@@ -303,10 +499,10 @@ def get_deployment_history(self, model_id: str) -> List[Dict]:
     def cleanup_old_models(self, days_old: int = 30) -> Dict:
         try:
             cutoff_date = datetime.now().timestamp() - (days_old * 24 * 3600)
-            registry_db = self._load_models_database()
             cleaned_models = []
             cleaned_files = []
-            for model_id, model_info in list(registry_db["models"].items()):
+            for model_info in self._query_models("status = 'inactive'"):
+                model_id = model_info["model_id"]
                 model_date = datetime.fromisoformat(
                     model_info["registered_at"]
                 ).timestamp()
@@ -314,9 +510,14 @@ def cleanup_old_models(self, days_old: int = 30) -> Dict:
                     if os.path.exists(model_info["model_file"]):
                         os.remove(model_info["model_file"])
                         cleaned_files.append(model_info["model_file"])
-                    del registry_db["models"][model_id]
+                    plan_file = model_info.get("transform_plan_file")
+                    if plan_file and os.path.exists(plan_file):
+                        os.remove(plan_file)
+                        cleaned_files.append(plan_file)
+                    self.artifact_cache.invalidate_prefix(f"{model_id}:")
+                    cache.delete(f"model_{model_id}")
                     cleaned_models.append(model_id)
-            self._save_models_database(registry_db)
+            self._delete_model_info(cleaned_models)
             logger.info(f"Cleaned up {len(cleaned_models)} old models")
             return {
                 "models_cleaned": len(cleaned_models),
@@ -0,0 +1,415 @@
+"""
+process_pool module
+
+Out-of-process inference workers for CPU-bound models.
+
+Each worker is a spawned process with its own ModelRegistry and artifact
+cache, so feature engineering and model calls run outside the web process's
+GIL. Models are routed to a sticky worker (affinity) so hot models stay
+resident; a worker only picks up another worker's model when the affine
+worker's backlog grows past ``spill_backlog``. Dense feature matrices travel
+through ``multiprocessing.shared_memory`` instead of being pickled through
+the task pipe. A supervisor thread fails the in-flight tasks of a crashed
+worker and restarts it with backoff.
+
+Priority is kept in the parent: every worker has at most
+``max_inflight_per_worker`` tasks outstanding and the rest wait in a
+per-worker heap ordered by priority rank, so a critical request never queues
+behind a backlog of background work already sent to the process.
+"""
+
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SHM_MIN_BYTES = 64 * 1024
+MAX_RESTART_BACKOFF_S = 30.0
+
+
+@dataclass
+class _PoolTask:
+    task_id: int
+    model_id: str
+    payload: Optional[Dict]
+    future: Future
+    worker_index: int = -1
+    shm: Optional[shared_memory.SharedMemory] = None
+
+
+@dataclass
+class _WorkerHandle:
+    index: int
+    process: Any = None
+    task_queue: Any = None
+    pending: List = field(default_factory=list)
+    inflight: Dict[int, _PoolTask] = field(default_factory=dict)
+    models: set = field(default_factory=set)
+    restarts: int = 0
+    consecutive_failures: int = 0
+    next_restart_at: float = 0.0
+
+    @property
+    def backlog(self) -> int:
+        return len(self.pending) + len(self.inflight)
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the segment with the
+        # resource tracker, which would unlink it when this worker exits.
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def encode_inputs(inputs: List[Any], shm_min_bytes: int = SHM_MIN_BYTES) -> tuple:
+    """Split ``inputs`` into pickled dict records and one stacked matrix.
+
+    Returns ``(payload, shm)``; ``shm`` is the segment holding the matrix
+    when it was large enough to be worth sharing, and must be unlinked by
+    the caller once the task has finished.
+    """
+    records = []
+    blocks = []
+    matrix_rows = []
+    for index, data in enumerate(inputs):
+        if isinstance(data, dict):
+            records.append((index, data))
+            continue
+        block = data.values if isinstance(data, pd.DataFrame) else data
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        blocks.append(block)
+        matrix_rows.append((index, len(block)))
+    payload = {"count": len(inputs), "records": records, "matrix_rows": matrix_rows}
+    shm = None
+    if blocks:
+        matrix = np.ascontiguousarray(np.vstack(blocks))
+        if matrix.nbytes >= shm_min_bytes:
+            shm = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+            np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=shm.buf)[:] = matrix
+            payload["matrix_shm"] = (shm.name, matrix.shape, matrix.dtype.str)
+        else:
+            payload["matrix"] = matrix
+    return payload, shm
+
+
+def decode_inputs(payload: Dict) -> tuple:
+    """Rebuild the input list from ``encode_inputs`` output inside a worker.
+
+    Matrix rows are views onto the shared segment; callers must drop them
+    before closing the returned ``shm``.
+    """
+    inputs = [None] * payload["count"]
+    for index, record in payload["records"]:
+        inputs[index] = record
+    shm = None
+    matrix = payload.get("matrix")
+    if "matrix_shm" in payload:
+        name, shape, dtype = payload["matrix_shm"]
+        shm = _attach_shared_memory(name)
+        matrix = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    offset = 0
+    for index, rows in payload["matrix_rows"]:
+        inputs[index] = matrix[offset : offset + rows]
+        offset += rows
+    return inputs, shm
+
+
+def _worker_main(
+    index: int,
+    task_queue,
+    response_queue,
+    registry_path: Optional[str],
+    model_cache_bytes: Optional[int],
+    settings_module: Optional[str],
+):
+    if settings_module:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup()
+    from .feature_engineering import FeatureEngineeringPipeline
+    from .inference_engine import build_feature_matrix, predict_rows
+    from .model_cache import get_model_artifact_cache, initialize_model_artifact_cache
+    from .model_registry import ModelRegistry
+
+    artifact_cache = (
+        initialize_model_artifact_cache(max_bytes=model_cache_bytes)
+        if model_cache_bytes
+        else get_model_artifact_cache()
+    )
+    registry = ModelRegistry(registry_path, artifact_cache=artifact_cache)
+    feature_pipeline = FeatureEngineeringPipeline()
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, model_id, payload = task
+        inputs = features = None
+        shm = None
+        try:
+            model_info = registry.get_model(model_id)
+            if "error" in model_info:
+                raise ValueError(model_info["error"])
+            if payload is None:
+                # Warm-up task: loading the model is the whole job.
+                response_queue.put((task_id, index, None, None))
+                continue
+            inputs, shm = decode_inputs(payload)
+            features, spans = build_feature_matrix(
+                feature_pipeline, inputs, model_info.get("transform_plan")
+            )
+            predictions, confidences = predict_rows(
+                model_info["model_object"], features
+            )
+            result = (np.asarray(predictions), np.asarray(confidences), spans)
+            response_queue.put((task_id, index, result, None))
+        except Exception as e:
+            response_queue.put((task_id, index, None, f"{type(e).__name__}: {e}"))
+        finally:
+            inputs = features = None
+            if shm is not None:
+                shm.close()
+
+
+class ProcessInferencePool:
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        registry_path: Optional[str] = None,
+        model_cache_bytes: Optional[int] = None,
+        max_inflight_per_worker: int = 2,
+        spill_backlog: int = 8,
+        shm_min_bytes: int = SHM_MIN_BYTES,
+    ):
+        self.num_workers = num_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.registry_path = registry_path
+        self.model_cache_bytes = model_cache_bytes
+        self.max_inflight_per_worker = max_inflight_per_worker
+        self.spill_backlog = spill_backlog
+        self.shm_min_bytes = shm_min_bytes
+        self._context = multiprocessing.get_context("spawn")
+        self._response_queue = self._context.Queue()
+        self._lock = threading.RLock()
+        self._task_ids = itertools.count()
+        self._tasks: Dict[int, _PoolTask] = {}
+        self._affinity: Dict[str, int] = {}
+        self._workers = [_WorkerHandle(index=i) for i in range(self.num_workers)]
+        self._stopping = threading.Event()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "restarts": 0}
+        for worker in self._workers:
+            self._start_worker(worker)
+        self._collector = threading.Thread(target=self._collect_loop, daemon=True)
+        self._collector.start()
+        self._supervisor = threading.Thread(target=self._supervise_loop, daemon=True)
+        self._supervisor.start()
+
+    def _start_worker(self, worker: _WorkerHandle):
+        worker.task_queue = self._context.Queue()
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(
+                worker.index,
+                worker.task_queue,
+                self._response_queue,
+                self.registry_path,
+                self.model_cache_bytes,
+                os.environ.get("DJANGO_SETTINGS_MODULE"),
+            ),
+            name=f"inference-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+
+    def submit(
+        self,
+        model_id: str,
+        inputs: Optional[List[Any]],
+        priority_rank: int = 2,
+    ) -> Future:
+        """Queue ``inputs`` for ``model_id``.
+
+        The future resolves to ``(predictions, confidences, spans)`` as
+        produced by ``predict_rows`` and ``build_feature_matrix``.
+        """
+        future = Future()
+        if self._stopping.is_set():
+            future.set_exception(RuntimeError("Inference pool is shut down"))
+            return future
+        payload, shm = (None, None)
+        if inputs is not None:
+            payload, shm = encode_inputs(inputs, self.shm_min_bytes)
+        with self._lock:
+            task = _PoolTask(
+                task_id=next(self._task_ids),
+                model_id=model_id,
+                payload=payload,
+                future=future,
+                shm=shm,
+            )
+            worker = self._workers[self._assign(model_id)]
+            task.worker_index = worker.index
+            self._tasks[task.task_id] = task
+            heapq.heappush(worker.pending, (priority_rank, task.task_id))
+            self.stats["submitted"] += 1
+            self._pump(worker)
+        return future
+
+    def warm(self, model_ids: List[str]) -> List[Future]:
+        """Load ``model_ids`` into their affine workers ahead of traffic."""
+        return [self.submit(model_id, None) for model_id in model_ids]
+
+    def _assign(self, model_id: str) -> int:
+        index = self._affinity.get(model_id)
+        least_loaded = min(
+            self._workers, key=lambda w: (w.backlog, len(w.models))
+        ).index
+        if index is None:
+            index = min(
+                self._workers, key=lambda w: (len(w.models), w.backlog)
+            ).index
+            self._affinity[model_id] = index
+        elif self._workers[index].backlog >= self.spill_backlog:
+            index = least_loaded
+        self._workers[index].models.add(model_id)
+        return index
+
+    def _pump(self, worker: _WorkerHandle):
+        if not worker.process.is_alive():
+            return
+        while worker.pending and len(worker.inflight) < self.max_inflight_per_worker:
+            _, task_id = heapq.heappop(worker.pending)
+            task = self._tasks.get(task_id)
+            if task is None:
+                continue
+            if not task.future.set_running_or_notify_cancel():
+                self._finish(task)
+                continue
+            worker.inflight[task_id] = task
+            worker.task_queue.put((task_id, task.model_id, task.payload))
+
+    def _finish(self, task: _PoolTask):
+        self._tasks.pop(task.task_id, None)
+        if task.shm is not None:
+            task.shm.close()
+            task.shm.unlink()
+            task.shm = None
+
+    def _collect_loop(self):
+        while not self._stopping.is_set():
+            try:
+                task_id, worker_index, result, error = self._response_queue.get(
+                    timeout=0.5
+                )
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                worker = self._workers[worker_index]
+                task = worker.inflight.pop(task_id, None)
+                worker.consecutive_failures = 0
+                if task is not None:
+                    self._finish(task)
+                self._pump(worker)
+            if task is None:
+                continue
+            if error:
+                self.stats["failed"] += 1
+                task.future.set_exception(RuntimeError(error))
+            else:
+                self.stats["completed"] += 1
+                task.future.set_result(result)
+
+    def _supervise_loop(self):
+        while not self._stopping.wait(1.0):
+            for worker in self._workers:
+                if worker.process.is_alive() or self._stopping.is_set():
+                    continue
+                self._handle_worker_exit(worker)
+
+    def _handle_worker_exit(self, worker: _WorkerHandle):
+        with self._lock:
+            lost = list(worker.inflight.values())
+            worker.inflight.clear()
+            for task in lost:
+                self._finish(task)
+            now = time.time()
+            resident = list(worker.models)
+            if not worker.next_restart_at:
+                worker.consecutive_failures += 1
+                backoff = min(
+                    2 ** (worker.consecutive_failures - 1), MAX_RESTART_BACKOFF_S
+                )
+                worker.next_restart_at = now + backoff
+                logger.error(
+                    f"Inference worker {worker.index} exited with code "
+                    f"{worker.process.exitcode}; restarting in {backoff:.0f}s"
+                )
+            if now < worker.next_restart_at:
+                restart = False
+            else:
+                restart = True
+                worker.next_restart_at = 0.0
+                worker.restarts += 1
+                self.stats["restarts"] += 1
+                self._start_worker(worker)
+        for task in lost:
+            task.future.set_exception(
+                RuntimeError(f"Inference worker {worker.index} exited mid-request")
+            )
+        if restart:
+            self.warm(resident)
+            with self._lock:
+                self._pump(worker)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "workers": [
+                    {
+                        "index": worker.index,
+                        "alive": worker.process.is_alive(),
+                        "pending": len(worker.pending),
+                        "inflight": len(worker.inflight),
+                        "models": sorted(worker.models),
+                        "restarts": worker.restarts,
+                    }
+                    for worker in self._workers
+                ],
+            }
+
+    def shutdown(self, timeout: float = 5.0):
+        self._stopping.set()
+        with self._lock:
+            for worker in self._workers:
+                if worker.process.is_alive():
+                    worker.task_queue.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout=timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        with self._lock:
+            for task in list(self._tasks.values()):
+                if not task.future.done():
+                    task.future.set_exception(
+                        RuntimeError("Inference pool is shut down")
+                    )
+                self._finish(task)
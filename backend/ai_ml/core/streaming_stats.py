@@ -0,0 +1,152 @@
+"""
+streaming_stats module
+
+Fixed-memory building blocks for model monitoring: NumPy ring buffers for
+sliding windows and fixed-edge histogram sketches that are updated in O(log
+bins) per observation and compared with PSI, Jensen-Shannon and a
+histogram-based Kolmogorov-Smirnov approximation.
+"""
+
+from typing import Any, Iterable, Optional
+
+import numpy as np
+from scipy import stats
+
+DEFAULT_SKETCH_BINS = 20
+DISTRIBUTION_EPSILON = 1e-6
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, dtype: Any = float, fill: Any = np.nan):
+        self.capacity = capacity
+        self.fill = fill
+        self.data = np.full(capacity, fill, dtype=dtype)
+        self.count = 0
+        self.head = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.capacity
+
+    def append(self, value: Any) -> Optional[Any]:
+        """Store ``value``; returns the evicted value once the buffer is full."""
+        evicted = self.data[self.head] if self.full else None
+        self.data[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return evicted
+
+    def values(self) -> np.ndarray:
+        """Copy of the buffered values, oldest first."""
+        if not self.full:
+            return self.data[: self.count].copy()
+        return np.concatenate([self.data[self.head :], self.data[: self.head]])
+
+    def clear(self):
+        self.data[:] = self.fill
+        self.count = 0
+        self.head = 0
+
+
+class HistogramSketch:
+    """Counts over fixed bin edges; the outer bins are open-ended."""
+
+    def __init__(self, edges: np.ndarray):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.missing = 0
+
+    @classmethod
+    def from_values(
+        cls, values: Iterable[float], bins: int = DEFAULT_SKETCH_BINS
+    ) -> "HistogramSketch":
+        """Build equal-frequency edges from ``values`` and count them."""
+        values = np.asarray(list(values), dtype=float)
+        observed = values[~np.isnan(values)]
+        if observed.size:
+            quantiles = np.linspace(0, 1, bins + 1)[1:-1]
+            edges = np.unique(np.quantile(observed, quantiles))
+        else:
+            edges = np.array([], dtype=float)
+        sketch = cls(edges)
+        sketch.add_many(values)
+        return sketch
+
+    def empty_like(self) -> "HistogramSketch":
+        return HistogramSketch(self.edges)
+
+    def bin_of(self, value: float) -> int:
+        return int(np.searchsorted(self.edges, value, side="right"))
+
+    def add(self, value: float, weight: int = 1):
+        if value is None or np.isnan(value):
+            self.missing += weight
+        else:
+            self.counts[self.bin_of(value)] += weight
+
+    def remove(self, value: float):
+        self.add(value, weight=-1)
+
+    def add_many(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        nan_mask = np.isnan(values)
+        self.missing += int(nan_mask.sum())
+        bins = np.searchsorted(self.edges, values[~nan_mask], side="right")
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def distribution(self) -> np.ndarray:
+        counts = self.counts.astype(float) + DISTRIBUTION_EPSILON
+        return counts / counts.sum()
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile by interpolating inside the containing bin."""
+        total = self.total
+        if total == 0 or len(self.edges) == 0:
+            return float("nan")
+        cumulative = np.cumsum(self.counts)
+        target = q * total
+        index = int(np.searchsorted(cumulative, target, side="left"))
+        index = min(index, len(self.counts) - 1)
+        lower = self.edges[index - 1] if index > 0 else self.edges[0]
+        upper = self.edges[index] if index < len(self.edges) else self.edges[-1]
+        before = cumulative[index - 1] if index > 0 else 0
+        inside = self.counts[index]
+        fraction = (target - before) / inside if inside else 0.0
+        return float(lower + (upper - lower) * fraction)
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def js_divergence(p: np.ndarray, q: np.ndarray) -> float:
+    m = 0.5 * (p + q)
+    return float(0.5 * (stats.entropy(p, m) + stats.entropy(q, m)))
+
+
+def js_distance(p: np.ndarray, q: np.ndarray) -> float:
+    """Jensen-Shannon distance, the square root of the divergence."""
+    return float(np.sqrt(max(js_divergence(p, q), 0.0)))
+
+
+def ks_approximation(baseline: HistogramSketch, current: HistogramSketch) -> tuple:
+    """KS statistic over the shared bin edges and its asymptotic p-value."""
+    n, m = baseline.total, current.total
+    if n == 0 or m == 0:
+        return 0.0, 1.0
+    statistic = float(
+        np.max(
+            np.abs(
+                np.cumsum(baseline.counts) / n - np.cumsum(current.counts) / m
+            )
+        )
+    )
+    effective = np.sqrt(n * m / (n + m))
+    return statistic, float(stats.kstwobign.sf(statistic * effective))
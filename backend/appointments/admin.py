@@ -6,6 +6,7 @@
 
 from .models import (
     Appointment,
+    AppointmentDailyRollup,
     AppointmentHistory,
     AppointmentReminder,
     AppointmentTemplate,
@@ -180,3 +181,15 @@ def has_add_permission(self, request):
 
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(AppointmentDailyRollup)
+class AppointmentDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ("date", "hospital", "provider", "status", "appointment_type", "count")
+    list_filter = ("hospital", "status", "appointment_type", "date")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
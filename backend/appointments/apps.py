@@ -4,3 +4,6 @@
 class AppointmentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "appointments"
+
+    def ready(self):
+        import appointments.signals
@@ -0,0 +1,39 @@
+"""
+rebuild_appointment_rollups module
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from appointments.rollups import rebuild_rollups
+from hospitals.models import Hospital
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily appointment rollups from the appointment table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hospital-id", type=int, help="Hospital ID (optional)")
+        parser.add_argument(
+            "--start-date", type=str, required=True, help="YYYY-MM-DD"
+        )
+        parser.add_argument("--end-date", type=str, required=True, help="YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        try:
+            start_date = datetime.strptime(options["start_date"], "%Y-%m-%d").date()
+            end_date = datetime.strptime(options["end_date"], "%Y-%m-%d").date()
+        except ValueError:
+            self.stdout.write(
+                self.style.ERROR("Invalid date format. Use YYYY-MM-DD format.")
+            )
+            return
+        hospitals = Hospital.objects.all()
+        if options.get("hospital_id"):
+            hospitals = hospitals.filter(id=options["hospital_id"])
+        for hospital in hospitals:
+            rows = rebuild_rollups(hospital.id, start_date, end_date)
+            self.stdout.write(
+                self.style.SUCCESS(f"{hospital.name}: rebuilt {rows} rollup rows")
+            )
@@ -0,0 +1,106 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hospitals", "0002_plan_hospitalplan"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("appointments", "0005_appointment_appointment_hospita_399297_idx_and_more"),
+    ]
+    operations = [
+        migrations.CreateModel(
+            name="AppointmentDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("date", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("SCHEDULED", "Scheduled"),
+                            ("CONFIRMED", "Confirmed"),
+                            ("CHECKED_IN", "Checked In"),
+                            ("IN_PROGRESS", "In Progress"),
+                            ("COMPLETED", "Completed"),
+                            ("NO_SHOW", "No Show"),
+                            ("CANCELLED", "Cancelled"),
+                            ("RESCHEDULED", "Rescheduled"),
+                            ("ON_HOLD", "On Hold"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "appointment_type",
+                    models.CharField(
+                        choices=[
+                            ("ROUTINE", "Routine Visit"),
+                            ("FOLLOW_UP", "Follow-up"),
+                            ("ANNUAL_PHYSICAL", "Annual Physical"),
+                            ("CONSULTATION", "Consultation"),
+                            ("PROCEDURE", "Procedure"),
+                            ("EMERGENCY", "Emergency"),
+                            ("URGENT", "Urgent Care"),
+                            ("TELEHEALTH", "Telehealth"),
+                            ("PREVENTIVE", "Preventive Care"),
+                            ("SPECIALIST", "Specialist Visit"),
+                            ("SURGICAL", "Surgical Consultation"),
+                            ("DIAGNOSTIC", "Diagnostic"),
+                            ("THERAPY", "Therapy Session"),
+                            ("VACCINATION", "Vaccination"),
+                            ("LAB_WORK", "Lab Work"),
+                            ("IMAGING", "Imaging"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "hospital",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(app_label)s_%(class)ss",
+                        to="hospitals.hospital",
+                    ),
+                ),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="appointment_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "indexes": [
+                    models.Index(
+                        fields=["hospital", "date"],
+                        name="appointment_hospita_8c971f_idx",
+                    ),
+                    models.Index(
+                        fields=["hospital", "provider", "date"],
+                        name="appointment_hospita_901975_idx",
+                    ),
+                ],
+                "unique_together": {
+                    ("hospital", "date", "provider", "status", "appointment_type")
+                },
+            },
+        ),
+    ]
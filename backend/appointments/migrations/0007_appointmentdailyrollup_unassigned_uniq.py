@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+def clear_rollups(apps, schema_editor):
+    # Counters written before the constraint may hold duplicate unassigned
+    # rows; 0008 rebuilds every hospital from the appointment table
+    apps.get_model("appointments", "AppointmentDailyRollup").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0006_appointmentdailyrollup"),
+    ]
+    operations = [
+        migrations.RunPython(clear_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="appointmentdailyrollup",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("provider__isnull", True)),
+                fields=("hospital", "date", "status", "appointment_type"),
+                name="appointment_rollup_unassigned_uniq",
+            ),
+        ),
+    ]
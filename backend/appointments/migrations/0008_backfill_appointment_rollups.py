@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def backfill_rollups(apps, schema_editor):
+    from appointments.rollups import appointment_date_span, rebuild_rollups
+
+    Appointment = apps.get_model("appointments", "Appointment")
+    AppointmentDailyRollup = apps.get_model("appointments", "AppointmentDailyRollup")
+    hospital_ids = (
+        Appointment.objects.order_by().values_list("hospital_id", flat=True).distinct()
+    )
+    for hospital_id in hospital_ids:
+        start_date, end_date = appointment_date_span(hospital_id, Appointment)
+        if start_date is not None:
+            rebuild_rollups(
+                hospital_id, start_date, end_date, Appointment, AppointmentDailyRollup
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0007_appointmentdailyrollup_unassigned_uniq"),
+    ]
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
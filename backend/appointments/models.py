@@ -527,6 +527,42 @@ def __str__(self):
         return f"{self.appointment} - {self.action} at {self.timestamp}"
 
 
+class AppointmentDailyRollup(TenantModel):
+    date = models.DateField()
+    provider = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="appointment_rollups",
+    )
+    status = models.CharField(max_length=16, choices=AppointmentStatus.choices)
+    appointment_type = models.CharField(max_length=20, choices=AppointmentType.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [
+            ["hospital", "date", "provider", "status", "appointment_type"]
+        ]
+        constraints = [
+            # NULLs never collide in unique_together, so the unassigned
+            # counter needs its own partial constraint
+            models.UniqueConstraint(
+                fields=["hospital", "date", "status", "appointment_type"],
+                condition=models.Q(provider__isnull=True),
+                name="appointment_rollup_unassigned_uniq",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["hospital", "date"]),
+            models.Index(fields=["hospital", "provider", "date"]),
+        ]
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.date} {self.provider_id} {self.status}: {self.count}"
+
+
 class SurgeryType(TenantModel):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
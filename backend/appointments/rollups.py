@@ -0,0 +1,198 @@
+"""
+rollups module
+
+Per-hospital, per-day, per-provider, per-status appointment counters.
+
+``AppointmentDailyRollup`` rows are adjusted by ``appointments.signals`` in
+the same transaction as the appointment write, so dashboard statistics over
+long ranges read a few hundred counter rows instead of scanning
+``Appointment``.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Appointment, AppointmentDailyRollup, AppointmentStatus
+
+STATUS_TOTALS = {
+    "completed": AppointmentStatus.COMPLETED,
+    "cancelled": AppointmentStatus.CANCELLED,
+    "no_shows": AppointmentStatus.NO_SHOW,
+    "scheduled": AppointmentStatus.SCHEDULED,
+    "confirmed": AppointmentStatus.CONFIRMED,
+}
+TOP_PROVIDERS = 10
+
+
+def rollup_key(appointment):
+    start_at = appointment.start_at
+    if isinstance(start_at, str):
+        start_at = parse_datetime(start_at)
+    if not (appointment.hospital_id and start_at):
+        return None
+    if timezone.is_naive(start_at):
+        start_at = timezone.make_aware(start_at)
+    return (
+        appointment.hospital_id,
+        timezone.localdate(start_at),
+        appointment.primary_provider_id,
+        appointment.status,
+        appointment.appointment_type,
+    )
+
+
+def apply_rollup_delta(key, delta):
+    if key is None or delta == 0:
+        return
+    hospital_id, day, provider_id, status, appointment_type = key
+    lookup = {
+        "hospital_id": hospital_id,
+        "date": day,
+        "provider_id": provider_id,
+        "status": status,
+        "appointment_type": appointment_type,
+    }
+    updated = AppointmentDailyRollup.objects.filter(**lookup).update(
+        count=F("count") + delta
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            AppointmentDailyRollup.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        AppointmentDailyRollup.objects.filter(**lookup).update(
+            count=F("count") + delta
+        )
+
+
+def record_transition(previous_key, current_key):
+    if previous_key == current_key:
+        return
+    apply_rollup_delta(previous_key, -1)
+    apply_rollup_delta(current_key, 1)
+
+
+def rebuild_rollups(
+    hospital_id,
+    start_date,
+    end_date,
+    appointment_model=Appointment,
+    rollup_model=AppointmentDailyRollup,
+):
+    """Recount one hospital's rollups for a date range from appointments.
+
+    The model arguments let migrations pass their historical models.
+    """
+    with transaction.atomic():
+        rollup_model.objects.filter(
+            hospital_id=hospital_id, date__gte=start_date, date__lte=end_date
+        ).delete()
+        rows = (
+            appointment_model.objects.filter(
+                hospital_id=hospital_id,
+                start_at__date__gte=start_date,
+                start_at__date__lte=end_date,
+            )
+            .values(
+                "start_at__date", "primary_provider_id", "status", "appointment_type"
+            )
+            .annotate(total=Count("id"))
+            .order_by()
+        )
+        rollups = [
+            rollup_model(
+                hospital_id=hospital_id,
+                date=row["start_at__date"],
+                provider_id=row["primary_provider_id"],
+                status=row["status"],
+                appointment_type=row["appointment_type"],
+                count=row["total"],
+            )
+            for row in rows
+        ]
+        rollup_model.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def appointment_date_span(hospital_id, appointment_model=Appointment):
+    """First and last appointment dates for a hospital, or (None, None)."""
+    span = appointment_model.objects.filter(hospital_id=hospital_id).aggregate(
+        first=Min("start_at__date"), last=Max("start_at__date")
+    )
+    return span["first"], span["last"]
+
+
+def fold_statistics(rows, provider_field):
+    """Fold (type, provider, status, count) rows into the statistics payload."""
+    statuses = Counter()
+    by_type = Counter()
+    by_provider = defaultdict(int)
+    provider_names = {}
+    for row in rows:
+        count = row["count"]
+        statuses[row["status"]] += count
+        by_type[row["appointment_type"]] += count
+        provider_id = row[f"{provider_field}_id"]
+        by_provider[provider_id] += count
+        provider_names[provider_id] = (
+            row[f"{provider_field}__first_name"],
+            row[f"{provider_field}__last_name"],
+        )
+    stats = {"total_appointments": sum(statuses.values())}
+    for name, status in STATUS_TOTALS.items():
+        stats[name] = statuses[status]
+    stats["by_type"] = [
+        {"appointment_type": appointment_type, "count": count}
+        for appointment_type, count in by_type.most_common()
+    ]
+    stats["by_provider"] = [
+        {
+            "primary_provider__first_name": provider_names[provider_id][0],
+            "primary_provider__last_name": provider_names[provider_id][1],
+            "count": count,
+        }
+        for provider_id, count in sorted(
+            by_provider.items(), key=lambda item: item[1], reverse=True
+        )[:TOP_PROVIDERS]
+    ]
+    return stats
+
+
+def live_statistics(queryset):
+    rows = (
+        queryset.order_by()
+        .values(
+            "appointment_type",
+            "status",
+            "primary_provider_id",
+            "primary_provider__first_name",
+            "primary_provider__last_name",
+        )
+        .annotate(count=Count("id", distinct=True))
+    )
+    return fold_statistics(rows, "primary_provider")
+
+
+def rollup_statistics(hospital_id, start_date, end_date, provider_id=None):
+    rollups = AppointmentDailyRollup.objects.filter(
+        hospital_id=hospital_id, date__gte=start_date, date__lte=end_date
+    )
+    if provider_id is not None:
+        rollups = rollups.filter(provider_id=provider_id)
+    rows = (
+        rollups.order_by()
+        .values(
+            "appointment_type",
+            "status",
+            "provider_id",
+            "provider__first_name",
+            "provider__last_name",
+        )
+        .annotate(count=Sum("count"))
+    )
+    return fold_statistics(rows, "provider")
@@ -0,0 +1,374 @@
+"""
+scheduling module
+
+Interval-set availability engine for providers and bookable resources.
+
+Working time comes from ``DutyRoster`` shifts; busy time comes from
+appointments (primary and additional providers), OT bookings and
+``AppointmentResource`` reservations. Every set is kept as a sorted list of
+disjoint ``(start, end)`` tuples so that free time is computed with a single
+sweep instead of comparing every slot against every appointment. Free lists
+are cached per provider/resource and day, and invalidated through
+per-object generation counters bumped by ``appointments.signals``.
+"""
+
+import heapq
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    Appointment,
+    AppointmentResource,
+    AppointmentStatus,
+    OTBooking,
+    OTStatus,
+    Resource,
+)
+
+BUSY_STATUSES = [
+    AppointmentStatus.SCHEDULED,
+    AppointmentStatus.CONFIRMED,
+    AppointmentStatus.CHECKED_IN,
+    AppointmentStatus.IN_PROGRESS,
+]
+OT_STAFF_FIELDS = (
+    "lead_surgeon_id",
+    "assisting_surgeon_id",
+    "anesthesiologist_id",
+    "scrub_nurse_id",
+    "circulating_nurse_id",
+)
+DEFAULT_WORKING_HOURS = (time(9, 0), time(17, 0))
+FREE_LIST_CACHE_TIMEOUT = 300
+
+
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(base, busy):
+    base = merge_intervals(base)
+    busy = merge_intervals(busy)
+    result = []
+    j = 0
+    for start, end in base:
+        cursor = start
+        while j < len(busy) and busy[j][1] <= cursor:
+            j += 1
+        k = j
+        while k < len(busy) and busy[k][0] < end:
+            if busy[k][0] > cursor:
+                result.append((cursor, busy[k][0]))
+            cursor = max(cursor, busy[k][1])
+            k += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+def intersect_intervals(first, second):
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        start = max(first[i][0], second[j][0])
+        end = min(first[i][1], second[j][1])
+        if start < end:
+            result.append((start, end))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def saturated_intervals(bookings, capacity):
+    """Return the periods where concurrent booked quantity reaches capacity."""
+    events = []
+    for start, end, quantity in bookings:
+        events.append((start, quantity))
+        events.append((end, -quantity))
+    events.sort(key=lambda event: (event[0], event[1]))
+    result = []
+    load = 0
+    saturated_since = None
+    for moment, delta in events:
+        load += delta
+        if load >= capacity and saturated_since is None:
+            saturated_since = moment
+        elif load < capacity and saturated_since is not None:
+            if saturated_since < moment:
+                result.append((saturated_since, moment))
+            saturated_since = None
+    return merge_intervals(result)
+
+
+def generation_key(kind, object_id):
+    return f"appointments:availability:gen:{kind}:{object_id}"
+
+
+def bump_generation(kind, object_ids):
+    for object_id in {object_id for object_id in object_ids if object_id}:
+        key = generation_key(kind, object_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+class AvailabilityEngine:
+    def __init__(self, hospital_id=None, slot_minutes=None, now=None):
+        self.hospital_id = hospital_id
+        self.slot_minutes = slot_minutes or settings.DEFAULT_APPOINTMENT_SLOT_MINUTES
+        self.now = now or timezone.now()
+        self.tz = timezone.get_current_timezone()
+
+    def day_bounds(self, day):
+        start = timezone.make_aware(datetime.combine(day, time.min), self.tz)
+        return start, start + timedelta(days=1)
+
+    def _cached_free_lists(self, kind, object_ids, days, loader):
+        generations = cache.get_many([generation_key(kind, oid) for oid in object_ids])
+        keys = {}
+        for object_id in object_ids:
+            generation = generations.get(generation_key(kind, object_id), 0)
+            for day in days:
+                keys[(object_id, day)] = (
+                    f"appointments:availability:{kind}:{object_id}:"
+                    f"{day.isoformat()}:{generation}"
+                )
+        cached = cache.get_many(list(keys.values()))
+        free_lists = {}
+        missing = []
+        for key, cache_key in keys.items():
+            if cache_key in cached:
+                free_lists[key] = cached[cache_key]
+            else:
+                missing.append(key)
+        if missing:
+            missing_ids = sorted({object_id for object_id, _ in missing})
+            missing_days = sorted({day for _, day in missing})
+            computed = loader(missing_ids, missing_days)
+            to_cache = {}
+            for key in missing:
+                free_lists[key] = computed.get(key, [])
+                to_cache[keys[key]] = free_lists[key]
+            cache.set_many(to_cache, timeout=FREE_LIST_CACHE_TIMEOUT)
+        return free_lists
+
+    def working_windows(self, provider_ids, days):
+        from hr.models import DutyRoster
+
+        rosters = DutyRoster.objects.filter(
+            user_id__in=provider_ids, date__in=days
+        ).select_related("shift")
+        if self.hospital_id:
+            rosters = rosters.filter(hospital_id=self.hospital_id)
+        windows = defaultdict(list)
+        for roster in rosters:
+            start = timezone.make_aware(
+                datetime.combine(roster.date, roster.shift.start_time), self.tz
+            )
+            end = timezone.make_aware(
+                datetime.combine(roster.date, roster.shift.end_time), self.tz
+            )
+            if end <= start:
+                end += timedelta(days=1)
+            windows[(roster.user_id, roster.date)].append((start, end))
+        for provider_id in provider_ids:
+            for day in days:
+                if (provider_id, day) not in windows:
+                    windows[(provider_id, day)] = [
+                        (
+                            timezone.make_aware(
+                                datetime.combine(day, DEFAULT_WORKING_HOURS[0]),
+                                self.tz,
+                            ),
+                            timezone.make_aware(
+                                datetime.combine(day, DEFAULT_WORKING_HOURS[1]),
+                                self.tz,
+                            ),
+                        )
+                    ]
+        return windows
+
+    def provider_busy_intervals(self, provider_ids, window_start, window_end):
+        busy = defaultdict(list)
+        overlapping = Q(start_at__lt=window_end, end_at__gt=window_start)
+        appointments = Appointment.objects.filter(
+            overlapping, status__in=BUSY_STATUSES
+        )
+        if self.hospital_id:
+            appointments = appointments.filter(hospital_id=self.hospital_id)
+        for provider_id, start, end in appointments.filter(
+            primary_provider_id__in=provider_ids
+        ).values_list("primary_provider_id", "start_at", "end_at"):
+            busy[provider_id].append((start, end))
+        additional = Appointment.additional_providers.through.objects.filter(
+            user_id__in=provider_ids, appointment__in=appointments
+        ).values_list("user_id", "appointment__start_at", "appointment__end_at")
+        for provider_id, start, end in additional:
+            busy[provider_id].append((start, end))
+        staff_filter = Q()
+        for field in OT_STAFF_FIELDS:
+            staff_filter |= Q(**{f"{field}__in": provider_ids})
+        ot_bookings = (
+            OTBooking.objects.filter(
+                staff_filter,
+                ot_slot__start_time__lt=window_end,
+                ot_slot__end_time__gt=window_start,
+            )
+            .exclude(status__in=[OTStatus.CANCELLED, OTStatus.COMPLETED])
+            .values_list(*OT_STAFF_FIELDS, "ot_slot__start_time", "ot_slot__end_time")
+        )
+        wanted = set(provider_ids)
+        for row in ot_bookings:
+            start, end = row[-2:]
+            for provider_id in set(row[:-2]) & wanted:
+                busy[provider_id].append((start, end))
+        return busy
+
+    def _load_provider_free_lists(self, provider_ids, days):
+        windows = self.working_windows(provider_ids, days)
+        window_start = min(start for spans in windows.values() for start, _ in spans)
+        window_end = max(end for spans in windows.values() for _, end in spans)
+        busy = self.provider_busy_intervals(provider_ids, window_start, window_end)
+        free_lists = {}
+        for (provider_id, day), spans in windows.items():
+            free_lists[(provider_id, day)] = subtract_intervals(
+                spans, busy.get(provider_id, [])
+            )
+        return free_lists
+
+    def provider_free_intervals(self, provider_ids, days):
+        return self._cached_free_lists(
+            "provider", provider_ids, days, self._load_provider_free_lists
+        )
+
+    def _load_resource_free_lists(self, resource_ids, days):
+        window_start = self.day_bounds(days[0])[0]
+        window_end = self.day_bounds(days[-1])[1]
+        resources = Resource.objects.filter(id__in=resource_ids)
+        if self.hospital_id:
+            resources = resources.filter(hospital_id=self.hospital_id)
+        capacities = {
+            resource_id: capacity
+            for resource_id, capacity, is_bookable in resources.values_list(
+                "id", "capacity", "is_bookable"
+            )
+            if is_bookable
+        }
+        bookings = defaultdict(list)
+        for resource_id, start, end, quantity in (
+            AppointmentResource.objects.filter(
+                resource_id__in=list(capacities),
+                start_time__lt=window_end,
+                end_time__gt=window_start,
+            )
+            .exclude(
+                appointment__status__in=[
+                    AppointmentStatus.CANCELLED,
+                    AppointmentStatus.NO_SHOW,
+                    AppointmentStatus.COMPLETED,
+                ]
+            )
+            .values_list("resource_id", "start_time", "end_time", "quantity")
+        ):
+            bookings[resource_id].append((start, end, quantity))
+        free_lists = {}
+        for resource_id, capacity in capacities.items():
+            busy = saturated_intervals(bookings[resource_id], max(capacity, 1))
+            for day in days:
+                free_lists[(resource_id, day)] = subtract_intervals(
+                    [self.day_bounds(day)], busy
+                )
+        return free_lists
+
+    def resource_free_intervals(self, resource_ids, days):
+        return self._cached_free_lists(
+            "resource", resource_ids, days, self._load_resource_free_lists
+        )
+
+    def _slots_in(self, free, day, duration):
+        step = timedelta(minutes=self.slot_minutes)
+        anchor = self.day_bounds(day)[0]
+        for start, end in free:
+            offset = max(start - anchor, timedelta(0))
+            current = anchor + step * -(-offset // step)
+            while current + duration <= end:
+                if current > self.now:
+                    yield current, current + duration
+                current += step
+
+    def _tagged_slots(self, provider_id, free, day, duration):
+        for start, end in self._slots_in(free, day, duration):
+            yield start, provider_id, end
+
+    def free_intervals(self, provider_ids, days, resource_ids=()):
+        provider_free = self.provider_free_intervals(provider_ids, days)
+        resource_free = (
+            self.resource_free_intervals(list(resource_ids), days)
+            if resource_ids
+            else {}
+        )
+        for provider_id in provider_ids:
+            for day in days:
+                free = provider_free.get((provider_id, day), [])
+                for resource_id in resource_ids:
+                    if not free:
+                        break
+                    free = intersect_intervals(
+                        free, resource_free.get((resource_id, day), [])
+                    )
+                yield provider_id, day, free
+
+    def find_slots(
+        self, provider_ids, days, duration_minutes=None, resource_ids=(), limit=None
+    ):
+        duration = timedelta(minutes=duration_minutes or self.slot_minutes)
+        slots = []
+        for provider_id, day, free in self.free_intervals(
+            provider_ids, days, resource_ids
+        ):
+            for start, end in self._slots_in(free, day, duration):
+                slots.append(
+                    {"provider": provider_id, "start_at": start, "end_at": end}
+                )
+        slots.sort(key=lambda slot: (slot["start_at"], slot["provider"]))
+        return slots[:limit] if limit else slots
+
+    def next_available(
+        self,
+        provider_ids,
+        start_date,
+        horizon_days=14,
+        duration_minutes=None,
+        resource_ids=(),
+        limit=1,
+    ):
+        duration = timedelta(minutes=duration_minutes or self.slot_minutes)
+        found = []
+        for offset in range(horizon_days):
+            day = start_date + timedelta(days=offset)
+            tagged = [
+                self._tagged_slots(provider_id, free, day, duration)
+                for provider_id, _, free in self.free_intervals(
+                    provider_ids, [day], resource_ids
+                )
+            ]
+            for start, provider_id, end in heapq.merge(*tagged):
+                found.append({"provider": provider_id, "start_at": start, "end_at": end})
+                if len(found) >= limit:
+                    return found
+        return found
@@ -0,0 +1,113 @@
+"""
+signals module
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from hr.models import DutyRoster
+
+from .models import Appointment, AppointmentResource, OTBooking, Resource
+from .rollups import apply_rollup_delta, record_transition, rollup_key
+from .scheduling import OT_STAFF_FIELDS, bump_generation
+
+
+@receiver(pre_save, sender=Appointment)
+def remember_previous_state(sender, instance, **kwargs):
+    instance._previous_rollup_key = None
+    instance._previous_status = None
+    if instance.pk:
+        previous = (
+            Appointment.objects.filter(pk=instance.pk)
+            .only(
+                "hospital", "start_at", "primary_provider", "status", "appointment_type"
+            )
+            .first()
+        )
+        if previous is not None:
+            instance._previous_provider_id = previous.primary_provider_id
+            instance._previous_status = previous.status
+            instance._previous_rollup_key = rollup_key(previous)
+
+
+@receiver(post_save, sender=Appointment)
+def update_appointment_rollups(sender, instance, created, **kwargs):
+    record_transition(
+        getattr(instance, "_previous_rollup_key", None), rollup_key(instance)
+    )
+
+
+@receiver(post_delete, sender=Appointment)
+def remove_appointment_from_rollups(sender, instance, **kwargs):
+    apply_rollup_delta(rollup_key(instance), -1)
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def invalidate_provider_availability(sender, instance, **kwargs):
+    provider_ids = [
+        instance.primary_provider_id,
+        getattr(instance, "_previous_provider_id", None),
+    ]
+    if instance.pk and kwargs.get("signal") is post_save:
+        provider_ids.extend(
+            instance.additional_providers.values_list("id", flat=True)
+        )
+    bump_generation("provider", provider_ids)
+
+
+@receiver(m2m_changed, sender=Appointment.additional_providers.through)
+def invalidate_additional_provider_availability(
+    sender, instance, action, pk_set, **kwargs
+):
+    if action in ("post_add", "post_remove", "pre_clear"):
+        if isinstance(instance, Appointment):
+            provider_ids = set(pk_set or ())
+            if action == "pre_clear":
+                provider_ids.update(
+                    instance.additional_providers.values_list("id", flat=True)
+                )
+        else:
+            provider_ids = {instance.pk}
+        bump_generation("provider", provider_ids)
+
+
+@receiver(post_save, sender=Appointment)
+def invalidate_appointment_resource_availability(sender, instance, created, **kwargs):
+    # Cancelling or no-showing an appointment frees its rooms and equipment
+    previous_status = getattr(instance, "_previous_status", None)
+    if created or previous_status is None or previous_status == instance.status:
+        return
+    bump_generation(
+        "resource",
+        AppointmentResource.objects.filter(appointment=instance).values_list(
+            "resource_id", flat=True
+        ),
+    )
+
+
+@receiver(post_save, sender=AppointmentResource)
+@receiver(post_delete, sender=AppointmentResource)
+def invalidate_resource_availability(sender, instance, **kwargs):
+    bump_generation("resource", [instance.resource_id])
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+def invalidate_resource_settings(sender, instance, **kwargs):
+    # Capacity and is_bookable feed the cached free lists
+    bump_generation("resource", [instance.pk])
+
+
+@receiver(post_save, sender=OTBooking)
+@receiver(post_delete, sender=OTBooking)
+def invalidate_ot_staff_availability(sender, instance, **kwargs):
+    bump_generation(
+        "provider", [getattr(instance, field) for field in OT_STAFF_FIELDS]
+    )
+
+
+@receiver(post_save, sender=DutyRoster)
+@receiver(post_delete, sender=DutyRoster)
+def invalidate_roster_availability(sender, instance, **kwargs):
+    bump_generation("provider", [instance.user_id])
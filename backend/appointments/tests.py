@@ -8,7 +8,26 @@
 from django.test import TestCase
 from django.utils import timezone
 
-from appointments.models import Appointment, AppointmentStatus
+from appointments.models import (
+    Appointment,
+    AppointmentDailyRollup,
+    AppointmentResource,
+    AppointmentStatus,
+    Resource,
+)
+from appointments.rollups import (
+    apply_rollup_delta,
+    appointment_date_span,
+    live_statistics,
+    rebuild_rollups,
+    rollup_statistics,
+)
+from appointments.scheduling import (
+    AvailabilityEngine,
+    intersect_intervals,
+    saturated_intervals,
+    subtract_intervals,
+)
 from hospitals.models import Hospital, HospitalPlan, Plan
 from hr.models import DutyRoster, Shift
 from patients.models import Patient
@@ -66,3 +85,209 @@ def test_slots(self):
         slots = res.data["slots"]
         self.assertEqual(len(slots), 1)
         self.assertIn("09:30:00", slots[0]["start_at"])
+
+    def test_available_slots_rejects_bad_limit(self):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.doctor)
+        res = client.get(
+            "/api/appointments/available_slots/",
+            {
+                "doctor": self.doctor.id,
+                "date": self.target_date.isoformat(),
+                "limit": "abc",
+            },
+        )
+        self.assertEqual(res.status_code, 400)
+
+    def test_next_available_across_specialists(self):
+        User = get_user_model()
+        self.doctor.specialization = "Cardiology"
+        self.doctor.save()
+        second = User.objects.create_user(
+            username="doc2",
+            password="x",
+            role=UserRole.ATTENDING_PHYSICIAN,
+            hospital=self.h,
+            specialization="Cardiology",
+        )
+        DutyRoster.objects.create(
+            hospital=self.h, user=second, date=self.target_date, shift=self.shift
+        )
+        tz = timezone.get_current_timezone()
+        Appointment.objects.create(
+            hospital=self.h,
+            patient=self.patient,
+            doctor=self.doctor,
+            start_at=timezone.make_aware(
+                datetime.combine(self.target_date, time(9, 0)), tz
+            ),
+            end_at=timezone.make_aware(
+                datetime.combine(self.target_date, time(10, 0)), tz
+            ),
+            status=AppointmentStatus.CONFIRMED,
+        )
+        engine = AvailabilityEngine(hospital_id=self.h.id, slot_minutes=30)
+        slots = engine.next_available(
+            [self.doctor.id, second.id], self.target_date, horizon_days=1
+        )
+        self.assertEqual(len(slots), 1)
+        self.assertEqual(slots[0]["provider"], second.id)
+        self.assertEqual(timezone.localtime(slots[0]["start_at"]).time(), time(9, 0))
+
+    def test_resource_constraint_and_cache_invalidation(self):
+        room = Resource.objects.create(
+            hospital=self.h, name="Echo Room", resource_type="ROOM", capacity=1
+        )
+        engine = AvailabilityEngine(hospital_id=self.h.id, slot_minutes=30)
+        self.assertEqual(
+            len(
+                engine.find_slots(
+                    [self.doctor.id], [self.target_date], resource_ids=[room.id]
+                )
+            ),
+            2,
+        )
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.combine(self.target_date, time(9, 30)), tz)
+        end = timezone.make_aware(datetime.combine(self.target_date, time(10, 0)), tz)
+        other = Appointment.objects.create(
+            hospital=self.h,
+            patient=self.patient,
+            start_at=start,
+            end_at=end,
+            status=AppointmentStatus.SCHEDULED,
+        )
+        AppointmentResource.objects.create(
+            appointment=other, resource=room, start_time=start, end_time=end
+        )
+        slots = AvailabilityEngine(hospital_id=self.h.id, slot_minutes=30).find_slots(
+            [self.doctor.id], [self.target_date], resource_ids=[room.id]
+        )
+        self.assertEqual(len(slots), 1)
+        self.assertEqual(timezone.localtime(slots[0]["start_at"]).time(), time(9, 0))
+
+    def test_cancellation_and_capacity_invalidate_resource_cache(self):
+        room = Resource.objects.create(
+            hospital=self.h, name="Echo Room", resource_type="ROOM", capacity=1
+        )
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.combine(self.target_date, time(9, 30)), tz)
+        end = timezone.make_aware(datetime.combine(self.target_date, time(10, 0)), tz)
+        other = Appointment.objects.create(
+            hospital=self.h,
+            patient=self.patient,
+            start_at=start,
+            end_at=end,
+            status=AppointmentStatus.SCHEDULED,
+        )
+        AppointmentResource.objects.create(
+            appointment=other, resource=room, start_time=start, end_time=end
+        )
+
+        def room_slots():
+            engine = AvailabilityEngine(hospital_id=self.h.id, slot_minutes=30)
+            return engine.find_slots(
+                [self.doctor.id], [self.target_date], resource_ids=[room.id]
+            )
+
+        self.assertEqual(len(room_slots()), 1)
+        other.status = AppointmentStatus.CANCELLED
+        other.save()
+        self.assertEqual(len(room_slots()), 2)
+        room.is_bookable = False
+        room.save()
+        self.assertEqual(len(room_slots()), 0)
+
+
+class IntervalAlgebraTest(TestCase):
+    def test_subtract_and_intersect(self):
+        self.assertEqual(
+            subtract_intervals([(0, 10), (20, 30)], [(2, 3), (5, 22), (29, 40)]),
+            [(0, 2), (3, 5), (22, 29)],
+        )
+        self.assertEqual(
+            intersect_intervals([(0, 10), (20, 30)], [(5, 25)]),
+            [(5, 10), (20, 25)],
+        )
+
+    def test_saturated_intervals_respects_capacity(self):
+        bookings = [(0, 10, 1), (5, 15, 1), (12, 20, 1)]
+        self.assertEqual(saturated_intervals(bookings, 2), [(5, 10), (12, 15)])
+        self.assertEqual(saturated_intervals(bookings, 3), [])
+
+
+class AppointmentRollupTest(TestCase):
+    def setUp(self):
+        self.h = Hospital.objects.create(name="H", code="h")
+        User = get_user_model()
+        self.doctor = User.objects.create_user(
+            username="doc",
+            password="x",
+            role=UserRole.ATTENDING_PHYSICIAN,
+            hospital=self.h,
+        )
+        self.patient = Patient.objects.create(
+            hospital=self.h,
+            first_name="Pat",
+            last_name="Ient",
+            date_of_birth=date.today() - timedelta(days=365 * 30),
+        )
+        self.day = date.today() + timedelta(days=2)
+        tz = timezone.get_current_timezone()
+        self.appointments = [
+            Appointment.objects.create(
+                hospital=self.h,
+                patient=self.patient,
+                doctor=self.doctor,
+                start_at=timezone.make_aware(datetime.combine(self.day, time(h)), tz),
+                end_at=timezone.make_aware(
+                    datetime.combine(self.day, time(h, 30)), tz
+                ),
+                status=AppointmentStatus.SCHEDULED,
+            )
+            for h in (9, 10, 11)
+        ]
+
+    def test_status_transitions_move_rollup_counts(self):
+        first, second, _ = self.appointments
+        first.status = AppointmentStatus.CONFIRMED
+        first.save()
+        second.status = AppointmentStatus.CANCELLED
+        second.save()
+        counts = dict(
+            AppointmentDailyRollup.objects.filter(
+                hospital=self.h, date=self.day, provider=self.doctor
+            ).values_list("status", "count")
+        )
+        self.assertEqual(counts[AppointmentStatus.SCHEDULED], 1)
+        self.assertEqual(counts[AppointmentStatus.CONFIRMED], 1)
+        self.assertEqual(counts[AppointmentStatus.CANCELLED], 1)
+
+    def test_rollup_statistics_match_live_statistics(self):
+        self.appointments[0].mark_as_no_show()
+        self.appointments[2].delete()
+        live = live_statistics(Appointment.objects.filter(hospital=self.h))
+        rolled = rollup_statistics(self.h.id, self.day, self.day)
+        self.assertEqual(live, rolled)
+        self.assertEqual(rolled["total_appointments"], 2)
+        self.assertEqual(rolled["no_shows"], 1)
+
+    def test_unassigned_counter_stays_single_row(self):
+        key = (self.h.id, self.day, None, AppointmentStatus.SCHEDULED, "ROUTINE")
+        apply_rollup_delta(key, 1)
+        apply_rollup_delta(key, 1)
+        rows = AppointmentDailyRollup.objects.filter(
+            hospital=self.h, date=self.day, provider__isnull=True
+        )
+        self.assertEqual(list(rows.values_list("count", flat=True)), [2])
+
+    def test_rebuild_over_date_span_matches_incremental(self):
+        self.appointments[1].mark_as_no_show()
+        incremental = rollup_statistics(self.h.id, self.day, self.day)
+        AppointmentDailyRollup.objects.all().delete()
+        start_date, end_date = appointment_date_span(self.h.id)
+        self.assertEqual((start_date, end_date), (self.day, self.day))
+        rebuild_rollups(self.h.id, start_date, end_date)
+        self.assertEqual(rollup_statistics(self.h.id, self.day, self.day), incremental)
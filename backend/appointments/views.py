@@ -2,7 +2,7 @@
 views module
 """
 
-from datetime import datetime, time, timedelta
+from datetime import datetime, timedelta
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
@@ -11,15 +11,12 @@
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from django.conf import settings
-from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
 
 from core.permissions import ModuleEnabledPermission, RolePermission
-from core.utils import PerformanceTracker, optimize_queryset
-from patients.models import Patient
-from users.models import User
+from core.tenant_scope import TenantScopeMixin
+from core.utils import PerformanceTracker
 
 from .models import (
     Appointment,
@@ -30,6 +27,8 @@
     Resource,
     WaitList,
 )
+from .rollups import live_statistics, rollup_statistics
+from .scheduling import AvailabilityEngine
 from .serializers import (
     AppointmentBasicSerializer,
     AppointmentHistorySerializer,
@@ -119,7 +118,9 @@ def availability(self, request, pk=None):
         return Response(availability_data)
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(TenantScopeMixin, viewsets.ModelViewSet):
+    scope_patient_field = "patient"
+    scope_provider_fields = ("primary_provider", "additional_providers")
     permission_classes = [IsAuthenticated, ModuleEnabledPermission]
     required_module = "enable_opd"
     filter_backends = [
@@ -153,57 +154,12 @@ def get_serializer_class(self):
         return AppointmentSerializer
 
     def get_queryset(self):
-        from django.core.cache import cache
-        from django.db.models import Prefetch
-
-        user = self.request.user
-        with PerformanceTracker("appointment_queryset") as tracker:
-            cache_key = f"appointment_queryset_filters:{user.id}:{user.hospital_id}"
-            cached_filters = cache.get(cache_key, version=1)
-            if cached_filters:
-                queryset = Appointment.objects.filter(**cached_filters)
-            else:
-                qs = optimize_queryset(
-                    Appointment.objects.all(),
-                    select_related=[
-                        "patient",
-                        "primary_provider",
-                        "hospital",
-                        "template",
-                    ],
-                    prefetch_related=[
-                        Prefetch(
-                            "patient",
-                            queryset=Patient.objects.only(
-                                "id", "first_name", "last_name", "medical_record_number"
-                            ),
-                        ),
-                        Prefetch(
-                            "primary_provider",
-                            queryset=User.objects.only("id", "first_name", "last_name"),
-                        ),
-                    ],
+        with PerformanceTracker("appointment_queryset"):
+            queryset = self.scope_queryset(
+                Appointment.objects.select_related(
+                    "patient", "primary_provider", "hospital", "template"
                 )
-                if user.is_superuser or getattr(user, "role", None) == "SUPER_ADMIN":
-                    queryset = qs
-                elif getattr(user, "hospital_id", None) is None:
-                    queryset = qs.none()
-                else:
-                    queryset = qs.filter(hospital_id=user.hospital_id)
-                if not (
-                    user.is_superuser
-                    or getattr(user, "role", None)
-                    in ["SUPER_ADMIN", "HOSPITAL_ADMIN", "ADMIN"]
-                ):
-                    if hasattr(user, "patient_profile"):
-                        queryset = queryset.filter(patient=user.patient_profile)
-                    elif user.role in ["DOCTOR", "NURSE"]:
-                        queryset = queryset.filter(
-                            Q(primary_provider=user) | Q(additional_providers=user)
-                        ).distinct()
-                    else:
-                        queryset = queryset.none()
-                cache.set(cache_key, queryset.query.where, timeout=300, version=1)
+            )
             start_date = self.request.query_params.get("start_date")
             end_date = self.request.query_params.get("end_date")
             if start_date:
@@ -262,38 +218,23 @@ def upcoming(self, request):
 
     @action(detail=False, methods=["get"])
     def statistics(self, request):
-        queryset = self.get_queryset()
         start_date = request.query_params.get(
             "start_date", timezone.now().date() - timedelta(days=30)
         )
         end_date = request.query_params.get("end_date", timezone.now().date())
-        stats_queryset = queryset.filter(
-            start_at__date__gte=start_date, start_at__date__lte=end_date
+        scope = self.tenant_scope
+        use_rollups = request.query_params.get("source", "rollup") == "rollup"
+        if scope.hospital_wide and use_rollups and scope.hospital_id:
+            stats = rollup_statistics(scope.hospital_id, start_date, end_date)
+            stats["source"] = "rollup"
+            return Response(stats)
+        stats_queryset = Appointment.objects.filter(
+            pk__in=self.get_queryset().values("pk"),
+            start_at__date__gte=start_date,
+            start_at__date__lte=end_date,
         )
-        stats = {
-            "total_appointments": stats_queryset.count(),
-            "completed": stats_queryset.filter(
-                status=AppointmentStatus.COMPLETED
-            ).count(),
-            "cancelled": stats_queryset.filter(
-                status=AppointmentStatus.CANCELLED
-            ).count(),
-            "no_shows": stats_queryset.filter(status=AppointmentStatus.NO_SHOW).count(),
-            "scheduled": stats_queryset.filter(
-                status=AppointmentStatus.SCHEDULED
-            ).count(),
-            "confirmed": stats_queryset.filter(
-                status=AppointmentStatus.CONFIRMED
-            ).count(),
-            "by_type": list(
-                stats_queryset.values("appointment_type").annotate(count=Count("id"))
-            ),
-            "by_provider": list(
-                stats_queryset.values(
-                    "primary_provider__first_name", "primary_provider__last_name"
-                ).annotate(count=Count("id"))[:10]
-            ),
-        }
+        stats = live_statistics(stats_queryset)
+        stats["source"] = "live"
         return Response(stats)
 
     @action(detail=True, methods=["post"])
@@ -476,58 +417,143 @@ def mark_no_show(self, request, pk=None):
         serializer = self.get_serializer(appointment)
         return Response(serializer.data)
 
+    def _availability_request(self, request):
+        from hr.models import DutyRoster
+
+        params = request.query_params
+        provider_ids = [
+            int(value)
+            for value in (params.get("doctors") or params.get("doctor") or "").split(",")
+            if value.strip()
+        ]
+        resource_ids = [
+            int(value)
+            for value in (params.get("resources") or "").split(",")
+            if value.strip()
+        ]
+        date_str = params.get("date") or params.get("start_date")
+        start_date = (
+            datetime.strptime(date_str, "%Y-%m-%d").date()
+            if date_str
+            else timezone.localdate()
+        )
+        end_date = (
+            datetime.strptime(params["end_date"], "%Y-%m-%d").date()
+            if params.get("end_date")
+            else start_date
+        )
+        if end_date < start_date or (end_date - start_date).days > 31:
+            raise ValueError("Date range must be between 1 and 31 days")
+        specialization = params.get("specialization")
+        if specialization:
+            rosters = DutyRoster.objects.filter(
+                date__gte=start_date,
+                date__lte=end_date + timedelta(days=int(params.get("days", 0))),
+                user__specialization__iexact=specialization,
+            )
+            if getattr(request.user, "hospital_id", None):
+                rosters = rosters.filter(hospital_id=request.user.hospital_id)
+            provider_ids.extend(rosters.values_list("user_id", flat=True).distinct())
+        engine = AvailabilityEngine(
+            hospital_id=getattr(request.user, "hospital_id", None),
+        )
+        duration = int(params.get("duration", engine.slot_minutes))
+        return (
+            engine,
+            sorted(set(provider_ids)),
+            resource_ids,
+            start_date,
+            end_date,
+            duration,
+        )
+
+    @staticmethod
+    def _serialize_slots(slots):
+        return [
+            {
+                "provider": slot["provider"],
+                "start_at": slot["start_at"].isoformat(),
+                "end_at": slot["end_at"].isoformat(),
+            }
+            for slot in slots
+        ]
+
     @action(detail=False, methods=["get"])
     def available_slots(self, request):
         self.throttle_scope = "slots"
-        doctor_id = request.query_params.get("doctor")
-        date_str = request.query_params.get("date")
-        if not (doctor_id and date_str):
+        if not (
+            (request.query_params.get("doctor") or request.query_params.get("doctors"))
+            or request.query_params.get("specialization")
+        ) or not (
+            request.query_params.get("date") or request.query_params.get("start_date")
+        ):
             return Response({"detail": "doctor and date are required"}, status=400)
         try:
-            target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        except ValueError:
-            return Response({"detail": "Invalid date"}, status=400)
-        slot_minutes = settings.DEFAULT_APPOINTMENT_SLOT_MINUTES
-        from hr.models import DutyRoster
+            (
+                engine,
+                provider_ids,
+                resource_ids,
+                start_date,
+                end_date,
+                duration,
+            ) = self._availability_request(request)
+            limit = int(request.query_params.get("limit", 0)) or None
+        except ValueError as e:
+            return Response({"detail": f"Invalid request: {e}"}, status=400)
+        days = [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        ]
+        slots = engine.find_slots(
+            provider_ids,
+            days,
+            duration_minutes=duration,
+            resource_ids=resource_ids,
+            limit=limit,
+        )
+        payload = {
+            "providers": provider_ids,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "slots": self._serialize_slots(slots),
+        }
+        if request.query_params.get("doctor") and start_date == end_date:
+            payload["doctor"] = int(request.query_params["doctor"])
+            payload["date"] = start_date.isoformat()
+        return Response(payload)
 
-        roster = (
-            DutyRoster.objects.filter(user_id=doctor_id, date=target_date)
-            .select_related("shift")
-            .first()
+    @action(detail=False, methods=["get"])
+    def next_available(self, request):
+        self.throttle_scope = "slots"
+        try:
+            (
+                engine,
+                provider_ids,
+                resource_ids,
+                start_date,
+                _,
+                duration,
+            ) = self._availability_request(request)
+            horizon_days = min(int(request.query_params.get("days", 14)), 90)
+            limit = min(int(request.query_params.get("limit", 1)), 50)
+        except ValueError as e:
+            return Response({"detail": f"Invalid request: {e}"}, status=400)
+        if not provider_ids:
+            return Response(
+                {"detail": "doctor, doctors or specialization is required"},
+                status=400,
+            )
+        slots = engine.next_available(
+            provider_ids,
+            start_date,
+            horizon_days=horizon_days,
+            duration_minutes=duration,
+            resource_ids=resource_ids,
+            limit=limit,
+        )
+        return Response(
+            {"providers": provider_ids, "slots": self._serialize_slots(slots)}
         )
-        if roster and roster.shift:
-            start_t: time = roster.shift.start_time
-            end_t: time = roster.shift.end_time
-        else:
-            start_t = time(9, 0)
-            end_t = time(17, 0)
-        tz = timezone.get_current_timezone()
-        start_dt = timezone.make_aware(datetime.combine(target_date, start_t), tz)
-        end_dt = timezone.make_aware(datetime.combine(target_date, end_t), tz)
-        slots = []
-        current = start_dt
-        existing = Appointment.objects.filter(
-            primary_provider_id=doctor_id,
-            start_at__date=target_date,
-            status__in=[
-                AppointmentStatus.SCHEDULED,
-                AppointmentStatus.CONFIRMED,
-                AppointmentStatus.IN_PROGRESS,
-            ],
-        ).values_list("start_at", "end_at")
-        while current + timedelta(minutes=slot_minutes) <= end_dt:
-            next_dt = current + timedelta(minutes=slot_minutes)
-            overlap = False
-            for s, e in existing:
-                if s < next_dt and e > current:
-                    overlap = True
-                    break
-            if not overlap and current > timezone.now():
-                slots.append(
-                    {"start_at": current.isoformat(), "end_at": next_dt.isoformat()}
-                )
-            current = next_dt
-        return Response({"doctor": int(doctor_id), "date": date_str, "slots": slots})
 
 
 class WaitListViewSet(viewsets.ModelViewSet):
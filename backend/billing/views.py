@@ -18,6 +18,7 @@
 
 from appointments.models import Appointment
 from core.permissions import ModuleEnabledPermission
+from core.tenant_scope import TenantScopeMixin
 from facilities.models import Bed
 from patients.models import Patient
 
@@ -31,18 +32,12 @@
 )
 
 
-class TenantScopedViewSet(viewsets.ModelViewSet):
+class TenantScopedViewSet(TenantScopeMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, ModuleEnabledPermission]
     required_module = None
 
     def get_queryset(self):
-        qs = super().get_queryset()
-        user = self.request.user
-        if user.is_superuser or getattr(user, "role", None) == "SUPER_ADMIN":
-            return qs
-        if getattr(user, "hospital_id", None) is None:
-            return qs.none()
-        return qs.filter(hospital_id=user.hospital_id)
+        return self.scope_queryset(super().get_queryset())
 
     def ensure_tenant_on_create(self, serializer):
         user = self.request.user
@@ -55,7 +55,7 @@ def generate_cache_key(self, prefix: str, *args, **kwargs) -> str:
         key_data = f"{prefix}:{':'.join(str(arg) for arg in args)}"
         if kwargs:
             key_data += f":{json.dumps(kwargs, sort_keys=True)}"
-        return hashlib.hashlib.sha256(key_data.encode()).hexdigest()
+        return hashlib.sha256(key_data.encode()).hexdigest()
 
     def get_with_fallback(
         self, key: str, fallback_func: Callable, timeout: int = None
@@ -76,13 +76,15 @@ def set_with_tags(
                 self.redis.sadd(tag_key, key)
                 self.redis.expire(tag_key, timeout)
 
-    def invalidate_by_tag(self, tag: str) -> None:
-        if self.redis:
-            tag_key = f"tag:{tag}"
-            keys = self.redis.smembers(tag_key)
-            if keys:
-                self.cache.delete_many(keys)
-                self.redis.delete(tag_key)
+    def invalidate_by_tag(self, tag: str) -> int:
+        if not self.redis:
+            return 0
+        tag_key = f"tag:{tag}"
+        keys = self.redis.smembers(tag_key)
+        if keys:
+            self.cache.delete_many(keys)
+            self.redis.delete(tag_key)
+        return len(keys)
 
     def cache_patient_data(self, patient_id: Union[str, int], data: Dict) -> None:
         patient_key = self.generate_cache_key(
@@ -143,6 +145,7 @@ def cache_queryset(
                     "cached_by": "enhanced_cache",
                 },
                 separators=(",", ":"),
+                default=str,
             )  # Compact JSON
 
             cache_key = f"qs:{self.generate_cache_key(queryset_key)}"
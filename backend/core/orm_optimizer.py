@@ -4,6 +4,7 @@
 """
 
 import functools
+import hashlib
 import logging
 import time
 import traceback
@@ -239,7 +240,8 @@ def _generate_cache_key(self, queryset: QuerySet) -> str:
         """Generate a unique cache key for a queryset"""
         model = queryset.model
         sql, params = queryset.query.sql_with_params()
-        key = f"orm:{model.__name__}:{hash(sql + str(params))}"
+        digest = hashlib.sha256(f"{sql}|{params!r}".encode()).hexdigest()
+        key = f"orm:{model._meta.label}:{digest}"
         return key
 
     def bulk_operations(
@@ -6,6 +6,7 @@
 import os
 from datetime import date, datetime
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
@@ -13,6 +14,7 @@
 
 from .audit import send_audit_event
 from .models import AuditLog
+from .tenant_scope import invalidate_tenant_scope
 
 KAFKA_BROKER = os.getenv("KAFKA_BROKER", "kafka:9092")
 KAFKA_TOPIC_APPT = os.getenv("KAFKA_TOPIC_APPOINTMENTS", "appointments_events")
@@ -87,3 +89,9 @@ def on_delete(sender, instance, **kwargs):
 
     if sender_name in ["Patient", "Appointment", "Prescription", "Bill", "Payment"]:
         log_action(instance, "DELETE")
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tenant_scope(sender, instance, **kwargs):
+    invalidate_tenant_scope(instance.pk)
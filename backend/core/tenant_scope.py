@@ -0,0 +1,148 @@
+"""
+tenant_scope module
+
+Resolve a user's data-access scope once and reuse it across viewsets.
+
+The scope is cached as plain data (ids and flags only, never ORM objects or
+query internals) under a per-user key and rebuilt when the user's role,
+hospital or linked patient profile changes.
+"""
+
+import logging
+from dataclasses import asdict, dataclass
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.db.models import Q, QuerySet
+
+logger = logging.getLogger(__name__)
+
+SCOPE_CACHE_TIMEOUT = 900
+UNRESTRICTED_ROLES = {"SUPER_ADMIN"}
+HOSPITAL_WIDE_ROLES = {"SUPER_ADMIN", "HOSPITAL_ADMIN", "ADMIN"}
+PROVIDER_ROLES = {"DOCTOR", "NURSE"}
+
+
+@dataclass(frozen=True)
+class TenantScope:
+    user_id: Optional[int]
+    hospital_id: Optional[int]
+    unrestricted: bool = False
+    hospital_wide: bool = False
+    provider_id: Optional[int] = None
+    patient_id: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TenantScope":
+        return cls(**data)
+
+    def apply(
+        self,
+        queryset: QuerySet,
+        hospital_field: str = "hospital",
+        patient_field: Optional[str] = None,
+        provider_fields: Iterable[str] = (),
+    ) -> QuerySet:
+        """Filter ``queryset`` down to this scope.
+
+        ``patient_field`` and ``provider_fields`` opt a viewset into
+        role-level restriction; without them only the tenant (hospital)
+        boundary is enforced.
+        """
+        if self.unrestricted:
+            return queryset
+        if self.hospital_id is None:
+            return queryset.none()
+        queryset = queryset.filter(**{f"{hospital_field}_id": self.hospital_id})
+        provider_fields = tuple(provider_fields)
+        if self.hospital_wide or not (patient_field or provider_fields):
+            return queryset
+        if self.patient_id is not None and patient_field:
+            return queryset.filter(**{f"{patient_field}_id": self.patient_id})
+        if self.provider_id is not None and provider_fields:
+            condition = Q()
+            for field in provider_fields:
+                condition |= Q(**{field: self.provider_id})
+            queryset = queryset.filter(condition)
+            if len(provider_fields) > 1:
+                queryset = queryset.distinct()
+            return queryset
+        return queryset.none()
+
+
+def scope_cache_key(user_id) -> str:
+    return f"tenant_scope:v1:{user_id}"
+
+
+def compute_tenant_scope(user) -> TenantScope:
+    role = getattr(user, "role", None)
+    hospital_id = getattr(user, "hospital_id", None)
+    unrestricted = bool(user.is_superuser or role in UNRESTRICTED_ROLES)
+    hospital_wide = unrestricted or role in HOSPITAL_WIDE_ROLES
+    patient_id = None
+    provider_id = None
+    if not hospital_wide:
+        try:
+            patient_profile = getattr(user, "patient_profile", None)
+        except Exception:
+            patient_profile = None
+        if patient_profile is not None:
+            patient_id = patient_profile.pk
+        elif role in PROVIDER_ROLES:
+            provider_id = user.pk
+    return TenantScope(
+        user_id=user.pk,
+        hospital_id=hospital_id,
+        unrestricted=unrestricted,
+        hospital_wide=hospital_wide,
+        provider_id=provider_id,
+        patient_id=patient_id,
+    )
+
+
+def resolve_tenant_scope(user) -> TenantScope:
+    if not getattr(user, "is_authenticated", False):
+        return TenantScope(user_id=None, hospital_id=None)
+    key = scope_cache_key(user.pk)
+    cached = cache.get(key)
+    if cached is not None:
+        try:
+            return TenantScope.from_dict(cached)
+        except TypeError:
+            logger.warning(f"Discarding malformed tenant scope for user {user.pk}")
+    scope = compute_tenant_scope(user)
+    cache.set(key, scope.to_dict(), SCOPE_CACHE_TIMEOUT)
+    return scope
+
+
+def invalidate_tenant_scope(user_id) -> None:
+    if user_id is not None:
+        cache.delete(scope_cache_key(user_id))
+
+
+class TenantScopeMixin:
+    """Viewset mixin exposing the request user's resolved ``tenant_scope``."""
+
+    scope_hospital_field = "hospital"
+    scope_patient_field = None
+    scope_provider_fields = ()
+
+    @property
+    def tenant_scope(self) -> TenantScope:
+        request = self.request
+        scope = getattr(request, "_tenant_scope", None)
+        if scope is None:
+            scope = resolve_tenant_scope(request.user)
+            request._tenant_scope = scope
+        return scope
+
+    def scope_queryset(self, queryset: QuerySet) -> QuerySet:
+        return self.tenant_scope.apply(
+            queryset,
+            hospital_field=self.scope_hospital_field,
+            patient_field=self.scope_patient_field,
+            provider_fields=self.scope_provider_fields,
+        )
@@ -1 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+
+from core.tenant_scope import (
+    TenantScope,
+    resolve_tenant_scope,
+    scope_cache_key,
+)
+from hospitals.models import Hospital
+from users.models import UserRole
+
+
+class TenantScopeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.h = Hospital.objects.create(name="H", code="h")
+        self.User = get_user_model()
+
+    def test_scope_is_cached_as_plain_data(self):
+        user = self.User.objects.create_user(
+            username="doc", password="x", role=UserRole.DOCTOR, hospital=self.h
+        )
+        scope = resolve_tenant_scope(user)
+        self.assertEqual(scope.hospital_id, self.h.id)
+        self.assertEqual(scope.provider_id, user.id)
+        self.assertFalse(scope.hospital_wide)
+        self.assertEqual(cache.get(scope_cache_key(user.id)), scope.to_dict())
+
+    def test_role_change_invalidates_cached_scope(self):
+        user = self.User.objects.create_user(
+            username="nurse", password="x", role=UserRole.DOCTOR, hospital=self.h
+        )
+        self.assertFalse(resolve_tenant_scope(user).hospital_wide)
+        user.role = UserRole.HOSPITAL_ADMIN
+        user.save()
+        self.assertIsNone(cache.get(scope_cache_key(user.id)))
+        self.assertTrue(resolve_tenant_scope(user).hospital_wide)
+
+    def test_apply_without_hospital_returns_nothing(self):
+        scope = TenantScope(user_id=1, hospital_id=None)
+        self.assertFalse(scope.apply(Hospital.objects.all()).exists())
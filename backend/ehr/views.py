@@ -11,6 +11,7 @@
 from django.shortcuts import render
 
 from core.permissions import ModuleEnabledPermission
+from core.tenant_scope import TenantScopeMixin
 
 from .models import Encounter, EncounterAttachment, EncounterNote
 from .serializers import (
@@ -20,7 +21,7 @@
 )
 
 
-class EncounterViewSet(viewsets.ModelViewSet):
+class EncounterViewSet(TenantScopeMixin, viewsets.ModelViewSet):
     serializer_class = EncounterSerializer
     queryset = Encounter.objects.select_related(
         "patient", "doctor", "hospital", "appointment"
@@ -29,17 +30,8 @@ class EncounterViewSet(viewsets.ModelViewSet):
     required_module = "enable_opd"
 
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
-        if user.is_superuser or getattr(user, "role", None) == "SUPER_ADMIN":
-            # Use prefetch_related for nested relationships to eliminate N+1 queries
-            return qs.prefetch_related(
-                "notes", "attachments", "notes__author", "attachments__uploaded_by"
-            )
-        if getattr(user, "hospital_id", None) is None:
-            return qs.none()
         # Use prefetch_related for nested relationships to eliminate N+1 queries
-        return qs.filter(hospital_id=user.hospital_id).prefetch_related(
+        return self.scope_queryset(super().get_queryset()).prefetch_related(
             "notes", "attachments", "notes__author", "attachments__uploaded_by"
         )
 
@@ -76,36 +68,26 @@ def perform_create(self, serializer):
         )
 
 
-class EncounterNoteViewSet(viewsets.ModelViewSet):
+class EncounterNoteViewSet(TenantScopeMixin, viewsets.ModelViewSet):
     serializer_class = EncounterNoteSerializer
     queryset = EncounterNote.objects.select_related("encounter").all()
     permission_classes = [IsAuthenticated, ModuleEnabledPermission]
     required_module = "enable_opd"
+    scope_hospital_field = "encounter__hospital"
 
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
-        if user.is_superuser or getattr(user, "role", None) == "SUPER_ADMIN":
-            return qs
-        if getattr(user, "hospital_id", None) is None:
-            return qs.none()
-        return qs.filter(encounter__hospital_id=user.hospital_id)
+        return self.scope_queryset(super().get_queryset())
 
 
-class EncounterAttachmentViewSet(viewsets.ModelViewSet):
+class EncounterAttachmentViewSet(TenantScopeMixin, viewsets.ModelViewSet):
     serializer_class = EncounterAttachmentSerializer
     queryset = EncounterAttachment.objects.select_related("encounter").all()
     permission_classes = [IsAuthenticated, ModuleEnabledPermission]
     required_module = "enable_opd"
+    scope_hospital_field = "encounter__hospital"
 
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
-        if user.is_superuser or getattr(user, "role", None) == "SUPER_ADMIN":
-            return qs
-        if getattr(user, "hospital_id", None) is None:
-            return qs.none()
-        return qs.filter(encounter__hospital_id=user.hospital_id)
+        return self.scope_queryset(super().get_queryset())
 
     def perform_create(self, serializer):
         file_obj = self.request.FILES.get("file")
@@ -144,17 +126,11 @@ def get_queryset(self):
         return qs.filter(recipient_user=user)
 
 
-class QualityMetricViewSet(viewsets.ModelViewSet):
+class QualityMetricViewSet(TenantScopeMixin, viewsets.ModelViewSet):
     serializer_class = QualityMetricSerializer
     queryset = QualityMetric.objects.select_related("hospital").all()
     permission_classes = [IsAuthenticated, ModuleEnabledPermission]
     required_module = "enable_opd"
 
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
-        if user.is_superuser or getattr(user, "role", None) == "SUPER_ADMIN":
-            return qs
-        if getattr(user, "hospital_id", None) is None:
-            return qs.none()
-        return qs.filter(hospital_id=user.hospital_id)
+        return self.scope_queryset(super().get_queryset())
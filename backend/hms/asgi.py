@@ -4,3 +4,12 @@
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hms.settings")
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if "ai_ml" in settings.INSTALLED_APPS:
+    # Models are no longer loaded at import time; load them once per server
+    # process before it starts taking requests.
+    from ai_ml.core.inference_engine import warm_up_inference_engine
+
+    warm_up_inference_engine()
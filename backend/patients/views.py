@@ -8,6 +8,7 @@
 
 from core.enhanced_cache import cache_result, enhanced_cache
 from core.permissions import ModuleEnabledPermission
+from core.tenant_scope import TenantScopeMixin
 
 from .models import Patient
 from .serializers import PatientSerializer
@@ -19,7 +20,7 @@ def has_object_permission(self, request, view, obj):
         return user_hospital_id is None or obj.hospital_id == user_hospital_id
 
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(TenantScopeMixin, viewsets.ModelViewSet):
     serializer_class = PatientSerializer
     queryset = Patient.objects.all()
     filterset_fields = ["gender", "status"]
@@ -29,13 +30,7 @@ class PatientViewSet(viewsets.ModelViewSet):
     required_module = "enable_opd"
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_superuser or getattr(user, "role", None) == "SUPER_ADMIN":
-            return Patient.get_optimized_queryset()
-        elif getattr(user, "hospital_id", None) is None:
-            return Patient.objects.none()
-        else:
-            return Patient.get_optimized_queryset(user.hospital_id)
+        return self.scope_queryset(Patient.get_optimized_queryset())
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -0,0 +1,163 @@
+"""
+Unit tests for the AI/ML fitted transform plan and its registry checks
+"""
+
+import json
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from ai_ml.core.feature_engineering import (
+    FeatureEngineeringPipeline,
+    FeatureType,
+    TransformPlan,
+)
+from ai_ml.core.model_cache import ModelArtifactCache
+from ai_ml.core.model_registry import ModelRegistry
+
+RECORDS = [
+    {
+        "date_of_birth": "1950-03-01",
+        "gender": "F",
+        "chronic_conditions": ["diabetes", "chf"],
+        "systolic_bp": 150,
+        "diastolic_bp": 95,
+        "heart_rate": 88,
+        "medications": [{"name": "warfarin"}],
+    },
+    {
+        "date_of_birth": "1990-07-12",
+        "gender": "M",
+        "chronic_conditions": [],
+        "systolic_bp": 118,
+        "diastolic_bp": 76,
+        "heart_rate": 64,
+        "medications": [],
+    },
+    {
+        "date_of_birth": "2015-01-20",
+        "gender": "F",
+        "chronic_conditions": ["asthma"],
+        "systolic_bp": 100,
+        "diastolic_bp": 65,
+        "heart_rate": 110,
+        "medications": [{"name": "albuterol"}],
+    },
+]
+
+
+@pytest.fixture
+def pipeline():
+    return FeatureEngineeringPipeline()
+
+
+@pytest.fixture
+def plan(pipeline):
+    return pipeline.fit(RECORDS)
+
+
+def engineered_records(pipeline, plan, records):
+    feature_types = [FeatureType(value) for value in plan.feature_types]
+    features, _ = pipeline._derive_features(pipeline._as_frame(records), feature_types)
+    return features.to_dict("records")
+
+
+class TestTransformPlan:
+    def test_round_trip_through_json(self, pipeline, plan):
+        restored = TransformPlan.from_dict(json.loads(json.dumps(plan.to_dict())))
+        assert restored == plan
+        assert restored.fingerprint == plan.fingerprint
+        np.testing.assert_array_equal(
+            pipeline.transform(RECORDS, restored), pipeline.transform(RECORDS, plan)
+        )
+
+    def test_encode_then_apply_matches_transform(self, pipeline, plan):
+        records = engineered_records(pipeline, plan, RECORDS)
+        matrix = plan.apply(plan.encode(records))
+        assert matrix.shape == (len(RECORDS), len(plan.output_columns))
+        np.testing.assert_allclose(matrix, pipeline.transform(RECORDS))
+
+    def test_fingerprint_ignores_fit_time(self, pipeline, plan):
+        refit = FeatureEngineeringPipeline().fit(RECORDS)
+        refit.fitted_at = "2000-01-01T00:00:00"
+        assert refit.fingerprint == plan.fingerprint
+
+    def test_fingerprint_tracks_fitted_state(self, plan):
+        changed = TransformPlan.from_dict(plan.to_dict())
+        changed.means[0] += 1.0
+        assert changed.fingerprint != plan.fingerprint
+
+    def test_unknown_version_is_rejected(self, plan):
+        data = plan.to_dict()
+        data["version"] = plan.version + 1
+        with pytest.raises(ValueError):
+            TransformPlan.from_dict(data)
+
+    def test_unseen_and_missing_values_are_imputed(self, plan):
+        column = plan.input_columns.index("age_group")
+        matrix = plan.encode([{"age_group": "unknown"}, {}])
+        assert np.isnan(matrix).all()
+        applied = plan.apply(matrix)
+        assert np.isfinite(applied).all()
+        selected = plan.selected_columns.index("age_group")
+        assert applied[0, selected] == plan.fill_values[column]
+
+
+class TestTransform:
+    def test_engineered_records_skip_feature_derivation(self, pipeline, plan):
+        records = engineered_records(pipeline, plan, RECORDS)
+        assert all(plan.is_engineered(record) for record in records)
+        assert not plan.is_engineered(RECORDS[0])
+        np.testing.assert_allclose(
+            pipeline.transform(records), pipeline.transform_records(records)
+        )
+        np.testing.assert_allclose(
+            pipeline.transform(records), pipeline.transform(RECORDS)
+        )
+
+    def test_single_record_matches_its_batch_row(self, pipeline, plan):
+        batch = pipeline.transform(RECORDS)
+        for row, record in enumerate(RECORDS):
+            np.testing.assert_allclose(pipeline.transform(record)[0], batch[row])
+
+    def test_transform_needs_a_plan(self):
+        with pytest.raises(ValueError):
+            FeatureEngineeringPipeline().transform(RECORDS)
+
+
+class TestRegistryPlanCheck:
+    @pytest.fixture
+    def registry(self, tmp_path):
+        return ModelRegistry(
+            registry_path=str(tmp_path), artifact_cache=ModelArtifactCache()
+        )
+
+    def fit_model(self, features):
+        return LogisticRegression().fit(features, [1, 0, 1])
+
+    def test_mismatched_plan_is_rejected_at_registration(self, registry, pipeline):
+        plan = pipeline.fit(RECORDS)
+        model = self.fit_model(pipeline.transform(RECORDS)[:, :-1])
+        result = registry.register_model(
+            "risk", model, "classifier", "1", transform_plan=plan
+        )
+        assert result["status"] == "error"
+
+    def test_get_model_checks_n_features_in(self, registry, pipeline):
+        plan = pipeline.fit(RECORDS)
+        features = pipeline.transform(RECORDS)
+        result = registry.register_model(
+            "risk", self.fit_model(features), "classifier", "1", transform_plan=plan
+        )
+        model_id = result["model_id"]
+        model_info = registry.get_model(model_id, load_model=False)["model_info"]
+        loaded = registry.get_model(model_id)
+        assert loaded["transform_plan"].fingerprint == plan.fingerprint
+
+        # An artifact replaced on disk no longer matches the registered plan
+        registry.artifact_cache.clear()
+        joblib.dump(self.fit_model(features[:, :-1]), model_info["model_file"])
+        error = registry.get_model(model_id)["error"]
+        assert error.startswith("Transform plan produces")
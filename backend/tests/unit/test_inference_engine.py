@@ -0,0 +1,52 @@
+"""
+Unit tests for the AI/ML inference engine feature batching
+"""
+
+import numpy as np
+import pandas as pd
+
+from ai_ml.core.inference_engine import build_feature_matrix
+
+
+class RecordingPipeline:
+    """Stands in for FeatureEngineeringPipeline and records its calls"""
+
+    def __init__(self):
+        self.engineered = []
+        self.transformed = []
+
+    def engineer_features(self, raw_data):
+        self.engineered.append(raw_data)
+        frame = pd.DataFrame([raw_data])
+        # Batch-fitted scaling would make each row depend on its neighbours
+        return {"features": frame - frame.mean()}
+
+    def transform(self, records, plan):
+        self.transformed.append(records)
+        return np.array([[record["x"]] for record in records], dtype=float)
+
+
+class TestBuildFeatureMatrix:
+    def test_records_without_plan_are_engineered_one_by_one(self):
+        pipeline = RecordingPipeline()
+        inputs = [{"x": 1.0}, np.array([7.0]), {"x": 5.0}]
+        matrix, spans = build_feature_matrix(pipeline, inputs)
+        assert pipeline.engineered == [{"x": 1.0}, {"x": 5.0}]
+        assert matrix.tolist() == [[0.0], [7.0], [0.0]]
+        assert spans == [(0, 1), (1, 2), (2, 3)]
+
+    def test_score_does_not_depend_on_batch_neighbours(self):
+        alone, _ = build_feature_matrix(RecordingPipeline(), [{"x": 3.0}])
+        batched, _ = build_feature_matrix(
+            RecordingPipeline(), [{"x": 3.0}, {"x": 100.0}]
+        )
+        assert batched[:1].tolist() == alone.tolist()
+
+    def test_records_with_plan_share_one_transform(self):
+        pipeline = RecordingPipeline()
+        inputs = [{"x": 1.0}, pd.DataFrame({"x": [2.0, 3.0]}), {"x": 4.0}]
+        matrix, spans = build_feature_matrix(pipeline, inputs, transform_plan=object())
+        assert pipeline.transformed == [[{"x": 1.0}, {"x": 4.0}]]
+        assert pipeline.engineered == []
+        assert matrix.ravel().tolist() == [1.0, 2.0, 3.0, 4.0]
+        assert spans == [(0, 1), (1, 3), (3, 4)]
@@ -0,0 +1,193 @@
+"""
+Unit tests for the AI/ML model artifact cache and the registry's legacy import
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from ai_ml.core.model_cache import MEGABYTE, ModelArtifactCache
+from ai_ml.core.model_registry import ModelRegistry
+
+
+def fill(cache, *keys, size=MEGABYTE):
+    for key in keys:
+        cache.put(key, key.upper(), size)
+
+
+def legacy_model(model_id, registered_at="2024-01-01T00:00:00"):
+    return {
+        "model_id": model_id,
+        "model_name": model_id,
+        "model_type": "risk",
+        "environment": "production",
+        "status": "deployed",
+        "registered_at": registered_at,
+        "deployment_info": {"deployed_to": "production"},
+    }
+
+
+class TestByteBudget:
+    def test_current_bytes_stays_within_budget(self):
+        cache = ModelArtifactCache(max_bytes=3 * MEGABYTE)
+        for index in range(10):
+            cache.put(f"m{index}", index, MEGABYTE)
+            assert cache.current_bytes <= cache.max_bytes
+        stats = cache.get_stats()
+        assert (stats["entries"], stats["evictions"]) == (3, 7)
+
+    def test_oversized_artifact_is_not_cached(self):
+        cache = ModelArtifactCache(max_bytes=MEGABYTE)
+        fill(cache, "small")
+        cache.put("huge", "HUGE", 2 * MEGABYTE)
+        assert "huge" not in cache
+        assert cache.get("small") == "SMALL"
+        assert cache.current_bytes == MEGABYTE
+
+    def test_replacing_a_key_does_not_double_count(self):
+        cache = ModelArtifactCache(max_bytes=4 * MEGABYTE)
+        cache.put("a", 1, MEGABYTE)
+        cache.put("a", 2, 2 * MEGABYTE)
+        assert (len(cache), cache.current_bytes) == (1, 2 * MEGABYTE)
+        assert cache.invalidate_prefix("a") == 1
+        assert cache.current_bytes == 0
+
+    def test_unknown_policy_is_rejected(self):
+        with pytest.raises(ValueError):
+            ModelArtifactCache(policy="fifo")
+
+
+class TestEvictionOrder:
+    def test_lfu_keeps_a_frequently_used_entry(self):
+        cache = ModelArtifactCache(max_bytes=2 * MEGABYTE, policy="lfu")
+        fill(cache, "a")
+        for _ in range(5):
+            cache.get("a")
+        fill(cache, "b", "c")
+        assert sorted(cache._entries) == ["a", "c"]
+
+    def test_lru_evicts_the_least_recent_entry_despite_hits(self):
+        cache = ModelArtifactCache(max_bytes=2 * MEGABYTE, policy="lru")
+        fill(cache, "a")
+        for _ in range(5):
+            cache.get("a")
+        fill(cache, "b", "c")
+        assert sorted(cache._entries) == ["b", "c"]
+
+        # A hit after the clock has advanced protects "c" over "b"
+        cache.get("c")
+        fill(cache, "d")
+        assert sorted(cache._entries) == ["c", "d"]
+
+    def test_larger_entries_are_evicted_first(self):
+        for policy in ("lfu", "lru"):
+            cache = ModelArtifactCache(max_bytes=3 * MEGABYTE, policy=policy)
+            fill(cache, "big", size=2 * MEGABYTE)
+            fill(cache, "small", "next")
+            assert sorted(cache._entries) == ["next", "small"]
+
+    def test_idle_entries_age_out_under_lfu(self):
+        cache = ModelArtifactCache(max_bytes=2 * MEGABYTE, policy="lfu")
+        fill(cache, "old")
+        cache.get("old")
+        # Each eviction advances the clock past the idle entry's priority
+        for index in range(4):
+            fill(cache, f"new{index}")
+            cache.get(f"new{index}")
+        assert "old" not in cache
+
+    def test_pinned_entries_are_evicted_last(self):
+        cache = ModelArtifactCache(max_bytes=2 * MEGABYTE)
+        cache.put("a", "A", MEGABYTE, pinned=True)
+        fill(cache, "b", "c")
+        assert sorted(cache._entries) == ["a", "c"]
+
+        cache.put("d", "D", MEGABYTE, pinned=True)
+        cache.put("e", "E", MEGABYTE, pinned=True)
+        assert len(cache) == 2
+        assert cache.get_stats()["pinned"] == 2
+
+        cache.pin("e", False)
+        cache.clear(include_pinned=False)
+        assert list(cache._entries) == ["d"]
+
+
+class TestGetOrLoad:
+    def test_concurrent_misses_load_once(self):
+        cache = ModelArtifactCache(max_bytes=4 * MEGABYTE)
+        calls = []
+        barrier = threading.Barrier(8)
+        results = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+        def worker():
+            barrier.wait()
+            results.append(cache.get_or_load("model", loader, MEGABYTE))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert len({id(result) for result in results}) == 1
+        assert cache.get_stats()["loads"] == 1
+        assert cache._load_locks == {}
+
+    def test_failed_load_is_retried(self):
+        cache = ModelArtifactCache(max_bytes=4 * MEGABYTE)
+
+        def broken():
+            raise OSError("artifact missing")
+
+        with pytest.raises(OSError):
+            cache.get_or_load("model", broken, MEGABYTE)
+        assert "model" not in cache
+        assert cache.get_or_load("model", lambda: "MODEL", MEGABYTE) == "MODEL"
+
+    def test_pinned_load_pins_a_cached_entry(self):
+        cache = ModelArtifactCache(max_bytes=4 * MEGABYTE)
+        fill(cache, "model")
+        assert cache.get_or_load("model", None, MEGABYTE, pinned=True) == "MODEL"
+        assert cache.get_stats()["pinned"] == 1
+
+
+class TestLegacyImport:
+    def write_legacy(self, tmp_path, *model_ids):
+        legacy = {
+            "models": {model_id: legacy_model(model_id) for model_id in model_ids},
+            "deployments": {
+                model_id: {"deployed_to": "production"} for model_id in model_ids
+            },
+        }
+        (tmp_path / "models_registry.json").write_text(json.dumps(legacy))
+
+    def registry(self, tmp_path):
+        return ModelRegistry(
+            registry_path=str(tmp_path), artifact_cache=ModelArtifactCache()
+        )
+
+    def test_legacy_json_is_imported(self, tmp_path):
+        self.write_legacy(tmp_path, "risk_1", "risk_2")
+        registry = self.registry(tmp_path)
+        assert {m["model_id"] for m in registry.list_models()} == {"risk_1", "risk_2"}
+        assert registry.list_models(environment="staging") == []
+        assert registry._get_deployment("risk_1") == {"deployed_to": "production"}
+
+    def test_import_runs_only_into_an_empty_store(self, tmp_path):
+        self.write_legacy(tmp_path, "risk_1")
+        self.registry(tmp_path)
+        self.write_legacy(tmp_path, "risk_1", "risk_2")
+        registry = self.registry(tmp_path)
+        assert [m["model_id"] for m in registry.list_models()] == ["risk_1"]
+
+    def test_unreadable_legacy_json_is_skipped(self, tmp_path):
+        (tmp_path / "models_registry.json").write_text("{not json")
+        assert self.registry(tmp_path).list_models() == []
@@ -0,0 +1,181 @@
+"""
+Unit tests for the AI/ML process inference pool with in-process fake workers
+"""
+
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_ml.core.process_pool import ProcessInferencePool, decode_inputs, encode_inputs
+
+
+class FakeProcess:
+    def __init__(self):
+        self.alive = True
+        self.exitcode = None
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        pass
+
+    def terminate(self):
+        self.alive = False
+
+
+class FakeTaskQueue:
+    def __init__(self):
+        self.sent = []
+
+    def put(self, task):
+        if task is not None:
+            self.sent.append(task)
+
+
+def start_fake_worker(self, worker):
+    worker.task_queue = FakeTaskQueue()
+    worker.process = FakeProcess()
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    monkeypatch.setattr(ProcessInferencePool, "_start_worker", start_fake_worker)
+    monkeypatch.setattr(ProcessInferencePool, "_supervise_loop", lambda self: None)
+    pools = []
+
+    def make(**kwargs):
+        pool = ProcessInferencePool(**{"num_workers": 1, **kwargs})
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.shutdown()
+
+
+def respond(pool, task_id, result="ok", error=None):
+    worker_index = pool._tasks[task_id].worker_index
+    pool._response_queue.put((task_id, worker_index, result, error))
+
+
+def segment_exists(name):
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    return True
+
+
+class TestEncodeInputs:
+    INPUTS = [
+        {"age": 71},
+        pd.DataFrame([[1.0, 2.0], [3.0, 4.0]]),
+        np.array([5.0, 6.0]),
+        {"age": 35},
+        [[7.0, 8.0]],
+    ]
+
+    def assert_round_trip(self, decoded):
+        assert decoded[0] == {"age": 71}
+        assert decoded[3] == {"age": 35}
+        np.testing.assert_array_equal(decoded[1], [[1.0, 2.0], [3.0, 4.0]])
+        np.testing.assert_array_equal(decoded[2], [[5.0, 6.0]])
+        np.testing.assert_array_equal(decoded[4], [[7.0, 8.0]])
+
+    def test_small_matrix_is_sent_inline(self):
+        payload, shm = encode_inputs(self.INPUTS)
+        assert shm is None
+        assert "matrix_shm" not in payload
+        decoded, worker_shm = decode_inputs(payload)
+        assert worker_shm is None
+        self.assert_round_trip(decoded)
+
+    def test_shared_memory_round_trip_and_unlink(self):
+        payload, shm = encode_inputs(self.INPUTS, shm_min_bytes=0)
+        assert "matrix" not in payload
+        assert payload["matrix_shm"][0] == shm.name
+        decoded, worker_shm = decode_inputs(payload)
+        self.assert_round_trip(decoded)
+
+        # The worker only closes its view; the parent owns the segment
+        decoded = None
+        worker_shm.close()
+        assert segment_exists(shm.name)
+        shm.close()
+        shm.unlink()
+        assert not segment_exists(shm.name)
+
+    def test_records_only_need_no_matrix(self):
+        payload, shm = encode_inputs([{"age": 1}], shm_min_bytes=0)
+        assert shm is None
+        assert decode_inputs(payload)[0] == [{"age": 1}]
+
+
+class TestPool:
+    def test_completed_task_unlinks_its_segment(self, make_pool):
+        pool = make_pool(shm_min_bytes=0)
+        future = pool.submit("risk", [np.ones((4, 3))])
+        task_id, model_id, payload = pool._workers[0].task_queue.sent[0]
+        name = payload["matrix_shm"][0]
+        assert segment_exists(name)
+        respond(pool, task_id, result="predictions")
+        assert future.result(timeout=5) == "predictions"
+        assert not segment_exists(name)
+        assert pool.get_stats()["completed"] == 1
+
+    def test_pending_tasks_are_sent_in_priority_order(self, make_pool):
+        pool = make_pool(max_inflight_per_worker=1)
+        sent = pool._workers[0].task_queue.sent
+        futures = [pool.submit("risk", [{"rank": 3}], priority_rank=3)]
+        for rank in (3, 2, 0, 1, 0):
+            futures.append(pool.submit("risk", [{"rank": rank}], priority_rank=rank))
+        assert len(sent) == 1
+
+        for index in range(len(futures)):
+            respond(pool, sent[index][0])
+            futures[sent[index][0]].result(timeout=5)
+            if index + 1 < len(futures):
+                deadline = time.monotonic() + 5
+                while len(sent) == index + 1:
+                    assert time.monotonic() < deadline
+                    time.sleep(0.01)
+        ranks = [payload["records"][0][1]["rank"] for _, _, payload in sent]
+        # Equal ranks keep submission order
+        assert ranks == [3, 0, 0, 1, 2, 3]
+        assert [task_id for task_id, _, _ in sent][1:3] == [3, 5]
+
+    def test_worker_exit_fails_inflight_tasks_and_restarts(self, make_pool):
+        pool = make_pool(shm_min_bytes=0, max_inflight_per_worker=2)
+        worker = pool._workers[0]
+        inflight = [pool.submit("risk", [np.ones((2, 2))]) for _ in range(2)]
+        queued = pool.submit("risk", [{"age": 50}])
+        names = [payload["matrix_shm"][0] for _, _, payload in worker.task_queue.sent]
+        dead_process = worker.process
+        dead_process.alive = False
+        dead_process.exitcode = -9
+
+        pool._handle_worker_exit(worker)
+        for future in inflight:
+            with pytest.raises(RuntimeError, match="exited mid-request"):
+                future.result(timeout=1)
+        assert not any(segment_exists(name) for name in names)
+        assert not queued.done()
+        # The restart waits for the backoff
+        assert worker.process is dead_process
+        assert worker.next_restart_at > time.time()
+
+        worker.next_restart_at = time.time() - 1
+        pool._handle_worker_exit(worker)
+        assert worker.process is not dead_process
+        assert pool.get_stats()["restarts"] == 1
+        sent = worker.task_queue.sent
+        # The queued request goes out first, then the warm-up for the model
+        assert [(model_id, payload is None) for _, model_id, payload in sent] == [
+            ("risk", False),
+            ("risk", True),
+        ]
@@ -0,0 +1,136 @@
+"""
+Unit tests for the AI/ML monitoring ring buffers, sketches and drift metrics
+"""
+
+import numpy as np
+import pytest
+from scipy import stats
+from scipy.spatial.distance import jensenshannon
+
+from ai_ml.core.model_monitoring import ModelMonitoring, _ModelWindow
+from ai_ml.core.streaming_stats import (
+    HistogramSketch,
+    RingBuffer,
+    js_distance,
+    js_divergence,
+    ks_approximation,
+    population_stability_index,
+)
+
+
+class TestRingBuffer:
+    def test_eviction_returns_oldest_value(self):
+        buffer = RingBuffer(3)
+        assert [buffer.append(v) for v in (1.0, 2.0, 3.0)] == [None, None, None]
+        assert buffer.append(4.0) == 1.0
+        assert buffer.append(5.0) == 2.0
+        assert buffer.values().tolist() == [3.0, 4.0, 5.0]
+        assert len(buffer) == 3
+
+    def test_clear_resets_the_window(self):
+        buffer = RingBuffer(2)
+        buffer.append(1.0)
+        buffer.clear()
+        assert len(buffer) == 0
+        assert buffer.values().tolist() == []
+
+
+class TestHistogramSketch:
+    def test_add_and_remove_are_symmetric(self):
+        sketch = HistogramSketch.from_values(np.arange(100.0), bins=10)
+        before = sketch.counts.copy()
+        for value in (-5.0, 3.5, 42.0, 250.0, np.nan):
+            sketch.add(value)
+        for value in (-5.0, 3.5, 42.0, 250.0, np.nan):
+            sketch.remove(value)
+        assert sketch.counts.tolist() == before.tolist()
+        assert sketch.missing == 0
+
+    def test_add_many_matches_add(self):
+        values = np.array([0.5, 7.0, np.nan, 99.0, -1.0])
+        one_by_one = HistogramSketch(np.array([0.0, 10.0, 50.0]))
+        for value in values:
+            one_by_one.add(value)
+        batched = one_by_one.empty_like()
+        batched.add_many(values)
+        assert batched.counts.tolist() == one_by_one.counts.tolist()
+        assert batched.missing == one_by_one.missing == 1
+
+    def test_quantile_is_close_to_exact(self):
+        values = np.random.default_rng(0).normal(size=5000)
+        sketch = HistogramSketch.from_values(values, bins=50)
+        assert sketch.quantile(0.5) == pytest.approx(np.median(values), abs=0.05)
+
+
+class TestDriftMetrics:
+    def setup_method(self):
+        self.p = np.array([0.1, 0.2, 0.3, 0.4])
+        self.q = np.array([0.4, 0.3, 0.2, 0.1])
+
+    def test_psi(self):
+        expected = np.sum((self.q - self.p) * np.log(self.q / self.p))
+        assert population_stability_index(self.p, self.q) == pytest.approx(expected)
+        assert population_stability_index(self.p, self.p) == 0.0
+
+    def test_js_distance_matches_scipy(self):
+        assert js_distance(self.p, self.q) == pytest.approx(
+            jensenshannon(self.p, self.q)
+        )
+        assert js_distance(self.p, self.q) ** 2 == pytest.approx(
+            js_divergence(self.p, self.q)
+        )
+        assert js_distance(self.p, self.p) == 0.0
+
+    def test_ks_approximation_tracks_exact_ks(self):
+        rng = np.random.default_rng(1)
+        baseline_values = rng.normal(size=4000)
+        current_values = rng.normal(loc=0.5, size=4000)
+        baseline = HistogramSketch.from_values(baseline_values, bins=50)
+        current = baseline.empty_like()
+        current.add_many(current_values)
+        statistic, p_value = ks_approximation(baseline, current)
+        exact = stats.ks_2samp(baseline_values, current_values)
+        assert statistic == pytest.approx(exact.statistic, abs=0.03)
+        assert p_value < 0.01
+
+    def test_ks_approximation_without_data(self):
+        empty = HistogramSketch(np.array([0.0]))
+        assert ks_approximation(empty, empty) == (0.0, 1.0)
+
+
+class TestModelWindow:
+    @pytest.mark.parametrize("earlier_rows", [2, 3, 7])
+    def test_feature_first_seen_mid_window(self, earlier_rows):
+        window = _ModelWindow(4)
+        for i in range(earlier_rows):
+            window.append({"a": float(i)}, 0.1, None, float(i), 1.0)
+        window.append({"a": 9.0, "b": 5.0}, 0.2, None, 9.0, 1.0)
+        rows = min(earlier_rows + 1, 4)
+        b = window.features["b"].values()
+        assert len(b) == rows
+        assert np.isnan(b[:-1]).all()
+        assert b[-1] == 5.0
+        assert window.features["a"].values()[-1] == 9.0
+
+    def test_missing_feature_is_padded_with_nan(self):
+        window = _ModelWindow(4)
+        window.append({"a": 1.0, "b": 2.0}, 0.1, None, 0.0, 1.0)
+        window.append({"a": 3.0}, 0.1, None, 1.0, 1.0)
+        b = window.features["b"].values()
+        assert b[0] == 2.0
+        assert np.isnan(b[1])
+
+
+class TestModelMonitoringThread:
+    def test_construction_does_not_start_a_thread(self):
+        monitor = ModelMonitoring()
+        assert monitor._analysis_thread is None
+
+    def test_thread_starts_on_first_scheduled_analysis(self):
+        monitor = ModelMonitoring(analysis_every=1)
+        try:
+            monitor.log_prediction("model", {"a": 1.0}, 0.5)
+            assert monitor._analysis_thread is not None
+            assert monitor._analysis_thread.is_alive()
+        finally:
+            monitor.stop()
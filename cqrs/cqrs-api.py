@@ -24,6 +24,9 @@
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel, Field, validator
+from redis.asyncio import Redis
+
+from shared.realtime.fanout import FanoutHub, SubscriptionFilter
 
 from .command_handler import (
     Command,
@@ -68,30 +71,12 @@
 security = HTTPBearer()
 
 
-# WebSocket manager for real-time updates
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                pass
-
-
-manager = ConnectionManager()
+# WebSocket fan-out for real-time updates; events published by other API
+# processes arrive through Redis pub/sub
+manager = FanoutHub(
+    redis_client=Redis.from_url("redis://localhost:6379", decode_responses=True),
+    channel="hms:cqrs:fanout",
+)
 
 
 # Request/Response Models
@@ -580,13 +565,37 @@ async def get_analytics(
 # WebSocket endpoints
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time updates"""
-    await manager.connect(websocket)
+    """WebSocket endpoint for real-time updates
+
+    Events can be narrowed with ``patient``, ``ward`` and ``event`` query
+    parameters or a ``subscribe`` message carrying ``patients``, ``wards`` and
+    ``event_types`` lists.
+    """
+    query = websocket.query_params
+    await manager.connect(
+        websocket,
+        SubscriptionFilter.from_message(
+            {
+                "patients": query.getlist("patient"),
+                "wards": query.getlist("ward"),
+                "event_types": query.getlist("event"),
+            }
+        ),
+    )
     try:
         while True:
             data = await websocket.receive_text()
-            # Handle WebSocket messages if needed
-            await manager.send_personal_message(f"Message received: {data}", websocket)
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = None
+            if isinstance(message, dict) and message.get("type") == "subscribe":
+                manager.update_filter(
+                    websocket, SubscriptionFilter.from_message(message)
+                )
+                manager.send_personal(websocket, {"type": "subscribed"})
+            else:
+                manager.send_personal(websocket, f"Message received: {data}")
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
@@ -790,6 +799,11 @@ async def startup_event():
         # Initialize projections
         await initialize_projections()
 
+        # Fan stored events out to subscribed WebSocket clients
+        event_store = await get_event_store()
+        event_store.publisher.fanout = manager
+        manager.start()
+
         logger.info("CQRS API started successfully")
     except Exception as e:
         logger.error(f"Error during startup: {e}")
@@ -802,6 +816,7 @@ async def shutdown_event():
     """Cleanup CQRS components on shutdown"""
     try:
         # Cleanup connections
+        await manager.stop()
         logger.info("CQRS API shutdown successfully")
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
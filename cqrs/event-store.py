@@ -16,7 +16,6 @@
 
 import aioredis
 import asyncpg
-from fastapi import WebSocket, WebSocketDisconnect
 from pydantic import BaseModel, Field
 from redis.asyncio import Redis
 
@@ -484,7 +483,9 @@ class EventPublisher:
     def __init__(self, redis_url: str):
         self.redis_url = redis_url
         self.redis = None
-        self.websockets: List[WebSocket] = []
+        # WebSocket fan-out hub (shared.realtime.fanout.FanoutHub), attached
+        # by the API process; it reaches other processes' clients itself
+        self.fanout = None
 
     async def initialize(self):
         """Initialize the publisher"""
@@ -495,34 +496,23 @@ async def publish_event(self, event: Event):
         event_data = event.dict()
         event_data["type"] = event.type.value
 
+        message = json.dumps(event_data, default=str)
+
         # Publish to Redis pub/sub
-        await self.redis.publish(f"events:{event.type.value}", json.dumps(event_data))
-        await self.redis.publish("events:all", json.dumps(event_data))
-
-        # Send to WebSocket clients
-        await self.broadcast_to_websockets(event_data)
-
-    async def broadcast_to_websockets(self, data: Dict[str, Any]):
-        """Broadcast event data to WebSocket clients"""
-        disconnected = []
-        for websocket in self.websockets:
-            try:
-                await websocket.send_text(json.dumps(data))
-            except WebSocketDisconnect:
-                disconnected.append(websocket)
-
-        # Remove disconnected clients
-        for websocket in disconnected:
-            self.websockets.remove(websocket)
-
-    async def add_websocket(self, websocket: WebSocket):
-        """Add a WebSocket client"""
-        self.websockets.append(websocket)
-
-    async def remove_websocket(self, websocket: WebSocket):
-        """Remove a WebSocket client"""
-        if websocket in self.websockets:
-            self.websockets.remove(websocket)
+        await self.redis.publish(f"events:{event.type.value}", message)
+        await self.redis.publish("events:all", message)
+
+        # Send to subscribed WebSocket clients
+        if self.fanout is not None:
+            patient_id = event.data.get("patient_id")
+            if patient_id is None and event.aggregate_type == "patient":
+                patient_id = event.aggregate_id
+            await self.fanout.publish(
+                message,
+                event.type.value,
+                patient_id=patient_id,
+                ward=event.data.get("ward"),
+            )
 
 
 class EventStore:
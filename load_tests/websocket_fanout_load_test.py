@@ -0,0 +1,233 @@
+"""
+WebSocket Fan-out Load Test for HMS Real-time Monitoring
+Opens thousands of ward-filtered nurse-station sockets against
+/ws/monitoring, drives vital-sign updates over HTTP and measures delivery
+latency, filtering correctness and how slow clients affect fast ones
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import aiohttp
+import websockets
+from websockets.exceptions import ConnectionClosed
+
+
+class FanoutLoadTest:
+    """Ward-subscribed sockets with a share of deliberately slow readers"""
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8003",
+        num_clients: int = 2000,
+        num_wards: int = 20,
+        patients_per_ward: int = 25,
+        slow_fraction: float = 0.05,
+        update_interval: float = 1.0,
+        duration: int = 60,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.ws_url = self.base_url.replace("http", "ws", 1) + "/ws/monitoring"
+        self.num_clients = num_clients
+        self.wards = [f"ward_{index}" for index in range(num_wards)]
+        self.patients = {
+            ward: [f"{ward}_patient_{index}" for index in range(patients_per_ward)]
+            for ward in self.wards
+        }
+        self.slow_fraction = slow_fraction
+        self.update_interval = update_interval
+        self.duration = duration
+
+        self.latencies: List[float] = []
+        self.received = {"fast": 0, "slow": 0}
+        self.foreign_messages = 0
+        self.slow_disconnects = 0
+        self.connect_errors: List[str] = []
+        self.updates_sent = 0
+        self.update_errors = 0
+
+    async def register_patients(self, session: aiohttp.ClientSession):
+        for ward, patient_ids in self.patients.items():
+            for patient_id in patient_ids:
+                config = {
+                    "patient_id": patient_id,
+                    "ward": ward,
+                    "monitoring_level": "intensive",
+                    "alert_thresholds": {},
+                    "monitoring_intervals": {"vital_signs": 60},
+                    "escalation_contacts": [],
+                }
+                async with session.post(
+                    f"{self.base_url}/monitoring/add", json=config
+                ) as response:
+                    response.raise_for_status()
+
+    async def drive_updates(self, session: aiohttp.ClientSession, stop: asyncio.Event):
+        """Post one reading per patient per interval, stamped with send time"""
+        patient_ids = [p for patients in self.patients.values() for p in patients]
+        while not stop.is_set():
+            started = time.time()
+            for patient_id in patient_ids:
+                vitals = {
+                    "timestamp": datetime.fromtimestamp(time.time()).isoformat(),
+                    "heart_rate": random.gauss(85, 15),
+                    "blood_pressure_systolic": random.gauss(120, 15),
+                    "blood_pressure_diastolic": random.gauss(78, 8),
+                    "oxygen_saturation": min(100, random.gauss(96, 2)),
+                    "temperature": random.gauss(37, 0.5),
+                    "respiratory_rate": random.gauss(17, 3),
+                    "consciousness_level": "alert",
+                }
+                try:
+                    async with session.post(
+                        f"{self.base_url}/monitoring/update-vitals",
+                        params={"patient_id": patient_id},
+                        json=vitals,
+                    ) as response:
+                        response.raise_for_status()
+                    self.updates_sent += 1
+                except aiohttp.ClientError:
+                    self.update_errors += 1
+            await asyncio.sleep(
+                max(0.0, self.update_interval - (time.time() - started))
+            )
+
+    async def run_client(self, client_id: int, slow: bool, stop: asyncio.Event):
+        ward = self.wards[client_id % len(self.wards)]
+        try:
+            websocket = await websockets.connect(
+                f"{self.ws_url}?ward={ward}", ping_interval=None
+            )
+        except Exception as e:
+            self.connect_errors.append(f"Client {client_id}: {e}")
+            return
+        kind = "slow" if slow else "fast"
+        try:
+            while not stop.is_set():
+                try:
+                    raw = await asyncio.wait_for(websocket.recv(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    continue
+                received_at = time.time()
+                message = json.loads(raw)
+                self.received[kind] += 1
+                if message.get("ward") not in (None, ward):
+                    self.foreign_messages += 1
+                if not slow and message.get("type") == "vital_signs_update":
+                    sent_at = datetime.fromisoformat(
+                        message["vital_signs"]["timestamp"]
+                    ).timestamp()
+                    self.latencies.append((received_at - sent_at) * 1000)
+                if slow:
+                    # Stop reading long enough for the server queue to fill.
+                    await asyncio.sleep(5.0)
+        except ConnectionClosed as e:
+            if slow and e.code == 1013:
+                self.slow_disconnects += 1
+        finally:
+            await websocket.close()
+
+    async def fanout_stats(self, session: aiohttp.ClientSession) -> Dict[str, Any]:
+        async with session.get(f"{self.base_url}/monitoring/fanout") as response:
+            return await response.json()
+
+    async def run_load_test(self) -> Dict[str, Any]:
+        print(
+            f"Starting fan-out test: {self.num_clients} sockets over "
+            f"{len(self.wards)} wards for {self.duration}s..."
+        )
+        stop = asyncio.Event()
+        async with aiohttp.ClientSession() as session:
+            await self.register_patients(session)
+            slow_clients = int(self.num_clients * self.slow_fraction)
+            clients = [
+                asyncio.create_task(self.run_client(index, index < slow_clients, stop))
+                for index in range(self.num_clients)
+            ]
+            await asyncio.sleep(2)  # let the sockets connect
+            driver = asyncio.create_task(self.drive_updates(session, stop))
+            await asyncio.sleep(self.duration)
+            stop.set()
+            await asyncio.gather(driver, *clients, return_exceptions=True)
+            server_stats = await self.fanout_stats(session)
+
+        results = self.calculate_statistics(slow_clients)
+        results["server"] = server_stats
+        print(f"Results: {json.dumps(results, indent=2)}")
+        return results
+
+    def calculate_statistics(self, slow_clients: int) -> Dict[str, Any]:
+        fast_clients = self.num_clients - slow_clients
+        patients = sum(len(p) for p in self.patients.values())
+        # A ward socket should see each of its patients once per tick at most.
+        expected_per_fast_client = (
+            self.duration / self.update_interval * patients / len(self.wards)
+        )
+        results = {
+            "clients": self.num_clients,
+            "slow_clients": slow_clients,
+            "connect_errors": len(self.connect_errors),
+            "updates_sent": self.updates_sent,
+            "update_errors": self.update_errors,
+            "messages_received": self.received,
+            "fast_client_delivery_ratio": (
+                self.received["fast"] / (fast_clients * expected_per_fast_client)
+                if fast_clients and expected_per_fast_client
+                else 0
+            ),
+            "foreign_ward_messages": self.foreign_messages,
+            "slow_clients_disconnected": self.slow_disconnects,
+        }
+        if len(self.latencies) >= 100:
+            quantiles = statistics.quantiles(self.latencies, n=100)
+            results["fast_client_latency_ms"] = {
+                "mean": statistics.mean(self.latencies),
+                "p50": quantiles[49],
+                "p95": quantiles[94],
+                "p99": quantiles[98],
+                "max": max(self.latencies),
+            }
+        return results
+
+
+async def main():
+    """Main test runner"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="WebSocket fan-out load test for HMS monitoring"
+    )
+    parser.add_argument("--url", default="http://localhost:8003")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--wards", type=int, default=20)
+    parser.add_argument("--patients-per-ward", type=int, default=25)
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    parser.add_argument("--update-interval", type=float, default=1.0)
+    parser.add_argument("--duration", type=int, default=60)
+    parser.add_argument("--output", default="websocket_fanout_results.json")
+    args = parser.parse_args()
+
+    # Thousands of sockets need a raised open-file limit (ulimit -n).
+    test = FanoutLoadTest(
+        base_url=args.url,
+        num_clients=args.clients,
+        num_wards=args.wards,
+        patients_per_ward=args.patients_per_ward,
+        slow_fraction=args.slow_fraction,
+        update_interval=args.update_interval,
+        duration=args.duration,
+    )
+    results = await test.run_load_test()
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+HMS Inference Worker Benchmark
+Compares in-process worker threads with the process pool on the risk models
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "backend")
+)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hms.settings")
+
+import django
+
+django.setup()
+
+from ai_ml.core.inference_engine import InferenceEngine, InferencePriority
+from ai_ml.core.model_registry import ModelRegistry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Same estimators as ai/predictive_models/patient_risk_prediction.py, over
+# its 20-column prepare_features layout.
+RISK_MODELS = {
+    "readmission": lambda: RandomForestClassifier(n_estimators=200, random_state=42),
+    "sepsis": lambda: GradientBoostingClassifier(n_estimators=100, random_state=42),
+    "heart_failure": lambda: RandomForestClassifier(n_estimators=150, random_state=42),
+}
+
+
+def synthetic_features(rows: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.column_stack(
+        [
+            rng.normal(60, 15, rows),  # age
+            rng.integers(0, 2, rows),  # gender
+            rng.normal(27, 5, rows),  # bmi
+            rng.integers(0, 4, rows),  # insurance_type_encoded
+            rng.normal(80, 15, rows),  # heart_rate
+            rng.normal(125, 20, rows),  # systolic
+            rng.normal(80, 12, rows),  # diastolic
+            rng.normal(96, 3, rows),  # oxygen_saturation
+            rng.normal(37, 0.7, rows),  # temperature
+            rng.normal(16, 4, rows),  # respiratory_rate
+            rng.normal(110, 30, rows),  # glucose
+            rng.normal(1.0, 0.4, rows),  # creatinine
+            rng.normal(139, 4, rows),  # sodium
+            rng.normal(4.2, 0.5, rows),  # potassium
+            rng.normal(13, 2, rows),  # hemoglobin
+            rng.normal(8, 3, rows),  # white_blood_cell_count
+            rng.poisson(2, rows),  # comorbidities
+            rng.poisson(4, rows),  # medications
+            rng.poisson(0.5, rows),  # recent_admissions
+            rng.exponential(3, rows),  # length_of_stay
+        ]
+    )
+
+
+def register_risk_models(registry: ModelRegistry) -> List[str]:
+    X = synthetic_features(5000)
+    risk = 0.03 * (X[:, 0] - 60) + 0.05 * (X[:, 4] - 80) - 0.2 * (X[:, 7] - 96)
+    y = (risk + np.random.default_rng(1).normal(0, 1, len(X)) > 0.5).astype(int)
+    model_ids = []
+    for name, build in RISK_MODELS.items():
+        model = build().fit(X, y)
+        result = registry.register_model(
+            model_name=f"benchmark_{name}",
+            model=model,
+            model_type="risk",
+            model_version="1.0",
+            environment="production",
+        )
+        model_ids.append(result["model_id"])
+        logger.info(f"Registered {name} as {result['model_id']}")
+    return model_ids
+
+
+def run_load(
+    engine: InferenceEngine,
+    model_ids: List[str],
+    concurrency: int,
+    requests: int,
+    rows_per_request: int,
+    seed_offset: int = 0,
+) -> Dict:
+    # Distinct inputs per request so the prediction cache never answers.
+    batches = [
+        synthetic_features(rows_per_request, seed=seed_offset + index)
+        for index in range(requests)
+    ]
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one_request(index: int):
+        nonlocal errors
+        start = time.perf_counter()
+        response = engine.predict(
+            model_ids[index % len(model_ids)],
+            batches[index],
+            priority=InferencePriority.HIGH,
+            timeout_ms=60000,
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            errors += bool(response.error)
+
+    # Foreground probe: a cheap task on the parent's GIL whose slowdown shows
+    # how much inference starves web-request threads.
+    probe_delays = []
+    stop_probe = threading.Event()
+
+    def probe():
+        while not stop_probe.is_set():
+            start = time.perf_counter()
+            time.sleep(0.005)
+            probe_delays.append((time.perf_counter() - start) * 1000 - 5)
+
+    probe_thread = threading.Thread(target=probe, daemon=True)
+    probe_thread.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(requests)))
+    wall = time.perf_counter() - started
+    stop_probe.set()
+    probe_thread.join()
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(requests / wall, 1),
+        "rows_per_second": round(requests * rows_per_request / wall, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2),
+        "gil_probe_p95_delay_ms": round(
+            float(np.percentile(probe_delays, 95)) if probe_delays else 0.0, 2
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HMS Inference Worker Benchmark")
+    parser.add_argument("--workers", type=int, default=max(1, os.cpu_count() - 1))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--rows-per-request", type=int, default=64)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    registry_path = tempfile.mkdtemp(prefix="hms_inference_bench_")
+    registry = ModelRegistry(registry_path)
+    model_ids = register_risk_models(registry)
+
+    results = {}
+    for label, process_workers in (("threads", 0), ("processes", args.workers)):
+        engine = InferenceEngine(
+            max_workers=args.concurrency,
+            process_workers=process_workers,
+            registry_path=registry_path,
+        )
+        # One untimed pass so both modes start with resident models.
+        run_load(engine, model_ids, args.concurrency, len(model_ids), 1, 10**6)
+        results[label] = run_load(
+            engine,
+            model_ids,
+            args.concurrency,
+            args.requests,
+            args.rows_per_request,
+            seed_offset=len(results) * args.requests,
+        )
+        engine.shutdown()
+        logger.info(f"{label}: {results[label]}")
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
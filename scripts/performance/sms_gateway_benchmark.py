@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+HMS SMS Gateway Benchmark
+Drives the blood bank SMS gateway against in-process fake providers,
+comparing one-at-a-time sends with bulk dispatch and hedged failover
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from typing import Dict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "services", "blood_bank", "app"))
+
+from sms_gateway import FakeSMSProvider, OutboundSMS, SMSGateway
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def build_gateway(args) -> SMSGateway:
+    primary = FakeSMSProvider(
+        rate=args.rate,
+        latency=args.latency,
+        spike_latency=args.spike_latency,
+        spike_rate=args.spike_rate,
+        failure_rate=args.failure_rate,
+        name="primary",
+    )
+    secondary = FakeSMSProvider(
+        rate=args.rate, latency=args.latency, name="secondary"
+    )
+    return SMSGateway(
+        {"primary": primary, "secondary": secondary},
+        ["primary", "secondary"],
+        hedge_after=args.hedge_after,
+    )
+
+
+def messages(count: int, priority: str):
+    return [
+        OutboundSMS(f"+1555{index:07d}", "HMS Blood Bank benchmark", priority)
+        for index in range(count)
+    ]
+
+
+async def run_sequential(gateway: SMSGateway, count: int, priority: str) -> Dict:
+    latencies = []
+    started = time.perf_counter()
+    for sms in messages(count, priority):
+        sent_at = time.perf_counter()
+        await gateway.send(sms)
+        latencies.append((time.perf_counter() - sent_at) * 1000)
+    return summarize(gateway, count, time.perf_counter() - started, latencies)
+
+
+async def run_concurrent(gateway: SMSGateway, count: int, priority: str) -> Dict:
+    latencies = []
+
+    async def send(sms):
+        sent_at = time.perf_counter()
+        await gateway.send(sms)
+        latencies.append((time.perf_counter() - sent_at) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(sms) for sms in messages(count, priority)))
+    return summarize(gateway, count, time.perf_counter() - started, latencies)
+
+
+async def run_bulk(gateway: SMSGateway, count: int, priority: str) -> Dict:
+    started = time.perf_counter()
+    await gateway.send_bulk(messages(count, priority))
+    return summarize(gateway, count, time.perf_counter() - started, [])
+
+
+def summarize(gateway: SMSGateway, count: int, wall: float, latencies) -> Dict:
+    result = {
+        "messages": count,
+        "wall_seconds": round(wall, 3),
+        "messages_per_second": round(count / wall, 1),
+        "gateway": {
+            key: value
+            for key, value in gateway.get_stats().items()
+            if key != "providers"
+        },
+    }
+    if len(latencies) >= 20:
+        quantiles = statistics.quantiles(latencies, n=100)
+        result["latency_ms"] = {
+            "p50": round(quantiles[49], 2),
+            "p95": round(quantiles[94], 2),
+            "p99": round(quantiles[98], 2),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HMS SMS Gateway Benchmark")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=500.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--spike-latency", type=float, default=2.0)
+    parser.add_argument("--spike-rate", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    parser.add_argument("--priority", default="high")
+    parser.add_argument(
+        "--hedge-after",
+        type=float,
+        default=0.5,
+        help="Hedge delay in seconds until enough latency samples exist",
+    )
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {}
+    # Sequential sends are slow by construction; a tenth of the load suffices
+    for label, runner, count in (
+        ("sequential", run_sequential, max(1, args.messages // 10)),
+        ("concurrent", run_concurrent, args.messages),
+        ("bulk", run_bulk, args.messages),
+    ):
+        results[label] = asyncio.run(runner(build_gateway(args), count, args.priority))
+        logger.warning(f"{label}: {results[label]['messages_per_second']} messages/s")
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+census module
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import models
+from sqlalchemy import func, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel; notifications are only delivered once the transaction commits
+CENSUS_CHANNEL = "bed_census"
+# DBAPI drivers whose LISTEN notifications CensusBroadcaster can read
+LISTEN_DRIVERS = ("psycopg2", "psycopg")
+
+STATUS_COLUMNS = {
+    models.BedStatus.AVAILABLE: "available_beds",
+    models.BedStatus.OCCUPIED: "occupied_beds",
+    models.BedStatus.MAINTENANCE: "maintenance_beds",
+    models.BedStatus.RESERVED: "reserved_beds",
+}
+COUNT_COLUMNS = ["total_beds", *STATUS_COLUMNS.values()]
+
+
+def as_bed_status(status) -> models.BedStatus:
+    return models.BedStatus(getattr(status, "value", status))
+
+
+def census_row(row, ward_name: Optional[str] = None) -> Dict[str, Any]:
+    counts = {column: row[column] for column in COUNT_COLUMNS}
+    return {
+        "ward_id": row["ward_id"],
+        "ward_name": ward_name,
+        **counts,
+        "occupancy_rate": (
+            counts["occupied_beds"] / counts["total_beds"]
+            if counts["total_beds"]
+            else 0.0
+        ),
+        "version": row["version"],
+        "updated_at": row["updated_at"],
+    }
+
+
+def record_bed_added(db: Session, bed: models.Bed):
+    if bed.is_active is False:
+        return
+    status = as_bed_status(bed.status or models.BedStatus.AVAILABLE)
+    adjust_census(db, bed.ward_id, {"total_beds": 1, STATUS_COLUMNS[status]: 1})
+
+
+def record_status_change(db: Session, bed: models.Bed, old_status, new_status):
+    if bed.is_active is False:
+        return
+    old_status = as_bed_status(old_status or models.BedStatus.AVAILABLE)
+    new_status = as_bed_status(new_status)
+    if old_status == new_status:
+        return
+    adjust_census(
+        db,
+        bed.ward_id,
+        {STATUS_COLUMNS[old_status]: -1, STATUS_COLUMNS[new_status]: 1},
+    )
+
+
+def adjust_census(db: Session, ward_id: Optional[int], changes: Dict[str, int]):
+    """Apply counter deltas for a ward inside the caller's transaction
+
+    The counter row is updated in place (col = col + delta) and a delta is
+    queued with pg_notify, so subscribers only hear about committed changes.
+    """
+    changes = {column: delta for column, delta in changes.items() if delta}
+    if ward_id is None or not changes:
+        return
+    table = models.WardCensus.__table__
+    row = (
+        db.execute(
+            update(table)
+            .where(table.c.ward_id == ward_id)
+            .values(
+                {
+                    **{
+                        column: table.c[column] + delta
+                        for column, delta in changes.items()
+                    },
+                    "version": table.c.version + 1,
+                    "updated_at": datetime.utcnow(),
+                }
+            )
+            .returning(*table.c)
+        )
+        .mappings()
+        .first()
+    )
+    if row is None:
+        # No counters yet for this ward: count it, including this change
+        db.flush()
+        row = rebuild_census(db, ward_id)[0]
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {
+            "channel": CENSUS_CHANNEL,
+            "payload": json.dumps(
+                {"ward_id": ward_id, "changes": changes, "census": census_row(row)},
+                default=str,
+            ),
+        },
+    )
+
+
+def rebuild_census(db: Session, ward_id: Optional[int] = None) -> List[Dict]:
+    """Recount ward counters from the beds table (bootstrap / reconciliation)"""
+    query = db.query(
+        models.Bed.ward_id, models.Bed.status, func.count(models.Bed.id)
+    ).filter(models.Bed.is_active == True)
+    wards = db.query(models.Ward.id)
+    if ward_id is not None:
+        query = query.filter(models.Bed.ward_id == ward_id)
+        wards = wards.filter(models.Ward.id == ward_id)
+
+    counts = {
+        ward: {column: 0 for column in COUNT_COLUMNS} for (ward,) in wards.all()
+    }
+    for ward, status, count in query.group_by(
+        models.Bed.ward_id, models.Bed.status
+    ).all():
+        if ward is None or status is None:
+            continue
+        ward_counts = counts.setdefault(
+            ward, {column: 0 for column in COUNT_COLUMNS}
+        )
+        ward_counts[STATUS_COLUMNS[as_bed_status(status)]] += count
+        ward_counts["total_beds"] += count
+    if not counts:
+        return []
+
+    table = models.WardCensus.__table__
+    now = datetime.utcnow()
+    stmt = insert(table).values(
+        [
+            {"ward_id": ward, **ward_counts, "version": 0, "updated_at": now}
+            for ward, ward_counts in counts.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.ward_id],
+        set_={
+            **{column: stmt.excluded[column] for column in COUNT_COLUMNS},
+            "version": table.c.version + 1,
+            "updated_at": now,
+        },
+    ).returning(*table.c)
+    return list(db.execute(stmt).mappings().all())
+
+
+def get_census(db: Session, ward_id: Optional[int] = None) -> List[Dict]:
+    query = db.query(models.WardCensus, models.Ward.ward_name).join(
+        models.Ward, models.Ward.id == models.WardCensus.ward_id
+    )
+    if ward_id:
+        query = query.filter(models.WardCensus.ward_id == ward_id)
+    return [
+        census_row(
+            {
+                "ward_id": census.ward_id,
+                **{column: getattr(census, column) for column in COUNT_COLUMNS},
+                "version": census.version,
+                "updated_at": census.updated_at,
+            },
+            ward_name,
+        )
+        for census, ward_name in query.all()
+    ]
+
+
+def take_census_snapshot(db: Session, taken_at: Optional[datetime] = None) -> int:
+    """Store the current counters of every ward under the hour of ``taken_at``"""
+    taken_at = (taken_at or datetime.utcnow()).replace(
+        minute=0, second=0, microsecond=0
+    )
+    rows = [
+        {
+            "ward_id": census["ward_id"],
+            "taken_at": taken_at,
+            **{column: census[column] for column in COUNT_COLUMNS},
+            "occupancy_rate": census["occupancy_rate"],
+        }
+        for census in get_census(db)
+    ]
+    if rows:
+        table = models.CensusSnapshot.__table__
+        db.execute(
+            insert(table)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[table.c.ward_id, table.c.taken_at])
+        )
+        db.commit()
+    return len(rows)
+
+
+def get_census_snapshots(
+    db: Session,
+    ward_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 24 * 31,
+):
+    query = db.query(models.CensusSnapshot)
+    if ward_id:
+        query = query.filter(models.CensusSnapshot.ward_id == ward_id)
+    if start:
+        query = query.filter(models.CensusSnapshot.taken_at >= start)
+    if end:
+        query = query.filter(models.CensusSnapshot.taken_at < end)
+    return (
+        query.order_by(
+            models.CensusSnapshot.taken_at.desc(), models.CensusSnapshot.ward_id
+        )
+        .limit(limit)
+        .all()
+    )
+
+
+async def run_snapshot_scheduler(session_factory, stop: asyncio.Event):
+    """Take a census snapshot at the top of every hour"""
+
+    def snapshot():
+        db = session_factory()
+        try:
+            return take_census_snapshot(db)
+        finally:
+            db.close()
+
+    while not stop.is_set():
+        now = datetime.utcnow()
+        next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        try:
+            await asyncio.wait_for(stop.wait(), (next_hour - now).total_seconds())
+            break
+        except asyncio.TimeoutError:
+            pass
+        try:
+            wards = await asyncio.to_thread(snapshot)
+            logger.info(f"Stored census snapshot for {wards} wards")
+        except Exception as e:
+            logger.error(f"Census snapshot failed: {e}")
+
+
+class CensusBroadcaster:
+    """Relays committed census deltas (LISTEN bed_census) to subscribers"""
+
+    def __init__(self, engine, max_queue: int = 256):
+        if engine.dialect.driver not in LISTEN_DRIVERS:
+            raise ValueError(
+                f"Census LISTEN needs psycopg2 or psycopg, not {engine.dialect.driver}"
+            )
+        self.engine = engine
+        self.max_queue = max_queue
+        self._subscribers: Dict[asyncio.Queue, Any] = {}  # queue -> (loop, ward)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._listen, name="census-listener", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def subscribe(self, ward_id: Optional[int] = None) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers[queue] = (asyncio.get_running_loop(), ward_id)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def _deliver(self, queue: asyncio.Queue, delta: Dict):
+        if queue.full():
+            # A lagging client only needs the latest counters per ward
+            queue.get_nowait()
+        queue.put_nowait(delta)
+
+    def publish(self, delta: Dict):
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, (loop, ward_id) in subscribers:
+            if ward_id is None or ward_id == delta.get("ward_id"):
+                loop.call_soon_threadsafe(self._deliver, queue, delta)
+
+    def _notifications(self, dbapi_connection) -> List[str]:
+        """Payloads received within one wait of up to five seconds"""
+        if self.engine.dialect.driver == "psycopg":
+            return [n.payload for n in dbapi_connection.notifies(timeout=5.0)]
+        if select.select([dbapi_connection], [], [], 5.0) == ([], [], []):
+            return []
+        dbapi_connection.poll()
+        payloads = [n.payload for n in dbapi_connection.notifies]
+        del dbapi_connection.notifies[:]
+        return payloads
+
+    def _listen(self):
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self.engine.raw_connection()
+                dbapi_connection = connection.driver_connection
+                dbapi_connection.autocommit = True
+                cursor = dbapi_connection.cursor()
+                cursor.execute(f"LISTEN {CENSUS_CHANNEL}")
+                while not self._stop.is_set():
+                    for payload in self._notifications(dbapi_connection):
+                        self.publish(json.loads(payload))
+            except Exception as e:
+                logger.error(f"Census listener error: {e}")
+                self._stop.wait(5.0)
+            finally:
+                if connection is not None:
+                    connection.invalidate()
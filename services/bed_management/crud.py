@@ -5,9 +5,10 @@
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+import census
 import models
 import schemas
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 
 
@@ -38,19 +39,32 @@ def get_available_beds(db: Session, ward_id: Optional[int] = None):
     return query.all()
 
 
+def _lock_bed(db: Session, bed_id: int):
+    # Row lock so concurrent transitions of one bed count once each
+    return (
+        db.query(models.Bed).filter(models.Bed.id == bed_id).with_for_update().first()
+    )
+
+
+def _set_bed_status(db: Session, bed: models.Bed, status):
+    census.record_status_change(db, bed, bed.status, status)
+    bed.status = census.as_bed_status(status)
+    bed.updated_at = datetime.utcnow()
+
+
 def create_bed(db: Session, bed: schemas.BedCreate):
     db_bed = models.Bed(**bed.dict())
     db.add(db_bed)
+    census.record_bed_added(db, db_bed)
     db.commit()
     db.refresh(db_bed)
     return db_bed
 
 
 def update_bed_status(db: Session, bed_id: int, status: schemas.BedStatus):
-    db_bed = db.query(models.Bed).filter(models.Bed.id == bed_id).first()
+    db_bed = _lock_bed(db, bed_id)
     if db_bed:
-        db_bed.status = status
-        db_bed.updated_at = datetime.utcnow()
+        _set_bed_status(db, db_bed, status)
         db.commit()
         db.refresh(db_bed)
     return db_bed
@@ -73,6 +87,9 @@ def get_wards(db: Session, skip: int = 0, limit: int = 100):
 def create_ward(db: Session, ward: schemas.WardCreate):
     db_ward = models.Ward(**ward.dict())
     db.add(db_ward)
+    db.flush()
+    # Seed zeroed counters so an empty ward is listed in availability
+    census.rebuild_census(db, db_ward.id)
     db.commit()
     db.refresh(db_ward)
     return db_ward
@@ -98,10 +115,9 @@ def get_active_bed_assignments(db: Session, patient_id: Optional[str] = None):
 def create_bed_assignment(db: Session, assignment: schemas.BedAssignmentCreate):
     db_assignment = models.BedAssignment(**assignment.dict())
     db.add(db_assignment)
-    bed = db.query(models.Bed).filter(models.Bed.id == assignment.bed_id).first()
+    bed = _lock_bed(db, assignment.bed_id)
     if bed:
-        bed.status = models.BedStatus.OCCUPIED
-        bed.updated_at = datetime.utcnow()
+        _set_bed_status(db, bed, models.BedStatus.OCCUPIED)
     db.commit()
     db.refresh(db_assignment)
     return db_assignment
@@ -116,10 +132,9 @@ def discharge_patient(db: Session, assignment_id: int):
     if db_assignment:
         db_assignment.is_active = False
         db_assignment.discharged_at = datetime.utcnow()
-        bed = db.query(models.Bed).filter(models.Bed.id == db_assignment.bed_id).first()
+        bed = _lock_bed(db, db_assignment.bed_id)
         if bed:
-            bed.status = models.BedStatus.AVAILABLE
-            bed.updated_at = datetime.utcnow()
+            _set_bed_status(db, bed, models.BedStatus.AVAILABLE)
         db.commit()
         db.refresh(db_assignment)
     return db_assignment
@@ -144,10 +159,9 @@ def get_pending_maintenance(db: Session):
 def create_bed_maintenance(db: Session, maintenance: schemas.BedMaintenanceCreate):
     db_maintenance = models.BedMaintenance(**maintenance.dict())
     db.add(db_maintenance)
-    bed = db.query(models.Bed).filter(models.Bed.id == maintenance.bed_id).first()
+    bed = _lock_bed(db, maintenance.bed_id)
     if bed:
-        bed.status = models.BedStatus.MAINTENANCE
-        bed.updated_at = datetime.utcnow()
+        _set_bed_status(db, bed, models.BedStatus.MAINTENANCE)
     db.commit()
     db.refresh(db_maintenance)
     return db_maintenance
@@ -162,87 +176,37 @@ def complete_maintenance(db: Session, maintenance_id: int):
     if db_maintenance:
         db_maintenance.status = "completed"
         db_maintenance.completed_date = datetime.utcnow()
-        bed = (
-            db.query(models.Bed).filter(models.Bed.id == db_maintenance.bed_id).first()
-        )
+        bed = _lock_bed(db, db_maintenance.bed_id)
         if bed:
-            bed.status = models.BedStatus.AVAILABLE
-            bed.updated_at = datetime.utcnow()
+            _set_bed_status(db, bed, models.BedStatus.AVAILABLE)
         db.commit()
         db.refresh(db_maintenance)
     return db_maintenance
 
 
 def get_bed_availability(db: Session, ward_id: Optional[int] = None):
-    query = db.query(models.Ward)
-    if ward_id:
-        query = query.filter(models.Ward.id == ward_id)
-    wards = query.all()
-    availability = []
-    for ward in wards:
-        total_beds = db.query(models.Bed).filter(models.Bed.ward_id == ward.id).count()
-        available_beds = (
-            db.query(models.Bed)
-            .filter(
-                models.Bed.ward_id == ward.id,
-                models.Bed.status == models.BedStatus.AVAILABLE,
-            )
-            .count()
-        )
-        occupied_beds = (
-            db.query(models.Bed)
-            .filter(
-                models.Bed.ward_id == ward.id,
-                models.Bed.status == models.BedStatus.OCCUPIED,
-            )
-            .count()
-        )
-        maintenance_beds = (
-            db.query(models.Bed)
-            .filter(
-                models.Bed.ward_id == ward.id,
-                models.Bed.status == models.BedStatus.MAINTENANCE,
-            )
-            .count()
-        )
-        availability.append(
-            {
-                "ward_id": ward.id,
-                "ward_name": ward.ward_name,
-                "total_beds": total_beds,
-                "available_beds": available_beds,
-                "occupied_beds": occupied_beds,
-                "maintenance_beds": maintenance_beds,
-            }
-        )
-    return availability
+    # Served from the ward census counters rather than counting beds
+    return [
+        {
+            "ward_id": ward["ward_id"],
+            "ward_name": ward["ward_name"],
+            "total_beds": ward["total_beds"],
+            "available_beds": ward["available_beds"],
+            "occupied_beds": ward["occupied_beds"],
+            "maintenance_beds": ward["maintenance_beds"],
+        }
+        for ward in census.get_census(db, ward_id)
+    ]
 
 
 def get_bed_statistics(db: Session):
-    total_beds = db.query(models.Bed).filter(models.Bed.is_active == True).count()
-    available_beds = (
-        db.query(models.Bed)
-        .filter(
-            models.Bed.is_active == True,
-            models.Bed.status == models.BedStatus.AVAILABLE,
-        )
-        .count()
-    )
-    occupied_beds = (
-        db.query(models.Bed)
-        .filter(
-            models.Bed.is_active == True, models.Bed.status == models.BedStatus.OCCUPIED
+    totals = db.query(
+        *(
+            func.coalesce(func.sum(getattr(models.WardCensus, column)), 0)
+            for column in census.COUNT_COLUMNS
         )
-        .count()
-    )
-    maintenance_beds = (
-        db.query(models.Bed)
-        .filter(
-            models.Bed.is_active == True,
-            models.Bed.status == models.BedStatus.MAINTENANCE,
-        )
-        .count()
-    )
+    ).one()
+    total_beds, available_beds, occupied_beds, maintenance_beds, _ = totals
     occupancy_rate = (occupied_beds / total_beds) if total_beds > 0 else 0.0
     return {
         "total_beds": total_beds,
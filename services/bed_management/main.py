@@ -2,17 +2,27 @@
 main module
 """
 
+import asyncio
 from datetime import datetime
 from typing import List, Optional
 
+import census
 import crud
 import models
 import schemas
-from database import Base, engine, get_db
-from fastapi import Depends, FastAPI, HTTPException, status
+from database import Base, SessionLocal, engine, get_db
+from fastapi import (
+    Depends,
+    FastAPI,
+    HTTPException,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
 from sqlalchemy.orm import Session
 
 Base.metadata.create_all(bind=engine)
+models.Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="Bed Management Service",
     description="Enterprise-grade bed management for hospital inpatient departments",
@@ -20,6 +30,32 @@
 )
 
 
+census_broadcaster = census.CensusBroadcaster(engine)
+census_stop = asyncio.Event()
+
+
+@app.on_event("startup")
+async def start_census():
+    # Reconcile counters with the beds table before serving from them
+    def rebuild():
+        db = SessionLocal()
+        try:
+            census.rebuild_census(db)
+            db.commit()
+        finally:
+            db.close()
+
+    await asyncio.to_thread(rebuild)
+    census_broadcaster.start()
+    asyncio.create_task(census.run_snapshot_scheduler(SessionLocal, census_stop))
+
+
+@app.on_event("shutdown")
+async def stop_census():
+    census_stop.set()
+    census_broadcaster.stop()
+
+
 @app.get("/")
 async def root():
     return {"message": "Bed Management Service is running"}
@@ -124,6 +160,56 @@ def get_bed_statistics(db: Session = Depends(get_db)):
     return crud.get_bed_statistics(db)
 
 
+@app.get("/census", response_model=List[schemas.WardCensus])
+def get_census(ward_id: Optional[int] = None, db: Session = Depends(get_db)):
+    return census.get_census(db, ward_id)
+
+
+@app.post("/census/rebuild", response_model=List[schemas.WardCensus])
+def rebuild_census(ward_id: Optional[int] = None, db: Session = Depends(get_db)):
+    census.rebuild_census(db, ward_id)
+    db.commit()
+    return census.get_census(db, ward_id)
+
+
+@app.get("/census/snapshots", response_model=List[schemas.CensusSnapshot])
+def get_census_snapshots(
+    ward_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    return census.get_census_snapshots(db, ward_id, start, end)
+
+
+@app.websocket("/census/ws")
+async def census_updates(websocket: WebSocket, ward_id: Optional[int] = None):
+    """Current census, then a delta message for every committed bed change"""
+    await websocket.accept()
+    queue = census_broadcaster.subscribe(ward_id)
+    try:
+
+        def current():
+            db = SessionLocal()
+            try:
+                return census.get_census(db, ward_id)
+            finally:
+                db.close()
+
+        wards = await asyncio.to_thread(current)
+        snapshot = [
+            schemas.WardCensus(**ward).model_dump(mode="json") for ward in wards
+        ]
+        await websocket.send_json({"type": "census", "wards": snapshot})
+        while True:
+            delta = await queue.get()
+            await websocket.send_json({"type": "census_delta", **delta})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        census_broadcaster.unsubscribe(queue)
+
+
 if __name__ == "__main__":
     import uvicorn
 
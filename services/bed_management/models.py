@@ -12,6 +12,7 @@
     Integer,
     String,
     Text,
+    UniqueConstraint,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -88,3 +89,32 @@ class BedMaintenance(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     bed = relationship("Bed")
+
+
+class WardCensus(Base):
+    """Live per-ward bed counts by status, maintained with every transition"""
+
+    __tablename__ = "ward_census"
+    ward_id = Column(Integer, ForeignKey("wards.id"), primary_key=True)
+    total_beds = Column(Integer, default=0, nullable=False)
+    available_beds = Column(Integer, default=0, nullable=False)
+    occupied_beds = Column(Integer, default=0, nullable=False)
+    maintenance_beds = Column(Integer, default=0, nullable=False)
+    reserved_beds = Column(Integer, default=0, nullable=False)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    ward = relationship("Ward")
+
+
+class CensusSnapshot(Base):
+    __tablename__ = "census_snapshots"
+    __table_args__ = (UniqueConstraint("ward_id", "taken_at"),)
+    id = Column(Integer, primary_key=True, index=True)
+    ward_id = Column(Integer, ForeignKey("wards.id"), index=True)
+    taken_at = Column(DateTime, index=True)
+    total_beds = Column(Integer)
+    available_beds = Column(Integer)
+    occupied_beds = Column(Integer)
+    maintenance_beds = Column(Integer)
+    reserved_beds = Column(Integer)
+    occupancy_rate = Column(Float)
@@ -124,3 +124,30 @@ class BedStatistics(BaseModel):
     occupied_beds: int
     maintenance_beds: int
     occupancy_rate: float
+
+
+class WardCensus(BaseModel):
+    ward_id: int
+    ward_name: Optional[str] = None
+    total_beds: int
+    available_beds: int
+    occupied_beds: int
+    maintenance_beds: int
+    reserved_beds: int
+    occupancy_rate: float
+    version: int
+    updated_at: Optional[datetime] = None
+
+
+class CensusSnapshot(BaseModel):
+    ward_id: int
+    taken_at: datetime
+    total_beds: int
+    available_beds: int
+    occupied_beds: int
+    maintenance_beds: int
+    reserved_beds: int
+    occupancy_rate: float
+
+    class Config:
+        from_attributes = True
@@ -74,12 +74,13 @@ class BloodInventoryAdmin(admin.ModelAdmin):
         "pk",
         "unit_id",
         "blood_type",
+        "component",
         "status",
         "expiry_date",
         "get_expiry_status",
         "created_at",
     ]
-    list_filter = ["blood_type", "status", "expiry_date", "created_at"]
+    list_filter = ["blood_type", "component", "status", "expiry_date", "created_at"]
     search_fields = ["unit_id", "blood_type", "storage_location"]
     readonly_fields = ["created_at", "updated_at", "history"]
     actions = ["mark_as_expired", "mark_as_available"]
@@ -90,6 +91,7 @@ class BloodInventoryAdmin(admin.ModelAdmin):
                 "fields": (
                     "donor",
                     "blood_type",
+                    "component",
                     "unit_id",
                     "quantity",
                     "storage_location",
@@ -0,0 +1,240 @@
+"""
+inventory module
+"""
+
+import heapq
+import itertools
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .models import BLOOD_COMPONENTS, BLOOD_TYPES, BloodInventory, Crossmatch, LogEntry
+
+BLOOD_TYPE_CODES = [code for code, _ in BLOOD_TYPES]
+COMPONENT_CODES = [code for code, _ in BLOOD_COMPONENTS]
+EXPIRY_HORIZONS = (1, 3, 7)
+
+# Minimum stock per component before a bucket counts as short; override per
+# component (int) or per component and blood type (dict) with
+# settings.BLOOD_BANK_PAR_LEVELS
+DEFAULT_PAR_LEVELS = {"WB": 0, "PRBC": 10, "FFP": 6, "PLT": 4, "CRYO": 2}
+
+
+def _antigens(blood_type):
+    abo = blood_type.rstrip("+-")
+    return set() if abo == "O" else set(abo), blood_type.endswith("+")
+
+
+def _preference(recipient, universal_abo):
+    """Identical type first, then same ABO, then other types, universal last
+
+    Within each group the recipient's own Rh comes first, sparing Rh-negative
+    stock for Rh-negative patients.
+    """
+
+    def key(donor):
+        return (
+            donor != recipient,
+            donor.rstrip("+-") != recipient.rstrip("+-"),
+            donor.rstrip("+-") == universal_abo,
+            donor[-1] != recipient[-1],
+            BLOOD_TYPE_CODES.index(donor),
+        )
+
+    return key
+
+
+def _red_cell_donors(recipient):
+    abo, rh = _antigens(recipient)
+    donors = [
+        donor
+        for donor in BLOOD_TYPE_CODES
+        if _antigens(donor)[0] <= abo and (rh or not _antigens(donor)[1])
+    ]
+    return sorted(donors, key=_preference(recipient, "O"))
+
+
+def _plasma_donors(recipient):
+    # Plasma carries antibodies, so compatibility is ABO-reversed and Rh-blind
+    abo, _ = _antigens(recipient)
+    donors = [donor for donor in BLOOD_TYPE_CODES if _antigens(donor)[0] >= abo]
+    return sorted(donors, key=_preference(recipient, "AB"))
+
+
+# recipient blood type -> acceptable donor types, most preferred first
+RED_CELL_COMPATIBILITY = {code: _red_cell_donors(code) for code in BLOOD_TYPE_CODES}
+PLASMA_COMPATIBILITY = {code: _plasma_donors(code) for code in BLOOD_TYPE_CODES}
+COMPATIBILITY_MATRICES = {
+    "WB": {code: [code] for code in BLOOD_TYPE_CODES},
+    "PRBC": RED_CELL_COMPATIBILITY,
+    "FFP": PLASMA_COMPATIBILITY,
+    "PLT": PLASMA_COMPATIBILITY,
+    "CRYO": PLASMA_COMPATIBILITY,
+}
+# Donor types for an emergency release before the recipient is typed
+UNCROSSMATCHED_DONORS = {
+    "WB": ["O-"],
+    "PRBC": ["O-"],
+    "FFP": ["AB+", "AB-"],
+    "PLT": ["AB+", "AB-"],
+    "CRYO": ["AB+", "AB-"],
+}
+
+
+def compatible_donor_types(recipient_type, component):
+    if component not in COMPATIBILITY_MATRICES:
+        raise ValueError(f"Invalid component: {component}")
+    if recipient_type is None:
+        return UNCROSSMATCHED_DONORS[component]
+    if recipient_type not in BLOOD_TYPE_CODES:
+        raise ValueError(f"Invalid blood type: {recipient_type}")
+    return COMPATIBILITY_MATRICES[component][recipient_type]
+
+
+def expiry_buckets(today=None):
+    """Available units per blood type and component, with expiry horizons
+
+    A unit is one inventory row (one bag), matching what allocate_units
+    reserves. One aggregate query; buckets with no stock are omitted.
+    """
+    today = today or date.today()
+    expiring = {
+        f"expiring_{days}d": Count(
+            "pk", filter=Q(expiry_date__lte=today + timedelta(days=days))
+        )
+        for days in EXPIRY_HORIZONS
+    }
+    return list(
+        BloodInventory.objects.filter(status="AVAILABLE", expiry_date__gte=today)
+        .values("blood_type", "component")
+        .annotate(
+            units=Count("pk"),
+            next_expiry=Min("expiry_date"),
+            **expiring,
+        )
+        .order_by("blood_type", "component")
+    )
+
+
+def par_level(blood_type, component):
+    levels = {
+        **DEFAULT_PAR_LEVELS,
+        **getattr(settings, "BLOOD_BANK_PAR_LEVELS", {}),
+    }
+    level = levels.get(component, 0)
+    if isinstance(level, dict):
+        return level.get(blood_type, 0)
+    return level
+
+
+def inventory_shortages(buckets=None, today=None):
+    """Buckets whose stock, less what expires tomorrow, is below par level"""
+    if buckets is None:
+        buckets = expiry_buckets(today)
+    stock = {(b["blood_type"], b["component"]): b for b in buckets}
+    shortages = []
+    for blood_type, component in itertools.product(BLOOD_TYPE_CODES, COMPONENT_CODES):
+        bucket = stock.get((blood_type, component), {})
+        usable = bucket.get("units", 0) - bucket.get("expiring_1d", 0)
+        required = par_level(blood_type, component)
+        if usable < required:
+            shortages.append(
+                {
+                    "blood_type": blood_type,
+                    "component": component,
+                    "usable_units": usable,
+                    "par_level": required,
+                    "shortfall": required - usable,
+                }
+            )
+    return shortages
+
+
+def expire_outdated_units(today=None):
+    """Flag every available unit past its expiry date in one UPDATE"""
+    today = today or date.today()
+    expired = BloodInventory.objects.filter(
+        status="AVAILABLE", expiry_date__lt=today
+    ).update(status="EXPIRED", updated_at=timezone.now())
+    if expired:
+        LogEntry.objects.create(
+            action="EXPIRY_CHECK",
+            details=f"Marked {expired} units expired before {today}",
+            user="SYSTEM",
+        )
+    return expired
+
+
+def _fefo_units(blood_type, component, limit, today):
+    """Earliest-expiring available units of one type, locked for allocation
+
+    Served by blood_inv_fefo_idx as a single index range seek.
+    """
+    if limit <= 0:
+        return []
+    return list(
+        BloodInventory.objects.select_for_update(skip_locked=True)
+        .filter(
+            status="AVAILABLE",
+            blood_type=blood_type,
+            component=component,
+            expiry_date__gte=today,
+        )
+        .order_by("expiry_date", "pk")[:limit]
+    )
+
+
+def allocate_units(recipient_type, component, units, emergency=False, today=None):
+    """Reserve compatible units first-expired-first-out
+
+    Routine requests exhaust the most preferred donor type before moving on;
+    emergency requests take the earliest-expiring units across every
+    compatible type. Returns the reserved units, which may be fewer than
+    requested when stock runs out.
+    """
+    today = today or date.today()
+    donor_types = compatible_donor_types(recipient_type, component)
+    with transaction.atomic():
+        if emergency:
+            candidates = heapq.merge(
+                *(_fefo_units(t, component, units, today) for t in donor_types),
+                key=lambda unit: (unit.expiry_date, unit.pk),
+            )
+            allocated = list(itertools.islice(candidates, units))
+        else:
+            allocated = []
+            for donor_type in donor_types:
+                allocated += _fefo_units(
+                    donor_type, component, units - len(allocated), today
+                )
+        # Saved one by one, still under the row locks, so auditlog records
+        # each reservation
+        for unit in allocated:
+            unit.status = "RESERVED"
+            unit.save(update_fields=["status", "updated_at"])
+    return allocated
+
+
+def allocate_for_crossmatch(
+    patient, component, units, emergency=False, tested_by=None
+):
+    """Reserve units for a patient and open a pending crossmatch for each"""
+    recipient_type = getattr(patient, "blood_type", None) or None
+    if recipient_type is None and not emergency:
+        raise ValueError("Patient blood type is required for a routine request")
+    with transaction.atomic():
+        allocated = allocate_units(recipient_type, component, units, emergency)
+        crossmatches = [
+            Crossmatch.objects.create(
+                patient=patient,
+                blood_unit=unit,
+                compatibility_result="PENDING",
+                tested_by=tested_by,
+                notes="Emergency release" if emergency else "",
+            )
+            for unit in allocated
+        ]
+    return crossmatches
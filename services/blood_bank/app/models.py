@@ -27,6 +27,13 @@
     ("AB-", "AB Negative"),
     ("AB+", "AB Positive"),
 ]
+BLOOD_COMPONENTS = [
+    ("WB", "Whole Blood"),
+    ("PRBC", "Packed Red Blood Cells"),
+    ("FFP", "Fresh Frozen Plasma"),
+    ("PLT", "Platelets"),
+    ("CRYO", "Cryoprecipitate"),
+]
 INVENTORY_STATUS = [
     ("AVAILABLE", "Available"),
     ("RESERVED", "Reserved"),
@@ -82,6 +89,9 @@ class BloodInventory(TimestampedModel):
         Donor, on_delete=models.CASCADE, related_name="inventory_items"
     )
     blood_type = models.CharField(max_length=3, choices=BLOOD_TYPES)
+    component = models.CharField(
+        max_length=4, choices=BLOOD_COMPONENTS, default="WB", verbose_name="Component"
+    )
     unit_id = models.CharField(max_length=50, unique=True, verbose_name="Unit ID")
     expiry_date = models.DateField(verbose_name="Expiry Date")
     status = models.CharField(
@@ -98,6 +108,11 @@ class Meta:
             models.Index(fields=["blood_type", "status"]),
             models.Index(fields=["expiry_date"]),
             models.Index(fields=["status"]),
+            # FEFO allocation: one range seek per (blood type, component)
+            models.Index(
+                fields=["status", "blood_type", "component", "expiry_date"],
+                name="blood_inv_fefo_idx",
+            ),
         ]
         verbose_name = "Blood Inventory"
         verbose_name_plural = "Blood Inventory"
@@ -9,7 +9,13 @@
 
 from django.core.validators import RegexValidator
 
-from .models import BloodInventory, Crossmatch, Donor, TransfusionRecord
+from .models import (
+    BLOOD_COMPONENTS,
+    BloodInventory,
+    Crossmatch,
+    Donor,
+    TransfusionRecord,
+)
 
 BLOOD_TYPES = ["O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"]
 
@@ -70,6 +76,7 @@ class Meta:
             "id",
             "donor",
             "blood_type",
+            "component",
             "unit_id",
             "expiry_date",
             "status",
@@ -162,9 +169,17 @@ def validate_compatibility_result(self, value):
         return value
 
 
+class CrossmatchAllocationSerializer(serializers.Serializer):
+    patient_id = serializers.CharField()
+    component = serializers.ChoiceField(choices=BLOOD_COMPONENTS, default="PRBC")
+    units = serializers.IntegerField(min_value=1, default=1)
+    emergency = serializers.BooleanField(default=False)
+
+
 __all__ = [
     "DonorSerializer",
     "BloodInventorySerializer",
     "TransfusionRecordSerializer",
     "CrossmatchSerializer",
+    "CrossmatchAllocationSerializer",
 ]
@@ -0,0 +1,795 @@
+"""
+Async SMS gateway for HMS Blood Bank
+Pooled provider clients, per-provider send quotas, hedged failover and
+batched delivery-status polling
+"""
+
+import asyncio
+import logging
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Messages per second each provider account is allowed to send
+DEFAULT_RATE_LIMITS = {
+    "twilio": 10.0,
+    "vonage": 30.0,
+    "aws_sns": 20.0,
+    "telnyx": 10.0,
+    "fake": 1000.0,
+}
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+FINAL_DELIVERY_STATUSES = {"delivered", "failed", "undelivered", "expired"}
+
+
+@dataclass
+class SMSResult:
+    message_id: str
+    status: str
+    recipient: str
+    timestamp: datetime
+    provider: str
+    delivery_status: Optional[str] = None
+    error_message: Optional[str] = None
+    cost: Optional[float] = None
+
+
+@dataclass
+class OutboundSMS:
+    recipient: str
+    message: str
+    priority: str = "normal"
+    message_type: str = "notification"
+    callback_url: Optional[str] = None
+
+
+class TokenBucket:
+    """Provider quota: ``rate`` messages per second with ``burst`` headroom
+
+    Sends reserve tokens up front and sleep off any debt, so a bulk request
+    for more than the burst still waits exactly as long as its share.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def delay(self, count: int = 1) -> float:
+        """Seconds a send of ``count`` messages would wait right now"""
+        self._refill()
+        return max(0.0, (count - self.tokens) / self.rate)
+
+    async def acquire(self, count: int = 1):
+        self._refill()
+        self.tokens -= count
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class AsyncSMSProvider:
+    """Base class for SMS providers sharing one pooled HTTP client each"""
+
+    name = "base"
+    bulk_size = 1
+    max_connections = 20
+
+    def __init__(self, rate: Optional[float] = None):
+        self.bucket = TokenBucket(rate or DEFAULT_RATE_LIMITS.get(self.name, 10.0))
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def record_latency(self, seconds: float):
+        self.latencies.append(seconds)
+
+    def latency_p95(self) -> Optional[float]:
+        if len(self.latencies) < LATENCY_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def sent(
+        self, sms: OutboundSMS, message_id: str, cost: Optional[float] = None
+    ) -> SMSResult:
+        return SMSResult(
+            message_id=message_id,
+            status="success",
+            recipient=sms.recipient,
+            timestamp=datetime.now(timezone.utc),
+            provider=self.name,
+            delivery_status="queued",
+            cost=cost,
+        )
+
+    def failed(self, sms: OutboundSMS, error: str) -> SMSResult:
+        return SMSResult(
+            message_id=f"{self.name}_error_{uuid.uuid4().hex}",
+            status="failed",
+            recipient=sms.recipient,
+            timestamp=datetime.now(timezone.utc),
+            provider=self.name,
+            error_message=error,
+        )
+
+    async def send(self, sms: OutboundSMS) -> SMSResult:
+        raise NotImplementedError
+
+    async def send_bulk(self, messages: List[OutboundSMS]) -> List[SMSResult]:
+        """Send several messages; providers with a bulk API override this"""
+        return list(await asyncio.gather(*(self.send(sms) for sms in messages)))
+
+    async def fetch_statuses(self, message_ids: List[str]) -> Dict[str, str]:
+        """Delivery status per message ID, for the IDs the provider reports"""
+        return {}
+
+    @property
+    def reports_status(self) -> bool:
+        """Whether this provider overrides fetch_statuses"""
+        return type(self).fetch_statuses is not AsyncSMSProvider.fetch_statuses
+
+
+class TwilioProvider(AsyncSMSProvider):
+    """Twilio SMS provider implementation"""
+
+    name = "twilio"
+
+    def __init__(self, rate: Optional[float] = None):
+        super().__init__(rate)
+        self.account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+        self.auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+        self.from_number = os.getenv("TWILIO_FROM_NUMBER")
+        self.base_url = f"https://api.twilio.com/2010-04-01/Accounts/{self.account_sid}"
+
+    @property
+    def configured(self) -> bool:
+        return all([self.account_sid, self.auth_token, self.from_number])
+
+    async def send(self, sms: OutboundSMS) -> SMSResult:
+        """Send SMS via Twilio"""
+        data = {"To": sms.recipient, "From": self.from_number, "Body": sms.message}
+        if sms.callback_url:
+            data["StatusCallback"] = sms.callback_url
+        response = await self.client.post(
+            f"{self.base_url}/Messages.json",
+            data=data,
+            auth=(self.account_sid, self.auth_token),
+        )
+        if response.status_code != 201:
+            return self.failed(sms, f"HTTP {response.status_code}: {response.text}")
+        response_data = response.json()
+        return self.sent(
+            sms, response_data["sid"], float(response_data.get("price") or 0)
+        )
+
+    async def fetch_statuses(self, message_ids: List[str]) -> Dict[str, str]:
+        """Twilio has no multi-ID lookup; fetch each over the shared pool"""
+
+        async def fetch(message_id):
+            try:
+                response = await self.client.get(
+                    f"{self.base_url}/Messages/{message_id}.json",
+                    auth=(self.account_sid, self.auth_token),
+                )
+                if response.status_code == 200:
+                    return message_id, response.json()["status"]
+            except Exception as e:
+                logger.error(f"Failed to get Twilio status: {e}")
+            return message_id, None
+
+        results = await asyncio.gather(*(fetch(m) for m in message_ids))
+        return {message_id: status for message_id, status in results if status}
+
+
+class VonageProvider(AsyncSMSProvider):
+    """Vonage (Nexmo) SMS provider implementation"""
+
+    name = "vonage"
+
+    def __init__(self, rate: Optional[float] = None):
+        super().__init__(rate)
+        self.api_key = os.getenv("VONAGE_API_KEY")
+        self.api_secret = os.getenv("VONAGE_API_SECRET")
+        self.from_number = os.getenv("VONAGE_FROM_NUMBER")
+        self.base_url = "https://rest.nexmo.com/sms/json"
+
+    @property
+    def configured(self) -> bool:
+        return all([self.api_key, self.api_secret, self.from_number])
+
+    async def send(self, sms: OutboundSMS) -> SMSResult:
+        """Send SMS via Vonage"""
+        data = {
+            "api_key": self.api_key,
+            "api_secret": self.api_secret,
+            "to": sms.recipient,
+            "from": self.from_number,
+            "text": sms.message,
+        }
+        if sms.callback_url:
+            data["callback"] = sms.callback_url
+        response = await self.client.post(self.base_url, data=data)
+        if response.status_code != 200:
+            return self.failed(sms, f"HTTP {response.status_code}: {response.text}")
+        messages = response.json().get("messages", [])
+        if messages and messages[0].get("status") == "0":
+            return self.sent(sms, messages[0]["message-id"])
+        return self.failed(
+            sms,
+            (
+                messages[0].get("error-text", "Unknown error")
+                if messages
+                else "No messages in response"
+            ),
+        )
+
+    # Vonage reports delivery through webhooks only
+
+
+class AWSNSProvider(AsyncSMSProvider):
+    """AWS SNS SMS provider implementation"""
+
+    name = "aws_sns"
+
+    def __init__(self, rate: Optional[float] = None):
+        super().__init__(rate)
+        self.access_key = os.getenv("AWS_ACCESS_KEY_ID")
+        self.secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+        self.region = os.getenv("AWS_REGION", "us-east-1")
+        self.sns_client = None
+
+    @property
+    def configured(self) -> bool:
+        return all([self.access_key, self.secret_key])
+
+    def _get_client(self):
+        """Get boto3 SNS client (thread-safe, with its own connection pool)"""
+        if self.sns_client is None:
+            import boto3
+            from botocore.config import Config
+
+            self.sns_client = boto3.client(
+                "sns",
+                aws_access_key_id=self.access_key,
+                aws_secret_access_key=self.secret_key,
+                region_name=self.region,
+                config=Config(max_pool_connections=self.max_connections),
+            )
+        return self.sns_client
+
+    async def send(self, sms: OutboundSMS) -> SMSResult:
+        """Send SMS via AWS SNS"""
+        attributes = {
+            "AWS.SNS.SMS.SMSType": {
+                "DataType": "String",
+                "StringValue": (
+                    "Transactional"
+                    if sms.priority in ["high", "urgent"]
+                    else "Promotional"
+                ),
+            }
+        }
+        client = self._get_client()
+        response = await asyncio.to_thread(
+            client.publish,
+            PhoneNumber=sms.recipient,
+            Message=sms.message,
+            MessageAttributes=attributes,
+        )
+        return self.sent(sms, response["MessageId"])
+
+    # SNS reports delivery through CloudWatch logs only
+
+
+class TelnyxProvider(AsyncSMSProvider):
+    """Telnyx SMS provider implementation"""
+
+    name = "telnyx"
+
+    def __init__(self, rate: Optional[float] = None):
+        super().__init__(rate)
+        self.api_key = os.getenv("TELNYX_API_KEY")
+        self.from_number = os.getenv("TELNYX_FROM_NUMBER")
+        self.base_url = "https://api.telnyx.com/v2/messages"
+
+    @property
+    def configured(self) -> bool:
+        return all([self.api_key, self.from_number])
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    async def send(self, sms: OutboundSMS) -> SMSResult:
+        """Send SMS via Telnyx"""
+        data = {"from": self.from_number, "to": sms.recipient, "text": sms.message}
+        if sms.callback_url:
+            data["webhook_url"] = sms.callback_url
+        response = await self.client.post(
+            self.base_url, json=data, headers=self.headers
+        )
+        if response.status_code != 200:
+            return self.failed(sms, f"HTTP {response.status_code}: {response.text}")
+        return self.sent(sms, response.json()["data"]["id"])
+
+    async def fetch_statuses(self, message_ids: List[str]) -> Dict[str, str]:
+        async def fetch(message_id):
+            try:
+                response = await self.client.get(
+                    f"{self.base_url}/{message_id}", headers=self.headers
+                )
+                if response.status_code == 200:
+                    to = response.json()["data"].get("to") or [{}]
+                    return message_id, to[0].get("status")
+            except Exception as e:
+                logger.error(f"Failed to get Telnyx status: {e}")
+            return message_id, None
+
+        results = await asyncio.gather(*(fetch(m) for m in message_ids))
+        return {message_id: status for message_id, status in results if status}
+
+
+class FakeSMSProvider(AsyncSMSProvider):
+    """In-process provider for load tests and local development
+
+    Simulates network latency (with occasional spikes), a failure rate, a
+    bulk endpoint and delivery receipts, without sending anything.
+    """
+
+    name = "fake"
+    bulk_size = 100
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        latency: float = 0.05,
+        spike_latency: float = 2.0,
+        spike_rate: float = 0.0,
+        failure_rate: float = 0.0,
+        delivery_delay: float = 1.0,
+        name: Optional[str] = None,
+    ):
+        if name:
+            self.name = name
+        super().__init__(rate or DEFAULT_RATE_LIMITS["fake"])
+        self.latency = latency
+        self.spike_latency = spike_latency
+        self.spike_rate = spike_rate
+        self.failure_rate = failure_rate
+        self.delivery_delay = delivery_delay
+        self.outbox: Dict[str, OutboundSMS] = {}
+        self._sent_at: Dict[str, float] = {}
+        self.calls = {"send": 0, "send_bulk": 0, "fetch_statuses": 0}
+
+    async def _network(self):
+        spike = random.random() < self.spike_rate
+        await asyncio.sleep(self.spike_latency if spike else self.latency)
+
+    def _accept(self, sms: OutboundSMS) -> SMSResult:
+        if random.random() < self.failure_rate:
+            return self.failed(sms, "Simulated provider failure")
+        message_id = f"{self.name}_{uuid.uuid4().hex}"
+        self.outbox[message_id] = sms
+        self._sent_at[message_id] = time.monotonic()
+        return self.sent(sms, message_id, cost=0.0)
+
+    async def send(self, sms: OutboundSMS) -> SMSResult:
+        self.calls["send"] += 1
+        await self._network()
+        return self._accept(sms)
+
+    async def send_bulk(self, messages: List[OutboundSMS]) -> List[SMSResult]:
+        self.calls["send_bulk"] += 1
+        await self._network()
+        return [self._accept(sms) for sms in messages]
+
+    async def fetch_statuses(self, message_ids: List[str]) -> Dict[str, str]:
+        self.calls["fetch_statuses"] += 1
+        await self._network()
+        now = time.monotonic()
+        return {
+            message_id: (
+                "delivered"
+                if now - self._sent_at[message_id] >= self.delivery_delay
+                else "sent"
+            )
+            for message_id in message_ids
+            if message_id in self._sent_at
+        }
+
+
+PROVIDER_CLASSES = {
+    "twilio": TwilioProvider,
+    "vonage": VonageProvider,
+    "aws_sns": AWSNSProvider,
+    "telnyx": TelnyxProvider,
+    "fake": FakeSMSProvider,
+}
+
+
+def _rate_limits_from_env() -> Dict[str, float]:
+    """SMS_RATE_LIMITS="twilio:10,vonage:30" overrides the default quotas"""
+    limits = dict(DEFAULT_RATE_LIMITS)
+    for item in os.getenv("SMS_RATE_LIMITS", "").split(","):
+        if ":" in item:
+            name, rate = item.split(":", 1)
+            limits[name.strip()] = float(rate)
+    return limits
+
+
+class SMSGateway:
+    """
+    Sends through the configured providers in order of preference
+
+    A provider whose quota backlog exceeds ``max_queue_delay`` drops behind
+    the others. High and urgent messages are hedged: if the provider has not
+    answered within its recent p95 latency, the next provider is tried in
+    parallel and the first success wins.
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, AsyncSMSProvider],
+        order: List[str],
+        hedge_after: float = 3.0,
+        min_hedge_after: float = 0.25,
+        hedge_priorities=("high", "urgent"),
+        max_attempts: int = 3,
+        max_queue_delay: float = 5.0,
+    ):
+        self.providers = providers
+        self.order = [name for name in order if name in providers]
+        self.hedge_after = hedge_after
+        self.min_hedge_after = min_hedge_after
+        self.hedge_priorities = set(hedge_priorities)
+        self.max_attempts = max_attempts
+        self.max_queue_delay = max_queue_delay
+        self.stats = {"sent": 0, "failed": 0, "hedged": 0, "failovers": 0}
+        self.poller = DeliveryStatusPoller(self)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    @classmethod
+    def from_env(cls) -> "SMSGateway":
+        rates = _rate_limits_from_env()
+        primary = os.getenv("SMS_PRIMARY_PROVIDER", "twilio")
+        fallbacks = os.getenv("SMS_FALLBACK_PROVIDERS", "vonage,aws_sns").split(",")
+        order = []
+        for name in [primary, *fallbacks]:
+            name = name.strip()
+            if name in PROVIDER_CLASSES and name not in order:
+                order.append(name)
+        return cls(
+            providers={name: PROVIDER_CLASSES[name](rates.get(name)) for name in order},
+            order=order,
+            hedge_after=float(os.getenv("SMS_HEDGE_AFTER", "3.0")),
+            max_attempts=int(os.getenv("SMS_MAX_RETRIES", "3")),
+            max_queue_delay=float(os.getenv("SMS_MAX_QUEUE_DELAY", "5.0")),
+        )
+
+    def provider_order(self, exclude=()) -> List[AsyncSMSProvider]:
+        """Configured providers, saturated ones moved behind the rest"""
+        candidates = [
+            self.providers[name]
+            for name in self.order
+            if name not in exclude and self.providers[name].configured
+        ]
+        return sorted(
+            candidates, key=lambda p: p.bucket.delay() > self.max_queue_delay
+        )
+
+    def hedge_delay(self, provider: AsyncSMSProvider) -> float:
+        p95 = provider.latency_p95()
+        return max(self.min_hedge_after, p95 if p95 is not None else self.hedge_after)
+
+    async def _attempt(self, provider: AsyncSMSProvider, sms: OutboundSMS):
+        await provider.bucket.acquire()
+        started = time.monotonic()
+        try:
+            result = await provider.send(sms)
+        except Exception as e:
+            result = provider.failed(sms, str(e))
+        provider.record_latency(time.monotonic() - started)
+        return result
+
+    def _no_provider(self, sms: OutboundSMS, error: str) -> SMSResult:
+        self.stats["failed"] += 1
+        return SMSResult(
+            message_id=f"failed_{uuid.uuid4().hex}",
+            status="failed",
+            recipient=sms.recipient,
+            timestamp=datetime.now(timezone.utc),
+            provider="none",
+            error_message=error,
+        )
+
+    async def send(self, sms: OutboundSMS, exclude=()) -> SMSResult:
+        """Send one message with failover (and hedging for urgent traffic)"""
+        providers = self.provider_order(exclude)[: self.max_attempts]
+        if not providers:
+            return self._no_provider(sms, "No SMS provider configured")
+        hedge = sms.priority in self.hedge_priorities
+        pending: Dict[asyncio.Task, AsyncSMSProvider] = {}
+        errors = []
+        launched = 0
+
+        def launch():
+            nonlocal launched
+            provider = providers[launched]
+            launched += 1
+            pending[asyncio.create_task(self._attempt(provider, sms))] = provider
+            return provider
+
+        latest = launch()
+        while pending:
+            timeout = None
+            if hedge and launched < len(providers):
+                timeout = self.hedge_delay(latest)
+            done, _ = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                # Latency spike on the in-flight attempt: race the next provider
+                logger.warning(f"SMS via {latest.name} slow, hedging")
+                self.stats["hedged"] += 1
+                latest = launch()
+                continue
+            for task in done:
+                provider = pending.pop(task)
+                result = task.result()
+                if result.status == "success":
+                    for other in pending:
+                        other.cancel()
+                    self.stats["sent"] += 1
+                    self.poller.track(result)
+                    return result
+                errors.append(f"{provider.name}: {result.error_message}")
+                logger.warning(f"SMS send failed via {provider.name}")
+            if not pending and launched < len(providers):
+                self.stats["failovers"] += 1
+                latest = launch()
+
+        return self._no_provider(
+            sms,
+            f"All SMS providers failed after {launched} attempts: {'; '.join(errors)}",
+        )
+
+    async def send_bulk(self, messages: List[OutboundSMS]) -> List[SMSResult]:
+        """Send many messages through the preferred provider's bulk path
+
+        Messages the provider rejects are retried one by one on the others.
+        """
+        providers = self.provider_order()
+        if not providers:
+            return [
+                self._no_provider(sms, "No SMS provider configured") for sms in messages
+            ]
+        provider = providers[0]
+        chunks = [
+            messages[start : start + provider.bulk_size]
+            for start in range(0, len(messages), provider.bulk_size)
+        ]
+
+        async def send_chunk(chunk):
+            await provider.bucket.acquire(len(chunk))
+            started = time.monotonic()
+            try:
+                results = await provider.send_bulk(chunk)
+            except Exception as e:
+                results = [provider.failed(sms, str(e)) for sms in chunk]
+            provider.record_latency(time.monotonic() - started)
+            retried = await asyncio.gather(
+                *(
+                    self.send(sms, exclude=(provider.name,))
+                    for sms, result in zip(chunk, results)
+                    if result.status != "success"
+                )
+            )
+            retried = iter(retried)
+            final = []
+            for result in results:
+                if result.status == "success":
+                    self.stats["sent"] += 1
+                    self.poller.track(result)
+                    final.append(result)
+                else:
+                    final.append(next(retried))
+            return final
+
+        results = []
+        for chunk_results in await asyncio.gather(*(send_chunk(c) for c in chunks)):
+            results.extend(chunk_results)
+        return results
+
+    async def fetch_status(self, message_id: str) -> Optional[str]:
+        for provider in self.providers.values():
+            try:
+                status = (await provider.fetch_statuses([message_id])).get(message_id)
+                if status:
+                    return status
+            except Exception as e:
+                logger.warning(f"Failed to get status from {provider.name}: {e}")
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "tracked_messages": self.poller.tracked(),
+            "providers": {
+                name: {
+                    "configured": provider.configured,
+                    "queue_delay": round(provider.bucket.delay(), 3),
+                    "latency_p95": provider.latency_p95(),
+                }
+                for name, provider in self.providers.items()
+            },
+        }
+
+    # Background loop: keeps the provider pools alive across sync callers
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._stop = asyncio.Event()
+            self._loop.create_task(self.poller.run(self._stop))
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="sms-gateway", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def call(self, coro: Awaitable, timeout: Optional[float] = 120.0):
+        """Run a coroutine on the gateway loop from synchronous code"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def shutdown(self):
+        if self._thread is None:
+            return
+
+        async def close():
+            self._stop.set()
+            for provider in self.providers.values():
+                await provider.aclose()
+
+        self.call(close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+
+class DeliveryStatusPoller:
+    """Looks up delivery status in batches for messages not yet final"""
+
+    def __init__(
+        self,
+        gateway: SMSGateway,
+        interval: float = 30.0,
+        batch_size: Optional[int] = None,
+        max_age: float = 24 * 3600,
+    ):
+        self.gateway = gateway
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.on_statuses: Optional[Callable[[Dict[str, str]], Awaitable]] = None
+        self._pending: Dict[str, Dict[str, float]] = {}  # provider -> id -> sent
+
+    def track(self, result: SMSResult):
+        provider = self.gateway.providers.get(result.provider)
+        if provider is None or not provider.reports_status:
+            return
+        self._pending.setdefault(result.provider, {})[
+            result.message_id
+        ] = time.monotonic()
+
+    def tracked(self) -> int:
+        return sum(len(ids) for ids in self._pending.values())
+
+    def _batch_size(self, provider: AsyncSMSProvider) -> int:
+        """Enough IDs per poll to keep up with what the provider can send"""
+        if self.batch_size is not None:
+            return self.batch_size
+        return max(1, math.ceil(provider.bucket.rate * self.interval))
+
+    async def _poll_provider(self, name: str) -> Dict[str, str]:
+        provider = self.gateway.providers[name]
+        pending = self._pending.get(name, {})
+        cutoff = time.monotonic() - self.max_age
+        for message_id in [m for m, sent in pending.items() if sent < cutoff]:
+            del pending[message_id]
+        # Oldest first, so nothing starves behind a steady stream of new sends
+        batch = sorted(pending, key=pending.get)[: self._batch_size(provider)]
+        if not batch:
+            return {}
+        statuses = await provider.fetch_statuses(batch)
+        for message_id, status in statuses.items():
+            if status in FINAL_DELIVERY_STATUSES:
+                pending.pop(message_id, None)
+        return statuses
+
+    async def poll_once(self) -> Dict[str, str]:
+        updates = {}
+        results = await asyncio.gather(
+            *(self._poll_provider(name) for name in list(self._pending)),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Delivery status poll failed: {result}")
+            else:
+                updates.update(result)
+        if updates and self.on_statuses is not None:
+            await self.on_statuses(updates)
+        return updates
+
+    async def run(self, stop: asyncio.Event):
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+                break
+            except asyncio.TimeoutError:
+                pass
+            await self.poll_once()
+
+
+_gateway: Optional[SMSGateway] = None
+_gateway_pid: Optional[int] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> SMSGateway:
+    """Process-wide gateway; rebuilt after a fork (e.g. Celery prefork)"""
+    global _gateway, _gateway_pid
+    with _gateway_lock:
+        if _gateway is None or _gateway_pid != os.getpid():
+            _gateway = SMSGateway.from_env()
+            _gateway_pid = os.getpid()
+        return _gateway
@@ -3,23 +3,40 @@
 HIPAA compliant with delivery confirmation, audit trail, and redundancy
 """
 
+import asyncio
 import hashlib
 import hmac
 import json
 import logging
 import os
-from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-import requests
-
 from django.conf import settings
 from django.core.cache import cache
 
+from .sms_gateway import (
+    OutboundSMS,
+    SMSGateway,
+    SMSResult,
+    get_gateway,
+)
+
 logger = logging.getLogger(__name__)
 
+# Provider delivery states -> SMSLog.STATUS_CHOICES
+DELIVERY_STATUS_MAP = {
+    "queued": "QUEUED",
+    "accepted": "QUEUED",
+    "sending": "QUEUED",
+    "sent": "SENT",
+    "delivered": "DELIVERED",
+    "failed": "FAILED",
+    "undelivered": "FAILED",
+    "expired": "FAILED",
+}
+
 
 class SMSPriority(Enum):
     LOW = "low"
@@ -35,40 +52,38 @@ class SMSMessageType(Enum):
     REMINDER = "reminder"
 
 
-@dataclass
-class SMSResult:
-    message_id: str
-    status: str
-    recipient: str
-    timestamp: datetime
-    provider: str
-    delivery_status: Optional[str] = None
-    error_message: Optional[str] = None
-    cost: Optional[float] = None
-
-
 class SMSService:
     """
     Enterprise SMS service with multi-provider redundancy and HIPAA compliance
+
+    A synchronous front for the process-wide async SMSGateway, whose loop
+    keeps the provider connection pools alive between calls.
     """
 
-    def __init__(self):
-        self.providers = self._initialize_providers()
+    def __init__(self, gateway: Optional[SMSGateway] = None):
+        self.gateway = gateway or get_gateway()
+        self.providers = self.gateway.providers
         self.primary_provider = os.getenv("SMS_PRIMARY_PROVIDER", "twilio")
         self.fallback_providers = os.getenv(
             "SMS_FALLBACK_PROVIDERS", "vonage,aws_sns"
         ).split(",")
         self.max_retries = int(os.getenv("SMS_MAX_RETRIES", "3"))
         self.hipaa_mode = os.getenv("HIPAA_MODE", "true").lower() == "true"
+        if self.gateway.poller.on_statuses is None:
+            self.gateway.poller.on_statuses = store_delivery_statuses
 
-    def _initialize_providers(self) -> Dict[str, "SMSProvider"]:
-        """Initialize SMS providers with enterprise configuration"""
-        return {
-            "twilio": TwilioProvider(),
-            "vonage": VonageProvider(),
-            "aws_sns": AWSNSProvider(),
-            "telnyx": TelnyxProvider(),
-        }
+    def _outbound(
+        self,
+        recipient: str,
+        message: str,
+        priority: str,
+        message_type: str,
+        callback_url: Optional[str],
+    ) -> OutboundSMS:
+        if self.hipaa_mode:
+            message = self._sanitize_hipaa_message(message)
+            recipient = self._sanitize_phone_number(recipient)
+        return OutboundSMS(recipient, message, priority, message_type, callback_url)
 
     def send_sms(
         self,
@@ -81,64 +96,70 @@ def send_sms(
         """
         Send SMS with enterprise features and fallback
         """
-        if self.hipaa_mode:
-            message = self._sanitize_hipaa_message(message)
-            recipient = self._sanitize_phone_number(recipient)
+        sms = self._outbound(recipient, message, priority, message_type, callback_url)
+        result = self.gateway.call(self.gateway.send(sms))
+        self._record(sms, result)
+        return result
 
-        attempts = 0
-        last_error = None
-
-        # Try primary provider first
-        provider_names = [self.primary_provider] + self.fallback_providers
-
-        for provider_name in provider_names:
-            if attempts >= self.max_retries:
-                break
-
-            provider = self.providers.get(provider_name)
-            if not provider:
-                logger.warning(f"SMS provider {provider_name} not configured")
-                continue
+    async def send_sms_async(
+        self,
+        recipient: str,
+        message: str,
+        priority: str = "normal",
+        message_type: str = "notification",
+        callback_url: Optional[str] = None,
+    ) -> SMSResult:
+        """Send from code already running on the gateway's event loop"""
+        sms = self._outbound(recipient, message, priority, message_type, callback_url)
+        result = await self.gateway.send(sms)
+        self._record(sms, result)
+        return result
 
+    def send_bulk(
+        self,
+        recipients: List[str],
+        message: str,
+        priority: str = "normal",
+        message_type: str = "notification",
+        callback_url: Optional[str] = None,
+    ) -> List[SMSResult]:
+        """
+        Send one message to many recipients through the provider bulk path
+        """
+        messages, positions = [], []
+        results: List[Optional[SMSResult]] = [None] * len(recipients)
+        for index, recipient in enumerate(recipients):
             try:
-                logger.info(
-                    f"Attempting SMS send via {provider_name} to {recipient[-4:]}"
+                messages.append(
+                    self._outbound(
+                        recipient, message, priority, message_type, callback_url
+                    )
                 )
-                result = provider.send_sms(
-                    recipient, message, priority, message_type, callback_url
+                positions.append(index)
+            except ValueError as e:
+                results[index] = SMSResult(
+                    message_id=f"failed_{datetime.now().timestamp()}_{index}",
+                    status="failed",
+                    recipient=recipient,
+                    timestamp=datetime.now(timezone.utc),
+                    provider="none",
+                    error_message=str(e),
                 )
-
-                # Validate result
-                if result.status == "success":
-                    logger.info(
-                        f"SMS sent successfully via {provider_name} with ID: {result.message_id}"
-                    )
-                    self._log_sms_activity(recipient, message, result, provider_name)
-                    return result
-                else:
-                    last_error = result.error_message or "Unknown error"
-                    logger.warning(f"SMS send failed via {provider_name}: {last_error}")
-
-            except Exception as e:
-                last_error = str(e)
-                logger.error(f"SMS provider {provider_name} failed: {last_error}")
-                continue
-
-            attempts += 1
-
-        # All providers failed
-        error_msg = f"All SMS providers failed after {attempts} attempts. Last error: {last_error}"
-        logger.error(error_msg)
-
-        # Create failure result
-        return SMSResult(
-            message_id=f"failed_{datetime.now().timestamp()}",
-            status="failed",
-            recipient=recipient,
-            timestamp=datetime.now(timezone.utc),
-            provider="none",
-            error_message=error_msg,
-        )
+        sent = self.gateway.call(self.gateway.send_bulk(messages)) if messages else []
+        for index, sms, result in zip(positions, messages, sent):
+            results[index] = result
+            self._record(sms, result)
+        return results
+
+    def _record(self, sms: OutboundSMS, result: SMSResult):
+        if result.status == "success":
+            logger.info(
+                f"SMS sent successfully via {result.provider} "
+                f"with ID: {result.message_id}"
+            )
+            self._log_sms_activity(sms.recipient, sms.message, result, result.provider)
+        else:
+            logger.error(result.error_message)
 
     def _sanitize_hipaa_message(self, message: str) -> str:
         """Sanitize message for HIPAA compliance"""
@@ -203,14 +224,9 @@ def get_delivery_status(self, message_id: str) -> Dict[str, Any]:
                 return cached_data
 
             # Query provider for status
-            for provider_name, provider in self.providers.items():
-                try:
-                    status = provider.get_delivery_status(message_id)
-                    if status:
-                        return status
-                except Exception as e:
-                    logger.warning(f"Failed to get status from {provider_name}: {e}")
-                    continue
+            status = self.gateway.call(self.gateway.fetch_status(message_id))
+            if status:
+                return {"message_id": message_id, "status": status}
 
             return {"error": "Status not available"}
 
@@ -219,398 +235,33 @@ def get_delivery_status(self, message_id: str) -> Dict[str, Any]:
             return {"error": str(e)}
 
 
-class SMSProvider:
-    """Base class for SMS providers"""
-
-    def send_sms(
-        self,
-        recipient: str,
-        message: str,
-        priority: str,
-        message_type: str,
-        callback_url: Optional[str],
-    ) -> SMSResult:
-        raise NotImplementedError
-
-    def get_delivery_status(self, message_id: str) -> Optional[Dict[str, Any]]:
-        raise NotImplementedError
-
-
-class TwilioProvider(SMSProvider):
-    """Twilio SMS provider implementation"""
-
-    def __init__(self):
-        self.account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-        self.auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-        self.from_number = os.getenv("TWILIO_FROM_NUMBER")
-        self.base_url = f"https://api.twilio.com/2010-04-01/Accounts/{self.account_sid}"
-
-    def send_sms(
-        self,
-        recipient: str,
-        message: str,
-        priority: str,
-        message_type: str,
-        callback_url: Optional[str],
-    ) -> SMSResult:
-        """Send SMS via Twilio"""
-        if not all([self.account_sid, self.auth_token, self.from_number]):
-            raise ValueError("Twilio configuration incomplete")
-
-        import base64
-        from urllib.parse import urlencode
-
-        # Prepare data
-        data = {
-            "To": recipient,
-            "From": self.from_number,
-            "Body": message,
-        }
-
-        if callback_url:
-            data["StatusCallback"] = callback_url
-
-        # Add priority header
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-            "Authorization": f'Basic {base64.b64encode(f"{self.account_sid}:{self.auth_token}".encode()).decode()}',
-        }
-
-        try:
-            response = requests.post(
-                f"{self.base_url}/Messages.json",
-                data=urlencode(data),
-                headers=headers,
-                timeout=30,
-            )
-
-            if response.status_code == 201:
-                response_data = response.json()
-                return SMSResult(
-                    message_id=response_data["sid"],
-                    status="success",
-                    recipient=recipient,
-                    timestamp=datetime.now(timezone.utc),
-                    provider="twilio",
-                    delivery_status="queued",
-                    cost=float(response_data.get("price", 0)),
-                )
-            else:
-                return SMSResult(
-                    message_id=f"twilio_error_{datetime.now().timestamp()}",
-                    status="failed",
-                    recipient=recipient,
-                    timestamp=datetime.now(timezone.utc),
-                    provider="twilio",
-                    error_message=f"HTTP {response.status_code}: {response.text}",
-                )
-
-        except Exception as e:
-            return SMSResult(
-                message_id=f"twilio_exception_{datetime.now().timestamp()}",
-                status="failed",
-                recipient=recipient,
-                timestamp=datetime.now(timezone.utc),
-                provider="twilio",
-                error_message=str(e),
-            )
-
-    def get_delivery_status(self, message_id: str) -> Optional[Dict[str, Any]]:
-        """Get delivery status from Twilio"""
-        try:
-            import base64
-
-            headers = {
-                "Authorization": f'Basic {base64.b64encode(f"{self.account_sid}:{self.auth_token}".encode()).decode()}'
-            }
-
-            response = requests.get(
-                f"{self.base_url}/Messages/{message_id}.json",
-                headers=headers,
-                timeout=30,
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "status": data["status"],
-                    "error_code": data.get("error_code"),
-                    "error_message": data.get("error_message"),
-                    "date_created": data.get("date_created"),
-                    "date_sent": data.get("date_sent"),
-                    "date_updated": data.get("date_updated"),
-                }
-
-        except Exception as e:
-            logger.error(f"Failed to get Twilio status: {e}")
-
-        return None
-
-
-class VonageProvider(SMSProvider):
-    """Vonage (Nexmo) SMS provider implementation"""
-
-    def __init__(self):
-        self.api_key = os.getenv("VONAGE_API_KEY")
-        self.api_secret = os.getenv("VONAGE_API_SECRET")
-        self.from_number = os.getenv("VONAGE_FROM_NUMBER")
-        self.base_url = "https://rest.nexmo.com/sms/json"
-
-    def send_sms(
-        self,
-        recipient: str,
-        message: str,
-        priority: str,
-        message_type: str,
-        callback_url: Optional[str],
-    ) -> SMSResult:
-        """Send SMS via Vonage"""
-        if not all([self.api_key, self.api_secret, self.from_number]):
-            raise ValueError("Vonage configuration incomplete")
-
-        data = {
-            "api_key": self.api_key,
-            "api_secret": self.api_secret,
-            "to": recipient,
-            "from": self.from_number,
-            "text": message,
-        }
-
-        if callback_url:
-            data["callback"] = callback_url
-
-        try:
-            response = requests.post(self.base_url, data=data, timeout=30)
-
-            if response.status_code == 200:
-                response_data = response.json()
-                messages = response_data.get("messages", [])
-                if messages and messages[0].get("status") == "0":
-                    return SMSResult(
-                        message_id=messages[0]["message-id"],
-                        status="success",
-                        recipient=recipient,
-                        timestamp=datetime.now(timezone.utc),
-                        provider="vonage",
-                        delivery_status="queued",
-                    )
-                else:
-                    error_msg = (
-                        messages[0].get("error-text", "Unknown error")
-                        if messages
-                        else "No messages in response"
-                    )
-                    return SMSResult(
-                        message_id=f"vonage_error_{datetime.now().timestamp()}",
-                        status="failed",
-                        recipient=recipient,
-                        timestamp=datetime.now(timezone.utc),
-                        provider="vonage",
-                        error_message=error_msg,
-                    )
-            else:
-                return SMSResult(
-                    message_id=f"vonage_http_error_{datetime.now().timestamp()}",
-                    status="failed",
-                    recipient=recipient,
-                    timestamp=datetime.now(timezone.utc),
-                    provider="vonage",
-                    error_message=f"HTTP {response.status_code}: {response.text}",
-                )
-
-        except Exception as e:
-            return SMSResult(
-                message_id=f"vonage_exception_{datetime.now().timestamp()}",
-                status="failed",
-                recipient=recipient,
-                timestamp=datetime.now(timezone.utc),
-                provider="vonage",
-                error_message=str(e),
-            )
-
-    def get_delivery_status(self, message_id: str) -> Optional[Dict[str, Any]]:
-        """Vonage delivery status via webhook (simplified)"""
-        # Vonage primarily uses webhooks for delivery reports
-        return None
-
-
-class AWSNSProvider(SMSProvider):
-    """AWS SNS SMS provider implementation"""
-
-    def __init__(self):
-        self.access_key = os.getenv("AWS_ACCESS_KEY_ID")
-        self.secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-        self.region = os.getenv("AWS_REGION", "us-east-1")
-        self.sns_client = None
-
-    def _get_client(self):
-        """Get boto3 SNS client"""
-        if self.sns_client is None:
-            import boto3
-
-            self.sns_client = boto3.client(
-                "sns",
-                aws_access_key_id=self.access_key,
-                aws_secret_access_key=self.secret_key,
-                region_name=self.region,
-            )
-        return self.sns_client
-
-    def send_sms(
-        self,
-        recipient: str,
-        message: str,
-        priority: str,
-        message_type: str,
-        callback_url: Optional[str],
-    ) -> SMSResult:
-        """Send SMS via AWS SNS"""
-        if not all([self.access_key, self.secret_key]):
-            raise ValueError("AWS SNS configuration incomplete")
-
-        try:
-            client = self._get_client()
-
-            attributes = {
-                "AWS.SNS.SMS.SMSType": {
-                    "DataType": "String",
-                    "StringValue": (
-                        "Transactional"
-                        if priority in ["high", "urgent"]
-                        else "Promotional"
-                    ),
-                }
-            }
-
-            if callback_url:
-                attributes["AWS.SNS.SMS.DeliveryStatus"] = {
-                    "DataType": "String",
-                    "StringValue": callback_url,
-                }
-
-            response = client.publish(
-                PhoneNumber=recipient, Message=message, MessageAttributes=attributes
-            )
-
-            return SMSResult(
-                message_id=response["MessageId"],
-                status="success",
-                recipient=recipient,
-                timestamp=datetime.now(timezone.utc),
-                provider="aws_sns",
-                delivery_status="queued",
-            )
-
-        except Exception as e:
-            return SMSResult(
-                message_id=f"aws_sns_exception_{datetime.now().timestamp()}",
-                status="failed",
-                recipient=recipient,
-                timestamp=datetime.now(timezone.utc),
-                provider="aws_sns",
-                error_message=str(e),
-            )
-
-    def get_delivery_status(self, message_id: str) -> Optional[Dict[str, Any]]:
-        """AWS SNS delivery status via CloudWatch (simplified)"""
-        return None
-
-
-class TelnyxProvider(SMSProvider):
-    """Telnyx SMS provider implementation"""
-
-    def __init__(self):
-        self.api_key = os.getenv("TELNYX_API_KEY")
-        self.from_number = os.getenv("TELNYX_FROM_NUMBER")
-        self.base_url = "https://api.telnyx.com/v2/messages"
-
-    def send_sms(
-        self,
-        recipient: str,
-        message: str,
-        priority: str,
-        message_type: str,
-        callback_url: Optional[str],
-    ) -> SMSResult:
-        """Send SMS via Telnyx"""
-        if not all([self.api_key, self.from_number]):
-            raise ValueError("Telnyx configuration incomplete")
-
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
-        data = {
-            "from": self.from_number,
-            "to": recipient,
-            "text": message,
-        }
-
-        if callback_url:
-            data["webhook_url"] = callback_url
-
-        try:
-            response = requests.post(
-                self.base_url, json=data, headers=headers, timeout=30
-            )
-
-            if response.status_code == 200:
-                response_data = response.json()
-                return SMSResult(
-                    message_id=response_data["data"]["id"],
-                    status="success",
-                    recipient=recipient,
-                    timestamp=datetime.now(timezone.utc),
-                    provider="telnyx",
-                    delivery_status="queued",
-                )
-            else:
-                return SMSResult(
-                    message_id=f"telnyx_error_{datetime.now().timestamp()}",
-                    status="failed",
-                    recipient=recipient,
-                    timestamp=datetime.now(timezone.utc),
-                    provider="telnyx",
-                    error_message=f"HTTP {response.status_code}: {response.text}",
-                )
-
-        except Exception as e:
-            return SMSResult(
-                message_id=f"telnyx_exception_{datetime.now().timestamp()}",
-                status="failed",
-                recipient=recipient,
-                timestamp=datetime.now(timezone.utc),
-                provider="telnyx",
-                error_message=str(e),
-            )
-
-    def get_delivery_status(self, message_id: str) -> Optional[Dict[str, Any]]:
-        """Get delivery status from Telnyx"""
-        try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            }
-
-            response = requests.get(
-                f"{self.base_url}/{message_id}", headers=headers, timeout=30
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "status": data["data"].get("status"),
-                    "created_at": data["data"].get("created_at"),
-                    "updated_at": data["data"].get("updated_at"),
-                    "error_code": data["data"].get("error_code"),
-                    "error_message": data["data"].get("error_message"),
-                }
-
-        except Exception as e:
-            logger.error(f"Failed to get Telnyx status: {e}")
+async def store_delivery_statuses(statuses: Dict[str, str]):
+    """Apply a batch of polled delivery statuses to the cache and SMS log"""
+    grouped: Dict[str, List[str]] = {}
+    for message_id, status in statuses.items():
+        grouped.setdefault(DELIVERY_STATUS_MAP.get(status, "UNKNOWN"), []).append(
+            message_id
+        )
 
-        return None
+    def store():
+        from django.utils import timezone as django_timezone
+
+        from .models import SMSLog
+
+        cached = cache.get_many([f"sms_{message_id}" for message_id in statuses])
+        for key, log_data in cached.items():
+            log_data["delivery_status"] = statuses[key[len("sms_") :]]
+        cache.set_many(cached, timeout=86400)
+        for status, message_ids in grouped.items():
+            updates = {"status": status}
+            if status == "DELIVERED":
+                updates["delivered_at"] = django_timezone.now()
+            SMSLog.objects.filter(message_id__in=message_ids).update(**updates)
+
+    try:
+        await asyncio.to_thread(store)
+    except Exception as e:
+        logger.error(f"Failed to store delivery statuses: {e}")
 
 
 # Factory function for easy instantiation
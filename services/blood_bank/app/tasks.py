@@ -4,6 +4,7 @@
 
 import os
 import smtplib
+from dataclasses import asdict
 from datetime import date, timedelta
 from email.mime.text import MimeText
 
@@ -16,7 +17,8 @@
 from django.db.models import Q
 from django.utils import timezone
 
-from .models import BloodInventory, LogEntry, TransfusionRecord
+from .inventory import expire_outdated_units, expiry_buckets, inventory_shortages
+from .models import LogEntry, TransfusionRecord
 from .views import BloodInventoryViewSet
 
 logger = get_task_logger(__name__)
@@ -26,51 +28,96 @@
 def check_expiry_alerts(self):
     try:
         logger.info("Starting blood expiry alert check")
-        expiry_threshold = date.today() + timedelta(days=7)
-        expiring_units = BloodInventory.objects.filter(
-            expiry_date__lte=expiry_threshold,
-            status="AVAILABLE",
-            expiry_date__gt=date.today(),
-        ).select_related("donor")
-        alert_count = expiring_units.count()
-        logger.info(f"Found {alert_count} units expiring soon")
-        if alert_count == 0:
-            logger.info("No expiring units found")
-            return {"status": "success", "alerts_sent": 0}
-        message_body = f"Blood Bank Expiry Alert\n\n"
-        for unit in expiring_units:
-            message_body += f"- Unit ID: {unit.unit_id} | Type: {unit.blood_type} | Expiry: {unit.expiry_date}\n"
-        message_body += (
-            "\nThis is an automated alert from the Blood Bank Management System."
+        today = date.today()
+        expired_count = expire_outdated_units(today)
+        buckets = expiry_buckets(today)
+        expiring = [bucket for bucket in buckets if bucket["expiring_7d"]]
+        shortages = inventory_shortages(buckets)
+        alert_count = sum(bucket["expiring_7d"] for bucket in expiring)
+        logger.info(
+            f"Found {alert_count} units expiring soon, {expired_count} expired, "
+            f"{len(shortages)} shortages"
         )
-        try:
-            email_subject = f"Blood Bank Alert: {alert_count} Units Expiring Soon"
-            if hasattr(settings, "BLOOD_BANK_ALERT_EMAILS"):
-                recipients = settings.BLOOD_BANK_ALERT_EMAILS
-            else:
-                recipients = ["admin@hospital.com"]
-            send_mail(
-                subject=email_subject,
-                message=message_body,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=recipients,
-                fail_silently=False,
+        if alert_count == 0 and not shortages:
+            logger.info("No expiring units or shortages found")
+            return {"status": "success", "alerts_sent": 0, "expired": expired_count}
+        # One digest per sweep, sent off this task by the alert dispatcher
+        send_inventory_alerts.delay(
+            {
+                "expiring_units": alert_count,
+                "expired_units": expired_count,
+                "expiring": [
+                    {
+                        "blood_type": bucket["blood_type"],
+                        "component": bucket["component"],
+                        "units": bucket["expiring_7d"],
+                        "next_expiry": str(bucket["next_expiry"]),
+                    }
+                    for bucket in expiring
+                ],
+                "shortages": shortages,
+            }
+        )
+        return {
+            "status": "success",
+            "alerts_sent": alert_count,
+            "units": alert_count,
+            "expired": expired_count,
+            "shortages": len(shortages),
+        }
+    except Exception as e:
+        logger.error(f"Expiry alert task failed: {str(e)}")
+        raise self.retry(countdown=60 * 10, exc=e)
+
+
+@shared_task(bind=True, max_retries=3)
+def send_inventory_alerts(self, digest):
+    """Send one email and one SMS round for an inventory sweep digest"""
+    message_body = "Blood Bank Inventory Alert\n\n"
+    if digest["expiring"]:
+        message_body += "Expiring within 7 days:\n"
+        for bucket in digest["expiring"]:
+            message_body += (
+                f"- {bucket['blood_type']} {bucket['component']}: "
+                f"{bucket['units']} units | Next expiry: {bucket['next_expiry']}\n"
             )
-            logger.info(f"Email alert sent to {len(recipients)} recipients")
-        except Exception as email_error:
-            logger.error(f"Failed to send email alert: {email_error}")
-            self.retry(countdown=60 * 5)
+    if digest["shortages"]:
+        message_body += "\nBelow par level:\n"
+        for shortage in digest["shortages"]:
+            message_body += (
+                f"- {shortage['blood_type']} {shortage['component']}: "
+                f"{shortage['usable_units']}/{shortage['par_level']} units\n"
+            )
+    if digest["expired_units"]:
+        message_body += f"\n{digest['expired_units']} units were marked expired.\n"
+    message_body += (
+        "\nThis is an automated alert from the Blood Bank Management System."
+    )
+    try:
+        recipients = getattr(
+            settings, "BLOOD_BANK_ALERT_EMAILS", ["admin@hospital.com"]
+        )
+        send_mail(
+            subject=(
+                f"Blood Bank Alert: {digest['expiring_units']} Units Expiring Soon, "
+                f"{len(digest['shortages'])} Shortages"
+            ),
+            message=message_body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=recipients,
+            fail_silently=False,
+        )
+        logger.info(f"Email alert sent to {len(recipients)} recipients")
+    except Exception as email_error:
+        logger.error(f"Failed to send email alert: {email_error}")
+        raise self.retry(countdown=60 * 5, exc=email_error)
+    if digest["expiring_units"]:
         try:
-            send_sms_expiry_alert(alert_count)
+            send_sms_expiry_alert(digest["expiring_units"])
             logger.info("SMS alert sent successfully")
         except Exception as sms_error:
             logger.error(f"Failed to send SMS alert: {sms_error}")
-        for unit in expiring_units:
-            unit.save()
-        return {"status": "success", "alerts_sent": alert_count, "units": alert_count}
-    except Exception as e:
-        logger.error(f"Expiry alert task failed: {str(e)}")
-        raise self.retry(countdown=60 * 10, exc=e)
+    return {"status": "success", "alerts_sent": digest["expiring_units"]}
 
 
 def send_sms_expiry_alert(unit_count):
@@ -79,12 +126,6 @@ def send_sms_expiry_alert(unit_count):
     HIPAA compliant with delivery confirmation and audit trail
     """
     try:
-        # Import enterprise SMS service
-        from .sms_service import SMSService
-
-        # Initialize SMS service with enterprise configuration
-        sms_service = SMSService()
-
         # Create HIPAA-compliant message
         sms_message = f"HMS Blood Bank: {unit_count} units expiring within 7 days. Immediate action required."
 
@@ -95,43 +136,9 @@ def send_sms_expiry_alert(unit_count):
             logger.warning("No emergency contacts configured for SMS alerts")
             return False
 
-        # Send SMS with enterprise features
-        delivery_results = []
-        for contact in emergency_contacts:
-            try:
-                result = sms_service.send_sms(
-                    recipient=contact["phone"],
-                    message=sms_message,
-                    priority="high",
-                    message_type="emergency",
-                    callback_url=generate_callback_url("blood_bank_expiry"),
-                )
-                delivery_results.append(result)
-
-                # Log for HIPAA compliance
-                log_sms_communication(
-                    recipient=contact["phone"],
-                    message=sms_message,
-                    message_id=result.get("message_id"),
-                    status=result.get("status"),
-                    purpose="blood_bank_expiry_alert",
-                )
-
-                logger.info(
-                    f"SMS alert sent to {contact['phone'][-4:]}: {result.get('status')}"
-                )
-
-            except Exception as contact_error:
-                logger.error(
-                    f"Failed to send SMS to {contact['phone'][-4:]}: {contact_error}"
-                )
-                delivery_results.append(
-                    {
-                        "phone": contact["phone"],
-                        "status": "failed",
-                        "error": str(contact_error),
-                    }
-                )
+        delivery_results = send_sms_batch(
+            emergency_contacts, sms_message, "blood_bank_expiry"
+        )
 
         # Verify delivery success
         successful_deliveries = [
@@ -160,6 +167,29 @@ def send_sms_expiry_alert(unit_count):
         raise
 
 
+def send_sms_batch(contacts, message, purpose):
+    """
+    Send one message to many contacts through the SMS gateway's bulk path
+    and log them in one insert
+    """
+    from .sms_service import SMSService
+
+    sms_service = SMSService()
+    results = sms_service.send_bulk(
+        [contact["phone"] for contact in contacts],
+        message,
+        priority="high",
+        message_type="emergency",
+        callback_url=generate_callback_url(purpose),
+    )
+    delivery_results = []
+    for contact, result in zip(contacts, results):
+        logger.info(f"SMS alert sent to {contact['phone'][-4:]}: {result.status}")
+        delivery_results.append({"phone": contact["phone"], **asdict(result)})
+    log_sms_batch(delivery_results, message, purpose)
+    return delivery_results
+
+
 def get_emergency_contacts():
     """
     Get emergency contacts from enterprise configuration
@@ -235,6 +265,38 @@ def log_sms_communication(recipient, message, message_id, status, purpose):
         logger.error(f"Failed to log SMS communication: {e}")
 
 
+def log_sms_batch(delivery_results, message, purpose):
+    """
+    Log a batch of SMS sends for the HIPAA audit trail in one insert
+    """
+    try:
+        from .models import SMSLog
+
+        now = timezone.now()
+        preview = message[:47] + "..." if len(message) > 50 else message
+        SMSLog.objects.bulk_create(
+            [
+                SMSLog(
+                    recipient_last_4=result["phone"][-4:],
+                    message_preview=preview,
+                    message_id=result.get("message_id")
+                    or f"failed_{now.timestamp()}_{index}",
+                    provider=result.get("provider") or "none",
+                    status="SENT" if result.get("status") == "success" else "FAILED",
+                    message_type="BLOOD_BANK_EXPIRY",
+                    priority="high",
+                    sent_at=now if result.get("status") == "success" else None,
+                    error_message=result.get("error_message") or result.get("error"),
+                    purpose=purpose,
+                )
+                for index, result in enumerate(delivery_results)
+            ],
+            ignore_conflicts=True,
+        )
+    except Exception as e:
+        logger.error(f"Failed to log SMS communication: {e}")
+
+
 def send_email_fallback(unit_count, original_error):
     """
     Send email fallback when SMS fails
@@ -12,12 +12,21 @@
 from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from django.apps import apps
 from django.core.cache import cache
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
+from .inventory import (
+    RED_CELL_COMPATIBILITY,
+    allocate_for_crossmatch,
+    expiry_buckets,
+    inventory_shortages,
+)
 from .models import BloodInventory, Crossmatch, Donor, TransfusionRecord
 from .serializers import (
     BloodInventorySerializer,
+    CrossmatchAllocationSerializer,
     CrossmatchSerializer,
     DonorSerializer,
     TransfusionRecordSerializer,
@@ -87,6 +96,13 @@ def expiring_soon(self, request):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["get"])
+    def buckets(self, request):
+        buckets = expiry_buckets()
+        return Response(
+            {"buckets": buckets, "shortages": inventory_shortages(buckets)}
+        )
+
     @action(detail=True, methods=["post"])
     def reserve(self, request, pk=None):
         instance = self.get_object()
@@ -167,19 +183,42 @@ def compatible_units(self, request):
                 {"error": "patient_id parameter required"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        Patient = apps.get_model("patients", "Patient")
         patient = get_object_or_404(Patient, id=patient_id)
-        patient_blood_type = patient.blood_type
-        compatible_types = []
-        if patient_blood_type == "O-":
-            compatible_types = ["O-"]
-        elif patient_blood_type == "O+":
-            compatible_types = ["O-", "O+"]
+        compatible_types = RED_CELL_COMPATIBILITY.get(patient.blood_type, [])
         queryset = Crossmatch.objects.filter(
-            patient_id=patient_id, compatibility_result="COMPATIBLE"
+            patient_id=patient_id,
+            compatibility_result="COMPATIBLE",
+            blood_unit__blood_type__in=compatible_types,
         ).select_related("blood_unit")
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["post"])
+    def allocate(self, request):
+        params = CrossmatchAllocationSerializer(data=request.data)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        Patient = apps.get_model("patients", "Patient")
+        patient = get_object_or_404(Patient, id=params.validated_data["patient_id"])
+        units = params.validated_data["units"]
+        try:
+            crossmatches = allocate_for_crossmatch(
+                patient,
+                params.validated_data["component"],
+                units,
+                emergency=params.validated_data["emergency"],
+                tested_by=request.user,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        cache.clear()
+        serializer = self.get_serializer(crossmatches, many=True)
+        return Response(
+            {"crossmatches": serializer.data, "shortfall": units - len(crossmatches)},
+            status=status.HTTP_201_CREATED,
+        )
+
 
 __all__ = [
     "DonorViewSet",
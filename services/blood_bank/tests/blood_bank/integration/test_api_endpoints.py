@@ -222,6 +222,18 @@ def test_crossmatch_compatible_units(self):
             for crossmatch in response.data
         )
 
+    def test_crossmatch_allocate_validates_request(self):
+        for units in (0, "two"):
+            response = self.client.post(
+                "/api/blood-bank/crossmatch/allocate/",
+                {"patient_id": self.patient.pk, "units": units},
+                **self.get_doctor_auth_headers(),
+            )
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert "units" in response.data
+        assert self.inventory.status == "AVAILABLE"
+        assert not Crossmatch.objects.exists()
+
     def test_invalid_blood_type_validation(self):
         donor_data = {
             "name": "Invalid Blood Type",
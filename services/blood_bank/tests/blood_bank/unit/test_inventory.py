@@ -0,0 +1,144 @@
+"""
+test_inventory module
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from auditlog.models import LogEntry as AuditLog
+
+from ..app.inventory import (
+    PLASMA_COMPATIBILITY,
+    RED_CELL_COMPATIBILITY,
+    allocate_for_crossmatch,
+    allocate_units,
+    compatible_donor_types,
+    expire_outdated_units,
+    expiry_buckets,
+    inventory_shortages,
+)
+from ..app.models import BloodInventory, Donor
+
+
+class TestCompatibilityMatrices:
+    def test_red_cell_compatibility(self):
+        assert RED_CELL_COMPATIBILITY["O-"] == ["O-"]
+        assert RED_CELL_COMPATIBILITY["A+"] == ["A+", "A-", "O+", "O-"]
+        assert set(RED_CELL_COMPATIBILITY["AB+"]) == {
+            "O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"
+        }
+        assert "B-" not in RED_CELL_COMPATIBILITY["A-"]
+
+    def test_plasma_compatibility_is_reversed(self):
+        assert PLASMA_COMPATIBILITY["AB+"] == ["AB+", "AB-"]
+        assert PLASMA_COMPATIBILITY["O-"][0] == "O-"
+        assert "O+" not in PLASMA_COMPATIBILITY["A-"]
+
+    def test_uncrossmatched_donors(self):
+        assert compatible_donor_types(None, "PRBC") == ["O-"]
+        assert compatible_donor_types(None, "FFP") == ["AB+", "AB-"]
+
+    def test_invalid_request(self):
+        with pytest.raises(ValueError):
+            compatible_donor_types("C+", "PRBC")
+        with pytest.raises(ValueError):
+            compatible_donor_types("A+", "PLASMA")
+
+
+@pytest.mark.django_db
+class TestInventoryEngine:
+    @pytest.fixture
+    def donor(self):
+        return Donor.objects.create(
+            name="Test Donor",
+            dob="01/01/1980",
+            ssn="123-45-6789",
+            address="123 Test St",
+            contact="1234567890",
+            blood_type="O-",
+            is_active=True,
+        )
+
+    def add_unit(
+        self, donor, unit_id, blood_type, days, component="PRBC", quantity=1
+    ):
+        return BloodInventory.objects.create(
+            donor=donor,
+            blood_type=blood_type,
+            component=component,
+            unit_id=unit_id,
+            expiry_date=date.today() + timedelta(days=days),
+            status="AVAILABLE",
+            quantity=quantity,
+        )
+
+    def test_expiry_buckets_and_shortages(self, donor):
+        self.add_unit(donor, "U-1", "A+", 1)
+        self.add_unit(donor, "U-2", "A+", 5)
+        self.add_unit(donor, "U-3", "A+", 20)
+        buckets = expiry_buckets()
+        assert len(buckets) == 1
+        bucket = buckets[0]
+        assert (bucket["blood_type"], bucket["component"]) == ("A+", "PRBC")
+        assert bucket["units"] == 3
+        assert bucket["expiring_1d"] == 1
+        assert bucket["expiring_7d"] == 2
+        shortage = next(
+            s
+            for s in inventory_shortages(buckets)
+            if (s["blood_type"], s["component"]) == ("A+", "PRBC")
+        )
+        assert shortage["usable_units"] == 2
+
+    def test_expire_outdated_units(self, donor):
+        unit = self.add_unit(donor, "U-OLD", "A+", -1)
+        assert expire_outdated_units() == 1
+        unit.refresh_from_db()
+        assert unit.status == "EXPIRED"
+
+    def test_routine_allocation_prefers_identical_type(self, donor):
+        self.add_unit(donor, "U-O", "O-", 2)
+        self.add_unit(donor, "U-A-LATE", "A+", 30)
+        self.add_unit(donor, "U-A-SOON", "A+", 10)
+        allocated = allocate_units("A+", "PRBC", 2)
+        assert [unit.unit_id for unit in allocated] == ["U-A-SOON", "U-A-LATE"]
+        assert BloodInventory.objects.filter(status="RESERVED").count() == 2
+
+    def test_emergency_allocation_is_fefo_across_types(self, donor):
+        self.add_unit(donor, "U-O", "O-", 2)
+        self.add_unit(donor, "U-A", "A+", 10)
+        self.add_unit(donor, "U-B", "B+", 1)
+        allocated = allocate_units("A+", "PRBC", 2, emergency=True)
+        assert [unit.unit_id for unit in allocated] == ["U-O", "U-A"]
+        assert BloodInventory.objects.get(unit_id="U-B").status == "AVAILABLE"
+
+    def test_buckets_count_units_as_allocated(self, donor):
+        self.add_unit(donor, "U-1", "A+", 5, quantity=2)
+        self.add_unit(donor, "U-2", "A+", 20)
+        assert expiry_buckets()[0]["units"] == 2
+        assert len(allocate_units("A+", "PRBC", 5)) == 2
+
+    def test_reservations_are_audited(self, donor):
+        unit = self.add_unit(donor, "U-A", "A+", 10)
+        allocate_units("A+", "PRBC", 1)
+        entries = AuditLog.objects.get_for_object(unit)
+        assert any(
+            entry.changes_dict.get("status") == ["AVAILABLE", "RESERVED"]
+            for entry in entries
+        )
+
+    def test_crossmatches_are_audited(self, donor):
+        from ..app.models import Patient
+
+        patient = Patient.objects.create(
+            id=1,
+            name="John Doe",
+            dob="1980-01-01",
+            gender="Male",
+            contact="123-456-7890",
+            medical_history="Test patient",
+        )
+        self.add_unit(donor, "U-O", "O-", 10)
+        crossmatches = allocate_for_crossmatch(patient, "PRBC", 1, emergency=True)
+        assert len(crossmatches) == 1
+        assert AuditLog.objects.get_for_object(crossmatches[0]).exists()
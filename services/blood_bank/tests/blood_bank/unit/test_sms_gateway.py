@@ -0,0 +1,108 @@
+"""
+test_sms_gateway module
+"""
+
+import asyncio
+import time
+
+from ..app.sms_gateway import (
+    AsyncSMSProvider,
+    FakeSMSProvider,
+    OutboundSMS,
+    SMSGateway,
+    TokenBucket,
+)
+
+
+def make_gateway(primary=None, secondary=None, **kwargs):
+    primary = primary or FakeSMSProvider(latency=0.01, name="primary")
+    secondary = secondary or FakeSMSProvider(latency=0.01, name="secondary")
+    return SMSGateway(
+        {"primary": primary, "secondary": secondary},
+        ["primary", "secondary"],
+        **kwargs,
+    )
+
+
+class TestSMSGateway:
+    def test_send_uses_primary(self):
+        gateway = make_gateway()
+        result = asyncio.run(gateway.send(OutboundSMS("+15550000001", "test")))
+        assert result.status == "success"
+        assert result.provider == "primary"
+
+    def test_failover_on_error(self):
+        gateway = make_gateway(
+            primary=FakeSMSProvider(latency=0.01, failure_rate=1.0, name="primary")
+        )
+        result = asyncio.run(gateway.send(OutboundSMS("+15550000001", "test")))
+        assert result.provider == "secondary"
+        assert gateway.stats["failovers"] == 1
+
+    def test_hedges_urgent_messages_on_latency_spike(self):
+        gateway = make_gateway(
+            primary=FakeSMSProvider(
+                latency=0.01, spike_latency=1.0, spike_rate=1.0, name="primary"
+            ),
+            hedge_after=0.05,
+            min_hedge_after=0.05,
+        )
+        started = time.monotonic()
+        result = asyncio.run(
+            gateway.send(OutboundSMS("+15550000001", "test", priority="urgent"))
+        )
+        assert result.provider == "secondary"
+        assert gateway.stats["hedged"] == 1
+        assert time.monotonic() - started < 0.5
+
+    def test_send_bulk_retries_rejected_messages(self):
+        primary = FakeSMSProvider(latency=0.01, failure_rate=1.0, name="primary")
+        gateway = make_gateway(primary=primary)
+        messages = [OutboundSMS(f"+1555000{i:04d}", "test") for i in range(150)]
+        results = asyncio.run(gateway.send_bulk(messages))
+        assert all(result.status == "success" for result in results)
+        assert {result.provider for result in results} == {"secondary"}
+        assert primary.calls["send_bulk"] == 2
+
+    def test_poller_batches_status_lookups(self):
+        provider = FakeSMSProvider(latency=0.0, delivery_delay=0.0, name="primary")
+        gateway = make_gateway(primary=provider)
+
+        async def run():
+            await gateway.send_bulk(
+                [OutboundSMS(f"+1555000{i:04d}", "test") for i in range(10)]
+            )
+            return await gateway.poller.poll_once()
+
+        statuses = asyncio.run(run())
+        assert set(statuses.values()) == {"delivered"}
+        assert provider.calls["fetch_statuses"] == 1
+        assert gateway.poller.tracked() == 0
+
+    def test_poller_skips_providers_without_status_lookup(self):
+        class BlindProvider(AsyncSMSProvider):
+            name = "blind"
+
+        gateway = make_gateway()
+        blind = gateway.providers["blind"] = BlindProvider()
+        sms = OutboundSMS("+15550000001", "test")
+        gateway.poller.track(blind.sent(sms, "m1"))
+        gateway.poller.track(gateway.providers["primary"].sent(sms, "m2"))
+        assert gateway.poller.tracked() == 1
+
+    def test_poller_batch_follows_send_rate(self):
+        provider = FakeSMSProvider(rate=2.0, name="primary")
+        gateway = make_gateway(primary=provider)
+        gateway.poller.interval = 30.0
+        assert gateway.poller._batch_size(provider) == 60
+
+    def test_token_bucket_paces_sends(self):
+        bucket = TokenBucket(rate=100, burst=10)
+
+        async def run():
+            for _ in range(30):
+                await bucket.acquire()
+
+        started = time.monotonic()
+        asyncio.run(run())
+        assert time.monotonic() - started >= 0.15
@@ -6,15 +6,18 @@
 import asyncio
 import json
 import logging
+import os
 import pickle
+import socket
 import time
 import zlib
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from enum import Enum
-from functools import wraps
-from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from functools import partial, wraps
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
 
 import aiohttp
 import aiohttp.web
@@ -44,6 +47,36 @@
     ["queue_name", "service"],
 )
 
+MESSAGE_QUEUE_DEPTH = prom.Gauge(
+    "message_queue_depth",
+    "Messages waiting per priority level",
+    ["queue_name", "priority"],
+)
+
+MESSAGE_QUEUE_WAIT = prom.Histogram(
+    "message_queue_wait_seconds",
+    "Time messages spend queued before dequeue",
+    ["queue_name", "priority"],
+)
+
+STREAM_ENTRIES_RECLAIMED = prom.Counter(
+    "stream_entries_reclaimed_total",
+    "Pending stream entries claimed from idle consumers",
+    ["stream", "group"],
+)
+
+STREAM_RETRIES_SCHEDULED = prom.Counter(
+    "stream_retries_scheduled_total",
+    "Failed stream entries scheduled for delayed retry",
+    ["stream", "group"],
+)
+
+STREAM_IN_FLIGHT = prom.Gauge(
+    "stream_handlers_in_flight",
+    "Stream entries currently being handled",
+    ["stream", "group"],
+)
+
 
 class MessagePriority(Enum):
     LOW = 1
@@ -52,6 +85,15 @@ class MessagePriority(Enum):
     CRITICAL = 4
 
 
+# Relative share of dequeues per priority while several levels are backlogged
+DEFAULT_PRIORITY_WEIGHTS = {
+    MessagePriority.CRITICAL: 8,
+    MessagePriority.HIGH: 4,
+    MessagePriority.NORMAL: 2,
+    MessagePriority.LOW: 1,
+}
+
+
 @dataclass
 class Message:
     """Message structure"""
@@ -83,78 +125,174 @@ class QueueConfig:
     compression: str = "snappy"  # none, gzip, snappy
     serializer: str = "orjson"  # json, orjson, msgpack, pickle
     enable_metrics: bool = True
+    priority_weights: Dict[MessagePriority, int] = field(
+        default_factory=lambda: dict(DEFAULT_PRIORITY_WEIGHTS)
+    )
 
 
 class PriorityQueue:
-    """Priority-based message queue implementation"""
+    """Priority-based message queue implementation
+
+    Each priority level is a FIFO. While more than one level holds messages,
+    dequeues are interleaved by smooth weighted round-robin over
+    ``config.priority_weights``: critical messages get most turns, but lower
+    levels keep draining instead of starving. One condition wakes consumers.
+    """
 
     def __init__(self, config: QueueConfig):
         self.config = config
-        self.queues = {
-            MessagePriority.CRITICAL: asyncio.Queue(maxsize=config.max_size // 4),
-            MessagePriority.HIGH: asyncio.Queue(maxsize=config.max_size // 4),
-            MessagePriority.NORMAL: asyncio.Queue(maxsize=config.max_size // 2),
-            MessagePriority.LOW: asyncio.Queue(maxsize=config.max_size // 4),
+        self.capacities = {
+            MessagePriority.CRITICAL: max(1, config.max_size // 4),
+            MessagePriority.HIGH: max(1, config.max_size // 4),
+            MessagePriority.NORMAL: max(1, config.max_size // 2),
+            MessagePriority.LOW: max(1, config.max_size // 4),
         }
+        # (enqueue time, message) per level, highest priority first
+        self.queues: Dict[MessagePriority, Deque[Tuple[float, Message]]] = {
+            priority: deque() for priority in self.capacities
+        }
+        self.weights = {
+            priority: max(1, int(config.priority_weights.get(priority, 1)))
+            for priority in self.queues
+        }
+        self._credit = {priority: 0 for priority in self.queues}
+        self._size = 0
+        self._not_empty = asyncio.Condition()
         self.metrics = {"enqueued": 0, "dequeued": 0, "retries": 0, "dead_lettered": 0}
+        self.level_metrics = {
+            priority: {"enqueued": 0, "dequeued": 0, "wait_seconds": 0.0}
+            for priority in self.queues
+        }
 
     async def put(self, message: Message):
         """Put message in queue with priority"""
-        try:
-            await self.queues[message.priority].put(message)
-            self.metrics["enqueued"] += 1
-            MESSAGE_QUEUE_SIZE.labels(
-                queue_name=self.config.name,
-                service=message.headers.get("source_service", "unknown"),
-            ).inc()
-        except asyncio.QueueFull:
+        level = self.queues[message.priority]
+        if len(level) >= self.capacities[message.priority]:
             logger.error(f"Queue {self.config.name} is full")
             if self.config.dead_letter_queue:
                 await self._dead_letter(message, "queue_full")
             raise QueueFullError(f"Queue {self.config.name} is full")
 
-    async def get(self) -> Message:
-        """Get highest priority message"""
-        # Check queues in priority order
-        for priority in [
-            MessagePriority.CRITICAL,
-            MessagePriority.HIGH,
-            MessagePriority.NORMAL,
-            MessagePriority.LOW,
-        ]:
-            try:
-                message = await self.queues[priority].get()
-                self.metrics["dequeued"] += 1
-                MESSAGE_QUEUE_SIZE.labels(
-                    queue_name=self.config.name,
-                    service=message.headers.get("source_service", "unknown"),
-                ).dec()
-                return message
-            except asyncio.QueueEmpty:
-                continue
+        level.append((time.monotonic(), message))
+        self._size += 1
+        self.metrics["enqueued"] += 1
+        self.level_metrics[message.priority]["enqueued"] += 1
+        self._record_depth(message.priority)
+        MESSAGE_QUEUE_SIZE.labels(
+            queue_name=self.config.name,
+            service=message.headers.get("source_service", "unknown"),
+        ).inc()
 
-        # All queues empty
-        raise asyncio.QueueEmpty()
+        async with self._not_empty:
+            self._not_empty.notify()
 
-    async def get_batch(self, batch_size: int = None) -> List[Message]:
-        """Get batch of messages"""
+    async def get(self) -> Message:
+        """Get next message, waiting until one is available"""
+        async with self._not_empty:
+            await self._not_empty.wait_for(lambda: self._size > 0)
+            return self._pop()
+
+    def get_nowait(self) -> Message:
+        """Get next message or raise ``asyncio.QueueEmpty``"""
+        if not self._size:
+            raise asyncio.QueueEmpty()
+        return self._pop()
+
+    async def get_batch(
+        self, batch_size: int = None, timeout: Optional[float] = None
+    ) -> List[Message]:
+        """Get batch of messages
+
+        Waits up to ``timeout`` (default ``config.batch_timeout``) for the
+        first message, then takes whatever else is already queued, up to
+        ``batch_size``, in weighted-fair order.
+        """
         batch_size = batch_size or self.config.batch_size
-        messages = []
-        timeout = self.config.batch_timeout
+        timeout = self.config.batch_timeout if timeout is None else timeout
 
-        start_time = time.time()
-        while len(messages) < batch_size and (time.time() - start_time) < timeout:
+        async with self._not_empty:
             try:
-                message = await asyncio.wait_for(self.get(), timeout=0.1)
-                messages.append(message)
+                await asyncio.wait_for(
+                    self._not_empty.wait_for(lambda: self._size > 0), timeout
+                )
             except asyncio.TimeoutError:
-                break
-
-        return messages
+                return []
+            return [self._pop() for _ in range(min(batch_size, self._size))]
+
+    async def get_batch_by_topic(
+        self, batch_size: int = None, timeout: Optional[float] = None
+    ) -> Dict[str, List[Message]]:
+        """Get batch of messages grouped by topic, in dequeue order"""
+        topic_batches: Dict[str, List[Message]] = {}
+        for message in await self.get_batch(batch_size, timeout):
+            topic_batches.setdefault(message.topic, []).append(message)
+        return topic_batches
+
+    def _select_priority(self) -> MessagePriority:
+        """Pick the level to serve next (smooth weighted round-robin)"""
+        selected = None
+        total_weight = 0
+        for priority, level in self.queues.items():
+            if not level:
+                # Idle levels don't bank credit for later bursts
+                self._credit[priority] = 0
+                continue
+            self._credit[priority] += self.weights[priority]
+            total_weight += self.weights[priority]
+            if selected is None or self._credit[priority] > self._credit[selected]:
+                selected = priority
+        self._credit[selected] -= total_weight
+        return selected
+
+    def _pop(self) -> Message:
+        priority = self._select_priority()
+        enqueued_at, message = self.queues[priority].popleft()
+        waited = time.monotonic() - enqueued_at
+        self._size -= 1
+        self.metrics["dequeued"] += 1
+        level_metrics = self.level_metrics[priority]
+        level_metrics["dequeued"] += 1
+        level_metrics["wait_seconds"] += waited
+        self._record_depth(priority)
+        MESSAGE_QUEUE_WAIT.labels(
+            queue_name=self.config.name, priority=priority.name.lower()
+        ).observe(waited)
+        MESSAGE_QUEUE_SIZE.labels(
+            queue_name=self.config.name,
+            service=message.headers.get("source_service", "unknown"),
+        ).dec()
+        return message
+
+    def _record_depth(self, priority: MessagePriority):
+        MESSAGE_QUEUE_DEPTH.labels(
+            queue_name=self.config.name, priority=priority.name.lower()
+        ).set(len(self.queues[priority]))
 
     def size(self) -> int:
         """Get total queue size"""
-        return sum(q.qsize() for q in self.queues.values())
+        return self._size
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue counters with per-priority depth and mean wait"""
+        return {
+            **self.metrics,
+            "size": self._size,
+            "levels": {
+                priority.name.lower(): {
+                    "depth": len(self.queues[priority]),
+                    "capacity": self.capacities[priority],
+                    "weight": self.weights[priority],
+                    "enqueued": stats["enqueued"],
+                    "dequeued": stats["dequeued"],
+                    "avg_wait_seconds": (
+                        stats["wait_seconds"] / stats["dequeued"]
+                        if stats["dequeued"]
+                        else 0.0
+                    ),
+                }
+                for priority, stats in self.level_metrics.items()
+            },
+        }
 
     async def _dead_letter(self, message: Message, reason: str):
         """Send message to dead letter queue"""
@@ -167,10 +305,18 @@ async def _dead_letter(self, message: Message, reason: str):
 class RedisQueueBackend:
     """Redis-based queue backend for distributed message processing"""
 
-    def __init__(self, config: QueueConfig):
+    def __init__(
+        self,
+        config: QueueConfig,
+        consumer_name: Optional[str] = None,
+        group: str = "consumer_group",
+    ):
         self.config = config
         self.redis = None
         self.subscribers = {}
+        # Stable per worker process so its pending entries survive reconnects
+        self.consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.group = group
         self.serializers = {
             "json": (json.dumps, json.loads),
             "orjson": (orjson.dumps, orjson.loads),
@@ -187,105 +333,437 @@ async def connect(self, url: str):
         """Connect to Redis"""
         self.redis = aioredis.from_url(url, decode_responses=False)
 
+    def encode(self, message: Message) -> bytes:
+        """Serialize and compress a message for the wire"""
+        serialize, _ = self.serializers[self.config.serializer]
+        compress, _ = self.compressors[self.config.compression]
+
+        data = dict(message.__dict__, priority=message.priority.value)
+        if isinstance(data["id"], bytes):
+            data["id"] = data["id"].decode()
+        return compress(serialize(data))
+
+    def decode(self, payload: bytes) -> Message:
+        """Inverse of :meth:`encode`"""
+        _, decompress = self.compressors[self.config.compression]
+        _, deserialize = self.serializers[self.config.serializer]
+
+        data = deserialize(decompress(payload))
+        data["priority"] = MessagePriority(
+            data.get("priority", MessagePriority.NORMAL.value)
+        )
+        return Message(**data)
+
     async def publish(self, topic: str, message: Message):
         """Publish message to topic"""
         if not self.redis:
             raise ConnectionError("Redis not connected")
 
-        # Serialize and compress
-        serialize, _ = self.serializers[self.config.serializer]
-        compress, _ = self.compressors[self.config.compression]
-
-        data = message.__dict__
-        serialized = serialize(data)
-        compressed = compress(serialized)
-
         # Publish to Redis stream
         await self.redis.xadd(
             f"stream:{topic}",
             {
-                "message": compressed,
+                "message": self.encode(message),
                 "priority": message.priority.value,
                 "timestamp": message.timestamp,
             },
         )
 
     async def subscribe(
-        self, topic: str, handler: Callable[[Message], Awaitable[None]]
+        self,
+        topic: str,
+        handler: Callable[[Message], Awaitable[None]],
+        concurrency: int = 32,
+        partition_key: Optional[Callable[[Message], Optional[str]]] = None,
+        per_partition: int = 1,
     ):
-        """Subscribe to topic"""
+        """Subscribe to topic
+
+        Runs a :class:`StreamConsumer` for the topic until
+        :meth:`unsubscribe` is called.
+        """
         if not self.redis:
             raise ConnectionError("Redis not connected")
 
-        # Create consumer group
+        consumer = StreamConsumer(
+            self,
+            topic,
+            handler,
+            concurrency=concurrency,
+            partition_key=partition_key,
+            per_partition=per_partition,
+        )
+        self.subscribers[topic] = consumer
+        try:
+            await consumer.run()
+        finally:
+            self.subscribers.pop(topic, None)
+
+    async def unsubscribe(self, topic: str):
+        """Stop the topic's consumer after its in-flight handlers finish"""
+        consumer = self.subscribers.get(topic)
+        if consumer:
+            await consumer.stop()
+
+    async def _dead_letter(self, message: Message, error: str):
+        """Send to dead letter queue"""
+        dlq_topic = f"{self.config.name}_dlq"
+        message.headers["dead_letter_reason"] = error
+        message.headers["dead_letter_time"] = time.time()
+        await self.publish(dlq_topic, message)
+
+
+class _PartitionLimiter:
+    """Bounds concurrent handlers per partition key"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._slots: Dict[str, List] = {}  # key -> [semaphore, holders]
+
+    @asynccontextmanager
+    async def hold(self, key: Optional[str]):
+        if key is None:
+            yield
+            return
+        entry = self._slots.get(key)
+        if entry is None:
+            entry = self._slots[key] = [asyncio.Semaphore(self.limit), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._slots[key]
+
+
+# Moves due retries onto the stream atomically, so no entry is lost between
+# leaving the schedule and being republished. KEYS: schedule, stream.
+# ARGV: now, limit.
+RELEASE_DUE_RETRIES_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, payload in ipairs(due) do
+    redis.call('ZREM', KEYS[1], payload)
+    redis.call('XADD', KEYS[2], '*', 'message', payload)
+end
+return #due
+"""
+
+
+class StreamConsumer:
+    """Consumer-group runtime for one Redis stream
+
+    - Reads under the backend's stable consumer name, replaying its own
+      pending entries first after a restart.
+    - Claims entries stuck with idle consumers via ``XAUTOCLAIM``, skipping
+      its own entries that are still being handled or awaiting their ACK.
+    - Runs handlers concurrently: at most ``concurrency`` in flight and
+      ``per_partition`` per ``partition_key(message)`` (ordering per key).
+      Entries waiting on a busy partition don't hold a handler slot; at
+      most ``max_buffered`` entries are read ahead, running or waiting.
+    - ACKs in pipelined batches.
+    - Failed entries go to a sorted set scored by due time; a scheduler
+      loop moves due entries back onto the stream, so the consumer never
+      sleeps on a retry.
+    """
+
+    def __init__(
+        self,
+        backend: RedisQueueBackend,
+        topic: str,
+        handler: Callable[[Message], Awaitable[None]],
+        concurrency: int = 32,
+        partition_key: Optional[Callable[[Message], Optional[str]]] = None,
+        per_partition: int = 1,
+        max_buffered: Optional[int] = None,
+        claim_idle_ms: int = 60000,
+        claim_interval: float = 15.0,
+        ack_batch_size: int = 100,
+        ack_interval: float = 0.05,
+        retry_poll_interval: float = 0.5,
+        retry_batch_size: int = 100,
+    ):
+        self.backend = backend
+        self.redis = backend.redis
+        self.topic = topic
+        self.stream = f"stream:{topic}"
+        self.retry_key = f"retry:{topic}:{backend.group}"
+        self.group = backend.group
+        self.consumer_name = backend.consumer_name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_buffered = max_buffered or concurrency * 4
+        self.partition_key = partition_key
+        self.claim_idle_ms = claim_idle_ms
+        self.claim_interval = claim_interval
+        self.ack_batch_size = ack_batch_size
+        self.ack_interval = ack_interval
+        self.retry_poll_interval = retry_poll_interval
+        self.retry_batch_size = retry_batch_size
+
+        self.running = False
+        # Handlers running, and entries read but not yet finished
+        self._slots = asyncio.Semaphore(concurrency)
+        self._buffered = asyncio.Semaphore(self.max_buffered)
+        self._partitions = _PartitionLimiter(per_partition)
+        self._handlers: set = set()
+        self._running = 0
+        # Entry ids currently being handled by this consumer
+        self._in_flight: set = set()
+        self._tasks: List[asyncio.Task] = []
+        # Entry ids to XACK, and retries (payload, due time) to ZADD with them
+        self._acks: List[bytes] = []
+        self._retries: Dict[bytes, float] = {}
+        self._ack_ready = asyncio.Event()
+        self._release_due = self.redis.register_script(RELEASE_DUE_RETRIES_SCRIPT)
+        self.metrics = {
+            "handled": 0,
+            "failed": 0,
+            "retried": 0,
+            "dead_lettered": 0,
+            "reclaimed": 0,
+            "acked": 0,
+        }
+
+    async def run(self):
+        """Consume until :meth:`stop`"""
         try:
             await self.redis.xgroup_create(
-                f"stream:{topic}", "consumer_group", id="0", mkstream=True
+                self.stream, self.group, id="0", mkstream=True
             )
         except aioredis.ResponseError:
             # Group already exists
             pass
 
-        # Start consuming
-        while True:
+        self.running = True
+        self._tasks = [
+            asyncio.create_task(self._read_loop()),
+            asyncio.create_task(self._claim_loop()),
+            asyncio.create_task(self._ack_loop()),
+            asyncio.create_task(self._retry_loop()),
+        ]
+        logger.info(
+            f"Consumer {self.consumer_name} joined {self.stream} group {self.group}"
+        )
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def stop(self):
+        """Stop reading, drain in-flight handlers and flush pending ACKs"""
+        self.running = False
+        for task in self._tasks:
+            task.cancel()
+        if self._handlers:
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._flush_acks()
+
+    async def _read_loop(self):
+        # Replay this consumer's own pending entries before taking new ones
+        last_id = "0"
+        while self.running:
             try:
-                # Read messages
-                messages = await self.redis.xreadgroup(
-                    "consumer_group",
-                    f"consumer_{time.time()}",
-                    {f"stream:{topic}": ">"},
-                    count=self.config.batch_size,
+                free = await self._wait_for_slot()
+                response = await self.redis.xreadgroup(
+                    self.group,
+                    self.consumer_name,
+                    {self.stream: last_id},
+                    count=free,
                     block=1000,
                 )
-
-                # Process messages
-                for stream, msgs in messages:
-                    _, decompress = self.compressors[self.config.compression]
-                    _, deserialize = self.serializers[self.config.serializer]
-
-                    for msg_id, fields in msgs:
-                        try:
-                            # Deserialize message
-                            compressed = fields["message"]
-                            serialized = decompress(compressed)
-                            data = deserialize(serialized)
-
-                            # Create message object
-                            message = Message(**data)
-                            message.id = msg_id
-
-                            # Process message
-                            await handler(message)
-
-                            # Acknowledge message
-                            await self.redis.xack(
-                                f"stream:{topic}", "consumer_group", msg_id
-                            )
-
-                        except Exception as e:
-                            logger.error(f"Error processing message {msg_id}: {e}")
-                            # Move to dead letter if max retries reached
-                            if message.retry_count >= message.max_retries:
-                                await self._dead_letter(message, str(e))
-                            else:
-                                # Retry
-                                message.retry_count += 1
-                                await self.redis.xack(
-                                    f"stream:{topic}", "consumer_group", msg_id
-                                )
-                                await asyncio.sleep(message.delay)
-                                await self.publish(topic, message)
-
+                entries = [entry for _, batch in response for entry in batch]
+                if last_id != ">":
+                    if not entries:
+                        last_id = ">"
+                        continue
+                    # Page through the pending list rather than re-reading it
+                    last_id = entries[-1][0]
+                await self._dispatch(entries)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"Error in subscriber: {e}")
+                logger.error(f"Error reading {self.stream}: {e}")
                 await asyncio.sleep(1)
 
-    async def _dead_letter(self, message: Message, error: str):
-        """Send to dead letter queue"""
-        dlq_topic = f"{self.config.name}_dlq"
-        message.headers["dead_letter_reason"] = error
-        message.headers["dead_letter_time"] = time.time()
-        await self.publish(dlq_topic, message)
+    async def _claim_loop(self):
+        while self.running:
+            try:
+                await asyncio.sleep(self.claim_interval)
+                start_id = "0-0"
+                while self.running:
+                    free = await self._wait_for_slot()
+                    response = await self.redis.xautoclaim(
+                        self.stream,
+                        self.group,
+                        self.consumer_name,
+                        min_idle_time=self.claim_idle_ms,
+                        start_id=start_id,
+                        count=free,
+                    )
+                    start_id, entries = response[0], response[1]
+                    # Entries trimmed from the stream come back without fields;
+                    # slow handlers of our own are still idle to Redis
+                    busy = self._in_flight.union(self._acks)
+                    entries = [
+                        entry
+                        for entry in entries
+                        if entry and entry[1] and entry[0] not in busy
+                    ]
+                    if entries:
+                        self.metrics["reclaimed"] += len(entries)
+                        STREAM_ENTRIES_RECLAIMED.labels(
+                            stream=self.stream, group=self.group
+                        ).inc(len(entries))
+                        await self._dispatch(entries)
+                    if start_id in (b"0-0", "0-0"):
+                        break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reclaiming {self.stream}: {e}")
+
+    async def _wait_for_slot(self) -> int:
+        """Wait for room to read ahead; return how many entries fit"""
+        await self._buffered.acquire()
+        self._buffered.release()
+        return max(1, self.max_buffered - len(self._handlers))
+
+    async def _dispatch(self, entries: List[Tuple[bytes, Dict]]):
+        for entry_id, fields in entries:
+            await self._buffered.acquire()
+            task = asyncio.create_task(self._handle(entry_id, fields))
+            self._handlers.add(task)
+            self._in_flight.add(entry_id)
+            task.add_done_callback(partial(self._handler_done, entry_id))
+        STREAM_IN_FLIGHT.labels(stream=self.stream, group=self.group).set(
+            len(self._handlers)
+        )
+
+    def _handler_done(self, entry_id: bytes, task: asyncio.Task):
+        self._handlers.discard(task)
+        self._in_flight.discard(entry_id)
+        self._buffered.release()
+
+    async def _handle(self, entry_id: bytes, fields: Optional[Dict]):
+        payload = (fields or {}).get(b"message", (fields or {}).get("message"))
+        try:
+            message = self.backend.decode(payload)
+        except Exception as e:
+            logger.error(f"Undecodable entry {entry_id} on {self.stream}: {e}")
+            self._ack(entry_id)
+            return
+        message.id = entry_id
+        service = message.headers.get("source_service", "unknown")
+
+        key = self.partition_key(message) if self.partition_key else None
+        # Partition first: entries queued behind a hot key don't take slots
+        async with self._partitions.hold(key), self._slots:
+            self._running += 1
+            try:
+                await self.handler(message)
+            except Exception as e:
+                logger.error(f"Error processing message {entry_id}: {e}")
+                self.metrics["failed"] += 1
+                await self._fail(entry_id, message, str(e), service)
+                return
+            finally:
+                self._running -= 1
+
+        self.metrics["handled"] += 1
+        MESSAGE_PROCESSED.labels(
+            queue_name=self.topic, status="success", service=service
+        ).inc()
+        self._ack(entry_id)
+
+    async def _fail(self, entry_id: bytes, message: Message, error: str, service: str):
+        if message.retry_count >= message.max_retries:
+            # Move to dead letter if max retries reached
+            self.metrics["dead_lettered"] += 1
+            MESSAGE_PROCESSED.labels(
+                queue_name=self.topic, status="dead_letter", service=service
+            ).inc()
+            try:
+                await self.backend._dead_letter(message, error)
+            except Exception as e:
+                # Leave it pending; a later claim will retry the dead-lettering
+                logger.error(f"Dead-lettering {entry_id} failed: {e}")
+                return
+            self._ack(entry_id)
+            return
+
+        message.retry_count += 1
+        message.headers["last_error"] = error
+        self.metrics["retried"] += 1
+        MESSAGE_PROCESSED.labels(
+            queue_name=self.topic, status="retry", service=service
+        ).inc()
+        STREAM_RETRIES_SCHEDULED.labels(stream=self.stream, group=self.group).inc()
+        due = time.time() + (message.delay or 2**message.retry_count)
+        self._retries[self.backend.encode(message)] = due
+        self._ack(entry_id)
+
+    def _ack(self, entry_id: bytes):
+        self._acks.append(entry_id)
+        if len(self._acks) >= self.ack_batch_size:
+            self._ack_ready.set()
+
+    async def _ack_loop(self):
+        while self.running:
+            try:
+                try:
+                    await asyncio.wait_for(self._ack_ready.wait(), self.ack_interval)
+                except asyncio.TimeoutError:
+                    pass
+                await self._flush_acks()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error acknowledging {self.stream}: {e}")
+                await asyncio.sleep(self.ack_interval)
+
+    async def _flush_acks(self):
+        """XACK the batch, scheduling its retries in the same transaction"""
+        self._ack_ready.clear()
+        if not self._acks:
+            return
+        acks, self._acks = self._acks, []
+        retries, self._retries = self._retries, {}
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                if retries:
+                    pipe.zadd(self.retry_key, retries)
+                pipe.xack(self.stream, self.group, *acks)
+                await pipe.execute()
+        except Exception:
+            # Keep them for the next flush; unacked entries stay pending
+            self._acks = acks + self._acks
+            self._retries = {**retries, **self._retries}
+            raise
+        self.metrics["acked"] += len(acks)
+
+    async def _retry_loop(self):
+        """Move due retries from the sorted set back onto the stream"""
+        while self.running:
+            try:
+                await asyncio.sleep(self.retry_poll_interval)
+                released = await self._release_due(
+                    keys=[self.retry_key, self.stream],
+                    args=[time.time(), self.retry_batch_size],
+                )
+                if released:
+                    logger.debug(f"Released {released} retries onto {self.stream}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error scheduling retries for {self.stream}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            "consumer": self.consumer_name,
+            "in_flight": self._running,
+            "buffered": len(self._handlers),
+            "pending_acks": len(self._acks),
+        }
 
 
 class MessageProcessor:
@@ -352,18 +830,11 @@ async def _batch_worker(self):
         """Batch message processor"""
         while self.running:
             try:
-                messages = await self.queue.get_batch()
-                if messages:
-                    # Group by topic for batch processing
-                    topic_batches = {}
-                    for msg in messages:
-                        if msg.topic not in topic_batches:
-                            topic_batches[msg.topic] = []
-                        topic_batches[msg.topic].append(msg)
-
-                    # Process each topic batch
-                    for topic, batch in topic_batches.items():
-                        await self._process_batch(topic, batch)
+                topic_batches = await self.queue.get_batch_by_topic()
+
+                # Process each topic batch
+                for topic, batch in topic_batches.items():
+                    await self._process_batch(topic, batch)
 
             except Exception as e:
                 logger.error(f"Batch worker error: {e}")
@@ -433,6 +904,10 @@ async def _process_batch(self, topic: str, messages: List[Message]):
         except Exception as e:
             logger.error(f"Error processing batch for {topic}: {e}")
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Processing metrics with queue depth and wait per priority"""
+        return {**self.metrics, "queue": self.queue.get_stats()}
+
     def _update_metrics(self, processing_time: float):
         """Update processing metrics"""
         self.metrics["processed"] += 1
@@ -5,6 +5,7 @@
 
 from typing import Optional
 
+from fastapi import Depends
 from pydantic import BaseModel, Field
 from shared.api.base import create_success_response
 from shared.config.base import get_config
@@ -14,6 +15,7 @@
 # Import shared components - eliminates redundant code
 from shared.service.template import ServiceBuilder, create_crud_service
 from sqlalchemy import JSON, Boolean, Column, Integer, String, Text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 
@@ -163,40 +165,37 @@ async def get_by_category(
         category: str,
         skip: int = 0,
         limit: int = 100,
-        db: Session = Depends(service.get_db),
+        db: AsyncSession = Depends(service.get_read_db),
     ):
         """Custom route using shared patterns."""
-        items = get_demo_by_category(db, category, skip, limit)
+        items = await db.run_sync(get_demo_by_category, category, skip, limit)
         return create_success_response(
             items, f"Found {len(items)} items in category '{category}'"
         )
 
     @app.get("/demo/high-priority")
     async def get_high_priority(
-        threshold: int = 5, db: Session = Depends(service.get_db)
+        threshold: int = 5, db: AsyncSession = Depends(service.get_read_db)
     ):
         """Custom route for high priority items."""
-        items = get_high_priority_items(db, threshold)
+        items = await db.run_sync(get_high_priority_items, threshold)
         return create_success_response(items, f"Found {len(items)} high priority items")
 
     @app.get("/demo/analytics")
-    async def get_analytics(db: Session = Depends(service.get_db)):
+    async def get_analytics(db: AsyncSession = Depends(service.get_read_db)):
         """Analytics endpoint using shared patterns."""
-        analytics = get_demo_analytics(db)
+        analytics = await db.run_sync(get_demo_analytics)
         return create_success_response(
             analytics, "Demo analytics retrieved successfully"
         )
 
     @app.post("/demo/batch")
     async def create_batch(
-        items: list[DemoCreate], db: Session = Depends(service.get_db)
+        items: list[DemoCreate], db: AsyncSession = Depends(service.get_db)
     ):
         """Batch creation using shared patterns."""
         crud = DemoCRUD(DemoModel)
-        created_items = []
-        for item_data in items:
-            item = crud.create(db, item_data)
-            created_items.append(item)
+        created_items = await db.run_sync(crud.bulk_create, items)
 
         return create_success_response(
             created_items, f"Successfully created {len(created_items)} items"
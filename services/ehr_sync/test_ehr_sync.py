@@ -543,6 +543,235 @@ async def test_broadcast_sync_result(self, ehr_service):
             assert call_data["type"] == "sync_result"
             assert call_data["data"]["status"] == "COMPLETED"
 
+    class TestSyncJobs:
+        """Test resumable sync jobs"""
+
+        @staticmethod
+        def _entities(*ids):
+            return [
+                {
+                    "type": "PATIENT",
+                    "id": entity_id,
+                    "key": ["2024-01-15T10:00:00", entity_id],
+                    "data": {"id": entity_id, "medical_record_number": entity_id},
+                }
+                for entity_id in ids
+            ]
+
+        @staticmethod
+        def _completed(ehr_system, entity_type, entities, mappings):
+            from main import EHRSyncResponse
+
+            return [
+                EHRSyncResponse(
+                    request_id="test_request",
+                    status=SyncStatus.COMPLETED,
+                    ehr_system_id=ehr_system.id,
+                    entity_type=entity_type,
+                    entity_id=entity["id"],
+                )
+                for entity in entities
+            ]
+
+        @pytest.mark.asyncio
+        async def test_full_sync_pages_and_checkpoints(self, ehr_service):
+            """Test keyset paging, bundling and checkpointing of a full sync"""
+            from main import EHRSyncJob
+
+            ehr_system = Mock(id="test_system", last_sync_at=None)
+            job = EHRSyncJob(
+                id="job1",
+                ehr_system_id="test_system",
+                mode="FULL",
+                entity_types=["PATIENT"],
+                cursor={},
+                errors=[],
+                started_at=datetime(2024, 1, 15, 9, 0),
+            )
+            ehr_service.page_size = 2
+            ehr_service.bundle_size = 1
+            pages = [self._entities("P1", "P2"), self._entities("P3")]
+
+            with patch.object(
+                ehr_service, "_get_ehr_system", return_value=ehr_system
+            ), patch.object(
+                ehr_service, "_get_resumable_job", return_value=None
+            ), patch.object(
+                ehr_service, "_create_sync_job", return_value=job
+            ), patch.object(
+                ehr_service, "_get_data_mappings", return_value=[]
+            ), patch.object(
+                ehr_service, "_get_entity_page", side_effect=pages
+            ) as mock_page, patch.object(
+                ehr_service, "_sync_entity_batch", side_effect=self._completed
+            ) as mock_batch, patch.object(
+                ehr_service, "_checkpoint_job"
+            ) as mock_checkpoint, patch.object(
+                ehr_service, "_update_last_sync_timestamp"
+            ) as mock_update, patch.object(
+                ehr_service, "_advance_entity_watermark"
+            ) as mock_advance:
+
+                results = await ehr_service.full_sync("test_system", ["PATIENT"])
+
+                assert results["job_id"] == "job1"
+                assert results["status"] == "COMPLETED"
+                assert results["successful"] == 3
+                assert mock_batch.call_count == 3
+                # The second page is requested after the last key of the first
+                assert mock_page.call_args_list[1][0][1] == pages[0][-1]["key"]
+                final_cursor = mock_checkpoint.call_args_list[-1][0][1]
+                assert final_cursor == {"PATIENT": "done"}
+                mock_update.assert_called_once_with("test_system", job.started_at)
+                mock_advance.assert_called_once_with(
+                    "test_system", "PATIENT", job.started_at
+                )
+
+        @pytest.mark.asyncio
+        async def test_full_sync_resumes_from_checkpoint(self, ehr_service):
+            """Test that an interrupted job continues after its last page"""
+            from main import EHRSyncJob
+
+            ehr_system = Mock(id="test_system", last_sync_at=None)
+            cursor = ["2024-01-15T10:00:00", 41]
+            job = EHRSyncJob(
+                id="job1",
+                ehr_system_id="test_system",
+                mode="FULL",
+                entity_types=["PATIENT", "ENCOUNTER"],
+                cursor={"PATIENT": "done", "ENCOUNTER": cursor},
+                total_processed=41,
+                successful=40,
+                failed=1,
+                errors=["P7: boom"],
+                started_at=datetime(2024, 1, 15, 9, 0),
+            )
+
+            with patch.object(
+                ehr_service, "_get_ehr_system", return_value=ehr_system
+            ), patch.object(
+                ehr_service, "_get_resumable_job", return_value=job
+            ), patch.object(
+                ehr_service, "_create_sync_job"
+            ) as mock_create, patch.object(
+                ehr_service, "_get_data_mappings", return_value=[]
+            ), patch.object(
+                ehr_service, "_get_entity_page", return_value=[]
+            ) as mock_page, patch.object(
+                ehr_service, "_checkpoint_job"
+            ), patch.object(
+                ehr_service, "_update_last_sync_timestamp"
+            ) as mock_update, patch.object(
+                ehr_service, "_advance_entity_watermark"
+            ) as mock_advance:
+
+                results = await ehr_service.full_sync("test_system")
+
+                mock_create.assert_not_called()
+                mock_page.assert_called_once_with(
+                    "ENCOUNTER", cursor, None, ehr_service.page_size
+                )
+                assert results["total_processed"] == 41
+                assert results["status"] == "PARTIAL"
+                # The earlier failure may belong to ENCOUNTER, so its
+                # watermark stays put while the run itself is recorded
+                mock_advance.assert_not_called()
+                mock_update.assert_called_once_with("test_system", job.started_at)
+
+        @pytest.mark.asyncio
+        async def test_incremental_sync_uses_entity_watermarks(self, ehr_service):
+            """Test that each entity type pages from its own watermark"""
+            ehr_system = Mock(
+                id="test_system",
+                last_sync_at=datetime(2024, 1, 15, 9, 0),
+                entity_sync_at={"PATIENT": "2024-01-14T09:00:00"},
+            )
+
+            with patch.object(
+                ehr_service, "_get_ehr_system", return_value=ehr_system
+            ), patch.object(
+                ehr_service, "full_sync", return_value={}
+            ) as mock_full_sync:
+
+                await ehr_service.incremental_sync("test_system")
+
+                mock_full_sync.assert_called_once_with(
+                    "test_system",
+                    None,
+                    entity_since={"PATIENT": datetime(2024, 1, 14, 9, 0)},
+                )
+
+        @pytest.mark.asyncio
+        async def test_full_sync_defaults_to_syncable_entity_types(self, ehr_service):
+            """Test that default jobs skip entity types without a push"""
+            ehr_system = Mock(id="test_system", last_sync_at=None)
+
+            with patch.object(
+                ehr_service, "_get_ehr_system", return_value=ehr_system
+            ), patch.object(
+                ehr_service, "_get_resumable_job", return_value=None
+            ), patch.object(
+                ehr_service, "_create_sync_job"
+            ) as mock_create, patch.object(
+                ehr_service, "_run_sync_job", return_value={}
+            ):
+
+                await ehr_service.full_sync("test_system")
+
+                assert mock_create.call_args[0][2] == ["PATIENT"]
+
+        @pytest.mark.asyncio
+        async def test_sync_fhir_bundle(self, ehr_service):
+            """Test that a batch is written as one transaction Bundle"""
+            ehr_system = Mock()
+            ehr_system.id = "test_system"
+            ehr_system.base_url = "https://test-epic.example.com/api"
+            ehr_system.timeout_seconds = 30
+
+            with patch.object(
+                ehr_service, "_transform_data", side_effect=lambda x, y, mappings: x
+            ), patch.object(
+                ehr_service,
+                "_get_ehr_headers",
+                return_value={"Authorization": "Bearer test"},
+            ), patch.object(
+                ehr_service, "_log_sync_many"
+            ) as mock_log, patch(
+                "aiohttp.ClientSession.post"
+            ) as mock_post:
+
+                mock_response = Mock()
+                mock_response.status = 200
+                mock_response.json = AsyncMock(
+                    return_value={
+                        "resourceType": "Bundle",
+                        "type": "transaction-response",
+                        "entry": [
+                            {
+                                "response": {
+                                    "status": "201 Created",
+                                    "location": "Patient/ext1/_history/1",
+                                }
+                            },
+                            {"response": {"status": "400 Bad Request"}},
+                        ],
+                    }
+                )
+                mock_post.return_value.__aenter__.return_value = mock_response
+
+                results = await ehr_service._sync_fhir_bundle(
+                    ehr_system, "PATIENT", self._entities("P1", "P2"), []
+                )
+
+                bundle = mock_post.call_args[1]["json"]
+                assert bundle["type"] == "transaction"
+                assert len(bundle["entry"]) == 2
+                assert bundle["entry"][0]["request"]["ifNoneExist"].endswith("|P1")
+                assert results[0].status == SyncStatus.COMPLETED
+                assert results[0].external_id == "ext1"
+                assert results[1].status == SyncStatus.FAILED
+                assert len(mock_log.call_args[0][0]) == 2
+
 
 # Integration Tests
 class TestIntegration:
@@ -5,20 +5,59 @@
 
 import asyncio
 import hashlib
+import itertools
 import json
 import logging
 import os
+import re
+import weakref
 import xml.etree.ElementTree as ET
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
+HL7_HEADERS = {
+    "Content-Type": "application/hl7-v2",
+    "Accept": "application/hl7-v2",
+}
+
+# One send window and connection pool per LIS endpoint, shared by every
+# LISService instance so concurrent syncs cannot overrun the LIS together.
+# Semaphores bind to an event loop, so windows are kept per running loop.
+_endpoint_windows: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = (
+    weakref.WeakKeyDictionary()
+)
+_endpoint_sessions: Dict[str, requests.Session] = {}
+_control_sequence = itertools.count()
+
+
+def _endpoint_window(lis_url: str, size: int) -> asyncio.Semaphore:
+    windows = _endpoint_windows.setdefault(asyncio.get_running_loop(), {})
+    if lis_url not in windows:
+        windows[lis_url] = asyncio.Semaphore(size)
+    return windows[lis_url]
+
+
+def _endpoint_session(lis_url: str, size: int) -> requests.Session:
+    if lis_url not in _endpoint_sessions:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _endpoint_sessions[lis_url] = session
+    return _endpoint_sessions[lis_url]
+
+
+def _normalise_code_key(name: str) -> str:
+    return re.sub(r"[^A-Z0-9]+", "_", name.upper()).strip("_")
+
 
 class LISMessageType(Enum):
     """HL7 message types for laboratory communication"""
@@ -71,6 +110,9 @@ class LISOrder:
     priority: str
     order_datetime: str
     clinical_info: Optional[str] = None
+    patient_address: Optional[str] = None
+    patient_phone: Optional[str] = None
+    account_number: Optional[str] = None
 
 
 @dataclass
@@ -89,6 +131,9 @@ class LISResult:
     interpretation: Optional[str] = None
     result_datetime: str = None
     performer: Optional[str] = None
+    patient_id: Optional[str] = None
+    specimen_type: Optional[str] = None
+    priority: Optional[str] = None
 
 
 @dataclass
@@ -118,9 +163,17 @@ def __init__(self):
         self.sending_facility = os.getenv("LIS_SENDING_FACILITY", "HMS_LABORATORY")
         self.receiving_facility = os.getenv("LIS_RECEIVING_FACILITY", "HMS_EMR")
 
+        # Send window per endpoint and HL7 batch (FHS/BHS) support of the LIS
+        self.max_in_flight = int(os.getenv("LIS_MAX_IN_FLIGHT", "8"))
+        self.batch_enabled = os.getenv("LIS_HL7_BATCH", "false").lower() == "true"
+        self.batch_size = int(os.getenv("LIS_BATCH_SIZE", "50"))
+        self._session = _endpoint_session(self.lis_url, self.max_in_flight)
+
         # LOINC and SNOMED CT mappings
         self.loinc_mappings = self._load_loinc_mappings()
         self.snomed_mappings = self._load_snomed_mappings()
+        self._loinc_index = self._build_loinc_index(self.loinc_mappings)
+        self._snomed_index = self._build_snomed_index(self.snomed_mappings)
 
         # HL7 message configuration
         self.hl7_config = {
@@ -132,6 +185,11 @@ def __init__(self):
             "encoding_chars": "^~\\&",
         }
 
+    @property
+    def _window(self) -> asyncio.Semaphore:
+        """This endpoint's send window on the running event loop"""
+        return _endpoint_window(self.lis_url, self.max_in_flight)
+
     def _load_loinc_mappings(self) -> Dict[str, Dict]:
         """Load LOINC code mappings"""
         # In production, this would load from database or file
@@ -187,6 +245,26 @@ def _load_snomed_mappings(self) -> Dict[str, str]:
             "PLATELET_COUNT": "4344000124107",
         }
 
+    @staticmethod
+    def _build_loinc_index(mappings: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Index LOINC mappings by test name, component and LOINC code"""
+        index = {}
+        for name, mapping in mappings.items():
+            for key in (mapping.get("loinc_code"), mapping.get("component"), name):
+                if key:
+                    index[_normalise_code_key(key)] = mapping
+        return index
+
+    @staticmethod
+    def _build_snomed_index(mappings: Dict[str, str]) -> Dict[str, str]:
+        """Index SNOMED CT concepts by name, with and without _TEST/_COUNT"""
+        index = {}
+        for name, concept in mappings.items():
+            key = _normalise_code_key(name)
+            index.setdefault(re.sub(r"_(TEST|COUNT)$", "", key), concept)
+            index[key] = concept
+        return index
+
     async def sync_orders(self, db: Session) -> Dict[str, Any]:
         """
         Synchronize laboratory orders with external LIS
@@ -202,38 +280,29 @@ async def sync_orders(self, db: Session) -> Dict[str, Any]:
                 "timestamp": datetime.now(timezone.utc).isoformat(),
             }
 
-            # Get pending orders to send to LIS
             pending_orders = await self._get_pending_orders(db)
-
-            for order in pending_orders:
-                try:
-                    result = await self._send_order_to_lis(order, db)
-                    if result["status"] == "success":
-                        sync_results["orders_sent"] += 1
-                    else:
-                        sync_results["errors"].append(result["error"])
-                except Exception as e:
-                    sync_results["errors"].append(f"Order sync error: {str(e)}")
-
-            # Get new orders from LIS
-            new_orders = await self._get_orders_from_lis(db)
-            sync_results["orders_received"] += len(new_orders)
-
-            # Get results from LIS
-            new_results = await self._get_results_from_lis(db)
-            sync_results["results_received"] += len(new_results)
-
-            # Send local results to LIS
             local_results = await self._get_local_results_to_send(db)
-            for result in local_results:
-                try:
-                    result_status = await self._send_result_to_lis(result, db)
-                    if result_status["status"] == "success":
-                        sync_results["results_sent"] += 1
-                    else:
-                        sync_results["errors"].append(result_status["error"])
-                except Exception as e:
-                    sync_results["errors"].append(f"Result sync error: {str(e)}")
+
+            # Outbound sends share the endpoint window with the two inbound
+            # queries, so all four directions progress at once
+            (sent_orders, order_errors), new_orders, new_results, (
+                sent_results,
+                result_errors,
+            ) = await asyncio.gather(
+                self._send_orders(pending_orders),
+                self._get_orders_from_lis(db),
+                self._get_results_from_lis(db),
+                self._send_results(local_results),
+            )
+
+            await self._update_order_statuses(db, sent_orders, "SENT_TO_LIS")
+            await self._update_result_statuses(db, sent_results, "SENT_TO_LIS")
+
+            sync_results["orders_sent"] = len(sent_orders)
+            sync_results["orders_received"] = len(new_orders)
+            sync_results["results_sent"] = len(sent_results)
+            sync_results["results_received"] = len(new_results)
+            sync_results["errors"] = order_errors + result_errors
 
             logger.info(f"LIS sync completed: {sync_results}")
             return sync_results
@@ -277,6 +346,20 @@ async def _send_order_to_lis(self, order: LISOrder, db: Session) -> Dict[str, An
             logger.error(f"Failed to send order to LIS: {e}")
             return {"status": "error", "error": str(e)}
 
+    async def _send_orders(
+        self, orders: List[LISOrder]
+    ) -> Tuple[List[str], List[str]]:
+        """Send orders as OML^O21 messages; returns (sent order numbers, errors)"""
+        order_numbers, messages = [], []
+        for order in orders:
+            try:
+                messages.append(self._create_hl7_oml_message(order))
+                order_numbers.append(order.placer_order_number)
+            except Exception as e:
+                logger.error(f"Failed to build order message: {e}")
+        responses = await self._send_hl7_messages(messages, "order")
+        return self._acknowledged_orders(order_numbers, responses, "Order")
+
     async def _get_orders_from_lis(self, db: Session) -> List[LISOrder]:
         """Get new orders from external LIS"""
         try:
@@ -330,6 +413,43 @@ async def _get_local_results_to_send(self, db: Session) -> List[LISResult]:
         # Query database for results not yet sent to LIS
         return []
 
+    async def _send_results(
+        self, results: List[LISResult]
+    ) -> Tuple[List[str], List[str]]:
+        """Send results as ORU^R01 messages; returns (sent order numbers, errors)
+
+        Results are one per test, so an order counts as sent only once every
+        one of its results was acknowledged.
+        """
+        order_numbers, messages = [], []
+        for result in results:
+            try:
+                messages.append(self._create_hl7_oru_message(result))
+                order_numbers.append(result.placer_order_number)
+            except Exception as e:
+                logger.error(f"Failed to build result message: {e}")
+        responses = await self._send_hl7_messages(messages, "result")
+        return self._acknowledged_orders(order_numbers, responses, "Result")
+
+    @staticmethod
+    def _acknowledged_orders(
+        order_numbers: List[str], responses: List[Dict[str, Any]], label: str
+    ) -> Tuple[List[str], List[str]]:
+        """Orders whose messages were all acknowledged, and an error per failure"""
+        failed, errors = set(), []
+        for order_number, response in zip(order_numbers, responses):
+            if response["status"] != "success":
+                failed.add(order_number)
+                errors.append(
+                    f"{label} sync error for {order_number}: {response.get('error')}"
+                )
+        sent = [
+            order_number
+            for order_number in dict.fromkeys(order_numbers)
+            if order_number not in failed
+        ]
+        return sent, errors
+
     async def _send_result_to_lis(
         self, result: LISResult, db: Session
     ) -> Dict[str, Any]:
@@ -357,17 +477,26 @@ async def _send_result_to_lis(
             logger.error(f"Failed to send result to LIS: {e}")
             return {"status": "error", "error": str(e)}
 
+    @staticmethod
+    def _message_control_id(seed: str) -> str:
+        """MSH-10 control ID, unique even for messages built in the same tick"""
+        return hashlib.sha256(
+            f"{seed}{datetime.now().isoformat()}{next(_control_sequence)}".encode()
+        ).hexdigest()[:20]
+
+    @staticmethod
+    def _get_message_control_id(hl7_message: str) -> str:
+        return hl7_message.split("\n", 1)[0].split("|")[9]
+
     def _create_hl7_oml_message(self, order: LISOrder) -> str:
         """Create HL7 OML^O21 (Order Message)"""
-        message_control_id = hashlib.hashlib.sha256(
-            f"{order.placer_order_number}{datetime.now().isoformat()}".encode()
-        ).hexdigest()[:20]
+        message_control_id = self._message_control_id(order.placer_order_number)
 
         # Create MSH segment
         msh = f"MSH|^~\\&|{self.sending_facility}|{self.facility_id}|{self.receiving_facility}|{self.facility_id}|{datetime.now().strftime('%Y%m%d%H%M%S')}||OML^O21|{message_control_id}|P|2.5.1||||||UNICODE"
 
         # Create PID segment
-        pid = f"PID|||{order.patient_id}||{order.patient_name}||{order.patient_dob}|{order.patient_sex}|||{order.patient_address}||||{order.patient_phone}|||||||||||||||"
+        pid = f"PID|||{order.patient_id}||{order.patient_name}||{order.patient_dob}|{order.patient_sex}|||{order.patient_address or ''}||||{order.patient_phone or ''}|||||||||||||||"
 
         # Create PV1 segment
         pv1 = f"PV1||O|{order.ordering_facility}||||{order.ordering_provider}|||||||||||{order.account_number or ''}|||||||||||||||||||||||||"
@@ -385,9 +514,7 @@ def _create_hl7_oml_message(self, order: LISOrder) -> str:
 
     def _create_hl7_oru_message(self, result: LISResult) -> str:
         """Create HL7 ORU^R01 (Observation Result) message"""
-        message_control_id = hashlib.hashlib.sha256(
-            f"{result.placer_order_number}{datetime.now().isoformat()}".encode()
-        ).hexdigest()[:20]
+        message_control_id = self._message_control_id(result.placer_order_number)
 
         # Create MSH segment
         msh = f"MSH|^~\\&|{self.sending_facility}|{self.facility_id}|{self.receiving_facility}|{self.facility_id}|{datetime.now().strftime('%Y%m%d%H%M%S')}||ORU^R01|{message_control_id}|P|2.5.1||||||UNICODE"
@@ -410,9 +537,7 @@ def _create_hl7_oru_message(self, result: LISResult) -> str:
 
     def _create_hl7_qbp_message(self, query_type: str) -> str:
         """Create HL7 QBP (Query by Parameter) message"""
-        message_control_id = hashlib.hashlib.sha256(
-            f"QBP_{query_type}_{datetime.now().isoformat()}".encode()
-        ).hexdigest()[:20]
+        message_control_id = self._message_control_id(f"QBP_{query_type}_")
 
         msh = f"MSH|^~\\&|{self.sending_facility}|{self.facility_id}|{self.receiving_facility}|{self.facility_id}|{datetime.now().strftime('%Y%m%d%H%M%S')}||QBP^Q11|{message_control_id}|P|2.5.1"
 
@@ -425,27 +550,27 @@ def _create_hl7_qbp_message(self, query_type: str) -> str:
 
         return f"{msh}\n{qpd}\n{rcp}"
 
+    async def _post_hl7(self, path: str, body: str) -> requests.Response:
+        """POST to the LIS inside this endpoint's send window"""
+        auth = None
+        if self.lis_username and self.lis_password:
+            auth = (self.lis_username, self.lis_password)
+        async with self._window:
+            return await asyncio.to_thread(
+                self._session.post,
+                f"{self.lis_url}{path}",
+                data=body.encode("utf-8"),
+                headers=HL7_HEADERS,
+                auth=auth,
+                timeout=30,
+            )
+
     async def _send_hl7_message(
         self, hl7_message: str, message_type: str
     ) -> Dict[str, Any]:
         """Send HL7 message to LIS system"""
         try:
-            headers = {
-                "Content-Type": "application/hl7-v2",
-                "Accept": "application/hl7-v2",
-            }
-
-            auth = None
-            if self.lis_username and self.lis_password:
-                auth = (self.lis_username, self.lis_password)
-
-            response = requests.post(
-                f"{self.lis_url}/api/hl7/{message_type}",
-                data=hl7_message.encode("utf-8"),
-                headers=headers,
-                auth=auth,
-                timeout=30,
-            )
+            response = await self._post_hl7(f"/api/hl7/{message_type}", hl7_message)
 
             if response.status_code == 200:
                 return {
@@ -463,6 +588,86 @@ async def _send_hl7_message(
             logger.error(f"HL7 message send failed: {e}")
             return {"status": "error", "error": str(e)}
 
+    async def _send_hl7_messages(
+        self, messages: List[str], message_type: str
+    ) -> List[Dict[str, Any]]:
+        """Send messages concurrently, batched when the LIS allows
+
+        Returns a send result per message, in order. Concurrency is bounded by
+        the endpoint window, so a large backlog queues here rather than at
+        the LIS.
+        """
+        if not messages:
+            return []
+        if self.batch_enabled:
+            chunks = [
+                messages[start : start + self.batch_size]
+                for start in range(0, len(messages), self.batch_size)
+            ]
+            responses = []
+            for chunk_responses in await asyncio.gather(
+                *(self._send_hl7_batch(chunk, message_type) for chunk in chunks)
+            ):
+                responses.extend(chunk_responses)
+            return responses
+
+        return list(
+            await asyncio.gather(
+                *(self._send_hl7_message(message, message_type) for message in messages)
+            )
+        )
+
+    def _create_hl7_batch(self, messages: List[str]) -> Tuple[str, str]:
+        """Wrap messages in an HL7 batch file envelope (FHS/BHS ... BTS/FTS)"""
+        control_id = self._message_control_id("BATCH_")
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        header = f"|^~\\&|{self.sending_facility}|{self.facility_id}|{self.receiving_facility}|{self.facility_id}|{timestamp}||||{control_id}"
+        segments = [f"FHS{header}", f"BHS{header}", *messages]
+        segments += [f"BTS|{len(messages)}", "FTS|1"]
+        return control_id, "\n".join(segments)
+
+    @staticmethod
+    def _parse_batch_acks(response_data: str) -> Dict[str, Tuple[str, str]]:
+        """Map acknowledged message control IDs to (MSA-1 code, MSA-3 text)"""
+        acks = {}
+        for segment in re.split(r"[\r\n]+", response_data or ""):
+            if segment.startswith("MSA|"):
+                fields = segment.split("|")
+                if len(fields) > 2:
+                    acks[fields[2]] = (fields[1], fields[3] if len(fields) > 3 else "")
+        return acks
+
+    async def _send_hl7_batch(
+        self, messages: List[str], message_type: str
+    ) -> List[Dict[str, Any]]:
+        """Send one batch and resolve each message from the batch ACK by MSH-10"""
+        try:
+            control_ids = [self._get_message_control_id(m) for m in messages]
+            batch_id, batch = self._create_hl7_batch(messages)
+            response = await self._post_hl7(f"/api/hl7/{message_type}/batch", batch)
+        except Exception as e:
+            logger.error(f"HL7 batch send failed: {e}")
+            return [{"status": "error", "error": str(e)} for _ in messages]
+
+        if response.status_code != 200:
+            error = f"HTTP {response.status_code}: {response.text}"
+            return [{"status": "error", "error": error} for _ in messages]
+
+        acks = self._parse_batch_acks(response.text)
+        results = []
+        for control_id in control_ids:
+            if not acks:
+                # The LIS acknowledged the batch as a whole
+                code, text = "AA", ""
+            else:
+                code, text = acks.get(control_id, ("AE", "No acknowledgement"))
+            if code in ("AA", "CA"):
+                results.append({"status": "success", "message_id": control_id})
+            else:
+                results.append({"status": "error", "error": f"{code}: {text}"})
+        logger.debug(f"HL7 batch {batch_id}: {len(messages)} {message_type} messages")
+        return results
+
     def _parse_orders_from_response(self, response_data: str) -> List[LISOrder]:
         """Parse orders from HL7 response"""
         # Implementation would parse HL7 ORU/OML messages
@@ -475,12 +680,24 @@ def _parse_results_from_response(self, response_data: str) -> List[LISResult]:
 
     async def _update_order_status(self, db: Session, order_id: str, status: str):
         """Update order status in local database"""
-        # Implementation would update order status
+        await self._update_order_statuses(db, [order_id], status)
+
+    async def _update_order_statuses(
+        self, db: Session, order_ids: List[str], status: str
+    ):
+        """Update the status of many orders in local database at once"""
+        # Implementation would issue one UPDATE ... WHERE id IN (order_ids)
         pass
 
     async def _update_result_status(self, db: Session, order_id: str, status: str):
         """Update result status in local database"""
-        # Implementation would update result status
+        await self._update_result_statuses(db, [order_id], status)
+
+    async def _update_result_statuses(
+        self, db: Session, order_ids: List[str], status: str
+    ):
+        """Update the status of many results in local database at once"""
+        # Implementation would issue one UPDATE ... WHERE id IN (order_ids)
         pass
 
     async def _store_lis_order(self, db: Session, order: LISOrder):
@@ -507,7 +724,10 @@ async def verify_lis_connectivity(self) -> bool:
     async def get_lis_statistics(self) -> Dict[str, Any]:
         """Get LIS system statistics"""
         try:
-            response = requests.get(f"{self.lis_url}/api/statistics", timeout=30)
+            async with self._window:
+                response = await asyncio.to_thread(
+                    self._session.get, f"{self.lis_url}/api/statistics", timeout=30
+                )
 
             if response.status_code == 200:
                 return response.json()
@@ -524,11 +744,15 @@ async def get_lis_statistics(self) -> Dict[str, Any]:
 
     def get_loinc_mapping(self, test_name: str) -> Optional[Dict[str, Any]]:
         """Get LOINC mapping for test name"""
-        return self.loinc_mappings.get(test_name.upper())
+        return self._loinc_index.get(_normalise_code_key(test_name))
 
     def get_snomed_mapping(self, test_name: str) -> Optional[str]:
         """Get SNOMED CT mapping for test name"""
-        return self.snomed_mappings.get(test_name.upper())
+        key = _normalise_code_key(test_name)
+        concept = self._snomed_index.get(key)
+        if concept is None and key.endswith("S"):
+            concept = self._snomed_index.get(key[:-1])
+        return concept
 
 
 # Factory function for easy instantiation
@@ -2,18 +2,40 @@
 main module
 """
 
+import asyncio
+import logging
 import os
 from datetime import datetime
 from typing import List, Optional
 
 import requests
-from fastapi import Depends, FastAPI, File, Header, HTTPException, UploadFile
+from fastapi import (
+    Depends,
+    FastAPI,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+)
 from jose import JWTError, jwt
 from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import BaseModel
 from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, create_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
+from .study_index import (
+    StudyIndex,
+    create_index_tables,
+    instance_to_dicom_json,
+    parse_date_range,
+    series_to_dicom_json,
+    study_to_dicom_json,
+)
+
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv(
     "RADIOLOGY_DATABASE_URL", os.getenv("DATABASE_URL", "sqlite:///./radiology.db")
 )
@@ -22,6 +44,10 @@
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
+study_index = StudyIndex(
+    SessionLocal,
+    thumbnail_dir=os.getenv("PACS_THUMBNAIL_DIR", "/storage/dicom/thumbnails"),
+)
 app = FastAPI(title="Radiology Service", version="1.2.0")
 Instrumentator().instrument(app).expose(app)
 
@@ -68,6 +94,7 @@ class PACSConfig(Base):
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    create_index_tables(engine)
 
 
 @app.on_event("startup")
@@ -83,6 +110,19 @@ def get_db() -> Session:
         db.close()
 
 
+_pacs_service = None
+
+
+def get_pacs_service():
+    """Shared PACS client, so its connection pool and index outlive a request"""
+    global _pacs_service
+    if _pacs_service is None:
+        from .pacs_service import create_pacs_service
+
+        _pacs_service = create_pacs_service(study_index)
+    return _pacs_service
+
+
 def require_auth(authorization: str | None = Header(None)):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -231,10 +271,7 @@ async def upload_dicom(
     try:
         import pydicom
 
-        from .pacs_service import create_pacs_service
-
-        # Initialize PACS service
-        pacs_service = create_pacs_service()
+        pacs_service = get_pacs_service()
 
         # Read and validate DICOM file
         dicom_content = await file.read()
@@ -294,6 +331,12 @@ async def upload_dicom(
         db.commit()
         db.refresh(image)
 
+        # Index for local QIDO-RS queries and cache the thumbnail
+        try:
+            await pacs_service.index_dataset(ds)
+        except Exception as index_error:
+            logger.warning(f"Study indexing failed: {index_error}")
+
         # Send HL7 order if needed
         try:
             hl7_order_data = {
@@ -393,10 +436,7 @@ async def pacs_query(
         raise HTTPException(status_code=500, detail="PACS not configured")
 
     try:
-        from .pacs_service import create_pacs_service
-
-        # Initialize PACS service
-        pacs_service = create_pacs_service()
+        pacs_service = get_pacs_service()
 
         # Verify connectivity
         if not await pacs_service.verify_pacs_connectivity():
@@ -405,9 +445,16 @@ async def pacs_query(
         # Query studies
         studies = await pacs_service.query_studies(str(patient_id), study_date)
 
+        # Series for every study at once; each is served from the study index
+        # when it is fresh
+        study_series = await asyncio.gather(
+            *(pacs_service.get_series(study.study_instance_uid) for study in studies),
+            return_exceptions=True,
+        )
+
         # Format response
         formatted_studies = []
-        for study in studies:
+        for study, series_list in zip(studies, study_series):
             study_dict = {
                 "study_instance_uid": study.study_instance_uid,
                 "study_id": study.study_id,
@@ -429,7 +476,8 @@ async def pacs_query(
 
             # Get series information for this study
             try:
-                series_list = await pacs_service.get_series(study.study_instance_uid)
+                if isinstance(series_list, Exception):
+                    raise series_list
                 study_dict["series"] = [
                     {
                         "series_instance_uid": series.series_instance_uid,
@@ -541,45 +589,39 @@ async def get_study_details(
     ensure_module_enabled(claims, "enable_diagnostics")
 
     try:
-        from .pacs_service import create_pacs_service
-
-        pacs_service = create_pacs_service()
-
-        # Get series for this study
-        series_list = await pacs_service.get_series(study_instance_uid)
+        pacs_service = get_pacs_service()
 
-        # Get images for each series
-        study_details = {"study_instance_uid": study_instance_uid, "series": []}
+        # Series and instances in one index read, or one concurrent PACS fetch
+        metadata = await pacs_service.get_study_metadata(study_instance_uid)
 
-        for series in series_list:
-            try:
-                images = await pacs_service.get_images(series.series_instance_uid)
-                series_detail = {
-                    "series_instance_uid": series.series_instance_uid,
-                    "series_number": series.series_number,
-                    "modality": series.modality,
-                    "series_description": series.series_description,
-                    "body_part_examined": series.body_part_examined,
-                    "number_of_instances": series.number_of_instances,
+        study_details = {
+            "study_instance_uid": study_instance_uid,
+            "series": [
+                {
+                    "series_instance_uid": series["series_instance_uid"],
+                    "series_number": series["series_number"],
+                    "modality": series["modality"],
+                    "series_description": series["series_description"],
+                    "body_part_examined": series["body_part_examined"],
+                    "number_of_instances": series["number_of_instances"],
                     "images": [
                         {
-                            "sop_instance_uid": image.sop_instance_uid,
-                            "instance_number": image.instance_number,
-                            "image_type": image.image_type,
-                            "rows": image.rows,
-                            "columns": image.columns,
-                            "bits_stored": image.bits_stored,
-                            "photometric_interpretation": image.photometric_interpretation,
+                            "sop_instance_uid": image["sop_instance_uid"],
+                            "instance_number": image["instance_number"],
+                            "image_type": image["image_type"],
+                            "rows": image["rows"],
+                            "columns": image["columns"],
+                            "bits_stored": image["bits_stored"],
+                            "photometric_interpretation": image[
+                                "photometric_interpretation"
+                            ],
                         }
-                        for image in images
+                        for image in series["instances"]
                     ],
                 }
-                study_details["series"].append(series_detail)
-            except Exception as e:
-                logger.warning(
-                    f"Could not get images for series {series.series_instance_uid}: {e}"
-                )
-                continue
+                for series in metadata["series"]
+            ],
+        }
 
         return study_details
 
@@ -606,9 +648,7 @@ async def get_dicom_image(
     ensure_module_enabled(claims, "enable_diagnostics")
 
     try:
-        from .pacs_service import create_pacs_service
-
-        pacs_service = create_pacs_service()
+        pacs_service = get_pacs_service()
 
         # Get image using WADO-RS
         image_data = await pacs_service.get_wado_image(
@@ -642,9 +682,7 @@ async def pacs_status(claims: dict = Depends(require_auth)):
     ensure_module_enabled(claims, "enable_diagnostics")
 
     try:
-        from .pacs_service import create_pacs_service
-
-        pacs_service = create_pacs_service()
+        pacs_service = get_pacs_service()
 
         # Check connectivity
         connectivity = await pacs_service.verify_pacs_connectivity()
@@ -656,6 +694,7 @@ async def pacs_status(claims: dict = Depends(require_auth)):
             "pacs_status": "online" if connectivity else "offline",
             "connectivity": connectivity,
             "statistics": statistics,
+            "study_index": await asyncio.to_thread(study_index.get_stats),
             "timestamp": datetime.utcnow().isoformat(),
         }
 
@@ -669,6 +708,151 @@ async def pacs_status(claims: dict = Depends(require_auth)):
         }
 
 
+VIEWER_ROLES = {"SUPER_ADMIN", "HOSPITAL_ADMIN", "DOCTOR", "LAB_TECH", "NURSE"}
+
+
+@app.get("/api/radiology/qido/studies")
+def qido_search_studies(
+    patient_id: Optional[str] = Query(None, alias="PatientID"),
+    patient_name: Optional[str] = Query(None, alias="PatientName"),
+    modality: Optional[str] = Query(None, alias="ModalitiesInStudy"),
+    study_date: Optional[str] = Query(None, alias="StudyDate"),
+    accession_number: Optional[str] = Query(None, alias="AccessionNumber"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    claims: dict = Depends(require_auth),
+):
+    """
+    QIDO-RS SearchForStudies against the local study index
+    StudyDate takes YYYYMMDD or a YYYYMMDD-YYYYMMDD range
+    """
+    ensure_role(claims, VIEWER_ROLES)
+    ensure_module_enabled(claims, "enable_diagnostics")
+    date_from, date_to = parse_date_range(study_date)
+    studies = study_index.search_studies(
+        patient_id=patient_id,
+        patient_name=patient_name,
+        modality=modality,
+        date_from=date_from,
+        date_to=date_to,
+        accession_number=accession_number,
+        limit=limit,
+        offset=offset,
+    )
+    return [study_to_dicom_json(study) for study in studies]
+
+
+@app.get("/api/radiology/qido/studies/{study_instance_uid}/series")
+def qido_search_series(
+    study_instance_uid: str,
+    modality: Optional[str] = Query(None, alias="Modality"),
+    claims: dict = Depends(require_auth),
+):
+    """QIDO-RS SearchForSeries within a study"""
+    ensure_role(claims, VIEWER_ROLES)
+    ensure_module_enabled(claims, "enable_diagnostics")
+    series = study_index.series_for_studies([study_instance_uid], modality)
+    return [series_to_dicom_json(s) for s in series[study_instance_uid]]
+
+
+@app.get(
+    "/api/radiology/qido/studies/{study_instance_uid}/series/"
+    "{series_instance_uid}/instances"
+)
+def qido_search_instances(
+    study_instance_uid: str,
+    series_instance_uid: str,
+    claims: dict = Depends(require_auth),
+):
+    """QIDO-RS SearchForInstances within a series"""
+    ensure_role(claims, VIEWER_ROLES)
+    ensure_module_enabled(claims, "enable_diagnostics")
+    instances = study_index.instances_for_series(series_instance_uid)
+    return [
+        instance_to_dicom_json(instance)
+        for instance in instances
+        if instance["study_instance_uid"] == study_instance_uid
+    ]
+
+
+@app.get("/api/radiology/worklist")
+def radiology_worklist(
+    patient_id: Optional[str] = None,
+    modality: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    accession_number: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    claims: dict = Depends(require_auth),
+):
+    """
+    Radiologist worklist: matching studies with their series embedded,
+    answered from the study index in two queries
+    """
+    ensure_role(claims, VIEWER_ROLES)
+    ensure_module_enabled(claims, "enable_diagnostics")
+    studies = study_index.worklist(
+        limit=limit,
+        offset=offset,
+        patient_id=patient_id,
+        modality=modality,
+        # Accept ISO dates as well as DICOM YYYYMMDD
+        date_from=date_from.replace("-", "") if date_from else None,
+        date_to=date_to.replace("-", "") if date_to else None,
+        accession_number=accession_number,
+    )
+    return {"studies": studies, "count": len(studies)}
+
+
+@app.get("/api/radiology/studies/{study_instance_uid}/metadata")
+async def get_study_metadata(
+    study_instance_uid: str,
+    claims: dict = Depends(require_auth),
+):
+    """
+    Bulk series and instance metadata for a study in one response
+    """
+    ensure_role(claims, VIEWER_ROLES)
+    ensure_module_enabled(claims, "enable_diagnostics")
+    try:
+        return await get_pacs_service().get_study_metadata(study_instance_uid)
+    except Exception as e:
+        logger.error(f"Failed to get study metadata: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get(
+    "/api/radiology/thumbnails/{study_instance_uid}/{series_instance_uid}/"
+    "{sop_instance_uid}"
+)
+async def get_thumbnail(
+    study_instance_uid: str,
+    series_instance_uid: str,
+    sop_instance_uid: str,
+    claims: dict = Depends(require_auth),
+):
+    """
+    Cached JPEG thumbnail, rendered on ingest or on first request
+    """
+    ensure_role(claims, VIEWER_ROLES)
+    ensure_module_enabled(claims, "enable_diagnostics")
+    try:
+        thumbnail = await get_pacs_service().get_thumbnail(
+            study_instance_uid, series_instance_uid, sop_instance_uid
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get thumbnail: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(
+        content=thumbnail,
+        media_type="image/jpeg",
+        headers={"Cache-Control": "private, max-age=86400"},
+    )
+
+
 @app.get("/api/radiology/kpi")
 def kpi(claims: dict = Depends(require_auth), db: Session = Depends(get_db)):
     ensure_module_enabled(claims, "enable_diagnostics")
@@ -19,6 +19,8 @@
 from fastapi import File, HTTPException, UploadFile
 from sqlalchemy.orm import Session
 
+from .study_index import StudyIndex, downscale_thumbnail, parse_date_range
+
 logger = logging.getLogger(__name__)
 
 
@@ -110,7 +112,8 @@ class PACSService:
     Enterprise PACS service with DICOM 3.0 compliance
     """
 
-    def __init__(self):
+    def __init__(self, study_index: Optional[StudyIndex] = None):
+        self.study_index = study_index
         self.pacs_url = os.getenv("PACS_URL", "http://localhost:8042")
         self.pacs_aet = os.getenv("PACS_AET", "HMS-RADIOLOGY")
         self.pacs_aec = os.getenv("PACS_AEC", "ORTHANC")
@@ -118,6 +121,11 @@ def __init__(self):
         self.pacs_password = os.getenv("PACS_PASSWORD")
         self.dicom_dir = os.getenv("DICOM_STORAGE_DIR", "/var/lib/dicom")
         self.hl7_url = os.getenv("HL7_URL", "http://localhost:8080")
+        # Keep-alive connections, and a cap on concurrent PACS calls
+        self.http = requests.Session()
+        self._request_slots = asyncio.Semaphore(
+            int(os.getenv("PACS_MAX_CONCURRENT_REQUESTS", 8))
+        )
 
         # Configure DICOM networking
         self._configure_dicom_network()
@@ -150,7 +158,25 @@ async def query_studies(
     ) -> List[PACSStudy]:
         """
         Query PACS for studies using QIDO-RS (Query based on ID for DICOM Objects)
+
+        Answered from the local study index when the PACS was asked the same
+        query within the index max age; PACS results are written back to it.
         """
+        query_key = StudyIndex.query_key("studies", patient_id, study_date)
+        if self.study_index and await asyncio.to_thread(
+            self.study_index.is_covered, query_key
+        ):
+            date_from, date_to = parse_date_range(study_date)
+            indexed = await asyncio.to_thread(
+                self.study_index.search_studies,
+                patient_id=patient_id,
+                date_from=date_from,
+                date_to=date_to,
+                # The PACS answer this replaces is not paged
+                limit=None,
+            )
+            return [self._study_from_index(study) for study in indexed]
+
         try:
             # Build QIDO-RS query parameters
             params = {"PatientID": patient_id, "includefield": "all"}
@@ -197,6 +223,12 @@ async def query_studies(
                     studies.append(study)
 
                 logger.info(f"Found {len(studies)} studies for patient {patient_id}")
+                if self.study_index:
+                    await asyncio.to_thread(
+                        self.study_index.index_studies,
+                        [asdict(study) for study in studies],
+                        query_key,
+                    )
                 return studies
 
             else:
@@ -213,6 +245,15 @@ async def get_series(self, study_instance_uid: str) -> List[PACSSeries]:
         """
         Get series for a specific study
         """
+        query_key = StudyIndex.query_key("series", study_instance_uid)
+        if self.study_index and await asyncio.to_thread(
+            self.study_index.is_covered, query_key
+        ):
+            indexed = await asyncio.to_thread(
+                self.study_index.series_for_study, study_instance_uid
+            )
+            return [self._series_from_index(series) for series in indexed]
+
         try:
             response = await self._make_pacs_request(
                 "GET", f"/studies/{study_instance_uid}/series"
@@ -251,6 +292,12 @@ async def get_series(self, study_instance_uid: str) -> List[PACSSeries]:
                     )
                     series_list.append(series)
 
+                if self.study_index:
+                    await asyncio.to_thread(
+                        self.study_index.index_series,
+                        [asdict(series) for series in series_list],
+                        query_key,
+                    )
                 return series_list
 
             else:
@@ -267,6 +314,15 @@ async def get_images(self, series_instance_uid: str) -> List[PACSImage]:
         """
         Get images for a specific series
         """
+        query_key = StudyIndex.query_key("instances", series_instance_uid)
+        if self.study_index and await asyncio.to_thread(
+            self.study_index.is_covered, query_key
+        ):
+            indexed = await asyncio.to_thread(
+                self.study_index.instances_for_series, series_instance_uid
+            )
+            return [PACSImage(**self._index_fields(PACSImage, i)) for i in indexed]
+
         try:
             response = await self._make_pacs_request(
                 "GET", f"/series/{series_instance_uid}/instances"
@@ -274,55 +330,23 @@ async def get_images(self, series_instance_uid: str) -> List[PACSImage]:
 
             if response.status_code == 200:
                 instances_data = response.json()
-                images = []
 
-                for instance in instances_data:
-                    # Get detailed DICOM metadata
-                    metadata_response = await self._make_pacs_request(
-                        "GET", f'/instances/{instance["ID"]}/metadata'
-                    )
-                    metadata = (
-                        metadata_response.json()
-                        if metadata_response.status_code == 200
-                        else {}
-                    )
-
-                    image = PACSImage(
-                        sop_instance_uid=instance.get("ID", ""),
-                        sop_class_uid=instance.get("00080016", {}).get("Value", [""])[
-                            0
-                        ],
-                        instance_number=instance.get("00200013", {}).get("Value", [0])[
-                            0
-                        ],
-                        series_instance_uid=series_instance_uid,
-                        study_instance_uid=instance.get("0020000D", {}).get(
-                            "Value", [""]
-                        )[0],
-                        image_type=metadata.get("00080008", {}).get("Value", []),
-                        rows=metadata.get("00280010", {}).get("Value", [0])[0],
-                        columns=metadata.get("00280011", {}).get("Value", [0])[0],
-                        bits_allocated=metadata.get("00280100", {}).get("Value", [16])[
-                            0
-                        ],
-                        bits_stored=metadata.get("00280101", {}).get("Value", [16])[0],
-                        high_bit=metadata.get("00280102", {}).get("Value", [15])[0],
-                        photometric_interpretation=metadata.get("00280004", {}).get(
-                            "Value", ["MONOCHROME2"]
-                        )[0],
-                        pixel_spacing=metadata.get("00280030", {}).get("Value"),
-                        slice_thickness=metadata.get("00180050", {}).get(
-                            "Value", [None]
-                        )[0],
-                        window_center=metadata.get("00281050", {}).get("Value", [None])[
-                            0
-                        ],
-                        window_width=metadata.get("00281051", {}).get("Value", [None])[
-                            0
-                        ],
+                # Per-instance metadata requests run concurrently, bounded by
+                # the request slots
+                metadata_list = await asyncio.gather(
+                    *(self._get_instance_metadata(i) for i in instances_data)
+                )
+                images = [
+                    self._image_from_metadata(instance, metadata, series_instance_uid)
+                    for instance, metadata in zip(instances_data, metadata_list)
+                ]
+
+                if self.study_index:
+                    await asyncio.to_thread(
+                        self.study_index.index_instances,
+                        [asdict(image) for image in images],
+                        query_key,
                     )
-                    images.append(image)
-
                 return images
 
             else:
@@ -335,6 +359,133 @@ async def get_images(self, series_instance_uid: str) -> List[PACSImage]:
             logger.error(f"Error getting images: {e}")
             return []
 
+    async def _get_instance_metadata(self, instance: Dict[str, Any]) -> Dict:
+        """Get detailed DICOM metadata for one instance"""
+        try:
+            response = await self._make_pacs_request(
+                "GET", f'/instances/{instance["ID"]}/metadata'
+            )
+            return response.json() if response.status_code == 200 else {}
+        except Exception as e:
+            logger.warning(f"Could not get metadata for {instance.get('ID')}: {e}")
+            return {}
+
+    def _image_from_metadata(
+        self, instance: Dict[str, Any], metadata: Dict, series_instance_uid: str
+    ) -> PACSImage:
+        return PACSImage(
+            sop_instance_uid=instance.get("ID", ""),
+            sop_class_uid=instance.get("00080016", {}).get("Value", [""])[0],
+            instance_number=instance.get("00200013", {}).get("Value", [0])[0],
+            series_instance_uid=series_instance_uid,
+            study_instance_uid=instance.get("0020000D", {}).get("Value", [""])[0],
+            image_type=metadata.get("00080008", {}).get("Value", []),
+            rows=metadata.get("00280010", {}).get("Value", [0])[0],
+            columns=metadata.get("00280011", {}).get("Value", [0])[0],
+            bits_allocated=metadata.get("00280100", {}).get("Value", [16])[0],
+            bits_stored=metadata.get("00280101", {}).get("Value", [16])[0],
+            high_bit=metadata.get("00280102", {}).get("Value", [15])[0],
+            photometric_interpretation=metadata.get("00280004", {}).get(
+                "Value", ["MONOCHROME2"]
+            )[0],
+            pixel_spacing=metadata.get("00280030", {}).get("Value"),
+            slice_thickness=metadata.get("00180050", {}).get("Value", [None])[0],
+            window_center=metadata.get("00281050", {}).get("Value", [None])[0],
+            window_width=metadata.get("00281051", {}).get("Value", [None])[0],
+        )
+
+    @staticmethod
+    def _index_fields(record_type, row: Dict[str, Any]) -> Dict[str, Any]:
+        fields = record_type.__dataclass_fields__
+        return {key: value for key, value in row.items() if key in fields}
+
+    def _study_from_index(self, row: Dict[str, Any]) -> PACSStudy:
+        return PACSStudy(
+            **{
+                **self._index_fields(PACSStudy, row),
+                "study_date": row["study_date"] or "",
+                "study_time": row["study_time"] or "",
+                "study_description": row["study_description"] or "",
+                "patient_name": row["patient_name"] or "",
+                "modalities_in_study": row["modalities_in_study"] or [],
+                "number_of_series": row["number_of_series"] or 0,
+                "number_of_instances": row["number_of_instances"] or 0,
+                "study_id": row["study_id"] or "",
+                "study_status": "INDEXED",
+                "accessed_datetime": datetime.now(timezone.utc),
+            }
+        )
+
+    def _series_from_index(self, row: Dict[str, Any]) -> PACSSeries:
+        return PACSSeries(**self._index_fields(PACSSeries, row))
+
+    async def get_study_metadata(self, study_instance_uid: str) -> Dict[str, Any]:
+        """
+        Study, series and instance metadata in one response
+
+        Served from the study index when the PACS was queried for the study's
+        series and each series' instances within the index max age; otherwise
+        they are fetched from the PACS concurrently and indexed first.
+        """
+        if self.study_index:
+            metadata = await asyncio.to_thread(
+                self.study_index.study_metadata, study_instance_uid
+            )
+            if metadata and await asyncio.to_thread(
+                self.study_index.is_covered,
+                StudyIndex.query_key("series", study_instance_uid),
+                *(
+                    StudyIndex.query_key("instances", s["series_instance_uid"])
+                    for s in metadata["series"]
+                ),
+            ):
+                return metadata
+
+        series_list = await self.get_series(study_instance_uid)
+        images = await asyncio.gather(
+            *(self.get_images(series.series_instance_uid) for series in series_list)
+        )
+        return {
+            "study_instance_uid": study_instance_uid,
+            "series": [
+                {
+                    **asdict(series),
+                    "instances": [asdict(image) for image in series_images],
+                }
+                for series, series_images in zip(series_list, images)
+            ],
+        }
+
+    async def get_thumbnail(
+        self,
+        study_instance_uid: str,
+        series_instance_uid: str,
+        sop_instance_uid: str,
+    ) -> bytes:
+        """
+        Get a cached thumbnail, rendering it through WADO on first access
+        """
+        thumbnails = self.study_index.thumbnails if self.study_index else None
+        if thumbnails:
+            cached = await asyncio.to_thread(thumbnails.get, sop_instance_uid)
+            if cached:
+                return cached
+        image = await self.get_wado_image(
+            study_instance_uid, series_instance_uid, sop_instance_uid, "jpeg", 70
+        )
+        thumbnail = await asyncio.to_thread(downscale_thumbnail, image)
+        if thumbnails:
+            await asyncio.to_thread(thumbnails.put, sop_instance_uid, thumbnail)
+        return thumbnail
+
+    async def index_dataset(self, ds) -> Optional[str]:
+        """
+        Add a stored dataset to the study index
+        """
+        if not self.study_index:
+            return None
+        return await asyncio.to_thread(self.study_index.ingest_dataset, ds)
+
     async def store_dicom(
         self, dicom_file: bytes, study_instance_uid: str
     ) -> Dict[str, Any]:
@@ -479,16 +630,18 @@ async def _make_pacs_request(
             if self.pacs_username and self.pacs_password:
                 auth = (self.pacs_username, self.pacs_password)
 
-            response = requests.request(
-                method=method,
-                url=url,
-                params=params,
-                json=json,
-                files=files,
-                headers=headers,
-                auth=auth,
-                timeout=30,
-            )
+            async with self._request_slots:
+                response = await asyncio.to_thread(
+                    self.http.request,
+                    method=method,
+                    url=url,
+                    params=params,
+                    json=json,
+                    files=files,
+                    headers=headers,
+                    auth=auth,
+                    timeout=30,
+                )
 
             return response
 
@@ -500,7 +653,9 @@ async def _make_hl7_request(self, method: str, endpoint: str, **kwargs):
         """Make HTTP request to HL7 server"""
         try:
             url = f"{self.hl7_url}{endpoint}"
-            response = requests.request(method, url, timeout=30, **kwargs)
+            response = await asyncio.to_thread(
+                self.http.request, method, url, timeout=30, **kwargs
+            )
             return response
         except Exception as e:
             logger.error(f"HL7 request failed: {e}")
@@ -583,6 +738,6 @@ async def get_pacs_statistics(self) -> Dict[str, Any]:
 
 
 # Factory function for easy instantiation
-def create_pacs_service() -> PACSService:
+def create_pacs_service(study_index: Optional[StudyIndex] = None) -> PACSService:
     """Create configured PACS service instance"""
-    return PACSService()
+    return PACSService(study_index)
@@ -0,0 +1,767 @@
+"""
+Local QIDO-RS study index
+Study, series and instance metadata indexed on ingest and on PACS reads, so
+worklists and viewer navigation are answered without a PACS round trip
+"""
+
+import io
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+    select,
+)
+from sqlalchemy.orm import Session, declarative_base
+
+try:
+    import numpy as np
+    from PIL import Image
+
+    THUMBNAILS_AVAILABLE = True
+except ImportError:
+    THUMBNAILS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+IndexBase = declarative_base()
+
+THUMBNAIL_SIZE = (128, 128)
+# Largest IN (...) list sent in one statement
+UID_BATCH_SIZE = 500
+
+
+class IndexedStudy(IndexBase):
+    __tablename__ = "pacs_study_index"
+    study_instance_uid = Column(String(64), primary_key=True)
+    patient_id = Column(String(64), nullable=False)
+    patient_name = Column(String(256))
+    study_date = Column(String(8))  # DICOM DA, so string order is date order
+    study_time = Column(String(16))
+    accession_number = Column(String(64))
+    study_id = Column(String(16))
+    study_description = Column(Text)
+    referring_physician_name = Column(String(256))
+    modalities_in_study = Column(JSON)
+    number_of_series = Column(Integer, default=0)
+    number_of_instances = Column(Integer, default=0)
+    source = Column(String(16), nullable=False, default="ingest")
+    indexed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    __table_args__ = (
+        Index("pacs_study_patient_date_idx", "patient_id", "study_date"),
+        Index("pacs_study_date_idx", "study_date"),
+        Index("pacs_study_accession_idx", "accession_number"),
+    )
+
+
+class IndexedStudyModality(IndexBase):
+    """One row per modality in a study, for indexed modality filters."""
+
+    __tablename__ = "pacs_study_modality_index"
+    modality = Column(String(16), primary_key=True)
+    study_instance_uid = Column(String(64), primary_key=True)
+
+
+class IndexedSeries(IndexBase):
+    __tablename__ = "pacs_series_index"
+    series_instance_uid = Column(String(64), primary_key=True)
+    study_instance_uid = Column(String(64), nullable=False)
+    series_number = Column(Integer)
+    modality = Column(String(16))
+    series_description = Column(Text)
+    body_part_examined = Column(String(64))
+    series_datetime = Column(DateTime)
+    number_of_instances = Column(Integer, default=0)
+    source = Column(String(16), nullable=False, default="ingest")
+    indexed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    __table_args__ = (
+        Index("pacs_series_study_idx", "study_instance_uid", "series_number"),
+    )
+
+
+class IndexedInstance(IndexBase):
+    __tablename__ = "pacs_instance_index"
+    sop_instance_uid = Column(String(64), primary_key=True)
+    series_instance_uid = Column(String(64), nullable=False)
+    study_instance_uid = Column(String(64), nullable=False)
+    sop_class_uid = Column(String(64))
+    instance_number = Column(Integer)
+    image_type = Column(JSON)
+    rows = Column(Integer)
+    columns = Column(Integer)
+    bits_allocated = Column(Integer)
+    bits_stored = Column(Integer)
+    high_bit = Column(Integer)
+    photometric_interpretation = Column(String(32))
+    pixel_spacing = Column(JSON)
+    slice_thickness = Column(Float)
+    window_center = Column(Float)
+    window_width = Column(Float)
+    source = Column(String(16), nullable=False, default="ingest")
+    indexed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    __table_args__ = (
+        Index("pacs_instance_series_idx", "series_instance_uid", "instance_number"),
+        Index("pacs_instance_study_idx", "study_instance_uid"),
+    )
+
+
+class IndexedQuery(IndexBase):
+    """When a PACS query last populated the index, by query key.
+
+    Only a key queried within max_age makes the index authoritative for it;
+    ingested rows add to results but never complete them.
+    """
+
+    __tablename__ = "pacs_index_queries"
+    query_key = Column(String(256), primary_key=True)
+    queried_at = Column(DateTime, nullable=False)
+
+
+def create_index_tables(engine):
+    IndexBase.metadata.create_all(bind=engine)
+
+
+def parse_date_range(value: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Parse a QIDO-RS StudyDate: YYYYMMDD, YYYYMMDD-YYYYMMDD or open-ended"""
+    if not value:
+        return None, None
+    if "-" not in value:
+        return value, value
+    start, end = value.split("-", 1)
+    return start or None, end or None
+
+
+def _dicom_wildcard(value: str) -> str:
+    """Translate DICOM * and ? wildcards to a LIKE pattern"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped.replace("*", "%").replace("?", "_")
+
+
+def _multi_value(value: Any) -> List[Any]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, (list, tuple)):
+        return [v for v in value if v not in (None, "")]
+    return [value]
+
+
+def _number(value: Any, cast=float) -> Optional[Any]:
+    value = _multi_value(value)
+    if not value:
+        return None
+    try:
+        return cast(value[0])
+    except (TypeError, ValueError):
+        return None
+
+
+def _columns(model) -> List[str]:
+    return [column.key for column in model.__table__.columns]
+
+
+def _as_dict(obj) -> Dict[str, Any]:
+    return {key: getattr(obj, key) for key in _columns(type(obj))}
+
+
+def _batches(items: List[Any], size: int = UID_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _upsert(db: Session, model, key: str, rows: List[Dict[str, Any]]):
+    """Insert or update rows by primary key, one SELECT per batch"""
+    columns = set(_columns(model))
+    rows = {row[key]: row for row in rows if row.get(key)}
+    for keys in _batches(list(rows)):
+        existing = {
+            getattr(obj, key): obj
+            for obj in db.scalars(select(model).where(getattr(model, key).in_(keys)))
+        }
+        for uid in keys:
+            values = {k: v for k, v in rows[uid].items() if k in columns}
+            values["indexed_at"] = datetime.utcnow()
+            obj = existing.get(uid)
+            if obj is None:
+                db.add(model(**values))
+            else:
+                for field, value in values.items():
+                    setattr(obj, field, value)
+
+
+def _attr(vr: str, value: Any) -> Dict[str, Any]:
+    values = _multi_value(value)
+    if not values:
+        return {"vr": vr}
+    if vr == "PN":
+        values = [{"Alphabetic": str(v)} for v in values]
+    return {"vr": vr, "Value": values}
+
+
+def study_to_dicom_json(study: Dict[str, Any]) -> Dict[str, Any]:
+    """QIDO-RS study attributes as DICOM JSON"""
+    return {
+        "00080020": _attr("DA", study["study_date"]),
+        "00080030": _attr("TM", study["study_time"]),
+        "00080050": _attr("SH", study["accession_number"]),
+        "00080061": _attr("CS", study["modalities_in_study"]),
+        "00080090": _attr("PN", study["referring_physician_name"]),
+        "00081030": _attr("LO", study["study_description"]),
+        "00100010": _attr("PN", study["patient_name"]),
+        "00100020": _attr("LO", study["patient_id"]),
+        "0020000D": _attr("UI", study["study_instance_uid"]),
+        "00200010": _attr("SH", study["study_id"]),
+        "00201206": _attr("IS", study["number_of_series"]),
+        "00201208": _attr("IS", study["number_of_instances"]),
+    }
+
+
+def series_to_dicom_json(series: Dict[str, Any]) -> Dict[str, Any]:
+    """QIDO-RS series attributes as DICOM JSON"""
+    series_datetime = series["series_datetime"]
+    return {
+        "00080021": _attr(
+            "DA", series_datetime.strftime("%Y%m%d") if series_datetime else None
+        ),
+        "00080060": _attr("CS", series["modality"]),
+        "0008103E": _attr("LO", series["series_description"]),
+        "00180015": _attr("CS", series["body_part_examined"]),
+        "0020000D": _attr("UI", series["study_instance_uid"]),
+        "0020000E": _attr("UI", series["series_instance_uid"]),
+        "00200011": _attr("IS", series["series_number"]),
+        "00201209": _attr("IS", series["number_of_instances"]),
+    }
+
+
+def instance_to_dicom_json(instance: Dict[str, Any]) -> Dict[str, Any]:
+    """QIDO-RS instance attributes as DICOM JSON"""
+    return {
+        "00080008": _attr("CS", instance["image_type"]),
+        "00080016": _attr("UI", instance["sop_class_uid"]),
+        "00080018": _attr("UI", instance["sop_instance_uid"]),
+        "0020000D": _attr("UI", instance["study_instance_uid"]),
+        "0020000E": _attr("UI", instance["series_instance_uid"]),
+        "00200013": _attr("IS", instance["instance_number"]),
+        "00280004": _attr("CS", instance["photometric_interpretation"]),
+        "00280010": _attr("US", instance["rows"]),
+        "00280011": _attr("US", instance["columns"]),
+        "00280030": _attr("DS", instance["pixel_spacing"]),
+        "00280100": _attr("US", instance["bits_allocated"]),
+        "00280101": _attr("US", instance["bits_stored"]),
+        "00280102": _attr("US", instance["high_bit"]),
+        "00281050": _attr("DS", instance["window_center"]),
+        "00281051": _attr("DS", instance["window_width"]),
+    }
+
+
+def render_thumbnail(ds) -> Optional[bytes]:
+    """Window and downscale a dataset's pixels to a JPEG thumbnail"""
+    if not THUMBNAILS_AVAILABLE:
+        return None
+    try:
+        pixels = ds.pixel_array.astype(np.float32)
+        if pixels.ndim > 2 and getattr(ds, "SamplesPerPixel", 1) == 1:
+            pixels = pixels[pixels.shape[0] // 2]  # middle frame
+        center = _number(getattr(ds, "WindowCenter", None))
+        width = _number(getattr(ds, "WindowWidth", None))
+        if center is not None and width:
+            low, high = center - width / 2, center + width / 2
+        else:
+            low, high = float(pixels.min()), float(pixels.max())
+        pixels = np.clip((pixels - low) / max(high - low, 1e-6), 0, 1) * 255
+        image = Image.fromarray(pixels.astype(np.uint8))
+        image.thumbnail(THUMBNAIL_SIZE)
+        output = io.BytesIO()
+        image.convert("L" if image.mode not in ("RGB", "L") else image.mode).save(
+            output, "JPEG", quality=75
+        )
+        return output.getvalue()
+    except Exception as e:
+        logger.warning(f"Could not render thumbnail: {e}")
+        return None
+
+
+def downscale_thumbnail(image_bytes: bytes) -> bytes:
+    """Shrink a rendered frame to thumbnail size; unchanged without PIL"""
+    if not THUMBNAILS_AVAILABLE:
+        return image_bytes
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        image.thumbnail(THUMBNAIL_SIZE)
+        output = io.BytesIO()
+        image.convert("RGB").save(output, "JPEG", quality=75)
+        return output.getvalue()
+    except Exception as e:
+        logger.warning(f"Could not downscale thumbnail: {e}")
+        return image_bytes
+
+
+class ThumbnailCache:
+    """Thumbnails in a bounded in-memory LRU, backed by a disk directory"""
+
+    def __init__(self, directory: Optional[str] = None, max_items: int = 2048):
+        self.directory = directory
+        self.max_items = max_items
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Thumbnail cache directory unavailable: {e}")
+                self.directory = None
+
+    def _path(self, sop_instance_uid: str) -> Optional[str]:
+        if not self.directory:
+            return None
+        return os.path.join(self.directory, f"{sop_instance_uid}.jpg")
+
+    def get(self, sop_instance_uid: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(sop_instance_uid)
+            if data is not None:
+                self._items.move_to_end(sop_instance_uid)
+                self.hits += 1
+                return data
+        path = self._path(sop_instance_uid)
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            self._remember(sop_instance_uid, data)
+            self.hits += 1
+            return data
+        self.misses += 1
+        return None
+
+    def put(self, sop_instance_uid: str, data: bytes):
+        self._remember(sop_instance_uid, data)
+        path = self._path(sop_instance_uid)
+        if path:
+            try:
+                with open(path, "wb") as f:
+                    f.write(data)
+            except OSError as e:
+                logger.warning(f"Could not persist thumbnail: {e}")
+
+    def _remember(self, sop_instance_uid: str, data: bytes):
+        with self._lock:
+            self._items[sop_instance_uid] = data
+            self._items.move_to_end(sop_instance_uid)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"cached": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+class StudyIndex:
+    """
+    Local QIDO-RS study/series/instance index
+
+    Populated from ingested datasets and from PACS responses; queries read
+    only indexed columns and return plain dicts.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        thumbnail_dir: Optional[str] = None,
+        max_age_seconds: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.thumbnails = ThumbnailCache(
+            thumbnail_dir,
+            max_items=int(os.getenv("PACS_THUMBNAIL_CACHE_SIZE", 2048)),
+        )
+        if max_age_seconds is None:
+            max_age_seconds = int(os.getenv("PACS_INDEX_MAX_AGE", 300))
+        # PACS queries older than this are repeated against the PACS
+        self.max_age = timedelta(seconds=max_age_seconds)
+
+    @staticmethod
+    def query_key(level: str, *parts: Optional[str]) -> str:
+        """Key of one PACS query, e.g. query_key("studies", patient_id, date)"""
+        return "|".join([level, *(part or "" for part in parts)])
+
+    def is_covered(self, *query_keys: str) -> bool:
+        """True if every query was answered by the PACS within max_age"""
+        keys = set(query_keys)
+        if not keys:
+            return False
+        cutoff = datetime.utcnow() - self.max_age
+        with self.session_factory() as db:
+            covered = db.scalar(
+                select(func.count())
+                .select_from(IndexedQuery)
+                .where(
+                    IndexedQuery.query_key.in_(keys),
+                    IndexedQuery.queried_at >= cutoff,
+                )
+            )
+        return covered == len(keys)
+
+    @staticmethod
+    def _record_query(db: Session, query_key: Optional[str]):
+        if not query_key:
+            return
+        queried = db.get(IndexedQuery, query_key)
+        if queried is None:
+            db.add(IndexedQuery(query_key=query_key, queried_at=datetime.utcnow()))
+        else:
+            queried.queried_at = datetime.utcnow()
+
+    # Population
+
+    def ingest_dataset(self, ds) -> str:
+        """Index one stored DICOM dataset and cache its thumbnail"""
+        study_uid = str(ds.StudyInstanceUID)
+        series_uid = str(ds.SeriesInstanceUID)
+        sop_uid = str(ds.SOPInstanceUID)
+        modality = str(getattr(ds, "Modality", "OT"))
+        series_date = str(getattr(ds, "SeriesDate", "") or "")
+        series_time = str(getattr(ds, "SeriesTime", "") or "").split(".")[0]
+        try:
+            series_datetime = datetime.strptime(
+                f"{series_date}{series_time:0<6}", "%Y%m%d%H%M%S"
+            )
+        except ValueError:
+            series_datetime = None
+        with self.session_factory() as db:
+            existing = db.get(IndexedStudy, study_uid)
+            modalities = {modality}
+            if existing is not None:
+                modalities.update(existing.modalities_in_study or [])
+            modalities = sorted(modalities)
+            _upsert(
+                db,
+                IndexedStudy,
+                "study_instance_uid",
+                [
+                    {
+                        "study_instance_uid": study_uid,
+                        "patient_id": str(getattr(ds, "PatientID", "")),
+                        "patient_name": str(getattr(ds, "PatientName", "")),
+                        "study_date": str(getattr(ds, "StudyDate", "") or ""),
+                        "study_time": str(getattr(ds, "StudyTime", "") or ""),
+                        "accession_number": str(getattr(ds, "AccessionNumber", "")),
+                        "study_id": str(getattr(ds, "StudyID", "")),
+                        "study_description": str(
+                            getattr(ds, "StudyDescription", "")
+                        ),
+                        "referring_physician_name": str(
+                            getattr(ds, "ReferringPhysicianName", "")
+                        ),
+                        "modalities_in_study": modalities,
+                        "source": "ingest",
+                    }
+                ],
+            )
+            self._index_modalities(db, {study_uid: modalities})
+            _upsert(
+                db,
+                IndexedSeries,
+                "series_instance_uid",
+                [
+                    {
+                        "series_instance_uid": series_uid,
+                        "study_instance_uid": study_uid,
+                        "series_number": _number(
+                            getattr(ds, "SeriesNumber", None), int
+                        ),
+                        "modality": modality,
+                        "series_description": str(
+                            getattr(ds, "SeriesDescription", "")
+                        ),
+                        "body_part_examined": str(
+                            getattr(ds, "BodyPartExamined", "")
+                        ),
+                        "series_datetime": series_datetime,
+                        "source": "ingest",
+                    }
+                ],
+            )
+            _upsert(
+                db,
+                IndexedInstance,
+                "sop_instance_uid",
+                [
+                    {
+                        "sop_instance_uid": sop_uid,
+                        "series_instance_uid": series_uid,
+                        "study_instance_uid": study_uid,
+                        "sop_class_uid": str(getattr(ds, "SOPClassUID", "")),
+                        "instance_number": _number(
+                            getattr(ds, "InstanceNumber", None), int
+                        ),
+                        "image_type": [
+                            str(v) for v in _multi_value(getattr(ds, "ImageType", None))
+                        ],
+                        "rows": _number(getattr(ds, "Rows", None), int),
+                        "columns": _number(getattr(ds, "Columns", None), int),
+                        "bits_allocated": _number(
+                            getattr(ds, "BitsAllocated", None), int
+                        ),
+                        "bits_stored": _number(getattr(ds, "BitsStored", None), int),
+                        "high_bit": _number(getattr(ds, "HighBit", None), int),
+                        "photometric_interpretation": str(
+                            getattr(ds, "PhotometricInterpretation", "")
+                        ),
+                        "pixel_spacing": [
+                            float(v)
+                            for v in _multi_value(getattr(ds, "PixelSpacing", None))
+                        ]
+                        or None,
+                        "slice_thickness": _number(
+                            getattr(ds, "SliceThickness", None)
+                        ),
+                        "window_center": _number(getattr(ds, "WindowCenter", None)),
+                        "window_width": _number(getattr(ds, "WindowWidth", None)),
+                        "source": "ingest",
+                    }
+                ],
+            )
+            db.flush()
+            self._refresh_counts(db, study_uid)
+            db.commit()
+        thumbnail = render_thumbnail(ds)
+        if thumbnail:
+            self.thumbnails.put(sop_uid, thumbnail)
+        return sop_uid
+
+    def index_studies(
+        self, studies: List[Dict[str, Any]], query_key: Optional[str] = None
+    ):
+        """Cache study attributes returned by the PACS for query_key"""
+        with self.session_factory() as db:
+            self._record_query(db, query_key)
+            _upsert(
+                db,
+                IndexedStudy,
+                "study_instance_uid",
+                [{**study, "source": "pacs"} for study in studies],
+            )
+            self._index_modalities(
+                db,
+                {
+                    study["study_instance_uid"]: study.get("modalities_in_study") or []
+                    for study in studies
+                },
+            )
+            db.commit()
+
+    def index_series(
+        self, series: List[Dict[str, Any]], query_key: Optional[str] = None
+    ):
+        """Cache series attributes returned by the PACS for query_key"""
+        with self.session_factory() as db:
+            self._record_query(db, query_key)
+            _upsert(
+                db,
+                IndexedSeries,
+                "series_instance_uid",
+                [{**s, "source": "pacs"} for s in series],
+            )
+            db.commit()
+
+    def index_instances(
+        self, instances: List[Dict[str, Any]], query_key: Optional[str] = None
+    ):
+        """Cache instance attributes returned by the PACS for query_key"""
+        with self.session_factory() as db:
+            self._record_query(db, query_key)
+            _upsert(
+                db,
+                IndexedInstance,
+                "sop_instance_uid",
+                [{**instance, "source": "pacs"} for instance in instances],
+            )
+            db.commit()
+
+    def _index_modalities(self, db: Session, modalities: Dict[str, List[str]]):
+        uids = [uid for uid in modalities if uid]
+        for batch in _batches(uids):
+            known = set(
+                db.execute(
+                    select(
+                        IndexedStudyModality.study_instance_uid,
+                        IndexedStudyModality.modality,
+                    ).where(IndexedStudyModality.study_instance_uid.in_(batch))
+                ).all()
+            )
+            for uid in batch:
+                for modality in set(modalities[uid]):
+                    if (uid, modality) not in known:
+                        db.add(
+                            IndexedStudyModality(
+                                study_instance_uid=uid, modality=modality
+                            )
+                        )
+
+    def _refresh_counts(self, db: Session, study_uid: str):
+        """Recount series and instances of an ingested study"""
+        per_series = dict(
+            db.execute(
+                select(IndexedInstance.series_instance_uid, func.count())
+                .where(IndexedInstance.study_instance_uid == study_uid)
+                .group_by(IndexedInstance.series_instance_uid)
+            ).all()
+        )
+        for series in db.scalars(
+            select(IndexedSeries).where(IndexedSeries.study_instance_uid == study_uid)
+        ):
+            series.number_of_instances = per_series.get(series.series_instance_uid, 0)
+        study = db.get(IndexedStudy, study_uid)
+        study.number_of_series = len(per_series)
+        study.number_of_instances = sum(per_series.values())
+
+    # Queries
+
+    def search_studies(
+        self,
+        patient_id: Optional[str] = None,
+        patient_name: Optional[str] = None,
+        modality: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        accession_number: Optional[str] = None,
+        limit: Optional[int] = 100,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Studies matching every given filter, newest first
+
+        Patient ID and name accept DICOM * and ? wildcards; dates are DICOM
+        DA strings (YYYYMMDD), both bounds inclusive. ``limit=None`` returns
+        every match.
+        """
+        stmt = select(IndexedStudy)
+        if patient_id:
+            if "*" in patient_id or "?" in patient_id:
+                stmt = stmt.where(
+                    IndexedStudy.patient_id.like(
+                        _dicom_wildcard(patient_id), escape="\\"
+                    )
+                )
+            else:
+                stmt = stmt.where(IndexedStudy.patient_id == patient_id)
+        if patient_name:
+            stmt = stmt.where(
+                IndexedStudy.patient_name.ilike(
+                    _dicom_wildcard(patient_name), escape="\\"
+                )
+            )
+        if accession_number:
+            stmt = stmt.where(IndexedStudy.accession_number == accession_number)
+        if date_from:
+            stmt = stmt.where(IndexedStudy.study_date >= date_from)
+        if date_to:
+            stmt = stmt.where(IndexedStudy.study_date <= date_to)
+        if modality:
+            stmt = stmt.where(
+                IndexedStudy.study_instance_uid.in_(
+                    select(IndexedStudyModality.study_instance_uid).where(
+                        IndexedStudyModality.modality == modality
+                    )
+                )
+            )
+        stmt = stmt.order_by(
+            IndexedStudy.study_date.desc(),
+            IndexedStudy.study_time.desc(),
+            IndexedStudy.study_instance_uid,
+        ).offset(offset)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        with self.session_factory() as db:
+            return [_as_dict(study) for study in db.scalars(stmt)]
+
+    def series_for_studies(
+        self, study_uids: List[str], modality: Optional[str] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Series grouped by study, one query per UID_BATCH_SIZE studies"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {uid: [] for uid in study_uids}
+        with self.session_factory() as db:
+            for batch in _batches(study_uids):
+                stmt = select(IndexedSeries).where(
+                    IndexedSeries.study_instance_uid.in_(batch)
+                )
+                if modality:
+                    stmt = stmt.where(IndexedSeries.modality == modality)
+                stmt = stmt.order_by(
+                    IndexedSeries.study_instance_uid, IndexedSeries.series_number
+                )
+                for series in db.scalars(stmt):
+                    grouped[series.study_instance_uid].append(_as_dict(series))
+        return grouped
+
+    def series_for_study(self, study_uid: str) -> List[Dict[str, Any]]:
+        return self.series_for_studies([study_uid])[study_uid]
+
+    def instances_for_series(self, series_uid: str) -> List[Dict[str, Any]]:
+        stmt = (
+            select(IndexedInstance)
+            .where(IndexedInstance.series_instance_uid == series_uid)
+            .order_by(IndexedInstance.instance_number)
+        )
+        with self.session_factory() as db:
+            return [_as_dict(instance) for instance in db.scalars(stmt)]
+
+    def study_metadata(self, study_uid: str) -> Optional[Dict[str, Any]]:
+        """A study with every series and instance, in three indexed queries"""
+        with self.session_factory() as db:
+            study = db.get(IndexedStudy, study_uid)
+            if study is None:
+                return None
+            series_list = [
+                {**_as_dict(series), "instances": []}
+                for series in db.scalars(
+                    select(IndexedSeries)
+                    .where(IndexedSeries.study_instance_uid == study_uid)
+                    .order_by(IndexedSeries.series_number)
+                )
+            ]
+            by_uid = {s["series_instance_uid"]: s for s in series_list}
+            for instance in db.scalars(
+                select(IndexedInstance)
+                .where(IndexedInstance.study_instance_uid == study_uid)
+                .order_by(
+                    IndexedInstance.series_instance_uid,
+                    IndexedInstance.instance_number,
+                )
+            ):
+                series = by_uid.get(instance.series_instance_uid)
+                if series is not None:
+                    series["instances"].append(_as_dict(instance))
+            return {**_as_dict(study), "series": series_list}
+
+    def worklist(self, limit: int = 50, offset: int = 0, **filters) -> List[Dict]:
+        """Studies with their series embedded, for one-request worklists"""
+        studies = self.search_studies(limit=limit, offset=offset, **filters)
+        series = self.series_for_studies([s["study_instance_uid"] for s in studies])
+        return [
+            {**study, "series": series[study["study_instance_uid"]]}
+            for study in studies
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.session_factory() as db:
+            counts = {
+                name: db.scalar(select(func.count()).select_from(model))
+                for name, model in (
+                    ("studies", IndexedStudy),
+                    ("series", IndexedSeries),
+                    ("instances", IndexedInstance),
+                )
+            }
+        return {**counts, "thumbnails": self.thumbnails.get_stats()}
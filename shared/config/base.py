@@ -27,6 +27,17 @@ class DatabaseConfig(BaseSettings):
     database: str = Field(default="hms", env="DB_DATABASE")
     username: str = Field(default="hms", env="DB_USERNAME")
     password: str = Field(default="hms", env="DB_PASSWORD")
+    # Read replica; reads go to the primary when unset
+    read_host: Optional[str] = Field(default=None, env="DB_READ_HOST")
+
+    # Connection pooling - the budget is split across worker processes
+    max_connections: int = Field(default=40, env="DB_MAX_CONNECTIONS")
+    workers: int = Field(default=1, env="WEB_CONCURRENCY")
+    pool_timeout: float = Field(default=10.0, env="DB_POOL_TIMEOUT")
+    pool_recycle: int = Field(default=1800, env="DB_POOL_RECYCLE")
+    statement_cache_size: int = Field(default=500, env="DB_STATEMENT_CACHE_SIZE")
+    statement_timeout_ms: int = Field(default=30000, env="DB_STATEMENT_TIMEOUT_MS")
+    slow_query_ms: float = Field(default=250.0, env="DB_SLOW_QUERY_MS")
 
     class Config:
         env_prefix = "DB_"
@@ -41,6 +52,12 @@ def url_async(self) -> str:
         """Generate async database URL."""
         return f"postgresql+asyncpg://{self.username}:{self.password}@{self.host}:{self.port}/{self.database}"
 
+    @property
+    def url_async_read(self) -> str:
+        """Generate async database URL for the read replica."""
+        host = self.read_host or self.host
+        return f"postgresql+asyncpg://{self.username}:{self.password}@{host}:{self.port}/{self.database}"
+
 
 class SecurityConfig(BaseSettings):
     """Security configuration - eliminates redundant security setup."""
@@ -3,20 +3,319 @@
 Eliminates redundant CRUD patterns across all services.
 """
 
-from datetime import datetime
-from typing import Any, Dict, Generic, List, Optional, TypeVar
-
-from sqlalchemy import and_, asc, desc, or_
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from sqlalchemy import and_, asc, desc, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from .base import HMSBaseModel
 
+if TYPE_CHECKING:
+    # Only the async CRUD needs this, and it pulls in greenlet
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 ModelType = TypeVar("ModelType", bound=HMSBaseModel)
 CreateSchemaType = TypeVar("CreateSchemaType")
 UpdateSchemaType = TypeVar("UpdateSchemaType")
 
+# Rows per INSERT/UPDATE statement in the bulk operations
+BULK_BATCH_SIZE = 1000
+# Planner estimates below this are cheap enough to replace with an exact count
+EXACT_COUNT_THRESHOLD = 10000
+# Columns an upsert never overwrites on an existing row
+UPSERT_PRESERVED_COLUMNS = ("id", "uuid", "created_at", "created_by")
+
+
+@dataclass
+class Page(Generic[ModelType]):
+    """One keyset page; pass next_cursor back to fetch the following page."""
+
+    items: List[ModelType]
+    next_cursor: Optional[str] = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def _cursor_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _from_cursor_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(order_by: str, order_direction: str, key: Sequence[Any]) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    payload = {
+        "o": order_by,
+        "d": order_direction,
+        "k": [_cursor_value(value) for value in key],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor from encode_cursor; raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        return {
+            "order_by": payload["o"],
+            "order_direction": payload["d"],
+            "key": [_from_cursor_value(value) for value in payload["k"]],
+        }
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _batches(rows: List[Dict[str, Any]], batch_size: int):
+    for start in range(0, len(rows), batch_size):
+        yield rows[start : start + batch_size]
+
+
+class _StatementMixin:
+    """Statement builders shared by the sync and async CRUD classes."""
+
+    model: Any
+
+    def _active(self):
+        return select(self.model).where(self.model.is_active == True)
+
+    def _apply_filters(self, stmt, filters: Optional[Dict[str, Any]]):
+        if filters:
+            for key, value in filters.items():
+                if hasattr(self.model, key):
+                    stmt = stmt.where(getattr(self.model, key) == value)
+        return stmt
+
+    def _apply_search(
+        self,
+        stmt,
+        search: Optional[str],
+        search_fields: Optional[List[str]],
+        search_mode: str = "contains",
+    ):
+        """Match search across fields.
+
+        "contains" is a substring ILIKE, served by a pg_trgm GIN index on the
+        field; "prefix" compares lower(field), served by a btree index on
+        lower(field) text_pattern_ops.
+        """
+        if not (search and search_fields):
+            return stmt
+        term = _escape_like(search)
+        search_conditions = []
+        for field in search_fields:
+            if hasattr(self.model, field):
+                column = getattr(self.model, field)
+                if search_mode == "prefix":
+                    condition = func.lower(column).like(
+                        f"{term.lower()}%", escape="\\"
+                    )
+                else:
+                    condition = column.ilike(f"%{term}%", escape="\\")
+                search_conditions.append(condition)
+        if search_conditions:
+            stmt = stmt.where(or_(*search_conditions))
+        return stmt
+
+    def _filtered(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        search: Optional[str] = None,
+        search_fields: Optional[List[str]] = None,
+        search_mode: str = "contains",
+    ):
+        stmt = self._apply_filters(self._active(), filters)
+        return self._apply_search(stmt, search, search_fields, search_mode)
+
+    def _ordering(self, order_by: Optional[str], order_direction: str):
+        if order_by and hasattr(self.model, order_by):
+            column = getattr(self.model, order_by)
+        else:
+            # Default ordering by creation date
+            column, order_direction = self.model.created_at, "desc"
+        direction = desc if order_direction.lower() == "desc" else asc
+        # id breaks ties so every row has a stable position
+        return [direction(column), direction(self.model.id)]
+
+    def _multi_statement(
+        self,
+        skip: int,
+        limit: int,
+        filters: Optional[Dict[str, Any]],
+        search: Optional[str],
+        search_fields: Optional[List[str]],
+        order_by: Optional[str],
+        order_direction: str,
+        search_mode: str,
+    ):
+        stmt = self._filtered(filters, search, search_fields, search_mode)
+        ordering = self._ordering(order_by, order_direction)
+        return stmt.order_by(*ordering).offset(skip).limit(limit)
+
+    def _page_statement(
+        self,
+        limit: int,
+        cursor: Optional[str],
+        filters: Optional[Dict[str, Any]],
+        search: Optional[str],
+        search_fields: Optional[List[str]],
+        order_by: str,
+        order_direction: str,
+        search_mode: str,
+    ):
+        if not hasattr(self.model, order_by):
+            raise ValueError(f"Unknown order column: {order_by}")
+        stmt = self._filtered(filters, search, search_fields, search_mode)
+        if cursor:
+            position = decode_cursor(cursor)
+            if (position["order_by"], position["order_direction"]) != (
+                order_by,
+                order_direction,
+            ):
+                raise ValueError("Cursor does not match the requested ordering")
+            key = tuple_(getattr(self.model, order_by), self.model.id)
+            last = tuple_(*position["key"])
+            descending = order_direction.lower() == "desc"
+            stmt = stmt.where(key < last if descending else key > last)
+        ordering = self._ordering(order_by, order_direction)
+        # One extra row tells us whether another page follows
+        return stmt.order_by(*ordering).limit(limit + 1)
+
+    def _page(
+        self, items: List[ModelType], limit: int, order_by: str, order_direction: str
+    ) -> Page[ModelType]:
+        if len(items) <= limit:
+            return Page(items)
+        items = items[:limit]
+        last = items[-1]
+        key = [getattr(last, order_by), last.id]
+        if key[0] is None:
+            raise ValueError("Keyset pagination needs a non-null order column")
+        return Page(items, encode_cursor(order_by, order_direction, key))
+
+    def _insert_rows(
+        self, objs_in: Sequence[Any], created_by: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        rows = []
+        for obj_in in objs_in:
+            row = dict(obj_in.dict() if hasattr(obj_in, "dict") else obj_in)
+            if hasattr(self.model, "created_by"):
+                row["created_by"] = created_by
+            rows.append(row)
+        return rows
+
+    def _update_rows(
+        self, objs_in: Sequence[Any], updated_by: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        now = datetime.utcnow()
+        rows = []
+        for obj_in in objs_in:
+            row = dict(
+                obj_in.dict(exclude_unset=True) if hasattr(obj_in, "dict") else obj_in
+            )
+            if row.get("id") is None:
+                raise ValueError("bulk_update rows must include id")
+            if hasattr(self.model, "updated_by"):
+                row["updated_by"] = updated_by
+            row["updated_at"] = now
+            rows.append(row)
+        return rows
+
+    def _bulk_insert_statement(self):
+        # insertmanyvalues renders each batch as one multi-row INSERT
+        return insert(self.model).returning(self.model, sort_by_parameter_order=True)
+
+    def _upsert_statement(
+        self,
+        rows: List[Dict[str, Any]],
+        conflict_columns: Sequence[str],
+        update_columns: Optional[Sequence[str]],
+    ):
+        stmt = pg_insert(self.model).values(rows)
+        if update_columns is None:
+            update_columns = [
+                column
+                for column in rows[0]
+                if column not in conflict_columns
+                and column not in UPSERT_PRESERVED_COLUMNS
+            ]
+        values = {column: stmt.excluded[column] for column in update_columns}
+        if hasattr(self.model, "updated_by"):
+            values["updated_by"] = stmt.excluded.created_by
+        values["updated_at"] = datetime.utcnow()
+        return stmt.on_conflict_do_update(
+            index_elements=list(conflict_columns), set_=values
+        ).returning(self.model)
+
+    def _count_statement(self, filters: Optional[Dict[str, Any]]):
+        return self._apply_filters(
+            select(func.count(self.model.id)).where(self.model.is_active == True),
+            filters,
+        )
+
+    def _planned_rows(
+        self, db: Session, filters: Optional[Dict[str, Any]]
+    ) -> Optional[int]:
+        """Row count the PostgreSQL planner expects for the filtered query.
+
+        Reads EXPLAIN output instead of scanning, so it is only as fresh as
+        the table statistics from the last ANALYZE. None on other dialects.
+        """
+        dialect = db.get_bind().dialect
+        if dialect.name != "postgresql":
+            return None
+        stmt = self._apply_filters(
+            select(self.model.id).where(self.model.is_active == True), filters
+        )
+        compiled = stmt.compile(dialect=dialect)
+        params = compiled.params
+        if compiled.positional:
+            params = tuple(params[name] for name in compiled.positiontup)
+        plan = (
+            db.connection()
+            .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+            .scalar()
+        )
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
 
-class BaseCRUD(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+class BaseCRUD(
+    _StatementMixin, Generic[ModelType, CreateSchemaType, UpdateSchemaType]
+):
     """Base CRUD operations class - eliminates redundant CRUD code."""
 
     def __init__(self, model: type[ModelType]):
@@ -40,47 +339,63 @@ def get_multi(
         search_fields: Optional[List[str]] = None,
         order_by: Optional[str] = None,
         order_direction: str = "asc",
+        search_mode: str = "contains",
     ) -> List[ModelType]:
-        """Get multiple records with filtering, search, and pagination."""
-        query = db.query(self.model).filter(self.model.is_active == True)
-
-        # Apply filters
-        if filters:
-            for key, value in filters.items():
-                if hasattr(self.model, key):
-                    query = query.filter(getattr(self.model, key) == value)
-
-        # Apply search
-        if search and search_fields:
-            search_conditions = []
-            for field in search_fields:
-                if hasattr(self.model, field):
-                    search_conditions.append(
-                        getattr(self.model, field).ilike(f"%{search}%")
-                    )
-            if search_conditions:
-                query = query.filter(or_(*search_conditions))
-
-        # Apply ordering
-        if order_by and hasattr(self.model, order_by):
-            order_column = getattr(self.model, order_by)
-            if order_direction.lower() == "desc":
-                query = query.order_by(desc(order_column))
-            else:
-                query = query.order_by(asc(order_column))
-        else:
-            # Default ordering by creation date
-            query = query.order_by(desc(self.model.created_at))
+        """Get multiple records with filtering, search, and offset pagination.
+
+        OFFSET reads and discards every skipped row; prefer get_page for deep
+        pagination.
+        """
+        stmt = self._multi_statement(
+            skip,
+            limit,
+            filters,
+            search,
+            search_fields,
+            order_by,
+            order_direction,
+            search_mode,
+        )
+        return list(db.scalars(stmt).all())
 
-        # Apply pagination
-        return query.offset(skip).limit(limit).all()
+    def get_page(
+        self,
+        db: Session,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        search: Optional[str] = None,
+        search_fields: Optional[List[str]] = None,
+        order_by: str = "created_at",
+        order_direction: str = "desc",
+        search_mode: str = "contains",
+    ) -> Page[ModelType]:
+        """Get one page with keyset pagination.
+
+        Seeks past the (order_by, id) key encoded in the cursor, so each page
+        costs the same however deep it is. order_by must be a non-null column,
+        ideally indexed together with id.
+        """
+        stmt = self._page_statement(
+            limit,
+            cursor,
+            filters,
+            search,
+            search_fields,
+            order_by,
+            order_direction,
+            search_mode,
+        )
+        items = list(db.scalars(stmt).all())
+        return self._page(items, limit, order_by, order_direction)
 
     def create(
         self, db: Session, obj_in: CreateSchemaType, created_by: Optional[str] = None
     ) -> ModelType:
         """Create new record."""
         obj_data = obj_in.dict() if hasattr(obj_in, "dict") else obj_in
-        obj_data["created_by"] = created_by
+        if hasattr(self.model, "created_by"):
+            obj_data["created_by"] = created_by
         db_obj = self.model(**obj_data)
         db.add(db_obj)
         db.commit()
@@ -120,16 +435,77 @@ def delete(
             db.refresh(db_obj)
         return db_obj
 
-    def count(self, db: Session, filters: Optional[Dict[str, Any]] = None) -> int:
-        """Count records with optional filters."""
-        query = db.query(self.model).filter(self.model.is_active == True)
+    def bulk_create(
+        self,
+        db: Session,
+        objs_in: Sequence[CreateSchemaType],
+        created_by: Optional[str] = None,
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> List[ModelType]:
+        """Create many records with one INSERT ... RETURNING per batch."""
+        created = []
+        for batch in _batches(self._insert_rows(objs_in, created_by), batch_size):
+            created += db.scalars(self._bulk_insert_statement(), batch).all()
+        db.commit()
+        return created
 
-        if filters:
-            for key, value in filters.items():
-                if hasattr(self.model, key):
-                    query = query.filter(getattr(self.model, key) == value)
+    def bulk_update(
+        self,
+        db: Session,
+        objs_in: Sequence[UpdateSchemaType],
+        updated_by: Optional[str] = None,
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> int:
+        """Update many records by primary key, one executemany per batch.
+
+        Each row must carry its id; only the fields it contains are updated.
+        """
+        rows = self._update_rows(objs_in, updated_by)
+        for batch in _batches(rows, batch_size):
+            db.execute(update(self.model), batch)
+        db.commit()
+        return len(rows)
+
+    def upsert(
+        self,
+        db: Session,
+        objs_in: Sequence[CreateSchemaType],
+        conflict_columns: Sequence[str] = ("uuid",),
+        update_columns: Optional[Sequence[str]] = None,
+        created_by: Optional[str] = None,
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> List[ModelType]:
+        """Insert or update many records with INSERT ... ON CONFLICT (PostgreSQL).
+
+        conflict_columns must match a unique index. Existing rows get every
+        supplied column except the conflict and UPSERT_PRESERVED_COLUMNS,
+        unless update_columns names them explicitly.
+        """
+        records = []
+        for batch in _batches(self._insert_rows(objs_in, created_by), batch_size):
+            stmt = self._upsert_statement(batch, conflict_columns, update_columns)
+            records += db.scalars(
+                stmt, execution_options={"populate_existing": True}
+            ).all()
+        db.commit()
+        return records
 
-        return query.count()
+    def count(
+        self,
+        db: Session,
+        filters: Optional[Dict[str, Any]] = None,
+        estimate: bool = False,
+    ) -> int:
+        """Count records with optional filters.
+
+        With estimate, large results come from the query planner rather than a
+        full COUNT(*); results under EXACT_COUNT_THRESHOLD are still exact.
+        """
+        if estimate:
+            planned = self._planned_rows(db, filters)
+            if planned is not None and planned >= EXACT_COUNT_THRESHOLD:
+                return planned
+        return db.scalar(self._count_statement(filters))
 
     def exists(self, db: Session, id: int) -> bool:
         """Check if record exists."""
@@ -276,6 +652,187 @@ def _create_audit_entry(
         pass
 
 
+class AsyncBaseCRUD(
+    _StatementMixin, Generic[ModelType, CreateSchemaType, UpdateSchemaType]
+):
+    """BaseCRUD for AsyncSession, for services on an async engine."""
+
+    def __init__(self, model: type[ModelType]):
+        self.model = model
+
+    async def get(self, db: "AsyncSession", id: int) -> Optional[ModelType]:
+        """Get single record by ID."""
+        return await db.scalar(self._active().where(self.model.id == id))
+
+    async def get_multi(
+        self,
+        db: "AsyncSession",
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        search: Optional[str] = None,
+        search_fields: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        order_direction: str = "asc",
+        search_mode: str = "contains",
+    ) -> List[ModelType]:
+        """Get multiple records with filtering, search, and offset pagination."""
+        stmt = self._multi_statement(
+            skip,
+            limit,
+            filters,
+            search,
+            search_fields,
+            order_by,
+            order_direction,
+            search_mode,
+        )
+        return list((await db.scalars(stmt)).all())
+
+    async def get_page(
+        self,
+        db: "AsyncSession",
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        search: Optional[str] = None,
+        search_fields: Optional[List[str]] = None,
+        order_by: str = "created_at",
+        order_direction: str = "desc",
+        search_mode: str = "contains",
+    ) -> Page[ModelType]:
+        """Get one page with keyset pagination (see BaseCRUD.get_page)."""
+        stmt = self._page_statement(
+            limit,
+            cursor,
+            filters,
+            search,
+            search_fields,
+            order_by,
+            order_direction,
+            search_mode,
+        )
+        items = list((await db.scalars(stmt)).all())
+        return self._page(items, limit, order_by, order_direction)
+
+    async def create(
+        self,
+        db: "AsyncSession",
+        obj_in: CreateSchemaType,
+        created_by: Optional[str] = None,
+    ) -> ModelType:
+        """Create new record."""
+        obj_data = obj_in.dict() if hasattr(obj_in, "dict") else obj_in
+        if hasattr(self.model, "created_by"):
+            obj_data["created_by"] = created_by
+        db_obj = self.model(**obj_data)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        db: "AsyncSession",
+        db_obj: ModelType,
+        obj_in: UpdateSchemaType,
+        updated_by: Optional[str] = None,
+    ) -> ModelType:
+        """Update existing record."""
+        obj_data = (
+            obj_in.dict(exclude_unset=True) if hasattr(obj_in, "dict") else obj_in
+        )
+        obj_data["updated_by"] = updated_by
+
+        for field, value in obj_data.items():
+            if hasattr(db_obj, field):
+                setattr(db_obj, field, value)
+
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def delete(
+        self, db: "AsyncSession", id: int, deleted_by: Optional[str] = None
+    ) -> Optional[ModelType]:
+        """Soft delete record."""
+        db_obj = await self.get(db, id=id)
+        if db_obj:
+            db_obj.is_active = False
+            db_obj.updated_by = deleted_by
+            await db.commit()
+            await db.refresh(db_obj)
+        return db_obj
+
+    async def bulk_create(
+        self,
+        db: "AsyncSession",
+        objs_in: Sequence[CreateSchemaType],
+        created_by: Optional[str] = None,
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> List[ModelType]:
+        """Create many records with one INSERT ... RETURNING per batch."""
+        created = []
+        for batch in _batches(self._insert_rows(objs_in, created_by), batch_size):
+            created += (await db.scalars(self._bulk_insert_statement(), batch)).all()
+        await db.commit()
+        return created
+
+    async def bulk_update(
+        self,
+        db: "AsyncSession",
+        objs_in: Sequence[UpdateSchemaType],
+        updated_by: Optional[str] = None,
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> int:
+        """Update many records by primary key, one executemany per batch."""
+        rows = self._update_rows(objs_in, updated_by)
+        for batch in _batches(rows, batch_size):
+            await db.execute(update(self.model), batch)
+        await db.commit()
+        return len(rows)
+
+    async def upsert(
+        self,
+        db: "AsyncSession",
+        objs_in: Sequence[CreateSchemaType],
+        conflict_columns: Sequence[str] = ("uuid",),
+        update_columns: Optional[Sequence[str]] = None,
+        created_by: Optional[str] = None,
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> List[ModelType]:
+        """Insert or update many records (see BaseCRUD.upsert)."""
+        records = []
+        for batch in _batches(self._insert_rows(objs_in, created_by), batch_size):
+            stmt = self._upsert_statement(batch, conflict_columns, update_columns)
+            result = await db.scalars(
+                stmt, execution_options={"populate_existing": True}
+            )
+            records += result.all()
+        await db.commit()
+        return records
+
+    async def count(
+        self,
+        db: "AsyncSession",
+        filters: Optional[Dict[str, Any]] = None,
+        estimate: bool = False,
+    ) -> int:
+        """Count records with optional filters (see BaseCRUD.count)."""
+        if estimate:
+            planned = await db.run_sync(self._planned_rows, filters)
+            if planned is not None and planned >= EXACT_COUNT_THRESHOLD:
+                return planned
+        return await db.scalar(self._count_statement(filters))
+
+    async def exists(self, db: "AsyncSession", id: int) -> bool:
+        """Check if record exists."""
+        stmt = select(self.model.id).where(
+            self.model.id == id, self.model.is_active == True
+        )
+        return await db.scalar(stmt) is not None
+
+
 # Common CRUD operations utility functions
 def get_standard_filters(request_data: Dict[str, Any]) -> Dict[str, Any]:
     """Extract standard filters from request data."""
@@ -0,0 +1,298 @@
+"""
+Shared Async Database Sessions
+Pooled asyncpg engines with read/write routing and query instrumentation.
+"""
+
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from sqlalchemy import MetaData, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from ..config.base import DatabaseConfig
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text kept in a slow-query log line
+SLOW_QUERY_LOG_CHARS = 500
+
+
+def pool_limits(max_connections: int, workers: int) -> Tuple[int, int]:
+    """Split a service's connection budget into per-worker pool limits.
+
+    Every worker process has its own pool, so workers * (pool_size +
+    max_overflow) stays within max_connections. Two thirds of each share are
+    kept open; the rest is burst overflow. A worker needs at least one
+    connection, so with fewer connections than workers the budget cannot be
+    met and each worker gets exactly one. Returns (pool_size, max_overflow).
+    """
+    workers = max(1, workers)
+    if max_connections < workers:
+        logger.warning(
+            f"{workers} workers need at least {workers} database connections; "
+            f"max_connections is {max_connections}"
+        )
+    share = max(1, max_connections // workers)
+    pool_size = max(1, share * 2 // 3)
+    return pool_size, share - pool_size
+
+
+class DatabaseStats:
+    """Query timing and pool-wait counters for one engine."""
+
+    def __init__(self, slow_query_ms: float):
+        self.slow_query_ms = slow_query_ms
+        self.queries = 0
+        self.slow_queries = 0
+        self.query_ms_total = 0.0
+        self.query_ms_max = 0.0
+        self.checkouts = 0
+        self.pool_wait_ms_total = 0.0
+        self.pool_wait_ms_max = 0.0
+        self.pool_timeouts = 0
+
+    def record_query(self, statement: str, elapsed_ms: float):
+        self.queries += 1
+        self.query_ms_total += elapsed_ms
+        self.query_ms_max = max(self.query_ms_max, elapsed_ms)
+        if elapsed_ms >= self.slow_query_ms:
+            self.slow_queries += 1
+            logger.warning(
+                f"Slow query ({elapsed_ms:.1f} ms): "
+                f"{' '.join(statement.split())[:SLOW_QUERY_LOG_CHARS]}"
+            )
+
+    def record_checkout(self, wait_ms: float):
+        self.checkouts += 1
+        self.pool_wait_ms_total += wait_ms
+        self.pool_wait_ms_max = max(self.pool_wait_ms_max, wait_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "slow_queries": self.slow_queries,
+            "query_ms_avg": round(self.query_ms_total / max(1, self.queries), 2),
+            "query_ms_max": round(self.query_ms_max, 2),
+            "checkouts": self.checkouts,
+            "pool_wait_ms_avg": round(
+                self.pool_wait_ms_total / max(1, self.checkouts), 2
+            ),
+            "pool_wait_ms_max": round(self.pool_wait_ms_max, 2),
+            "pool_timeouts": self.pool_timeouts,
+        }
+
+
+def _instrument(engine: AsyncEngine, stats: DatabaseStats):
+    """Time every statement on the engine's connections."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        started = conn.info["query_started"].pop()
+        stats.record_query(statement, (time.perf_counter() - started) * 1000)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def create_pooled_engine(
+    url: str,
+    stats: DatabaseStats,
+    pool_size: int,
+    max_overflow: int,
+    pool_timeout: float = 10.0,
+    pool_recycle: int = 1800,
+    statement_cache_size: int = 500,
+    statement_timeout_ms: int = 30000,
+    application_name: str = "hms",
+    readonly: bool = False,
+    echo: bool = False,
+) -> AsyncEngine:
+    """Create an instrumented asyncpg engine.
+
+    statement_cache_size bounds the per-connection prepared statement cache;
+    set it to 0 behind PgBouncer in transaction pooling mode. Read-only
+    engines open every transaction READ ONLY, so a routed write fails fast.
+    """
+    server_settings = {
+        "application_name": application_name,
+        "statement_timeout": str(statement_timeout_ms),
+    }
+    if readonly:
+        server_settings["default_transaction_read_only"] = "on"
+    engine = create_async_engine(
+        url,
+        echo=echo,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=True,
+        connect_args={
+            "prepared_statement_cache_size": statement_cache_size,
+            "statement_cache_size": statement_cache_size,
+            "server_settings": server_settings,
+        },
+    )
+    _instrument(engine, stats)
+    return engine
+
+
+class AsyncDatabase:
+    """Async engines for one service: a writer and an optional read replica.
+
+    Reads routed through read sessions use the replica when one is configured
+    and fall back to the writer otherwise.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        read_url: Optional[str] = None,
+        application_name: str = "hms",
+        max_connections: int = 40,
+        workers: int = 1,
+        pool_timeout: float = 10.0,
+        pool_recycle: int = 1800,
+        statement_cache_size: int = 500,
+        statement_timeout_ms: int = 30000,
+        slow_query_ms: float = 250.0,
+        echo: bool = False,
+    ):
+        pool_size, max_overflow = pool_limits(max_connections, workers)
+        options = {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+            "pool_recycle": pool_recycle,
+            "statement_cache_size": statement_cache_size,
+            "statement_timeout_ms": statement_timeout_ms,
+            "application_name": application_name,
+            "echo": echo,
+        }
+        self.stats = DatabaseStats(slow_query_ms)
+        self.engine = create_pooled_engine(url, self.stats, **options)
+        if read_url and read_url != url:
+            self.read_stats = DatabaseStats(slow_query_ms)
+            self.read_engine = create_pooled_engine(
+                read_url, self.read_stats, readonly=True, **options
+            )
+        else:
+            self.read_stats = self.stats
+            self.read_engine = self.engine
+        self._sessions = async_sessionmaker(
+            self.engine, autoflush=False, expire_on_commit=False
+        )
+        self._read_sessions = async_sessionmaker(
+            self.read_engine, autoflush=False, expire_on_commit=False
+        )
+        logger.info(
+            f"Database pool for {application_name}: pool_size={pool_size}, "
+            f"max_overflow={max_overflow}, workers={workers}"
+        )
+
+    @classmethod
+    def from_config(
+        cls, config: DatabaseConfig, application_name: str, echo: bool = False
+    ) -> "AsyncDatabase":
+        """Build from DatabaseConfig (DB_* and WEB_CONCURRENCY settings)."""
+        return cls(
+            config.url_async,
+            read_url=config.url_async_read,
+            application_name=application_name,
+            max_connections=config.max_connections,
+            workers=config.workers,
+            pool_timeout=config.pool_timeout,
+            pool_recycle=config.pool_recycle,
+            statement_cache_size=config.statement_cache_size,
+            statement_timeout_ms=config.statement_timeout_ms,
+            slow_query_ms=config.slow_query_ms,
+            echo=echo,
+        )
+
+    @asynccontextmanager
+    async def session(self, readonly: bool = False) -> AsyncIterator[AsyncSession]:
+        """Open a session, rolling back if the block raises.
+
+        The connection is checked out up front so the time spent waiting on
+        the pool is measured and a pool timeout surfaces here.
+        """
+        factory = self._read_sessions if readonly else self._sessions
+        stats = self.read_stats if readonly else self.stats
+        async with factory() as session:
+            started = time.perf_counter()
+            try:
+                await session.connection()
+            except PoolTimeoutError:
+                stats.pool_timeouts += 1
+                logger.error("Timed out waiting for a database connection")
+                raise
+            stats.record_checkout((time.perf_counter() - started) * 1000)
+            try:
+                yield session
+            except Exception:
+                await session.rollback()
+                raise
+
+    async def get_session(self) -> AsyncIterator[AsyncSession]:
+        """FastAPI dependency yielding a read/write session."""
+        async with self.session() as session:
+            yield session
+
+    async def get_read_session(self) -> AsyncIterator[AsyncSession]:
+        """FastAPI dependency yielding a session on the read replica."""
+        async with self.session(readonly=True) as session:
+            yield session
+
+    async def create_all(self, metadata: MetaData):
+        """Create tables for metadata on the writer."""
+        async with self.engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+
+    async def health_check(self) -> bool:
+        try:
+            async with self.session() as session:
+                await session.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.error(f"Database health check failed: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"writer": self._engine_stats(self.engine, self.stats)}
+        if self.read_engine is not self.engine:
+            stats["reader"] = self._engine_stats(self.read_engine, self.read_stats)
+        return stats
+
+    @staticmethod
+    def _engine_stats(engine: AsyncEngine, stats: DatabaseStats) -> Dict[str, Any]:
+        pool = engine.pool
+        return {
+            **stats.snapshot(),
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+
+    async def dispose(self):
+        await self.engine.dispose()
+        if self.read_engine is not self.engine:
+            await self.read_engine.dispose()
@@ -0,0 +1,4 @@
+"""
+Shared Patient Feature Store
+Online (Redis) and offline (Parquet) patient features materialised from ingestion events.
+"""
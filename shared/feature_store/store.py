@@ -0,0 +1,374 @@
+"""
+Patient Feature Store
+Materialises patient features incrementally from ingestion events into an
+online Redis tier for low-latency lookup and an offline Parquet tier for
+point-in-time correct training sets.
+"""
+
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ENTITY_COLUMN = "patient_id"
+TIMESTAMP_COLUMN = "event_timestamp"
+CREATED_COLUMN = "created_timestamp"
+
+# Feature names follow the column vocabulary of FeatureEngineeringPipeline so
+# stored features can be fed straight into a fitted transform plan.
+VITAL_SIGN_FEATURES = {
+    "heart_rate": "heart_rate",
+    "blood_pressure_systolic": "systolic_bp",
+    "blood_pressure_diastolic": "diastolic_bp",
+    "temperature": "temperature",
+    "oxygen_saturation": "oxygen_saturation",
+    "respiratory_rate": "respiratory_rate",
+    "pain_score": "pain_score",
+}
+
+LAB_FEATURE_ALIASES = {
+    "creatinine": "creatinine",
+    "sodium": "sodium",
+    "na": "sodium",
+    "potassium": "potassium",
+    "k": "potassium",
+    "hemoglobin": "hemoglobin",
+    "hgb": "hemoglobin",
+    "glucose": "glucose",
+    "white_blood_cell": "white_blood_cell",
+    "white_blood_cell_count": "white_blood_cell",
+    "wbc": "white_blood_cell",
+    "platelet": "platelet",
+    "platelets": "platelet",
+    "albumin": "albumin",
+    "bilirubin": "bilirubin",
+    "ast": "ast",
+    "alt": "alt",
+}
+
+# Each feature carries its own observation time and is only overwritten by an
+# event that is not older, so late or replayed events cannot roll it back.
+SET_IF_NEWER_SCRIPT = """
+local written = 0
+for i = 2, #ARGV, 2 do
+    local ts_field = '__ts:' .. ARGV[i]
+    local current = redis.call('HGET', KEYS[1], ts_field)
+    if not current or tonumber(current) <= tonumber(ARGV[1]) then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1], ts_field, ARGV[1])
+        written = written + 1
+    end
+end
+return written
+"""
+
+
+def _vital_sign_features(event: Dict) -> Dict[str, Any]:
+    data = event.get("data") or {}
+    return {
+        feature: data[source]
+        for source, feature in VITAL_SIGN_FEATURES.items()
+        if data.get(source) is not None
+    }
+
+
+def _lab_result_features(event: Dict) -> Dict[str, Any]:
+    data = event.get("data") or {}
+    test_name = str(data.get("test_name", "")).strip().lower().replace(" ", "_")
+    feature = LAB_FEATURE_ALIASES.get(test_name)
+    if feature is None or data.get("value") is None:
+        return {}
+    return {feature: data["value"]}
+
+
+def _patient_profile_features(event: Dict) -> Dict[str, Any]:
+    data = event.get("data") or {}
+    return {
+        key: data[key]
+        for key in (
+            "age",
+            "gender",
+            "admission_status",
+            "ward",
+            "attending_physician",
+        )
+        if key in data
+    }
+
+
+@dataclass(frozen=True)
+class FeatureView:
+    """A named group of features materialised from one or more event types."""
+
+    name: str
+    event_types: Sequence[str]
+    features: Sequence[str]
+    materialize: Callable[[Dict], Dict[str, Any]]
+    ttl: timedelta = timedelta(hours=24)
+
+
+DEFAULT_FEATURE_VIEWS = (
+    FeatureView(
+        name="vital_signs",
+        event_types=("vital_signs",),
+        features=tuple(VITAL_SIGN_FEATURES.values()),
+        materialize=_vital_sign_features,
+        ttl=timedelta(hours=6),
+    ),
+    FeatureView(
+        name="lab_results",
+        event_types=("lab_results",),
+        features=tuple(sorted(set(LAB_FEATURE_ALIASES.values()))),
+        materialize=_lab_result_features,
+        ttl=timedelta(days=3),
+    ),
+    FeatureView(
+        name="patient_profile",
+        event_types=("patient_profile",),
+        features=("age", "gender", "admission_status", "ward", "attending_physician"),
+        materialize=_patient_profile_features,
+        ttl=timedelta(days=30),
+    ),
+)
+
+
+class PatientFeatureStore:
+    """Online/offline patient feature store keyed by ``patient_id``."""
+
+    def __init__(
+        self,
+        redis_client,
+        offline_path: str,
+        views: Iterable[FeatureView] = DEFAULT_FEATURE_VIEWS,
+        key_prefix: str = "fs:patient",
+        offline_flush_rows: int = 1000,
+    ):
+        self.redis = redis_client
+        self.offline_path = offline_path
+        self.key_prefix = key_prefix
+        self.offline_flush_rows = offline_flush_rows
+        self.views = {view.name: view for view in views}
+        self._views_by_event = {}
+        owners = {}
+        for view in self.views.values():
+            for feature in view.features:
+                if feature in owners:
+                    raise ValueError(
+                        f"Feature {feature} is defined by both {owners[feature]} "
+                        f"and {view.name}"
+                    )
+                owners[feature] = view.name
+            for event_type in view.event_types:
+                self._views_by_event.setdefault(event_type, []).append(view)
+        self._offline_rows = {name: [] for name in self.views}
+        self._online_ttl = int(
+            max(view.ttl for view in self.views.values()).total_seconds()
+        )
+        self._set_if_newer = redis_client.register_script(SET_IF_NEWER_SCRIPT)
+
+    def online_key(self, patient_id: str) -> str:
+        return f"{self.key_prefix}:{patient_id}"
+
+    @staticmethod
+    def _timestamp(value) -> datetime:
+        if value is None:
+            return datetime.utcnow()
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        # Stored times are naive UTC
+        if value.tzinfo:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def ingest(self, event: Dict) -> int:
+        """Materialise one ingestion event; returns the number of views updated."""
+        return self.ingest_many([event])
+
+    def ingest_many(self, events: Iterable[Dict]) -> int:
+        """Materialise a batch of events with one Redis round trip."""
+        pipeline = self.redis.pipeline(transaction=False)
+        updated = 0
+        for event in events:
+            patient_id = event.get(ENTITY_COLUMN)
+            views = self._views_by_event.get(event.get("type"), ())
+            if patient_id is None or not views:
+                continue
+            event_time = self._timestamp(event.get("timestamp"))
+            for view in views:
+                features = view.materialize(event)
+                if not features:
+                    continue
+                self._write_online(pipeline, view, str(patient_id), event_time, features)
+                self._buffer_offline(view, str(patient_id), event_time, features)
+                updated += 1
+        pipeline.execute()
+        for name, rows in self._offline_rows.items():
+            if len(rows) >= self.offline_flush_rows:
+                self._flush_view(name)
+        return updated
+
+    def put_online(self, view_name: str, patient_id: str, features: Dict, timestamp=None):
+        """Write features for a view directly, e.g. after a source-of-truth lookup."""
+        self.put_online_many(view_name, {patient_id: features}, timestamp)
+
+    def put_online_many(self, view_name: str, rows: Dict[str, Dict], timestamp=None):
+        """Write one view's features for many patients in one round trip."""
+        view = self.views[view_name]
+        event_time = self._timestamp(timestamp)
+        pipeline = self.redis.pipeline(transaction=False)
+        for patient_id, features in rows.items():
+            self._write_online(pipeline, view, str(patient_id), event_time, features)
+        pipeline.execute()
+
+    def _write_online(self, pipeline, view, patient_id, event_time, features):
+        args = [event_time.timestamp()]
+        for feature, value in features.items():
+            if feature in view.features:
+                args.extend([feature, json.dumps(value, default=str)])
+        key = self.online_key(patient_id)
+        self._set_if_newer(keys=[key], args=args, client=pipeline)
+        pipeline.expire(key, self._online_ttl)
+
+    def get_online_features(
+        self,
+        patient_ids: Sequence[str],
+        features: Optional[Sequence[str]] = None,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch current features for many patients in one round trip.
+
+        Features not observed within their view's TTL are dropped.
+        """
+        now = now or datetime.utcnow()
+        pipeline = self.redis.pipeline(transaction=False)
+        for patient_id in patient_ids:
+            pipeline.hgetall(self.online_key(str(patient_id)))
+        wanted = set(features) if features else None
+        results = {}
+        for patient_id, raw in zip(patient_ids, pipeline.execute()):
+            raw = {
+                (k.decode() if isinstance(k, bytes) else k): v for k, v in raw.items()
+            }
+            values = {}
+            for view in self.views.values():
+                for feature in view.features:
+                    observed = raw.get(f"__ts:{feature}")
+                    if observed is None or feature not in raw:
+                        continue
+                    if wanted is not None and feature not in wanted:
+                        continue
+                    if now - datetime.utcfromtimestamp(float(observed)) > view.ttl:
+                        continue
+                    values[feature] = json.loads(raw[feature])
+            results[patient_id] = values
+        return results
+
+    def _buffer_offline(self, view, patient_id, event_time, features):
+        row = {feature: features.get(feature) for feature in view.features}
+        row[ENTITY_COLUMN] = patient_id
+        row[TIMESTAMP_COLUMN] = event_time
+        row[CREATED_COLUMN] = datetime.utcnow()
+        self._offline_rows[view.name].append(row)
+
+    def flush_offline(self) -> int:
+        """Write all buffered offline rows to Parquet; returns rows written."""
+        return sum(self._flush_view(name) for name in self.views)
+
+    def _flush_view(self, view_name: str) -> int:
+        rows = self._offline_rows[view_name]
+        if not rows:
+            return 0
+        self._offline_rows[view_name] = []
+        frame = pd.DataFrame(rows)
+        frame[TIMESTAMP_COLUMN] = pd.to_datetime(frame[TIMESTAMP_COLUMN])
+        for day, partition in frame.groupby(frame[TIMESTAMP_COLUMN].dt.date):
+            directory = os.path.join(
+                self.offline_path, view_name, f"date={day.isoformat()}"
+            )
+            os.makedirs(directory, exist_ok=True)
+            partition.to_parquet(
+                os.path.join(directory, f"part-{uuid.uuid4().hex}.parquet"),
+                index=False,
+            )
+        logger.debug(f"Flushed {len(rows)} offline rows for {view_name}")
+        return len(rows)
+
+    def _read_offline(self, view: FeatureView, start: datetime, end: datetime):
+        view_path = os.path.join(self.offline_path, view.name)
+        files = []
+        day = start.date()
+        while day <= end.date():
+            directory = os.path.join(view_path, f"date={day.isoformat()}")
+            if os.path.isdir(directory):
+                files.extend(
+                    os.path.join(directory, name)
+                    for name in sorted(os.listdir(directory))
+                    if name.endswith(".parquet")
+                )
+            day += timedelta(days=1)
+        columns = [ENTITY_COLUMN, TIMESTAMP_COLUMN, CREATED_COLUMN, *view.features]
+        if not files:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(
+            [pd.read_parquet(path, columns=columns) for path in files],
+            ignore_index=True,
+        )
+
+    def get_historical_features(
+        self, entity_df: pd.DataFrame, view_names: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """Point-in-time join of feature views onto ``entity_df``.
+
+        ``entity_df`` needs ``patient_id`` and ``event_timestamp`` columns; each
+        row receives, per feature, the latest value observed at or before its
+        timestamp, never values from the future. Rows are matched within the
+        view's TTL of the most recent event for that patient.
+        """
+        result = entity_df.copy()
+        result[ENTITY_COLUMN] = result[ENTITY_COLUMN].astype(str)
+        result[TIMESTAMP_COLUMN] = pd.to_datetime(result[TIMESTAMP_COLUMN])
+        result = result.sort_values(TIMESTAMP_COLUMN, kind="mergesort")
+        if result.empty:
+            return result.reset_index(drop=True)
+        start = result[TIMESTAMP_COLUMN].min().to_pydatetime()
+        end = result[TIMESTAMP_COLUMN].max().to_pydatetime()
+        for name in view_names or list(self.views):
+            view = self.views[name]
+            history = self._read_offline(view, start - view.ttl, end)
+            history[ENTITY_COLUMN] = history[ENTITY_COLUMN].astype(str)
+            history[TIMESTAMP_COLUMN] = pd.to_datetime(history[TIMESTAMP_COLUMN])
+            # Rows sharing a timestamp (e.g. each test of a lab panel) are
+            # merged, keeping the latest written non-null value per feature.
+            history = (
+                history.sort_values(
+                    [TIMESTAMP_COLUMN, CREATED_COLUMN], kind="mergesort"
+                )
+                .groupby([ENTITY_COLUMN, TIMESTAMP_COLUMN], sort=False)
+                .last()
+                .reset_index()
+            )
+            history = history.drop(columns=[CREATED_COLUMN])
+            # Events carry only the features they observed; carry earlier
+            # values forward so each row holds the latest known value of each.
+            history = history.sort_values(
+                [ENTITY_COLUMN, TIMESTAMP_COLUMN], kind="mergesort"
+            )
+            history[list(view.features)] = history.groupby(ENTITY_COLUMN)[
+                list(view.features)
+            ].ffill()
+            history = history.sort_values(TIMESTAMP_COLUMN, kind="mergesort")
+            result = pd.merge_asof(
+                result,
+                history,
+                on=TIMESTAMP_COLUMN,
+                by=ENTITY_COLUMN,
+                direction="backward",
+                tolerance=pd.Timedelta(view.ttl),
+            )
+        return result.reset_index(drop=True)
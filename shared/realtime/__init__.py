@@ -0,0 +1,4 @@
+"""
+Shared Real-time Fan-out
+Topic-based WebSocket delivery by patient, ward and event type with per-connection backpressure.
+"""
@@ -0,0 +1,440 @@
+"""
+WebSocket Fan-out Hub
+Routes each message to the connections subscribed to its patient, ward or
+event type. A message is serialised once and the same string is queued for
+every subscriber; each connection drains its own bounded queue, so a slow
+client only ever delays itself. Hubs in other processes are reached through
+Redis pub/sub.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import uuid
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = "*"
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_SEND_TIMEOUT = 5.0
+DEFAULT_CHANNEL = "hms:fanout"
+# Close code sent to clients that cannot keep up ("try again later").
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def _serialise(message: Any) -> str:
+    return json.dumps(message, default=str)
+
+
+@dataclass(frozen=True)
+class Envelope:
+    """A serialised message plus the routing fields it is matched on.
+
+    Messages that share a ``coalesce_key`` are snapshots of the same state
+    (e.g. a patient's latest vitals): a queued one is replaced by a newer one
+    instead of both being sent, and they are the first to go on overflow.
+    """
+
+    payload: str
+    event_type: str
+    patient_id: Optional[str] = None
+    ward: Optional[str] = None
+    coalesce_key: Optional[str] = None
+
+    def routing_keys(self) -> List[str]:
+        keys = [f"event:{self.event_type}", WILDCARD]
+        if self.patient_id is not None:
+            keys.append(f"patient:{self.patient_id}")
+        if self.ward is not None:
+            keys.append(f"ward:{self.ward}")
+        return keys
+
+    def encode(self, origin: str) -> str:
+        """Redis wire format: a one-line JSON header, then the payload as-is."""
+        header = json.dumps(
+            {
+                "origin": origin,
+                "event_type": self.event_type,
+                "patient_id": self.patient_id,
+                "ward": self.ward,
+                "coalesce_key": self.coalesce_key,
+            }
+        )
+        return f"{header}\n{self.payload}"
+
+    @classmethod
+    def decode(cls, raw: Any) -> Tuple[str, "Envelope"]:
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        header, _, payload = raw.partition("\n")
+        fields = json.loads(header)
+        origin = fields.pop("origin")
+        return origin, cls(payload=payload, **fields)
+
+
+@dataclass
+class SubscriptionFilter:
+    """Empty sets match everything; non-empty dimensions must all match."""
+
+    patients: Set[str] = field(default_factory=set)
+    wards: Set[str] = field(default_factory=set)
+    event_types: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_message(cls, message: Dict[str, Any]) -> "SubscriptionFilter":
+        """Build from a client ``subscribe`` message or query parameters."""
+
+        def values(*names: str) -> Set[str]:
+            collected: Set[str] = set()
+            for name in names:
+                value = message.get(name)
+                if value is None:
+                    continue
+                if isinstance(value, (list, tuple, set)):
+                    collected.update(str(item) for item in value)
+                else:
+                    collected.add(str(value))
+            return collected
+
+        return cls(
+            patients=values("patients", "patient_id", "patient"),
+            wards=values("wards", "ward"),
+            event_types=values("event_types", "events", "event_type"),
+        )
+
+    def matches(self, envelope: Envelope) -> bool:
+        return (
+            (not self.patients or envelope.patient_id in self.patients)
+            and (not self.wards or envelope.ward in self.wards)
+            and (not self.event_types or envelope.event_type in self.event_types)
+        )
+
+    def index_keys(self) -> List[str]:
+        """The narrowest dimension is enough to find every candidate envelope."""
+        if self.patients:
+            return [f"patient:{patient}" for patient in self.patients]
+        if self.wards:
+            return [f"ward:{ward}" for ward in self.wards]
+        if self.event_types:
+            return [f"event:{event_type}" for event_type in self.event_types]
+        return [WILDCARD]
+
+
+class Subscription:
+    """One connection's filter, bounded send queue and sender task"""
+
+    def __init__(
+        self,
+        hub: "FanoutHub",
+        websocket: Any,
+        subscription_filter: SubscriptionFilter,
+        max_queue: int,
+        overflow_policy: str,
+        send_timeout: float,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.hub = hub
+        self.websocket = websocket
+        self.filter = subscription_filter
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        # Coalescable messages are keyed by their coalesce key, the rest by a
+        # sequence number, so replacing a snapshot keeps its queue position.
+        self.queue: "OrderedDict[Any, str]" = OrderedDict()
+        self.closed = False
+        self.close_code: Optional[int] = None
+        self.stats = {"sent": 0, "coalesced": 0, "dropped": 0}
+        self._sequence = itertools.count()
+        self._ready = asyncio.Event()
+        self._sender: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._sender = asyncio.create_task(self._run())
+
+    def offer(self, envelope: Envelope) -> bool:
+        """Queue ``envelope`` without blocking; False if it was not queued."""
+        if self.closed:
+            return False
+        key = envelope.coalesce_key
+        if key is not None and key in self.queue:
+            self.queue[key] = envelope.payload
+            self.stats["coalesced"] += 1
+            return True
+        if len(self.queue) >= self.max_queue and not self._make_room():
+            return False
+        self.queue[key if key is not None else next(self._sequence)] = (
+            envelope.payload
+        )
+        self._ready.set()
+        return True
+
+    def _make_room(self) -> bool:
+        # State snapshots are superseded by the next one anyway, so they are
+        # dropped before any event message is.
+        snapshot = next((key for key in self.queue if isinstance(key, str)), None)
+        if snapshot is not None:
+            del self.queue[snapshot]
+            self.stats["dropped"] += 1
+            return True
+        if self.overflow_policy == "drop_oldest":
+            self.queue.popitem(last=False)
+            self.stats["dropped"] += 1
+            return True
+        if self.overflow_policy == "drop_newest":
+            self.stats["dropped"] += 1
+            return False
+        logger.warning("Disconnecting WebSocket client whose send queue is full")
+        self.close(SLOW_CONSUMER_CLOSE_CODE)
+        return False
+
+    def close(self, close_code: Optional[int] = None):
+        if self.closed:
+            return
+        self.closed = True
+        self.close_code = close_code
+        self.stats["dropped"] += len(self.queue)
+        self.queue.clear()
+        self._ready.set()
+
+    async def _run(self):
+        try:
+            while not self.closed:
+                if not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                _, payload = self.queue.popitem(last=False)
+                await asyncio.wait_for(
+                    self.websocket.send_text(payload), self.send_timeout
+                )
+                self.stats["sent"] += 1
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"WebSocket send exceeded {self.send_timeout}s; closing slow client"
+            )
+            self.close_code = SLOW_CONSUMER_CLOSE_CODE
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.debug(f"WebSocket send failed: {e}")
+        finally:
+            if self.close_code is not None:
+                try:
+                    await self.websocket.close(code=self.close_code)
+                except Exception:
+                    pass
+            self.hub._remove(self)
+
+
+class FanoutHub:
+    """
+    Topic-based WebSocket fan-out with per-connection backpressure.
+
+    Publishing never awaits a client: the payload is serialised once, offered
+    to each matching subscription's queue and, if a Redis client is given,
+    published once to ``channel`` for the hubs in other processes.
+    """
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        channel: str = DEFAULT_CHANNEL,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+        overflow_policy: str = "drop_oldest",
+        send_timeout: float = DEFAULT_SEND_TIMEOUT,
+        serializer: Callable[[Any], str] = _serialise,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.redis_client = redis_client
+        self.channel = channel
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.serializer = serializer
+        self.node_id = uuid.uuid4().hex
+        self.subscriptions: Dict[Any, Subscription] = {}
+        self._index: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._listener: Optional[asyncio.Task] = None
+        self.stats = {
+            "published": 0,
+            "remote_received": 0,
+            "delivered": 0,
+            "sent": 0,
+            "coalesced": 0,
+            "dropped": 0,
+        }
+
+    def start(self):
+        """Start the Redis listener (needs a running event loop)"""
+        if self.redis_client is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        for websocket in list(self.subscriptions):
+            self.disconnect(websocket)
+
+    async def connect(
+        self,
+        websocket: Any,
+        subscription_filter: Optional[SubscriptionFilter] = None,
+        **options,
+    ) -> Subscription:
+        await websocket.accept()
+        return self.subscribe(websocket, subscription_filter, **options)
+
+    def subscribe(
+        self,
+        websocket: Any,
+        subscription_filter: Optional[SubscriptionFilter] = None,
+        max_queue: Optional[int] = None,
+        overflow_policy: Optional[str] = None,
+    ) -> Subscription:
+        self.disconnect(websocket)
+        subscription = Subscription(
+            self,
+            websocket,
+            subscription_filter or SubscriptionFilter(),
+            max_queue or self.max_queue,
+            overflow_policy or self.overflow_policy,
+            self.send_timeout,
+        )
+        self.subscriptions[websocket] = subscription
+        self._add_to_index(subscription)
+        subscription.start()
+        return subscription
+
+    def update_filter(self, websocket: Any, subscription_filter: SubscriptionFilter):
+        subscription = self.subscriptions.get(websocket)
+        if subscription is None:
+            return
+        self._remove_from_index(subscription)
+        subscription.filter = subscription_filter
+        self._add_to_index(subscription)
+
+    def disconnect(self, websocket: Any):
+        subscription = self.subscriptions.pop(websocket, None)
+        if subscription is None:
+            return
+        self._remove_from_index(subscription)
+        subscription.close()
+        for name in ("sent", "coalesced", "dropped"):
+            self.stats[name] += subscription.stats[name]
+
+    def _remove(self, subscription: Subscription):
+        if self.subscriptions.get(subscription.websocket) is subscription:
+            self.disconnect(subscription.websocket)
+
+    def _add_to_index(self, subscription: Subscription):
+        for key in subscription.filter.index_keys():
+            self._index[key].add(subscription)
+
+    def _remove_from_index(self, subscription: Subscription):
+        for key in subscription.filter.index_keys():
+            subscribers = self._index.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._index[key]
+
+    def envelope(
+        self,
+        message: Any,
+        event_type: str,
+        patient_id: Optional[str] = None,
+        ward: Optional[str] = None,
+        coalesce_key: Optional[str] = None,
+    ) -> Envelope:
+        payload = message if isinstance(message, str) else self.serializer(message)
+        return Envelope(
+            payload,
+            event_type,
+            None if patient_id is None else str(patient_id),
+            None if ward is None else str(ward),
+            coalesce_key,
+        )
+
+    async def publish(self, message: Any, event_type: str, **routing) -> int:
+        """Fan ``message`` out here and to other processes; returns local count"""
+        return await self.publish_many([self.envelope(message, event_type, **routing)])
+
+    async def publish_many(self, envelopes: Iterable[Envelope]) -> int:
+        envelopes = list(envelopes)
+        delivered = sum(self.deliver(envelope) for envelope in envelopes)
+        self.stats["published"] += len(envelopes)
+        if self.redis_client is not None and envelopes:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for envelope in envelopes:
+                pipe.publish(self.channel, envelope.encode(self.node_id))
+            try:
+                await pipe.execute()
+            except Exception as e:
+                logger.error(f"Error publishing fan-out messages to Redis: {e}")
+        return delivered
+
+    def send_personal(self, websocket: Any, message: Any) -> bool:
+        """Queue a message for one connection only"""
+        subscription = self.subscriptions.get(websocket)
+        if subscription is None:
+            return False
+        return subscription.offer(self.envelope(message, "direct"))
+
+    def deliver(self, envelope: Envelope) -> int:
+        candidates: Set[Subscription] = set()
+        for key in envelope.routing_keys():
+            candidates.update(self._index.get(key, ()))
+        delivered = 0
+        for subscription in candidates:
+            if subscription.filter.matches(envelope) and subscription.offer(envelope):
+                delivered += 1
+        self.stats["delivered"] += delivered
+        return delivered
+
+    async def _listen(self):
+        while True:
+            pubsub = self.redis_client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    origin, envelope = Envelope.decode(message["data"])
+                    if origin == self.node_id:
+                        continue
+                    self.stats["remote_received"] += 1
+                    self.deliver(envelope)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Fan-out Redis listener error: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        for subscription in self.subscriptions.values():
+            for name in ("sent", "coalesced", "dropped"):
+                stats[name] += subscription.stats[name]
+        stats.update(
+            {
+                "connections": len(self.subscriptions),
+                "queued": sum(len(s.queue) for s in self.subscriptions.values()),
+                "index_keys": len(self._index),
+            }
+        )
+        return stats
@@ -9,12 +9,13 @@
 
 import uvicorn
 from fastapi import Depends, FastAPI, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..api.base import BaseServiceApp, create_error_response, create_success_response
 from ..config.base import BaseConfig, get_config
 from ..database.base import Base, HMSBaseModel
-from ..database.crud import BaseCRUD
+from ..database.crud import AsyncBaseCRUD, BaseCRUD
+from ..database.session import AsyncDatabase
 
 
 class BaseServiceTemplate:
@@ -61,20 +62,26 @@ def __init__(
         self._add_custom_routes()
 
     def _setup_database(self):
-        """Setup database connection and session."""
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-
-        self.engine = create_engine(
-            self.config.get_database_url(), echo=self.config.debug
-        )
-        self.SessionLocal = sessionmaker(
-            autocommit=False, autoflush=False, bind=self.engine
+        """Setup the async database engines and session dependencies."""
+        self.database = AsyncDatabase.from_config(
+            self.config.database,
+            application_name=self.service_name,
+            echo=self.config.debug,
         )
+        # FastAPI dependencies for custom routes
+        self.get_db = self.database.get_session
+        self.get_read_db = self.database.get_read_session
+
+        app = self.service_app.get_app()
+
+        @app.on_event("startup")
+        async def create_tables():
+            if self.database_model:
+                await self.database.create_all(Base.metadata)
 
-        # Create tables
-        if self.database_model:
-            Base.metadata.create_all(bind=self.engine)
+        @app.on_event("shutdown")
+        async def close_database():
+            await self.database.dispose()
 
     def _setup_logging(self):
         """Setup standardized logging."""
@@ -96,78 +103,89 @@ def _add_custom_routes(self):
         if self.database_model and self.crud_class:
             self._add_crud_routes(app)
 
+    async def _crud_call(self, db: AsyncSession, method: str, *args, **kwargs):
+        """Call a CRUD method without blocking the event loop.
+
+        Synchronous BaseCRUD classes run unchanged on the async connection via
+        run_sync; AsyncBaseCRUD methods are awaited directly.
+        """
+        crud = self.crud_class(self.database_model)
+        if isinstance(crud, AsyncBaseCRUD):
+            return await getattr(crud, method)(db, *args, **kwargs)
+        return await db.run_sync(getattr(crud, method), *args, **kwargs)
+
     def _add_crud_routes(self, app: FastAPI):
         """Add standard CRUD routes."""
         from ..database.crud import CreateSchemaType, UpdateSchemaType
 
-        # Dependency to get database session
-        def get_db():
-            db = self.SessionLocal()
-            try:
-                yield db
-            finally:
-                db.close()
-
         # CRUD routes
         @app.get(f"/{self.database_model.__tablename__.lower()}", response_model=list)
         async def list_items(
-            skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            db: AsyncSession = Depends(self.get_read_db),
         ):
-            """List items with pagination."""
-            crud = self.crud_class(self.database_model)
-            items = crud.get_multi(db, skip=skip, limit=limit)
-            return create_success_response(items)
+            """List items with keyset pagination; skip falls back to offsets."""
+            if skip:
+                items = await self._crud_call(db, "get_multi", skip=skip, limit=limit)
+                return create_success_response(items)
+            try:
+                page = await self._crud_call(db, "get_page", limit=limit, cursor=cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return create_success_response(
+                page.items, metadata={"next_cursor": page.next_cursor}
+            )
 
         @app.get(f"/{self.database_model.__tablename__.lower()}/{{item_id}}")
-        async def get_item(item_id: int, db: Session = Depends(get_db)):
+        async def get_item(item_id: int, db: AsyncSession = Depends(self.get_read_db)):
             """Get single item by ID."""
-            crud = self.crud_class(self.database_model)
-            item = crud.get(db, item_id)
+            item = await self._crud_call(db, "get", item_id)
             if not item:
                 raise HTTPException(status_code=404, detail="Item not found")
             return create_success_response(item)
 
         @app.post(f"/{self.database_model.__tablename__.lower()}", status_code=201)
         async def create_item(
-            item_data: CreateSchemaType, db: Session = Depends(get_db)
+            item_data: CreateSchemaType, db: AsyncSession = Depends(self.get_db)
         ):
             """Create new item."""
-            crud = self.crud_class(self.database_model)
-            item = crud.create(db, item_data)
+            item = await self._crud_call(db, "create", item_data)
             return create_success_response(item, message="Item created successfully")
 
         @app.put(f"/{self.database_model.__tablename__.lower()}/{{item_id}}")
         async def update_item(
-            item_id: int, item_data: UpdateSchemaType, db: Session = Depends(get_db)
+            item_id: int,
+            item_data: UpdateSchemaType,
+            db: AsyncSession = Depends(self.get_db),
         ):
             """Update existing item."""
-            crud = self.crud_class(self.database_model)
-            db_item = crud.get(db, item_id)
+            db_item = await self._crud_call(db, "get", item_id)
             if not db_item:
                 raise HTTPException(status_code=404, detail="Item not found")
-            item = crud.update(db, db_item, item_data)
+            item = await self._crud_call(db, "update", db_item, item_data)
             return create_success_response(item, message="Item updated successfully")
 
         @app.delete(f"/{self.database_model.__tablename__.lower()}/{{item_id}}")
-        async def delete_item(item_id: int, db: Session = Depends(get_db)):
+        async def delete_item(item_id: int, db: AsyncSession = Depends(self.get_db)):
             """Delete item."""
-            crud = self.crud_class(self.database_model)
-            item = crud.delete(db, item_id)
+            item = await self._crud_call(db, "delete", item_id)
             if not item:
                 raise HTTPException(status_code=404, detail="Item not found")
             return create_success_response(None, message="Item deleted successfully")
 
         # Analytics routes
         @app.get(f"/{self.database_model.__tablename__.lower()}/stats")
-        async def get_stats(db: Session = Depends(get_db)):
+        async def get_stats(db: AsyncSession = Depends(self.get_read_db)):
             """Get basic statistics."""
-            crud = self.crud_class(self.database_model)
-            total_count = crud.count(db)
+            total_count = await self._crud_call(db, "count", estimate=True)
             return create_success_response(
                 {
                     "total_count": total_count,
                     "service": self.service_name,
                     "timestamp": datetime.utcnow(),
+                    "database": self.database.get_stats(),
                 }
             )
 
@@ -192,7 +210,8 @@ def run(self, host: Optional[str] = None, port: Optional[int] = None):
 
         self.logger.info(f"Starting {self.service_name} service on {host}:{port}")
         self.logger.info(f"Environment: {self.config.environment.value}")
-        self.logger.info(f"Database URL: {self.config.get_database_url()}")
+        database_url = self.config.get_database_url(async_mode=True)
+        self.logger.info(f"Database URL: {database_url}")
 
         uvicorn.run(
             self.get_app(),
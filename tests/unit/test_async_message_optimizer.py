@@ -0,0 +1,363 @@
+"""
+Unit tests for the async message optimizer priority queue, and its stream
+consumer on fakeredis
+"""
+
+import asyncio
+import time
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from services.communication.async_message_optimizer import (
+    Message,
+    MessagePriority,
+    PriorityQueue,
+    QueueConfig,
+    RedisQueueBackend,
+    StreamConsumer,
+)
+
+TOPIC = "orders"
+STREAM = f"stream:{TOPIC}"
+
+
+def make_backend():
+    backend = RedisQueueBackend(
+        QueueConfig(name="test", compression="none", serializer="json"),
+        consumer_name="me",
+    )
+    backend.redis = FakeAsyncRedis()
+    return backend
+
+
+def make_consumer(backend, handler=None, **kwargs):
+    async def ignore(message):
+        pass
+
+    return StreamConsumer(backend, TOPIC, handler or ignore, **kwargs)
+
+
+async def publish(backend, *keys):
+    for key in keys:
+        await backend.publish(TOPIC, Message(id="", topic=TOPIC, data={"key": key}))
+
+
+async def create_group(backend):
+    await backend.redis.xgroup_create(STREAM, backend.group, id="0", mkstream=True)
+
+
+async def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def queued_message(priority, index=0):
+    return Message(
+        id=f"{priority.name}-{index}", topic=TOPIC, data={}, priority=priority
+    )
+
+
+class TestPriorityQueue:
+    def test_get_serves_lower_levels_when_critical_is_empty(self):
+        async def run():
+            queue = PriorityQueue(QueueConfig(name="test"))
+            await queue.put(queued_message(MessagePriority.LOW))
+            await queue.put(queued_message(MessagePriority.HIGH))
+            first = await asyncio.wait_for(queue.get(), 1.0)
+            second = await asyncio.wait_for(queue.get(), 1.0)
+            assert [first.priority, second.priority] == [
+                MessagePriority.HIGH,
+                MessagePriority.LOW,
+            ]
+            assert queue.size() == 0
+
+        asyncio.run(run())
+
+    def test_dequeue_shares_follow_weights_under_backlog(self):
+        async def run():
+            queue = PriorityQueue(QueueConfig(name="test"))
+            for priority in MessagePriority:
+                for index in range(150):
+                    await queue.put(queued_message(priority, index))
+            served = [queue.get_nowait().priority for _ in range(150)]
+            return {priority: served.count(priority) for priority in MessagePriority}
+
+        assert asyncio.run(run()) == {
+            MessagePriority.CRITICAL: 80,
+            MessagePriority.HIGH: 40,
+            MessagePriority.NORMAL: 20,
+            MessagePriority.LOW: 10,
+        }
+
+    def test_each_level_stays_fifo(self):
+        async def run():
+            queue = PriorityQueue(QueueConfig(name="test"))
+            for index in range(3):
+                await queue.put(queued_message(MessagePriority.CRITICAL, index))
+                await queue.put(queued_message(MessagePriority.LOW, index))
+            return [queue.get_nowait().id for _ in range(6)]
+
+        served = asyncio.run(run())
+        for level in ("CRITICAL", "LOW"):
+            assert [i for i in served if i.startswith(level)] == [
+                f"{level}-{index}" for index in range(3)
+            ]
+
+    def test_get_batch_returns_queued_messages_without_waiting(self):
+        async def run():
+            queue = PriorityQueue(QueueConfig(name="test", batch_timeout=5.0))
+            for index in range(3):
+                await queue.put(queued_message(MessagePriority.NORMAL, index))
+            started = time.monotonic()
+            batch = await queue.get_batch(batch_size=10)
+            return batch, time.monotonic() - started
+
+        batch, elapsed = asyncio.run(run())
+        assert [message.id for message in batch] == [f"NORMAL-{i}" for i in range(3)]
+        assert elapsed < 0.5
+
+    def test_get_batch_wakes_on_first_put(self):
+        async def run():
+            queue = PriorityQueue(QueueConfig(name="test", batch_timeout=5.0))
+            started = time.monotonic()
+            waiter = asyncio.create_task(queue.get_batch(batch_size=10))
+            await asyncio.sleep(0.05)
+            await queue.put(queued_message(MessagePriority.LOW))
+            batch = await asyncio.wait_for(waiter, 1.0)
+            return batch, time.monotonic() - started
+
+        batch, elapsed = asyncio.run(run())
+        assert [message.priority for message in batch] == [MessagePriority.LOW]
+        assert elapsed < 1.0
+
+    def test_get_batch_times_out_empty(self):
+        queue = PriorityQueue(QueueConfig(name="test"))
+        assert asyncio.run(queue.get_batch(timeout=0.01)) == []
+
+
+class TestPartitionedDispatch:
+    def test_hot_partition_does_not_take_every_slot(self):
+        async def run():
+            backend = make_backend()
+            release = asyncio.Event()
+            started = []
+
+            async def handler(message):
+                started.append(message.data["key"])
+                if message.data["key"] == "hot":
+                    await release.wait()
+
+            consumer = make_consumer(
+                backend,
+                handler,
+                concurrency=2,
+                partition_key=lambda message: message.data["key"],
+            )
+            await create_group(backend)
+            await publish(backend, "hot", "hot", "hot", "hot", "cold")
+            response = await backend.redis.xreadgroup(
+                backend.group, "me", {STREAM: ">"}
+            )
+            entries = response[0][1]
+            await asyncio.wait_for(consumer._dispatch(entries), 1.0)
+            await wait_until(lambda: "cold" in started)
+            assert started == ["hot", "cold"]
+            assert consumer.get_stats()["in_flight"] == 1
+            assert consumer.get_stats()["buffered"] == 4
+
+            release.set()
+            await wait_until(lambda: not consumer._handlers)
+            assert started == ["hot", "cold", "hot", "hot", "hot"]
+
+        asyncio.run(run())
+
+    def test_running_handlers_never_exceed_concurrency(self):
+        async def run():
+            backend = make_backend()
+            running, peak = 0, 0
+
+            async def handler(message):
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+            consumer = make_consumer(
+                backend,
+                handler,
+                concurrency=3,
+                max_buffered=4,
+                partition_key=lambda message: message.data["key"],
+            )
+            await create_group(backend)
+            await publish(backend, *(f"key{i}" for i in range(12)))
+            response = await backend.redis.xreadgroup(
+                backend.group, "me", {STREAM: ">"}
+            )
+            await consumer._dispatch(response[0][1])
+            await wait_until(lambda: not consumer._handlers)
+            assert peak == 3
+            assert consumer.metrics["handled"] == 12
+
+        asyncio.run(run())
+
+
+class TestClaim:
+    def test_own_busy_entries_are_not_reclaimed(self):
+        async def run():
+            backend = make_backend()
+            consumer = make_consumer(backend, claim_idle_ms=0, claim_interval=0)
+            await create_group(backend)
+            await publish(backend, "a", "b", "c")
+            response = await backend.redis.xreadgroup(
+                backend.group, "other", {STREAM: ">"}
+            )
+            ids = [entry_id for entry_id, _ in response[0][1]]
+            consumer._in_flight.add(ids[0])
+            consumer._acks.append(ids[1])
+            dispatched = []
+
+            async def dispatch(entries):
+                dispatched.extend(entry_id for entry_id, _ in entries)
+                consumer.running = False
+
+            consumer._dispatch = dispatch
+            consumer.running = True
+            await asyncio.wait_for(consumer._claim_loop(), 1.0)
+            assert dispatched == [ids[2]]
+            assert consumer.metrics["reclaimed"] == 1
+
+        asyncio.run(run())
+
+
+class FailingPipeline:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+    async def execute(self):
+        raise ConnectionError("redis unavailable")
+
+
+class TestAcksAndRetries:
+    def test_flush_acks_and_schedules_retries_together(self):
+        async def run():
+            backend = make_backend()
+            consumer = make_consumer(backend)
+            await create_group(backend)
+            await publish(backend, "a", "b")
+            response = await backend.redis.xreadgroup(
+                backend.group, "me", {STREAM: ">"}
+            )
+            first, second = [entry_id for entry_id, _ in response[0][1]]
+            message = Message(id=second, topic=TOPIC, data={"key": "b"}, delay=60)
+
+            consumer._ack(first)
+            await consumer._fail(second, message, "boom", "test")
+            await consumer._flush_acks()
+
+            pending = await backend.redis.xpending(STREAM, backend.group)
+            assert pending["pending"] == 0
+            scheduled = await backend.redis.zrange(
+                consumer.retry_key, 0, -1, withscores=True
+            )
+            assert len(scheduled) == 1
+            retry = backend.decode(scheduled[0][0])
+            assert (retry.retry_count, retry.headers["last_error"]) == (1, "boom")
+            assert scheduled[0][1] > time.time() + 50
+            assert consumer.metrics["acked"] == 2
+
+        asyncio.run(run())
+
+    def test_failed_flush_keeps_acks_and_retries(self):
+        async def run():
+            backend = make_backend()
+            consumer = make_consumer(backend)
+            consumer.redis = type(
+                "BrokenRedis", (), {"pipeline": lambda self, **kw: FailingPipeline()}
+            )()
+            consumer._ack(b"1-0")
+            consumer._retries[b"payload"] = 1.0
+            with pytest.raises(ConnectionError):
+                await consumer._flush_acks()
+            assert consumer._acks == [b"1-0"]
+            assert consumer._retries == {b"payload": 1.0}
+            assert consumer.metrics["acked"] == 0
+
+        asyncio.run(run())
+
+    def test_exhausted_retries_are_dead_lettered(self):
+        async def run():
+            backend = make_backend()
+            consumer = make_consumer(backend)
+            message = Message(
+                id=b"1-0", topic=TOPIC, data={}, retry_count=3, max_retries=3
+            )
+            await consumer._fail(b"1-0", message, "boom", "test")
+            assert consumer._retries == {}
+            assert consumer._acks == [b"1-0"]
+            dead = await backend.redis.xrange("stream:test_dlq")
+            assert len(dead) == 1
+            assert backend.decode(dead[0][1][b"message"]).headers[
+                "dead_letter_reason"
+            ] == "boom"
+
+        asyncio.run(run())
+
+    def test_release_script_moves_only_due_retries(self):
+        async def run():
+            backend = make_backend()
+            consumer = make_consumer(backend)
+            now = time.time()
+            await backend.redis.zadd(
+                consumer.retry_key,
+                {b"due-1": now - 5, b"due-2": now, b"later": now + 60},
+            )
+            released = await consumer._release_due(
+                keys=[consumer.retry_key, STREAM], args=[now, 100]
+            )
+            assert released == 2
+            entries = await backend.redis.xrange(STREAM)
+            assert [fields[b"message"] for _, fields in entries] == [
+                b"due-1",
+                b"due-2",
+            ]
+            assert await backend.redis.zrange(consumer.retry_key, 0, -1) == [b"later"]
+
+        asyncio.run(run())
+
+    def test_failed_message_is_redelivered_and_handled(self):
+        async def run():
+            backend = make_backend()
+            attempts = []
+
+            async def handler(message):
+                attempts.append(message.retry_count)
+                if len(attempts) == 1:
+                    raise ValueError("first attempt fails")
+
+            consumer = make_consumer(
+                backend, handler, ack_interval=0.01, retry_poll_interval=0.01
+            )
+            await backend.publish(
+                TOPIC, Message(id="", topic=TOPIC, data={}, delay=0.01)
+            )
+            runner = asyncio.create_task(consumer.run())
+            await wait_until(lambda: consumer.metrics["handled"] == 1)
+            await consumer.stop()
+            await runner
+            assert attempts == [0, 1]
+            assert consumer.metrics["retried"] == 1
+            pending = await backend.redis.xpending(STREAM, backend.group)
+            assert pending["pending"] == 0
+
+        asyncio.run(run())
@@ -0,0 +1,141 @@
+"""
+Unit tests for the shared keyset pagination and bulk CRUD helpers on SQLite
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Column, String, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from shared.database.base import Base, BaseAuditMixin, HMSBaseModel
+from shared.database.crud import BaseCRUD, encode_cursor
+
+
+class CrudItem(HMSBaseModel, BaseAuditMixin):
+    __tablename__ = "crud_test_items"
+
+    category = Column(String(20))
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[CrudItem.__table__])
+    session = sessionmaker(engine, expire_on_commit=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def crud():
+    return BaseCRUD(CrudItem)
+
+
+def read_all_pages(crud, db, limit, **kwargs):
+    seen, cursor = [], None
+    while True:
+        page = crud.get_page(db, limit=limit, cursor=cursor, **kwargs)
+        seen += page.items
+        if not page.has_more:
+            return seen
+        cursor = page.next_cursor
+
+
+class TestKeysetPagination:
+    @pytest.mark.parametrize("direction", ["asc", "desc"])
+    def test_ties_on_order_column_are_not_skipped(self, crud, db, direction):
+        crud.bulk_create(db, [{"name": f"item_{i % 3}"} for i in range(10)])
+        items = read_all_pages(
+            crud, db, 4, order_by="name", order_direction=direction
+        )
+        keys = [(item.name, item.id) for item in items]
+        assert len(set(keys)) == 10
+        assert keys == sorted(keys, reverse=direction == "desc")
+
+    def test_datetime_cursor_round_trip(self, crud, db):
+        same_time = datetime(2024, 1, 5, 8, 30)
+        crud.bulk_create(
+            db, [{"name": f"item_{i}", "created_at": same_time} for i in range(5)]
+        )
+        items = read_all_pages(crud, db, 2)
+        assert [item.id for item in items] == [5, 4, 3, 2, 1]
+
+    def test_cursor_must_match_ordering(self, crud, db):
+        crud.bulk_create(db, [{"name": f"item_{i}"} for i in range(3)])
+        page = crud.get_page(db, limit=1, order_by="name", order_direction="asc")
+        with pytest.raises(ValueError):
+            crud.get_page(
+                db, cursor=page.next_cursor, order_by="name", order_direction="desc"
+            )
+        with pytest.raises(ValueError):
+            crud.get_page(db, cursor=page.next_cursor, order_by="id")
+
+    def test_malformed_cursor_is_rejected(self, crud, db):
+        cursor = encode_cursor("name", "asc", ["item_0", 1])
+        with pytest.raises(ValueError):
+            crud.get_page(db, cursor=cursor[:-4])
+
+
+class TestSearch:
+    def test_like_wildcards_are_literal(self, crud, db):
+        crud.bulk_create(
+            db,
+            [
+                {"name": "100% saline"},
+                {"name": "1000 saline"},
+                {"name": "ward_a"},
+                {"name": "wardXa"},
+            ],
+        )
+
+        def names(term, mode="contains"):
+            items = crud.get_multi(
+                db, search=term, search_fields=["name"], search_mode=mode
+            )
+            return sorted(item.name for item in items)
+
+        assert names("0%") == ["100% saline"]
+        assert names("d_a") == ["ward_a"]
+        assert names("WARD_", mode="prefix") == ["ward_a"]
+        assert names("%") == ["100% saline"]
+
+
+class TestBulkOperations:
+    def test_bulk_create_batches_in_order(self, crud, db):
+        created = crud.bulk_create(
+            db,
+            [{"name": f"item_{i}", "category": "a"} for i in range(25)],
+            created_by="loader",
+            batch_size=10,
+        )
+        assert [item.name for item in created] == [f"item_{i}" for i in range(25)]
+        assert {item.created_by for item in created} == {"loader"}
+        assert crud.count(db) == 25
+
+    def test_bulk_update_touches_only_given_fields(self, crud, db):
+        created = crud.bulk_create(
+            db, [{"name": f"item_{i}", "category": "a"} for i in range(3)]
+        )
+        updated = crud.bulk_update(
+            db,
+            [{"id": item.id, "category": "b"} for item in created[:2]],
+            updated_by="editor",
+            batch_size=1,
+        )
+        assert updated == 2
+        assert crud.count(db, {"category": "b"}) == 2
+        item = crud.get(db, created[0].id)
+        db.refresh(item)
+        assert (item.name, item.updated_by) == ("item_0", "editor")
+
+    def test_bulk_update_requires_id(self, crud, db):
+        with pytest.raises(ValueError):
+            crud.bulk_update(db, [{"category": "b"}])
+
+    def test_estimated_count_is_exact_off_postgresql(self, crud, db):
+        crud.bulk_create(db, [{"name": f"item_{i}"} for i in range(4)])
+        assert crud.count(db, estimate=True) == 4
@@ -0,0 +1,172 @@
+"""
+Unit tests for the bed management ward census counters on SQLite
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# The service imports its modules top-level (import models, import census)
+sys.path.insert(
+    0, str(Path(__file__).resolve().parents[2] / "services" / "bed_management")
+)
+
+import census  # noqa: E402
+import crud  # noqa: E402
+import models  # noqa: E402
+import schemas  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def add_pg_notify(dbapi_connection, record):
+        dbapi_connection.create_function("pg_notify", 2, lambda channel, payload: None)
+
+    models.Base.metadata.create_all(engine)
+    session = sessionmaker(engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def create_ward(db, name="Ward A"):
+    return crud.create_ward(
+        db,
+        schemas.WardCreate(
+            ward_name=name, ward_type="general", total_beds=0, available_beds=0
+        ),
+    )
+
+
+def create_bed(db, ward, number, status=models.BedStatus.AVAILABLE):
+    bed = models.Bed(
+        bed_number=number,
+        bed_type=models.BedType.GENERAL,
+        ward_id=ward.id,
+        floor_number=1,
+        room_number="101",
+        status=status,
+    )
+    db.add(bed)
+    census.record_bed_added(db, bed)
+    db.commit()
+    return bed
+
+
+def counts(db):
+    return {
+        row["ward_id"]: {column: row[column] for column in census.COUNT_COLUMNS}
+        for row in census.get_census(db)
+    }
+
+
+class TestCreateWard:
+    def test_empty_ward_is_listed_in_availability(self, db):
+        ward = create_ward(db)
+        assert crud.get_bed_availability(db) == [
+            {
+                "ward_id": ward.id,
+                "ward_name": "Ward A",
+                "total_beds": 0,
+                "available_beds": 0,
+                "occupied_beds": 0,
+                "maintenance_beds": 0,
+            }
+        ]
+        assert crud.get_bed_statistics(db)["total_beds"] == 0
+
+
+class TestTransitions:
+    def test_bed_lifecycle_moves_one_bed_between_counters(self, db):
+        ward = create_ward(db)
+        bed = create_bed(db, ward, "A1")
+        assert counts(db)[ward.id] == {
+            "total_beds": 1,
+            "available_beds": 1,
+            "occupied_beds": 0,
+            "maintenance_beds": 0,
+            "reserved_beds": 0,
+        }
+
+        assignment = crud.create_bed_assignment(
+            db,
+            schemas.BedAssignmentCreate(
+                bed_id=bed.id, patient_id="P1", admission_id="1"
+            ),
+        )
+        assert counts(db)[ward.id]["occupied_beds"] == 1
+        assert counts(db)[ward.id]["available_beds"] == 0
+
+        crud.discharge_patient(db, assignment.id)
+        crud.update_bed_status(db, bed.id, schemas.BedStatus.MAINTENANCE)
+        assert counts(db)[ward.id] == {
+            "total_beds": 1,
+            "available_beds": 0,
+            "occupied_beds": 0,
+            "maintenance_beds": 1,
+            "reserved_beds": 0,
+        }
+
+    def test_repeated_status_is_not_counted_twice(self, db):
+        ward = create_ward(db)
+        bed = create_bed(db, ward, "A1")
+        version = census.get_census(db)[0]["version"]
+        crud.update_bed_status(db, bed.id, schemas.BedStatus.AVAILABLE)
+        assert census.get_census(db)[0]["version"] == version
+        assert counts(db)[ward.id]["available_beds"] == 1
+
+    def test_inactive_beds_are_not_counted(self, db):
+        ward = create_ward(db)
+        bed = create_bed(db, ward, "A1")
+        bed.is_active = False
+        census.record_status_change(
+            db, bed, models.BedStatus.AVAILABLE, models.BedStatus.OCCUPIED
+        )
+        db.commit()
+        assert counts(db)[ward.id]["occupied_beds"] == 0
+
+
+class TestRebuild:
+    def test_rebuilt_counters_match_incremental(self, db):
+        first, second = create_ward(db, "Ward A"), create_ward(db, "Ward B")
+        beds = [create_bed(db, first, f"A{i}") for i in range(4)]
+        beds += [create_bed(db, second, f"B{i}") for i in range(3)]
+        create_bed(db, second, "B9", status=models.BedStatus.RESERVED)
+        for bed in beds[:3] + beds[5:]:
+            crud.create_bed_assignment(
+                db,
+                schemas.BedAssignmentCreate(
+                    bed_id=bed.id, patient_id=f"P{bed.id}", admission_id=str(bed.id)
+                ),
+            )
+        crud.update_bed_status(db, beds[3].id, schemas.BedStatus.MAINTENANCE)
+        crud.update_bed_status(db, beds[0].id, schemas.BedStatus.AVAILABLE)
+        incremental = counts(db)
+
+        census.rebuild_census(db)
+        db.commit()
+        assert counts(db) == incremental
+        assert incremental[second.id] == {
+            "total_beds": 4,
+            "available_beds": 1,
+            "occupied_beds": 2,
+            "maintenance_beds": 0,
+            "reserved_beds": 1,
+        }
+
+    def test_rebuild_corrects_drifted_counters(self, db):
+        ward = create_ward(db)
+        create_bed(db, ward, "A1")
+        db.query(models.WardCensus).update({"occupied_beds": 5})
+        db.commit()
+        census.rebuild_census(db, ward.id)
+        db.commit()
+        assert counts(db)[ward.id]["occupied_beds"] == 0
@@ -0,0 +1,186 @@
+"""
+Unit tests for the clinical NLP batch path and its content-keyed result cache
+
+spaCy and the Hugging Face pipelines are replaced by small local models so the
+tests need no downloads; NLTK's punkt and stopwords data must be installed.
+"""
+
+import importlib
+
+import pytest
+
+nltk = pytest.importorskip("nltk")
+spacy = pytest.importorskip("spacy")
+pytest.importorskip("transformers")
+
+try:
+    nltk.data.find("tokenizers/punkt_tab")
+    nltk.data.find("corpora/stopwords")
+except LookupError:
+    pytest.skip(
+        "NLTK punkt and stopwords data are not installed", allow_module_level=True
+    )
+
+NOTES = [
+    (
+        "n1",
+        "Subjective: 67 year old with history of HTN and DM. "
+        "Allergy: penicillin. Father with history of CAD. Former smoker. "
+        "Objective: BP: 150/90 HR: 88 Temp: 37.2 SpO2: 96. "
+        "Glucose: 182 mg/dL. Creatinine: 1.4 mg/dL. "
+        "Assessment: Primary diagnosis: hypertension, worsening. "
+        "Plan: 1. Start metformin 500 mg bid\n2. Continue lisinopril 10 mg daily\n"
+        "Will order echocardiogram.",
+    ),
+    (
+        "n2",
+        "Patient underwent colonoscopy without complication. Active COPD. "
+        "Allergic to: sulfa. Lives with daughter. Occupation: teacher. "
+        "Plan: recommend follow up in 2 weeks.",
+    ),
+    ("n3", "Seen today."),
+]
+
+
+class FakeSentiment:
+    """Scores every chunk as mildly positive and records what it was given"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None):
+        self.calls.append(list(texts))
+        return [{"label": "POSITIVE", "score": 0.6} for _ in texts]
+
+
+def blank_medical_model(name):
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns(
+        [
+            {"label": "MEDICATION", "pattern": [{"LOWER": "metformin"}]},
+            {"label": "MEDICATION", "pattern": [{"LOWER": "aspirin"}]},
+            {"label": "CONDITION", "pattern": [{"LOWER": "htn"}]},
+        ]
+    )
+    return nlp
+
+
+@pytest.fixture(scope="module")
+def nlp_module():
+    # Loading the pipelines replaces the lazy transformers package module,
+    # so patch the one that is registered afterwards
+    importlib.import_module("transformers.pipelines")
+    hf = importlib.import_module("transformers")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(spacy, "load", blank_medical_model)
+        patch.setattr(hf.AutoTokenizer, "from_pretrained", lambda *a, **kw: None)
+        patch.setattr(
+            hf.AutoModelForSequenceClassification,
+            "from_pretrained",
+            lambda *a, **kw: None,
+        )
+        patch.setattr(hf, "pipeline", lambda *a, **kw: FakeSentiment())
+        yield importlib.import_module("ai.nlp.clinical_nlp_processor")
+
+
+@pytest.fixture
+def make_processor(nlp_module):
+    def make(**kwargs):
+        return nlp_module.ClinicalNLPProcessor(**kwargs)
+
+    return make
+
+
+def make_note(nlp_module, note_id, content, patient_id="P1"):
+    return nlp_module.ClinicalNote(
+        note_id=note_id,
+        patient_id=patient_id,
+        note_type="progress_note",
+        note_date="2024-01-05",
+        author="dr_smith",
+        content=content,
+    )
+
+
+def extraction(result):
+    return result.model_dump(exclude={"note_id", "patient_id", "processing_timestamp"})
+
+
+class TestBatchMatchesSingleNote:
+    def test_batch_extraction_equals_single_note_extraction(
+        self, nlp_module, make_processor
+    ):
+        notes = [make_note(nlp_module, *note) for note in NOTES]
+        batch = make_processor().process_clinical_notes(notes, batch_size=2)
+        single = make_processor()
+        for note, result in zip(notes, batch):
+            expected = single.process_clinical_note(note)
+            assert (result.note_id, result.patient_id) == (note.note_id, "P1")
+            assert extraction(result) == extraction(expected)
+
+    def test_sample_note_extraction(self, nlp_module, make_processor):
+        result = make_processor().process_clinical_note(
+            make_note(nlp_module, *NOTES[0])
+        )
+        assert [m.name for m in result.medications][:2] == ["metformin", "lisinopril"]
+        assert {v["type"] for v in result.vital_signs} >= {"blood_pressure", "hr"}
+        assert result.allergies[0]["allergen"] == "penicillin"
+        assert {e.normalized_value for e in result.entities} >= {
+            "metformin",
+            "hypertension",
+        }
+        assert result.sentiment["overall"] == "positive"
+
+    def test_iter_process_notes_matches_batch(self, nlp_module, make_processor):
+        notes = [make_note(nlp_module, *note) for note in NOTES]
+        processor = make_processor()
+        streamed = list(processor.iter_process_notes(notes, chunk_size=2))
+        batch = make_processor().process_clinical_notes(notes)
+        assert [extraction(r) for r in streamed] == [extraction(r) for r in batch]
+
+
+class TestResultCache:
+    def test_notes_with_the_same_content_share_one_extraction(
+        self, nlp_module, make_processor
+    ):
+        processor = make_processor()
+        content = NOTES[1][1]
+        notes = [
+            make_note(nlp_module, "a", content, patient_id="P1"),
+            make_note(nlp_module, "b", content, patient_id="P2"),
+        ]
+        results = processor.process_clinical_notes(notes)
+        assert len(processor.result_cache) == 1
+        assert len(processor.sentiment_analyzer.calls) == 1
+        assert [(r.note_id, r.patient_id) for r in results] == [
+            ("a", "P1"),
+            ("b", "P2"),
+        ]
+        assert extraction(results[0]) == extraction(results[1])
+
+        # Seen content is answered from the cache, new content is not
+        processor.process_clinical_note(make_note(nlp_module, "c", content))
+        assert len(processor.sentiment_analyzer.calls) == 1
+        processor.process_clinical_note(make_note(nlp_module, "d", content + " "))
+        assert len(processor.sentiment_analyzer.calls) == 2
+        assert len(processor.result_cache) == 2
+
+    def test_key_depends_on_content_and_extractor_version(
+        self, nlp_module, monkeypatch
+    ):
+        key = nlp_module.ExtractionCache.key
+        assert key("note") == key("note")
+        assert key("note") != key("note.")
+        before = key("note")
+        monkeypatch.setattr(nlp_module, "EXTRACTOR_VERSION", "test")
+        assert key("note") != before
+
+    def test_cache_is_bounded_lru(self, nlp_module):
+        cache = nlp_module.ExtractionCache(max_entries=2)
+        cache.put("a", {"n": 1})
+        cache.put("b", {"n": 2})
+        assert cache.get("a") == {"n": 1}
+        cache.put("c", {"n": 3})
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == ({"n": 1}, {"n": 3})
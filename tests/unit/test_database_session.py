@@ -0,0 +1,92 @@
+"""
+Unit tests for the shared async database pool limits and session rollback
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from shared.database.session import AsyncDatabase, pool_limits
+
+items = Table("session_test_items", MetaData(), Column("id", Integer, primary_key=True))
+
+
+class RecordingSession(AsyncSession):
+    rollbacks = 0
+
+    async def rollback(self):
+        RecordingSession.rollbacks += 1
+        await super().rollback()
+
+
+class TestPoolLimits:
+    @pytest.mark.parametrize(
+        "max_connections, workers",
+        [(40, 1), (40, 4), (40, 3), (20, 7), (10, 10), (3, 2), (2, 2), (1, 1)],
+    )
+    def test_workers_stay_within_max_connections(self, max_connections, workers):
+        pool_size, max_overflow = pool_limits(max_connections, workers)
+        assert pool_size >= 1
+        assert max_overflow >= 0
+        assert workers * (pool_size + max_overflow) <= max_connections
+
+    def test_share_is_split_two_thirds_open(self):
+        assert pool_limits(40, 1) == (26, 14)
+        assert pool_limits(40, 4) == (6, 4)
+        assert pool_limits(2, 1) == (1, 1)
+
+    def test_every_worker_gets_one_connection_when_short(self):
+        assert pool_limits(3, 8) == (1, 0)
+
+    def test_zero_workers_counts_as_one(self):
+        assert pool_limits(9, 0) == pool_limits(9, 1)
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = AsyncDatabase("postgresql+asyncpg://hms@localhost/hms")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'session.db'}")
+    database.engine = database.read_engine = engine
+    database._sessions = database._read_sessions = async_sessionmaker(
+        engine, class_=RecordingSession, expire_on_commit=False
+    )
+    RecordingSession.rollbacks = 0
+
+    async def create_table():
+        async with engine.begin() as conn:
+            await conn.run_sync(items.metadata.create_all)
+
+    asyncio.run(create_table())
+    yield database
+    asyncio.run(engine.dispose())
+
+
+async def count_items(database):
+    async with database.session() as session:
+        return await session.scalar(select(func.count()).select_from(items))
+
+
+class TestSession:
+    def test_exception_rolls_back_and_propagates(self, database):
+        async def run():
+            with pytest.raises(ValueError):
+                async with database.session() as session:
+                    await session.execute(insert(items).values(id=1))
+                    raise ValueError("handler failed")
+            return await count_items(database)
+
+        assert asyncio.run(run()) == 0
+        assert RecordingSession.rollbacks == 1
+
+    def test_committed_work_is_kept(self, database):
+        async def run():
+            async with database.session() as session:
+                await session.execute(insert(items).values(id=1))
+                await session.commit()
+            return await count_items(database)
+
+        assert asyncio.run(run()) == 1
+        assert RecordingSession.rollbacks == 0
+        assert database.stats.checkouts == 2
@@ -0,0 +1,205 @@
+"""
+Unit tests for the shared WebSocket fan-out hub routing, coalescing and
+overflow policies
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from shared.realtime.fanout import (
+    SLOW_CONSUMER_CLOSE_CODE,
+    Envelope,
+    FanoutHub,
+    Subscription,
+    SubscriptionFilter,
+)
+
+
+class FakeWebSocket:
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(json.loads(payload))
+
+    async def close(self, code=None):
+        self.close_code = code
+
+
+async def settle():
+    await asyncio.sleep(0.01)
+
+
+def subscription(max_queue=2, overflow_policy="drop_oldest"):
+    """A subscription whose sender is not started, so its queue can be read"""
+    return Subscription(
+        FanoutHub(),
+        FakeWebSocket(),
+        SubscriptionFilter(),
+        max_queue=max_queue,
+        overflow_policy=overflow_policy,
+        send_timeout=1.0,
+    )
+
+
+def event(payload, coalesce_key=None):
+    return Envelope(payload=payload, event_type="alert", coalesce_key=coalesce_key)
+
+
+class TestSubscriptionFilter:
+    def test_from_message_accepts_singular_and_plural_names(self):
+        subscription_filter = SubscriptionFilter.from_message(
+            {"patient_id": 7, "wards": ["icu", "hdu"], "events": "vitals"}
+        )
+        assert subscription_filter == SubscriptionFilter(
+            patients={"7"}, wards={"icu", "hdu"}, event_types={"vitals"}
+        )
+
+    def test_index_uses_the_narrowest_dimension(self):
+        assert SubscriptionFilter(patients={"1"}, wards={"icu"}).index_keys() == [
+            "patient:1"
+        ]
+        assert SubscriptionFilter(wards={"icu"}, event_types={"x"}).index_keys() == [
+            "ward:icu"
+        ]
+        assert SubscriptionFilter(event_types={"x"}).index_keys() == ["event:x"]
+        assert SubscriptionFilter().index_keys() == ["*"]
+
+
+class TestRouting:
+    def test_messages_reach_only_matching_subscriptions(self):
+        async def run():
+            hub = FanoutHub()
+            sockets = {
+                name: FakeWebSocket()
+                for name in ("patient", "ward_vitals", "alerts", "everything")
+            }
+            filters = {
+                "patient": SubscriptionFilter(patients={"1"}),
+                "ward_vitals": SubscriptionFilter(
+                    wards={"icu"}, event_types={"vitals"}
+                ),
+                "alerts": SubscriptionFilter(event_types={"alert"}),
+                "everything": SubscriptionFilter(),
+            }
+            for name, websocket in sockets.items():
+                await hub.connect(websocket, filters[name])
+
+            delivered = [
+                await hub.publish({"n": 1}, "vitals", patient_id=1, ward="icu"),
+                await hub.publish({"n": 2}, "vitals", patient_id=2, ward="ward3"),
+                await hub.publish({"n": 3}, "alert", patient_id=2, ward="icu"),
+                await hub.publish({"n": 4}, "alert", patient_id=1, ward="ward3"),
+            ]
+            await settle()
+            received = {
+                name: [message["n"] for message in websocket.sent]
+                for name, websocket in sockets.items()
+            }
+            await hub.stop()
+            return delivered, received
+
+        delivered, received = asyncio.run(run())
+        assert delivered == [3, 1, 2, 3]
+        assert received == {
+            "patient": [1, 4],
+            "ward_vitals": [1],
+            "alerts": [3, 4],
+            "everything": [1, 2, 3, 4],
+        }
+
+    def test_update_filter_and_disconnect_maintain_the_index(self):
+        async def run():
+            hub = FanoutHub()
+            websocket = FakeWebSocket()
+            await hub.connect(websocket, SubscriptionFilter(patients={"1"}))
+            hub.update_filter(websocket, SubscriptionFilter(wards={"icu"}))
+            assert set(hub._index) == {"ward:icu"}
+            assert await hub.publish({"n": 1}, "vitals", patient_id=1) == 0
+            assert await hub.publish({"n": 2}, "vitals", ward="icu") == 1
+            hub.disconnect(websocket)
+            assert hub.get_stats()["index_keys"] == 0
+            assert await hub.publish({"n": 3}, "vitals", ward="icu") == 0
+
+        asyncio.run(run())
+
+
+class TestCoalescing:
+    def test_newer_snapshot_replaces_the_queued_one_in_place(self):
+        sub = subscription(max_queue=10)
+        sub.offer(event("a"))
+        sub.offer(event("v1", coalesce_key="vitals:1"))
+        sub.offer(event("b"))
+        sub.offer(event("v2", coalesce_key="vitals:1"))
+        assert list(sub.queue.values()) == ["a", "v2", "b"]
+        assert sub.stats["coalesced"] == 1
+
+    def test_snapshots_are_dropped_before_events(self):
+        sub = subscription(overflow_policy="drop_newest")
+        sub.offer(event("v1", coalesce_key="vitals:1"))
+        sub.offer(event("a"))
+        assert sub.offer(event("b"))
+        assert list(sub.queue.values()) == ["a", "b"]
+        assert sub.stats["dropped"] == 1
+
+
+class TestOverflowPolicies:
+    def fill(self, sub):
+        return [sub.offer(event(payload)) for payload in ("a", "b", "c")]
+
+    def test_drop_oldest(self):
+        sub = subscription(overflow_policy="drop_oldest")
+        assert self.fill(sub) == [True, True, True]
+        assert list(sub.queue.values()) == ["b", "c"]
+        assert sub.stats["dropped"] == 1
+
+    def test_drop_newest(self):
+        sub = subscription(overflow_policy="drop_newest")
+        assert self.fill(sub) == [True, True, False]
+        assert list(sub.queue.values()) == ["a", "b"]
+        assert sub.stats["dropped"] == 1
+
+    def test_disconnect(self):
+        sub = subscription(overflow_policy="disconnect")
+        assert self.fill(sub) == [True, True, False]
+        assert sub.closed
+        assert sub.close_code == SLOW_CONSUMER_CLOSE_CODE
+        assert len(sub.queue) == 0
+        assert sub.stats["dropped"] == 2
+        assert not sub.offer(event("d"))
+
+    def test_unknown_policy_is_rejected(self):
+        with pytest.raises(ValueError):
+            subscription(overflow_policy="block")
+
+    def test_slow_client_is_disconnected_without_delaying_others(self):
+        async def run():
+            hub = FanoutHub(
+                max_queue=1, overflow_policy="disconnect", send_timeout=0.05
+            )
+            fast, slow = FakeWebSocket(), FakeWebSocket(gate=asyncio.Event())
+            await hub.connect(fast)
+            slow_subscription = await hub.connect(slow)
+            for n in range(4):
+                await hub.publish({"n": n}, "alert")
+                await settle()
+            assert slow_subscription.closed
+            # The blocked send times out, then the socket is closed and removed
+            await asyncio.sleep(0.2)
+            assert slow not in hub.subscriptions
+            assert fast in hub.subscriptions
+            return fast, slow
+
+        fast, slow = asyncio.run(run())
+        assert [message["n"] for message in fast.sent] == [0, 1, 2, 3]
+        assert slow.sent == []
+        assert slow.close_code == SLOW_CONSUMER_CLOSE_CODE
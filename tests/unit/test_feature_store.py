@@ -0,0 +1,82 @@
+"""
+Unit tests for the shared patient feature store offline tier
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from shared.feature_store.store import PatientFeatureStore
+
+
+class FakePipeline:
+    def expire(self, key, ttl):
+        pass
+
+    def execute(self):
+        return []
+
+
+class FakeRedis:
+    """Just enough of the client for offline-only use"""
+
+    def register_script(self, script):
+        return lambda keys, args, client: None
+
+    def pipeline(self, transaction=False):
+        return FakePipeline()
+
+
+def lab_event(patient_id, test_name, value, timestamp):
+    return {
+        "type": "lab_results",
+        "patient_id": patient_id,
+        "timestamp": timestamp,
+        "data": {"test_name": test_name, "value": value},
+    }
+
+
+class TestPatientFeatureStore:
+    def make_store(self, tmp_path):
+        return PatientFeatureStore(FakeRedis(), str(tmp_path))
+
+    def test_timestamp_converts_offsets_to_utc(self):
+        local = datetime(2024, 1, 5, 10, 0, tzinfo=timezone(timedelta(hours=5.5)))
+        expected = datetime(2024, 1, 5, 4, 30)
+        assert PatientFeatureStore._timestamp(local) == expected
+        assert PatientFeatureStore._timestamp("2024-01-05T10:00+05:30") == expected
+        assert PatientFeatureStore._timestamp("2024-01-05T04:30:00Z") == expected
+
+    def test_panel_results_at_one_timestamp_are_merged(self, tmp_path):
+        store = self.make_store(tmp_path)
+        drawn = "2024-01-05T08:00:00"
+        store.ingest_many(
+            [
+                lab_event("P1", "potassium", 4.1, drawn),
+                lab_event("P1", "sodium", 139, drawn),
+            ]
+        )
+        store.flush_offline()
+
+        entity_df = pd.DataFrame(
+            {"patient_id": ["P1"], "event_timestamp": [datetime(2024, 1, 5, 9, 0)]}
+        )
+        row = store.get_historical_features(entity_df, ["lab_results"]).iloc[0]
+        assert row["potassium"] == 4.1
+        assert row["sodium"] == 139
+
+    def test_historical_features_exclude_future_values(self, tmp_path):
+        store = self.make_store(tmp_path)
+        store.ingest_many(
+            [
+                lab_event("P1", "potassium", 4.1, "2024-01-05T08:00:00"),
+                lab_event("P1", "potassium", 5.6, "2024-01-05T12:00:00"),
+            ]
+        )
+        store.flush_offline()
+
+        entity_df = pd.DataFrame(
+            {"patient_id": ["P1"], "event_timestamp": [datetime(2024, 1, 5, 10, 0)]}
+        )
+        row = store.get_historical_features(entity_df, ["lab_results"]).iloc[0]
+        assert row["potassium"] == 4.1
@@ -0,0 +1,165 @@
+"""
+Unit tests for LIS HL7 batch sends and batch acknowledgement handling
+"""
+
+import asyncio
+import re
+
+import pytest
+
+from services.lab.app.lis_service import LISResult, LISService
+
+
+class FakeResponse:
+    def __init__(self, text="", status_code=200):
+        self.text = text
+        self.status_code = status_code
+        self.headers = {}
+
+
+class FakeLIS:
+    """Answers each batch with one MSA per message, in reverse order"""
+
+    def __init__(self, rejected=(), unacknowledged=(), status_code=200):
+        self.rejected = set(rejected)
+        self.unacknowledged = set(unacknowledged)
+        self.status_code = status_code
+        self.batches = []
+
+    def control_ids(self, batch):
+        return re.findall(r"^MSH\|(?:[^|\n]*\|){8}([^|\n]*)", batch, re.MULTILINE)
+
+    def placer_order(self, batch, control_id):
+        message = batch.split(control_id, 1)[1]
+        return re.search(r"^ORC\|\w+\|([^|\n]*)", message, re.MULTILINE).group(1)
+
+    async def post(self, path, body):
+        self.batches.append((path, body))
+        if self.status_code != 200:
+            return FakeResponse("unavailable", self.status_code)
+        segments = ["MSH|^~\\&|LIS|LAB|HMS|LAB|20240105||ACK|1|P|2.5.1"]
+        for control_id in reversed(self.control_ids(body)):
+            order = self.placer_order(body, control_id)
+            if order in self.unacknowledged:
+                continue
+            code = "AE" if order in self.rejected else "AA"
+            segments.append(f"MSA|{code}|{control_id}|{order} {code}")
+        return FakeResponse("\r".join(segments))
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("LIS_HL7_BATCH", "true")
+    monkeypatch.setenv("LIS_BATCH_SIZE", "2")
+    return LISService()
+
+
+def use_lis(monkeypatch, service, lis):
+    monkeypatch.setattr(service, "_post_hl7", lis.post)
+    return lis
+
+
+def result(order, test_code="2345-7"):
+    return LISResult(
+        placer_order_number=order,
+        filler_order_number=f"F{order}",
+        test_code=test_code,
+        test_name="Glucose",
+        result_value="5.4",
+        result_units="mmol/L",
+        reference_range="3.9-5.6",
+        result_status="F",
+        patient_id="P1",
+    )
+
+
+class TestParseBatchAcks:
+    def test_maps_control_ids_to_code_and_text(self):
+        acks = LISService._parse_batch_acks(
+            "MSH|^~\\&|LIS\rMSA|AA|ID1|ok\r\nMSA|AE|ID2\nMSA|AR\nERR|x"
+        )
+        assert acks == {"ID1": ("AA", "ok"), "ID2": ("AE", "")}
+
+    def test_empty_response_has_no_acks(self):
+        assert LISService._parse_batch_acks("") == {}
+        assert LISService._parse_batch_acks(None) == {}
+
+
+class TestSendBatch:
+    def test_acks_are_matched_by_control_id(self, monkeypatch, service):
+        lis = use_lis(monkeypatch, service, FakeLIS(rejected={"O2"}))
+        messages = [service._create_hl7_oru_message(result(o)) for o in "O1 O2".split()]
+        responses = asyncio.run(service._send_hl7_batch(messages, "result"))
+        control_ids = [service._get_message_control_id(m) for m in messages]
+        assert responses[0] == {"status": "success", "message_id": control_ids[0]}
+        assert responses[1] == {"status": "error", "error": "AE: O2 AE"}
+        assert lis.batches[0][0] == "/api/hl7/result/batch"
+
+    def test_missing_ack_is_an_error(self, monkeypatch, service):
+        use_lis(monkeypatch, service, FakeLIS(unacknowledged={"O1"}))
+        messages = [service._create_hl7_oru_message(result(o)) for o in "O1 O2".split()]
+        responses = asyncio.run(service._send_hl7_batch(messages, "result"))
+        assert [r["status"] for r in responses] == ["error", "success"]
+        assert responses[0]["error"] == "AE: No acknowledgement"
+
+    def test_batch_level_ack_accepts_every_message(self, monkeypatch, service):
+        async def post(path, body):
+            return FakeResponse("MSH|^~\\&|LIS|LAB|HMS|LAB|20240105||ACK|1|P|2.5.1")
+
+        monkeypatch.setattr(service, "_post_hl7", post)
+        messages = [service._create_hl7_oru_message(result(o)) for o in "O1 O2".split()]
+        responses = asyncio.run(service._send_hl7_batch(messages, "result"))
+        assert [r["status"] for r in responses] == ["success", "success"]
+
+    def test_http_error_fails_every_message(self, monkeypatch, service):
+        use_lis(monkeypatch, service, FakeLIS(status_code=503))
+        messages = [service._create_hl7_oru_message(result(o)) for o in "O1 O2".split()]
+        responses = asyncio.run(service._send_hl7_batch(messages, "result"))
+        assert responses == [{"status": "error", "error": "HTTP 503: unavailable"}] * 2
+
+
+class TestSendResults:
+    def test_order_is_sent_only_when_every_result_was_acknowledged(
+        self, monkeypatch, service
+    ):
+        lis = use_lis(monkeypatch, service, FakeLIS(rejected={"O2"}))
+        results = [
+            result("O1", "2345-7"),
+            result("O2", "2345-7"),
+            result("O1", "2160-0"),
+            result("O2", "2160-0"),
+            result("O3", "2345-7"),
+        ]
+        # One O2 result is rejected in each batch; O1 spans two batches
+        sent, errors = asyncio.run(service._send_results(results))
+        assert len(lis.batches) == 3
+        assert sent == ["O1", "O3"]
+        assert errors == ["Result sync error for O2: AE: O2 AE"] * 2
+
+    def test_partially_acknowledged_order_is_not_sent(self):
+        responses = [
+            {"status": "success"},
+            {"status": "error", "error": "AE: rejected"},
+            {"status": "success"},
+        ]
+        sent, errors = LISService._acknowledged_orders(
+            ["O1", "O1", "O2"], responses, "Order"
+        )
+        assert sent == ["O2"]
+        assert errors == ["Order sync error for O1: AE: rejected"]
+
+    def test_unbatched_sends_go_one_message_per_request(self, monkeypatch):
+        monkeypatch.setenv("LIS_HL7_BATCH", "false")
+        service = LISService()
+        paths = []
+
+        async def post(path, body):
+            paths.append(path)
+            return FakeResponse("MSA|AA|x")
+
+        monkeypatch.setattr(service, "_post_hl7", post)
+        sent, errors = asyncio.run(
+            service._send_results([result("O1"), result("O2")])
+        )
+        assert (sent, errors) == (["O1", "O2"], [])
+        assert paths == ["/api/hl7/result", "/api/hl7/result"]
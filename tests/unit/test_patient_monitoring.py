@@ -0,0 +1,333 @@
+"""
+Unit tests for the vectorised early-warning scores, custom rules and tick
+persistence of the real-time patient monitoring system
+"""
+
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from ai.realtime_monitoring.patient_monitoring_system import (
+    COLUMN_INDEX,
+    READING_COLUMNS,
+    MonitoringConfig,
+    RealtimePatientMonitoringSystem,
+    VitalSigns,
+    WardVitalsStore,
+    mews_scores,
+    news2_scores,
+    reading_row,
+)
+
+SYSTEM_CONFIG = {"redis": {"host": "localhost", "port": 6379}, "database": {}}
+
+
+def single_reading(**values):
+    row = np.full((1, len(READING_COLUMNS)), np.nan)
+    for param, value in values.items():
+        row[0, COLUMN_INDEX[param]] = value
+    return row
+
+
+def monitoring_config(**kwargs):
+    return MonitoringConfig(
+        patient_id=kwargs.pop("patient_id", "p1"),
+        monitoring_level="basic",
+        alert_thresholds=kwargs.pop("alert_thresholds", {}),
+        monitoring_intervals={},
+        escalation_contacts=[],
+        **kwargs,
+    )
+
+
+def evaluate_rule(rule, vital_signs):
+    """The original per-reading rule evaluation the vectorised path replaced"""
+    for condition in rule.get("conditions", []):
+        current_value = getattr(vital_signs, condition["parameter"], None)
+        if current_value is None:
+            return False
+        operator, value = condition["operator"], condition["value"]
+        if operator == "gt" and current_value <= value:
+            return False
+        elif operator == "lt" and current_value >= value:
+            return False
+        elif operator == "eq" and current_value != value:
+            return False
+    return True
+
+
+# (parameter, value, points) at the edges of every MEWS band
+MEWS_BANDS = [
+    ("heart_rate", 39, 3),
+    ("heart_rate", 40, 1),
+    ("heart_rate", 50, 1),
+    ("heart_rate", 51, 0),
+    ("heart_rate", 100, 0),
+    ("heart_rate", 101, 1),
+    ("heart_rate", 110, 1),
+    ("heart_rate", 111, 2),
+    ("heart_rate", 130, 2),
+    ("heart_rate", 131, 3),
+    ("blood_pressure_systolic", 69, 3),
+    ("blood_pressure_systolic", 70, 2),
+    ("blood_pressure_systolic", 80, 2),
+    ("blood_pressure_systolic", 81, 1),
+    ("blood_pressure_systolic", 100, 1),
+    ("blood_pressure_systolic", 101, 0),
+    ("blood_pressure_systolic", 199, 0),
+    ("blood_pressure_systolic", 201, 2),
+    ("respiratory_rate", 8, 3),
+    ("respiratory_rate", 9, 0),
+    ("respiratory_rate", 14, 0),
+    ("respiratory_rate", 15, 1),
+    ("respiratory_rate", 20, 1),
+    ("respiratory_rate", 21, 2),
+    ("respiratory_rate", 29, 2),
+    ("respiratory_rate", 31, 3),
+    ("temperature", 34.9, 2),
+    ("temperature", 35.0, 0),
+    ("temperature", 38.4, 0),
+    ("temperature", 38.6, 2),
+    ("consciousness_level", 0, 0),
+    ("consciousness_level", 1, 1),
+    ("consciousness_level", 2, 2),
+    ("consciousness_level", 3, 3),
+]
+
+# (parameter, value, points) at the edges of every NEWS2 band, SpO2 scale 1
+NEWS2_BANDS = [
+    ("respiratory_rate", 8, 3),
+    ("respiratory_rate", 9, 1),
+    ("respiratory_rate", 11, 1),
+    ("respiratory_rate", 12, 0),
+    ("respiratory_rate", 20, 0),
+    ("respiratory_rate", 21, 2),
+    ("respiratory_rate", 24, 2),
+    ("respiratory_rate", 25, 3),
+    ("oxygen_saturation", 91, 3),
+    ("oxygen_saturation", 92, 2),
+    ("oxygen_saturation", 93, 2),
+    ("oxygen_saturation", 94, 1),
+    ("oxygen_saturation", 95, 1),
+    ("oxygen_saturation", 96, 0),
+    ("supplemental_oxygen", 0, 0),
+    ("supplemental_oxygen", 1, 2),
+    ("blood_pressure_systolic", 90, 3),
+    ("blood_pressure_systolic", 91, 2),
+    ("blood_pressure_systolic", 100, 2),
+    ("blood_pressure_systolic", 101, 1),
+    ("blood_pressure_systolic", 110, 1),
+    ("blood_pressure_systolic", 111, 0),
+    ("blood_pressure_systolic", 219, 0),
+    ("blood_pressure_systolic", 220, 3),
+    ("heart_rate", 40, 3),
+    ("heart_rate", 41, 1),
+    ("heart_rate", 50, 1),
+    ("heart_rate", 51, 0),
+    ("heart_rate", 90, 0),
+    ("heart_rate", 91, 1),
+    ("heart_rate", 110, 1),
+    ("heart_rate", 111, 2),
+    ("heart_rate", 130, 2),
+    ("heart_rate", 131, 3),
+    ("consciousness_level", 0, 0),
+    ("consciousness_level", 1, 3),
+    ("consciousness_level", 3, 3),
+    ("temperature", 35.0, 3),
+    ("temperature", 35.1, 1),
+    ("temperature", 36.0, 1),
+    ("temperature", 36.1, 0),
+    ("temperature", 38.0, 0),
+    ("temperature", 38.1, 1),
+    ("temperature", 39.0, 1),
+    ("temperature", 39.1, 2),
+]
+
+
+class TestEarlyWarningScores:
+    @pytest.mark.parametrize("param, value, points", MEWS_BANDS)
+    def test_mews_band(self, param, value, points):
+        assert mews_scores(single_reading(**{param: value}))[0] == points
+
+    @pytest.mark.parametrize("param, value, points", NEWS2_BANDS)
+    def test_news2_band(self, param, value, points):
+        assert news2_scores(single_reading(**{param: value}))[0] == points
+
+    def test_missing_values_score_zero(self):
+        empty = single_reading()
+        assert mews_scores(empty)[0] == 0
+        assert news2_scores(empty)[0] == 0
+
+    def test_rows_are_scored_independently(self):
+        vitals = VitalSigns(
+            timestamp=datetime(2024, 1, 1),
+            heart_rate=135,
+            blood_pressure_systolic=85,
+            respiratory_rate=22,
+            oxygen_saturation=93,
+            temperature=38.7,
+            consciousness_level="voice",
+            supplemental_oxygen=True,
+        )
+        readings = np.vstack([reading_row(vitals), single_reading()[0]])
+        assert mews_scores(readings).tolist() == [3 + 1 + 2 + 2 + 1, 0]
+        assert news2_scores(readings).tolist() == [2 + 2 + 2 + 3 + 3 + 3 + 1, 0]
+
+
+class TestCustomRules:
+    RULES = [
+        {
+            "name": "tachy_hypotension",
+            "severity": "high",
+            "message": "Tachycardia with low blood pressure",
+            "conditions": [
+                {"parameter": "heart_rate", "operator": "gt", "value": 110},
+                {"parameter": "blood_pressure_systolic", "operator": "lt", "value": 95},
+            ],
+        },
+        {
+            "name": "exact_rate",
+            "severity": "low",
+            "message": "Respiratory rate is exactly 30",
+            "conditions": [
+                {"parameter": "respiratory_rate", "operator": "eq", "value": 30}
+            ],
+        },
+        {
+            "name": "unknown_parameter",
+            "severity": "low",
+            "message": "Never fires",
+            "conditions": [{"parameter": "lactate", "operator": "gt", "value": 2}],
+        },
+        {
+            "name": "unknown_operator",
+            "severity": "low",
+            "message": "Only needs a heart rate",
+            "conditions": [
+                {"parameter": "heart_rate", "operator": "between", "value": 1}
+            ],
+        },
+        {
+            "name": "responds_to_pain",
+            "severity": "high",
+            "message": "Responds to pain only",
+            "conditions": [
+                {"parameter": "consciousness_level", "operator": "eq", "value": "pain"}
+            ],
+        },
+        {"name": "no_conditions", "severity": "low", "message": "Always fires"},
+    ]
+
+    READINGS = [
+        {"heart_rate": 120, "blood_pressure_systolic": 90, "respiratory_rate": 30},
+        {"heart_rate": 110, "blood_pressure_systolic": 90},
+        {"heart_rate": 120, "blood_pressure_systolic": 95, "respiratory_rate": 29},
+        {"blood_pressure_systolic": 80, "consciousness_level": "pain"},
+        {"consciousness_level": "voice"},
+        {},
+    ]
+
+    @pytest.mark.parametrize("values", READINGS)
+    def test_vectorised_rules_match_evaluate_rule(self, values):
+        system = RealtimePatientMonitoringSystem(SYSTEM_CONFIG)
+        store = WardVitalsStore("icu", initial_capacity=2)
+        slot = store.add(monitoring_config(custom_rules=self.RULES), {})
+        vitals = VitalSigns(timestamp=datetime(2024, 1, 1), **values)
+        store.record(slot, reading_row(vitals), 0.0)
+        alerts = system.evaluate_custom_rules(store, np.array([slot]), datetime.now())
+        expected = [rule["name"] for rule in self.RULES if evaluate_rule(rule, vitals)]
+        assert [alert.alert_type for alert in alerts] == expected
+
+    def test_rules_fire_only_for_updated_patients(self):
+        system = RealtimePatientMonitoringSystem(SYSTEM_CONFIG)
+        store = WardVitalsStore("icu", initial_capacity=2)
+        rules = self.RULES[-1:]
+        first = store.add(monitoring_config(patient_id="p1", custom_rules=rules), {})
+        store.add(monitoring_config(patient_id="p2", custom_rules=rules), {})
+        alerts = system.evaluate_custom_rules(store, np.array([first]), datetime.now())
+        assert [alert.patient_id for alert in alerts] == ["p1"]
+
+
+class FlakyPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+    async def execute(self):
+        if self.redis.down:
+            raise ConnectionError("redis unavailable")
+        self.redis.executed += 1
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.down = False
+        self.executed = 0
+
+    def pipeline(self, transaction=True):
+        return FlakyPipeline(self)
+
+
+class RecordingFanout:
+    def __init__(self):
+        self.published = []
+
+    def envelope(self, message, event_type, **kwargs):
+        return message
+
+    async def publish_many(self, envelopes):
+        self.published.extend(envelopes)
+
+
+class TestEvaluateTick:
+    def setup_method(self):
+        self.system = RealtimePatientMonitoringSystem(SYSTEM_CONFIG)
+        self.system.redis_client = self.redis = FlakyRedis()
+        self.system.fanout = RecordingFanout()
+        self.notified = []
+
+        async def notify_alert(alert):
+            self.notified.append(alert.alert_type)
+
+        self.system.notify_alert = notify_alert
+
+    async def admit_tachycardic_patient(self):
+        await self.system.add_patient_to_monitoring(
+            monitoring_config(
+                alert_thresholds={"heart_rate": {"min": 60, "max": 100}}, ward="icu"
+            )
+        )
+        await self.system.update_vital_signs(
+            "p1", VitalSigns(timestamp=datetime(2024, 1, 1), heart_rate=120)
+        )
+
+    def test_alerts_are_notified_and_slots_stay_dirty_when_redis_fails(self):
+        async def run():
+            await self.admit_tachycardic_patient()
+            self.redis.down = True
+            with pytest.raises(ConnectionError):
+                await self.system.evaluate_tick()
+            assert self.notified == ["heart_rate_abnormal"]
+            assert self.system.fanout.published == []
+
+            self.redis.down = False
+            alerts = await self.system.evaluate_tick()
+            assert [alert.alert_type for alert in alerts] == ["heart_rate_abnormal"]
+            assert len(self.system.fanout.published) == 1
+
+        asyncio.run(run())
+        assert self.system.wards["icu"].dirty.sum() == 0
+
+    def test_successful_tick_clears_dirty_slots(self):
+        async def run():
+            await self.admit_tachycardic_patient()
+            await self.system.evaluate_tick()
+            assert await self.system.evaluate_tick() == []
+
+        asyncio.run(run())
+        assert self.notified == ["heart_rate_abnormal"]
+        assert self.redis.executed == 2
@@ -0,0 +1,140 @@
+"""
+Unit tests for the staged real-time ingestion pipeline with a local producer
+and fakeredis
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from fakeredis import FakeRedis
+
+from ai.data_ingestion import realtime_pipeline
+from ai.data_ingestion.realtime_pipeline import (
+    PIPELINE_STAGES,
+    LocalProducer,
+    RealtimeDataIngestor,
+)
+
+
+@pytest.fixture
+def ingestor(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        realtime_pipeline.redis, "Redis", lambda **kwargs: FakeRedis(**kwargs)
+    )
+    monkeypatch.setattr(RealtimeDataIngestor, "initialize_metrics", lambda self: None)
+    config = {
+        "kafka": {"bootstrap_servers": "localhost:9092"},
+        "redis": {"host": "localhost", "port": 6379},
+        "feature_store": {"offline_path": str(tmp_path / "features")},
+        "ingestion": {"batch_size": 2, "batch_wait_ms": 1},
+    }
+    return RealtimeDataIngestor(config, producer=LocalProducer())
+
+
+def vital_signs(patient_id, heart_rate=80):
+    return {
+        "patient_id": patient_id,
+        "type": "vital_signs",
+        "timestamp": datetime.utcnow(),
+        "source": "monitor",
+        "data": {
+            "heart_rate": heart_rate,
+            "blood_pressure_systolic": 120,
+            "blood_pressure_diastolic": 80,
+            "oxygen_saturation": 98,
+            "temperature": 36.8,
+            "respiratory_rate": 16,
+        },
+    }
+
+
+def lab_result(patient_id, value):
+    return {
+        "patient_id": patient_id,
+        "type": "lab_results",
+        "timestamp": datetime.utcnow(),
+        "data": {
+            "test_name": "potassium",
+            "value": value,
+            "unit": "mmol/L",
+            "reference_range": "3.5-5.0",
+        },
+    }
+
+
+def ingest(ingestor, records):
+    async def stream():
+        for record in records:
+            yield record
+
+    return asyncio.run(ingestor.ingest_patient_data(stream()))
+
+
+def published(ingestor, *topics):
+    return [
+        (topic, json.loads(payload))
+        for topic, _, payload in ingestor.kafka_producer.messages
+        if topic in topics
+    ]
+
+
+class TestIngestPatientData:
+    RECORDS = [
+        vital_signs("P1"),
+        lab_result("P2", 6.1),
+        vital_signs("P3", heart_rate=400),
+        vital_signs("P2"),
+        lab_result("P1", 4.2),
+    ]
+
+    def test_records_flow_through_every_stage_in_order(self, ingestor):
+        stats = ingest(ingestor, self.RECORDS)
+        assert [stats[stage]["records"] for stage in PIPELINE_STAGES] == [5, 4, 4, 4]
+        assert stats["validate"]["batches"] >= 3
+        assert all(stats[stage]["busy_seconds"] >= 0 for stage in PIPELINE_STAGES)
+
+        records = published(ingestor, "hms_vital_signs", "hms_lab_results")
+        assert [(topic, data["patient_id"]) for topic, data in records] == [
+            ("hms_vital_signs", "P1"),
+            ("hms_lab_results", "P2"),
+            ("hms_vital_signs", "P2"),
+            ("hms_lab_results", "P1"),
+        ]
+        lab = records[1][1]
+        assert lab["data"]["is_abnormal"] is True
+        assert "enrichment" in lab
+
+        # Persisted to the Redis cache before being published
+        latest = ingestor.redis_client.get("latest_vital_signs:P1")
+        assert json.loads(latest)["data"]["heart_rate"] == 80
+        assert ingestor.redis_client.zcard("patient_timeline:P2") == 2
+
+    def test_invalid_record_is_routed_to_the_error_topic(self, ingestor):
+        ingest(ingestor, self.RECORDS)
+        errors = published(ingestor, "hms_ingestion_errors")
+        assert len(errors) == 1
+        assert errors[0][1]["original_data"]["patient_id"] == "P3"
+        assert "heart_rate" in errors[0][1]["error"]
+        assert ingestor.kafka_producer.sent["hms_vital_signs"] == 2
+
+    def test_failed_stage_routes_its_batch_to_the_error_topic(
+        self, ingestor, monkeypatch
+    ):
+        def unavailable(records):
+            raise ConnectionError("redis unavailable")
+
+        monkeypatch.setattr(ingestor, "_persist", unavailable)
+        stats = ingest(ingestor, self.RECORDS)
+        assert [stats[stage]["records"] for stage in PIPELINE_STAGES] == [5, 4, 4, 0]
+
+        errors = published(ingestor, "hms_ingestion_errors")
+        assert sorted(data["original_data"]["patient_id"] for _, data in errors) == [
+            "P1",
+            "P1",
+            "P2",
+            "P2",
+            "P3",
+        ]
+        assert published(ingestor, "hms_vital_signs", "hms_lab_results") == []
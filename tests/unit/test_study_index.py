@@ -0,0 +1,211 @@
+"""
+Unit tests for the radiology QIDO-RS study index and thumbnail cache on SQLite
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from services.radiology.app.study_index import (
+    UID_BATCH_SIZE,
+    IndexedQuery,
+    IndexedStudy,
+    StudyIndex,
+    ThumbnailCache,
+    _upsert,
+    create_index_tables,
+    parse_date_range,
+)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'index.db'}")
+    create_index_tables(engine)
+    try:
+        yield sessionmaker(engine, expire_on_commit=False)
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def index(session_factory):
+    return StudyIndex(session_factory, max_age_seconds=300)
+
+
+def study(uid, **fields):
+    return {
+        "study_instance_uid": uid,
+        "patient_id": "PAT1",
+        "patient_name": "DOE^JANE",
+        "study_date": "20240105",
+        "study_time": "080000",
+        "modalities_in_study": ["CT"],
+        **fields,
+    }
+
+
+def uids(studies):
+    return sorted(s["study_instance_uid"] for s in studies)
+
+
+class TestSearchStudies:
+    def test_patient_id_wildcards(self, index):
+        index.index_studies(
+            [
+                study("1", patient_id="PAT1"),
+                study("2", patient_id="PAT10"),
+                study("3", patient_id="XPAT1"),
+                study("4", patient_id="A_1"),
+                study("5", patient_id="AB1"),
+            ]
+        )
+        assert uids(index.search_studies(patient_id="PAT*")) == ["1", "2"]
+        assert uids(index.search_studies(patient_id="PAT?")) == ["1"]
+        assert uids(index.search_studies(patient_id="PAT1")) == ["1"]
+        # LIKE metacharacters in the value are literal
+        assert uids(index.search_studies(patient_id="A_?")) == ["4"]
+
+    def test_patient_name_is_case_insensitive(self, index):
+        index.index_studies(
+            [study("1", patient_name="SMITH^JOHN"), study("2", patient_name="DOE")]
+        )
+        assert uids(index.search_studies(patient_name="smith*")) == ["1"]
+
+    def test_date_range_bounds_are_inclusive(self, index):
+        index.index_studies(
+            [study(str(day), study_date=f"202401{day:02d}") for day in range(1, 6)]
+        )
+        date_from, date_to = parse_date_range("20240102-20240104")
+        found = index.search_studies(date_from=date_from, date_to=date_to)
+        assert uids(found) == ["2", "3", "4"]
+        assert uids(index.search_studies(date_from="20240104")) == ["4", "5"]
+        assert [s["study_date"] for s in index.search_studies()] == [
+            f"202401{day:02d}" for day in range(5, 0, -1)
+        ]
+
+    def test_modality_filter_uses_every_modality_in_study(self, index):
+        index.index_studies(
+            [
+                study("1", modalities_in_study=["CT", "SR"]),
+                study("2", modalities_in_study=["MR"]),
+            ]
+        )
+        assert uids(index.search_studies(modality="SR")) == ["1"]
+        assert uids(index.search_studies(modality="MR")) == ["2"]
+
+    def test_limit_none_returns_every_match(self, index):
+        index.index_studies([study(f"{i:03d}") for i in range(150)])
+        assert len(index.search_studies()) == 100
+        assert len(index.search_studies(limit=None)) == 150
+        assert len(index.search_studies(limit=None, offset=140)) == 10
+
+
+class TestParseDateRange:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            (None, (None, None)),
+            ("20240105", ("20240105", "20240105")),
+            ("20240101-20240131", ("20240101", "20240131")),
+            ("20240101-", ("20240101", None)),
+            ("-20240131", (None, "20240131")),
+        ],
+    )
+    def test_forms(self, value, expected):
+        assert parse_date_range(value) == expected
+
+
+class TestCoverage:
+    def test_only_queried_keys_are_covered(self, index):
+        key = StudyIndex.query_key("studies", "PAT1", None)
+        assert not index.is_covered(key)
+        index.index_studies([study("1")], query_key=key)
+        assert index.is_covered(key)
+        assert not index.is_covered(key, StudyIndex.query_key("studies", "PAT2"))
+        assert not index.is_covered()
+
+    def test_ingested_rows_do_not_cover_a_query(self, index):
+        index.index_studies([study("1")])
+        assert not index.is_covered(StudyIndex.query_key("studies", "PAT1", None))
+
+    def test_coverage_expires_after_max_age(self, index, session_factory):
+        key = StudyIndex.query_key("studies", "PAT1", None)
+        index.index_studies([study("1")], query_key=key)
+        with session_factory() as db:
+            db.get(IndexedQuery, key).queried_at = datetime.utcnow() - timedelta(
+                seconds=301
+            )
+            db.commit()
+        assert not index.is_covered(key)
+        index.index_studies([study("1")], query_key=key)
+        assert index.is_covered(key)
+
+
+class TestUpsert:
+    def test_inserts_and_updates_across_batches(self, session_factory):
+        total = UID_BATCH_SIZE + 20
+        with session_factory() as db:
+            _upsert(
+                db,
+                IndexedStudy,
+                "study_instance_uid",
+                [study(str(i)) for i in range(0, total, 2)],
+            )
+            db.commit()
+        with session_factory() as db:
+            _upsert(
+                db,
+                IndexedStudy,
+                "study_instance_uid",
+                [study(str(i), patient_id="PAT2", unknown="x") for i in range(total)]
+                + [study("", patient_id="PAT3")],
+            )
+            db.commit()
+            rows = db.query(IndexedStudy).all()
+        assert len(rows) == total
+        assert {row.patient_id for row in rows} == {"PAT2"}
+
+    def test_later_duplicate_row_wins(self, session_factory):
+        with session_factory() as db:
+            _upsert(
+                db,
+                IndexedStudy,
+                "study_instance_uid",
+                [study("1", patient_name="OLD"), study("1", patient_name="NEW")],
+            )
+            db.commit()
+            assert db.get(IndexedStudy, "1").patient_name == "NEW"
+
+
+class TestThumbnailCache:
+    def test_least_recently_used_is_evicted(self):
+        cache = ThumbnailCache(max_items=2)
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        assert cache.get("a") == b"1"
+        cache.put("c", b"3")
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (b"1", b"3")
+        assert cache.get_stats() == {"cached": 2, "hits": 3, "misses": 1}
+
+    def test_disk_backs_evicted_entries(self, tmp_path):
+        cache = ThumbnailCache(str(tmp_path / "thumbs"), max_items=1)
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        assert cache.get("a") == b"1"
+        assert ThumbnailCache(str(tmp_path / "thumbs")).get("b") == b"2"
+
+
+class TestQueryStudiesReadThrough:
+    def test_index_hit_is_not_truncated(self, index):
+        pacs_service = pytest.importorskip("services.radiology.app.pacs_service")
+        key = StudyIndex.query_key("studies", "PAT1", None)
+        index.index_studies([study(f"{i:03d}") for i in range(150)], query_key=key)
+        service = pacs_service.PACSService(study_index=index)
+        studies = asyncio.run(service.query_studies("PAT1"))
+        assert len(studies) == 150
+        assert {s.study_status for s in studies} == {"INDEXED"}